@@ -4,11 +4,10 @@ Handles Chart of Accounts, Journal Entries, Fiscal Periods, and Financial Report
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func, and_, or_, desc
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app.database import get_db
 from app.models import (
@@ -31,27 +30,17 @@ from app.schemas import (
     BalanceSheetReport, BSSection, BSLineItem,
     BalanceSheetDiagnostic, UnbalancedJournalEntry, AccountBalanceIssue
 )
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
+from app.services.journal_posting import upsert_account_balances, generate_entry_number
+from app.services.sequences import next_number, max_suffix
+from app.services.ledger_balances import (
+    refresh_period_balances, recompute_balances, account_balances_as_of, account_activity, descendant_account_ids
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get current authenticated user from JWT token"""
-    token = credentials.credentials
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-
-    return user
 
 
 def get_company_id(user: User, db: Session) -> int:
@@ -61,29 +50,6 @@ def get_company_id(user: User, db: Session) -> int:
     return user.company_id
 
 
-def generate_entry_number(db: Session, company_id: int) -> str:
-    """Generate unique journal entry number for a company"""
-    year = datetime.now().year
-    prefix = f"JE-{year}-"
-
-    # Get last entry number for this year
-    last_entry = db.query(JournalEntry).filter(
-        JournalEntry.company_id == company_id,
-        JournalEntry.entry_number.like(f"{prefix}%")
-    ).order_by(desc(JournalEntry.entry_number)).first()
-
-    if last_entry:
-        try:
-            last_num = int(last_entry.entry_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:06d}"
-
-
 # ============================================================================
 # Account Types Endpoints
 # ============================================================================
@@ -447,10 +413,17 @@ def close_fiscal_period(
     period.status = "closed"
     period.closed_at = datetime.utcnow()
     period.closed_by = current_user.id
+    db.flush()
+
+    # Materialize the period's balances for reports (rolls opening balances forward)
+    balance_rows = refresh_period_balances(db, company_id, period)
 
     db.commit()
 
-    return {"message": f"Period '{period.period_name}' closed successfully"}
+    return {
+        "message": f"Period '{period.period_name}' closed successfully",
+        "balance_rows": balance_rows
+    }
 
 
 # ============================================================================
@@ -794,7 +767,7 @@ def reverse_journal_entry(
     # Create reversed lines (swap debit/credit)
     for orig_line in original.lines:
         rev_line = JournalEntryLine(
-            journal_entry_id=reversal.id,
+            journal_entry=reversal,
             account_id=orig_line.account_id,
             debit=orig_line.credit,  # Swap
             credit=orig_line.debit,  # Swap
@@ -862,19 +835,10 @@ def reverse_journal_entry(
                         # Create ItemLedger reversal entry
                         today = datetime.now().strftime("%Y%m%d")
                         tx_prefix = f"JE-REV-{today}-"
-                        last_tx = db.query(ItemLedger).filter(
-                            ItemLedger.company_id == company_id,
-                            ItemLedger.transaction_number.like(f"{tx_prefix}%")
-                        ).order_by(ItemLedger.id.desc()).first()
-
-                        next_num = 1
-                        if last_tx:
-                            try:
-                                next_num = int(last_tx.transaction_number.split("-")[-1]) + 1
-                            except:
-                                pass
-
-                        tx_number = f"{tx_prefix}{next_num:05d}"
+                        tx_number = next_number(
+                            db, company_id, tx_prefix, width=5,
+                            seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, company_id, tx_prefix)
+                        )
 
                         unit_cost = float(grn_line.unit_price or 0)
                         total_cost = unit_cost * qty_to_reverse
@@ -937,54 +901,7 @@ def reverse_journal_entry(
 
 def update_account_balances(db: Session, entry: JournalEntry):
     """Update account balances when an entry is posted"""
-    if not entry.fiscal_period_id:
-        return
-
-    for line in entry.lines:
-        # Get or create balance record (now including business_unit_id)
-        balance = db.query(AccountBalance).filter(
-            AccountBalance.company_id == entry.company_id,
-            AccountBalance.account_id == line.account_id,
-            AccountBalance.fiscal_period_id == entry.fiscal_period_id,
-            AccountBalance.site_id == line.site_id,
-            AccountBalance.business_unit_id == line.business_unit_id
-        ).first()
-
-        if not balance:
-            balance = AccountBalance(
-                company_id=entry.company_id,
-                account_id=line.account_id,
-                fiscal_period_id=entry.fiscal_period_id,
-                site_id=line.site_id,
-                business_unit_id=line.business_unit_id,
-                period_debit=0,
-                period_credit=0,
-                opening_balance=0,
-                closing_balance=0
-            )
-            db.add(balance)
-
-        balance.period_debit = float(Decimal(str(balance.period_debit)) + Decimal(str(line.debit)))
-        balance.period_credit = float(Decimal(str(balance.period_credit)) + Decimal(str(line.credit)))
-
-        # Get account's normal balance
-        account = db.query(Account).options(
-            joinedload(Account.account_type)
-        ).filter(Account.id == line.account_id).first()
-
-        if account and account.account_type:
-            if account.account_type.normal_balance == "debit":
-                balance.closing_balance = float(
-                    Decimal(str(balance.opening_balance)) +
-                    Decimal(str(balance.period_debit)) -
-                    Decimal(str(balance.period_credit))
-                )
-            else:
-                balance.closing_balance = float(
-                    Decimal(str(balance.opening_balance)) +
-                    Decimal(str(balance.period_credit)) -
-                    Decimal(str(balance.period_debit))
-                )
+    upsert_account_balances(db, entry)
 
 
 # ============================================================================
@@ -1186,77 +1103,35 @@ def get_trial_balance(
     """Get trial balance as of a specific date, optionally filtered by site or business unit"""
     company_id = get_company_id(current_user, db)
 
-    # Get all accounts with their balances
-    # Create a subquery to sum journal entry lines from posted entries up to as_of_date
-    line_sums = db.query(
-        JournalEntryLine.account_id,
-        JournalEntryLine.site_id,
-        JournalEntryLine.business_unit_id,
-        func.sum(JournalEntryLine.debit).label('total_debit'),
-        func.sum(JournalEntryLine.credit).label('total_credit')
-    ).join(
-        JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id
-    ).filter(
-        JournalEntry.company_id == company_id,
-        JournalEntry.status == "posted",
-        JournalEntry.entry_date <= as_of_date
+    # Net debit per account up to as_of_date (closed-period balances + open tail lines)
+    balances = account_balances_as_of(
+        db, company_id, as_of_date, site_id=site_id, business_unit_id=business_unit_id
     )
 
-    # Apply site/business unit filters if specified
-    if site_id:
-        line_sums = line_sums.filter(JournalEntryLine.site_id == site_id)
-
-    if business_unit_id:
-        line_sums = line_sums.filter(JournalEntryLine.business_unit_id == business_unit_id)
-
-    line_sums = line_sums.group_by(
-        JournalEntryLine.account_id,
-        JournalEntryLine.site_id,
-        JournalEntryLine.business_unit_id
-    ).subquery()
-
-    # Aggregate all lines per account (across all sites/BUs unless filtered)
-    account_totals = db.query(
-        line_sums.c.account_id,
-        func.sum(line_sums.c.total_debit).label('total_debit'),
-        func.sum(line_sums.c.total_credit).label('total_credit')
-    ).group_by(line_sums.c.account_id).subquery()
-
-    # Join with accounts to get account details
-    query = db.query(
+    results = db.query(
         Account.id,
         Account.code,
         Account.name,
         AccountType.code.label('type_code'),
-        AccountType.normal_balance,
-        func.coalesce(account_totals.c.total_debit, 0).label('total_debit'),
-        func.coalesce(account_totals.c.total_credit, 0).label('total_credit')
+        AccountType.normal_balance
     ).join(
         AccountType, Account.account_type_id == AccountType.id
-    ).outerjoin(
-        account_totals, Account.id == account_totals.c.account_id
     ).filter(
         Account.company_id == company_id,
         Account.is_active == True,
         Account.is_header == False
-    )
-
-    # No need for group_by since we're using subquery aggregation
-    query = query.order_by(Account.code)
-
-    results = query.all()
+    ).order_by(Account.code).all()
 
     rows = []
     total_debit = 0
     total_credit = 0
 
     for row in results:
-        debit = float(row.total_debit)
-        credit = float(row.total_credit)
+        net_debit = float(balances.get(row.id, 0))
 
         # Calculate balance based on normal balance
         if row.normal_balance == "debit":
-            balance = debit - credit
+            balance = net_debit
             if balance >= 0:
                 row_debit = balance
                 row_credit = 0
@@ -1264,7 +1139,7 @@ def get_trial_balance(
                 row_debit = 0
                 row_credit = abs(balance)
         else:
-            balance = credit - debit
+            balance = -net_debit
             if balance >= 0:
                 row_debit = 0
                 row_credit = balance
@@ -1308,144 +1183,76 @@ def get_trial_balance(
 
 @router.post("/reports/recompute-balances")
 def recompute_account_balances(
-    year: int,
+    year: Optional[int] = None,
     month: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Recompute account balances from journal entries for a specific period.
+    Recompute account balances from journal entries.
 
-    This endpoint recalculates all account balances from the underlying
-    journal entry lines for the specified year (and optionally month).
-    Use this to fix any discrepancies in the AccountBalance table.
+    This endpoint rebuilds the AccountBalance rows of every fiscal period in
+    the range from the underlying journal entry lines, one set-based
+    INSERT ... SELECT per period, rolling opening balances forward period by
+    period. Use this to fix any discrepancies in the AccountBalance table
+    after data corrections (`python manage.py recompute-balances` runs the
+    same rebuild outside the API).
 
     Parameters:
-    - year: The fiscal year to recompute (e.g., 2025)
-    - month: Optional month (1-12). If not provided, recomputes entire year.
+    - year: Optional fiscal year to recompute (e.g., 2025). If not provided, recomputes all periods.
+    - month: Optional month (1-12). If not provided, recomputes the entire year.
 
     Returns:
-    - Summary of accounts updated with their new balances
+    - Summary of the periods rebuilt, rows written and throughput
     """
     company_id = get_company_id(current_user, db)
 
     # Validate month if provided
     if month is not None and (month < 1 or month > 12):
         raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
+    if month is not None and year is None:
+        raise HTTPException(status_code=400, detail="Month requires a year")
 
     # Calculate date range
-    if month:
+    start_date = end_date = None
+    if year and month:
         start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1)
-        else:
-            end_date = date(year, month + 1, 1)
-    else:
+        end_date = (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)) - timedelta(days=1)
+    elif year:
         start_date = date(year, 1, 1)
-        end_date = date(year + 1, 1, 1)
-
-    # Get the fiscal period for this date range (if it exists)
-    fiscal_period = db.query(FiscalPeriod).filter(
-        FiscalPeriod.company_id == company_id,
-        FiscalPeriod.start_date <= start_date,
-        FiscalPeriod.end_date >= start_date
-    ).first()
-
-    # Clear existing account balances for this period
-    if fiscal_period:
-        deleted = db.query(AccountBalance).filter(
-            AccountBalance.company_id == company_id,
-            AccountBalance.fiscal_period_id == fiscal_period.id
-        ).delete()
-        logger.info(f"Deleted {deleted} existing AccountBalance records for period {fiscal_period.id}")
-
-    # Query all journal entry lines within the date range
-    query = db.query(
-        JournalEntryLine.account_id,
-        JournalEntryLine.site_id,
-        JournalEntryLine.business_unit_id,
-        func.sum(JournalEntryLine.debit).label('total_debit'),
-        func.sum(JournalEntryLine.credit).label('total_credit')
-    ).join(
-        JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id
-    ).filter(
-        JournalEntry.company_id == company_id,
-        JournalEntry.status == "posted",
-        JournalEntry.entry_date >= start_date,
-        JournalEntry.entry_date < end_date
-    ).group_by(
-        JournalEntryLine.account_id,
-        JournalEntryLine.site_id,
-        JournalEntryLine.business_unit_id
-    )
-
-    results = query.all()
-
-    accounts_updated = []
-    total_entries_created = 0
-
-    for row in results:
-        # Get account details for normal balance
-        account = db.query(Account).options(
-            joinedload(Account.account_type)
-        ).filter(Account.id == row.account_id).first()
-
-        if not account:
-            continue
-
-        period_debit = float(row.total_debit or 0)
-        period_credit = float(row.total_credit or 0)
-
-        # Calculate closing balance based on normal balance
-        if account.account_type and account.account_type.normal_balance == "debit":
-            closing_balance = period_debit - period_credit
-        else:
-            closing_balance = period_credit - period_debit
-
-        # Create or update AccountBalance record if fiscal period exists
-        if fiscal_period:
-            balance = AccountBalance(
-                company_id=company_id,
-                account_id=row.account_id,
-                fiscal_period_id=fiscal_period.id,
-                site_id=row.site_id,
-                business_unit_id=row.business_unit_id,
-                period_debit=period_debit,
-                period_credit=period_credit,
-                opening_balance=0,  # Would need prior period logic
-                closing_balance=closing_balance
-            )
-            db.add(balance)
-            total_entries_created += 1
-
-        accounts_updated.append({
-            "account_code": account.code,
-            "account_name": account.name,
-            "site_id": row.site_id,
-            "business_unit_id": row.business_unit_id,
-            "period_debit": period_debit,
-            "period_credit": period_credit,
-            "closing_balance": closing_balance
-        })
+        end_date = date(year, 12, 31)
 
+    result = recompute_balances(db, company_id, start_date, end_date)
     db.commit()
 
-    # Calculate totals for verification
-    total_debit = sum(a["period_debit"] for a in accounts_updated)
-    total_credit = sum(a["period_credit"] for a in accounts_updated)
+    period_str = (f"{year}-{month:02d}" if month else str(year)) if year else "all periods"
 
-    period_str = f"{year}-{month:02d}" if month else str(year)
+    # Totals of the rebuilt rows for verification
+    period_ids = [period["fiscal_period_id"] for period in result["periods"]]
+    totals = db.query(
+        func.count(func.distinct(AccountBalance.account_id)),
+        func.coalesce(func.sum(AccountBalance.period_debit), 0),
+        func.coalesce(func.sum(AccountBalance.period_credit), 0)
+    ).filter(
+        AccountBalance.company_id == company_id,
+        AccountBalance.fiscal_period_id.in_(period_ids)
+    ).one()
+    total_debit = float(totals[1])
+    total_credit = float(totals[2])
 
     return {
         "message": f"Recomputed account balances for {period_str}",
         "period": period_str,
-        "fiscal_period_id": fiscal_period.id if fiscal_period else None,
-        "accounts_processed": len(accounts_updated),
-        "balance_entries_created": total_entries_created,
+        "fiscal_period_id": period_ids[0] if len(period_ids) == 1 else None,
+        "periods": result["periods"],
+        "accounts_processed": totals[0],
+        "balance_entries_created": result["rows_written"],
+        "later_periods_invalidated": result["later_periods_invalidated"],
+        "elapsed_seconds": result["elapsed_seconds"],
+        "rows_per_second": result["rows_per_second"],
         "total_debit": total_debit,
         "total_credit": total_credit,
-        "is_balanced": abs(total_debit - total_credit) < 0.01,
-        "accounts": accounts_updated
+        "is_balanced": abs(total_debit - total_credit) < 0.01
     }
 
 
@@ -1474,108 +1281,36 @@ def get_profit_loss(
     if not revenue_type_id or not expense_type_id:
         raise HTTPException(status_code=400, detail="Chart of accounts not properly initialized")
 
-    # Helper to get account balances by type
-    def get_account_balances(account_type_id: int, parent_codes: list = None):
-        query = db.query(
-            Account.id,
-            Account.code,
-            Account.name,
-            Account.parent_id,
-            func.coalesce(func.sum(JournalEntryLine.debit), 0).label('total_debit'),
-            func.coalesce(func.sum(JournalEntryLine.credit), 0).label('total_credit')
-        ).outerjoin(
-            JournalEntryLine, Account.id == JournalEntryLine.account_id
-        ).outerjoin(
-            JournalEntry, and_(
-                JournalEntryLine.journal_entry_id == JournalEntry.id,
-                JournalEntry.status == "posted",
-                JournalEntry.entry_date >= start_date,
-                JournalEntry.entry_date <= end_date
-            )
-        ).filter(
+    # Net debit per account over the range (closed-period balances + open tail lines)
+    activity = account_activity(
+        db, company_id, start_date, end_date,
+        site_id=site_id, business_unit_id=business_unit_id, include_unassigned=True
+    )
+
+    def get_posting_accounts(*filters):
+        """Active non-header accounts matching the filters, ordered by code"""
+        return db.query(Account.id, Account.code, Account.name).filter(
             Account.company_id == company_id,
-            Account.account_type_id == account_type_id,
             Account.is_active == True,
-            Account.is_header == False
-        )
-
-        if site_id:
-            query = query.filter(
-                or_(
-                    JournalEntryLine.site_id == site_id,
-                    JournalEntryLine.site_id == None
-                )
-            )
-
-        if business_unit_id:
-            query = query.filter(
-                or_(
-                    JournalEntryLine.business_unit_id == business_unit_id,
-                    JournalEntryLine.business_unit_id == None
-                )
-            )
-
-        # Filter by parent codes if specified (for expense subcategories)
-        if parent_codes:
-            parent_accounts = db.query(Account.id).filter(
-                Account.company_id == company_id,
-                Account.code.in_(parent_codes)
-            ).all()
-            parent_ids = [p.id for p in parent_accounts]
-            if parent_ids:
-                query = query.filter(Account.parent_id.in_(parent_ids))
-
-        query = query.group_by(
-            Account.id, Account.code, Account.name, Account.parent_id
-        ).order_by(Account.code)
-
-        return query.all()
-
-    # Helper function to get all descendant account IDs recursively
-    def get_descendant_ids(parent_id: int, include_parent: bool = False) -> list:
-        """Get all descendant account IDs under a parent account"""
-        if not parent_id:
-            return []
-
-        descendant_ids = [parent_id] if include_parent else []
+            Account.is_header == False,
+            *filters
+        ).order_by(Account.code).all()
 
-        # Get direct children
-        children = db.query(Account.id).filter(
+    # Get parent accounts for categorization
+    parent_ids = {
+        row.code: row.id for row in db.query(Account.id, Account.code).filter(
             Account.company_id == company_id,
-            Account.parent_id == parent_id
-        ).all()
-
-        for child in children:
-            descendant_ids.append(child.id)
-            # Recursively get grandchildren
-            descendant_ids.extend(get_descendant_ids(child.id, include_parent=False))
-
-        return descendant_ids
-
-    # Get parent account codes for categorization
-    direct_cost_parent = db.query(Account).filter(
-        Account.company_id == company_id,
-        Account.code == "5100"  # Direct Costs header
-    ).first()
-
-    operating_exp_parent = db.query(Account).filter(
-        Account.company_id == company_id,
-        Account.code == "5200"  # Operating Expenses header
-    ).first()
-
-    admin_exp_parent = db.query(Account).filter(
-        Account.company_id == company_id,
-        Account.code == "5300"  # Administrative Expenses header
-    ).first()
+            Account.code.in_(["5100", "5200", "5300"])  # Direct Costs, Operating and Administrative Expenses headers
+        )
+    }
 
     # Get Revenue accounts
-    revenue_results = get_account_balances(revenue_type_id)
     revenue_items = []
     total_revenue = 0.0
 
-    for row in revenue_results:
+    for row in get_posting_accounts(Account.account_type_id == revenue_type_id):
         # Revenue has credit normal balance, so amount = credit - debit
-        amount = float(row.total_credit) - float(row.total_debit)
+        amount = -float(activity.get(row.id, 0))
         if amount != 0:
             revenue_items.append(PLLineItem(
                 account_id=row.id,
@@ -1591,138 +1326,38 @@ def get_profit_loss(
         if total_revenue > 0:
             item.percentage = round((item.amount / total_revenue) * 100, 2)
 
-    # Get Direct Cost / Cost of Sales accounts (parent code 5100)
-    cost_items = []
-    total_cost_of_sales = 0.0
-
-    if direct_cost_parent:
-        # Get all descendant account IDs under 5100 (Cost of Services)
-        cost_account_ids = get_descendant_ids(direct_cost_parent.id)
-
-        cost_query = db.query(
-            Account.id,
-            Account.code,
-            Account.name,
-            func.coalesce(func.sum(JournalEntryLine.debit), 0).label('total_debit'),
-            func.coalesce(func.sum(JournalEntryLine.credit), 0).label('total_credit')
-        ).outerjoin(
-            JournalEntryLine, Account.id == JournalEntryLine.account_id
-        ).outerjoin(
-            JournalEntry, and_(
-                JournalEntryLine.journal_entry_id == JournalEntry.id,
-                JournalEntry.status == "posted",
-                JournalEntry.entry_date >= start_date,
-                JournalEntry.entry_date <= end_date
-            )
-        ).filter(
-            Account.company_id == company_id,
-            Account.id.in_(cost_account_ids) if cost_account_ids else Account.parent_id == direct_cost_parent.id,
-            Account.is_active == True,
-            Account.is_header == False
+    def expense_items(parent_codes: list) -> tuple:
+        """Line items and total of the accounts under the given headers"""
+        account_ids = descendant_account_ids(
+            db, company_id, [parent_ids[code] for code in parent_codes if code in parent_ids]
         )
-
-        if site_id:
-            cost_query = cost_query.filter(
-                or_(
-                    JournalEntryLine.site_id == site_id,
-                    JournalEntryLine.site_id == None
-                )
-            )
-
-        if business_unit_id:
-            cost_query = cost_query.filter(
-                or_(
-                    JournalEntryLine.business_unit_id == business_unit_id,
-                    JournalEntryLine.business_unit_id == None
-                )
-            )
-
-        cost_results = cost_query.group_by(
-            Account.id, Account.code, Account.name
-        ).order_by(Account.code).all()
-
-        for row in cost_results:
+        items = []
+        total = 0.0
+        if not account_ids:
+            return items, total
+        for row in get_posting_accounts(Account.id.in_(account_ids)):
             # Expenses have debit normal balance, so amount = debit - credit
-            amount = float(row.total_debit) - float(row.total_credit)
+            amount = float(activity.get(row.id, 0))
             if amount != 0:
-                cost_items.append(PLLineItem(
+                items.append(PLLineItem(
                     account_id=row.id,
                     account_code=row.code,
                     account_name=row.name,
                     amount=amount,
                     percentage=round((amount / total_revenue) * 100, 2) if total_revenue > 0 else 0.0
                 ))
-                total_cost_of_sales += amount
+                total += amount
+        return items, total
+
+    # Get Direct Cost / Cost of Sales accounts (all accounts under 5100)
+    cost_items, total_cost_of_sales = expense_items(["5100"])
 
     # Calculate Gross Profit
     gross_profit = total_revenue - total_cost_of_sales
     gross_profit_margin = round((gross_profit / total_revenue) * 100, 2) if total_revenue > 0 else 0.0
 
-    # Get Operating Expenses (parent codes 5200 and 5300)
-    operating_items = []
-    total_operating_expenses = 0.0
-
-    # Get all descendant IDs for operating and administrative expenses
-    opex_account_ids = []
-    if operating_exp_parent:
-        opex_account_ids.extend(get_descendant_ids(operating_exp_parent.id))
-    if admin_exp_parent:
-        opex_account_ids.extend(get_descendant_ids(admin_exp_parent.id))
-
-    if opex_account_ids:
-        opex_query = db.query(
-            Account.id,
-            Account.code,
-            Account.name,
-            func.coalesce(func.sum(JournalEntryLine.debit), 0).label('total_debit'),
-            func.coalesce(func.sum(JournalEntryLine.credit), 0).label('total_credit')
-        ).outerjoin(
-            JournalEntryLine, Account.id == JournalEntryLine.account_id
-        ).outerjoin(
-            JournalEntry, and_(
-                JournalEntryLine.journal_entry_id == JournalEntry.id,
-                JournalEntry.status == "posted",
-                JournalEntry.entry_date >= start_date,
-                JournalEntry.entry_date <= end_date
-            )
-        ).filter(
-            Account.company_id == company_id,
-            Account.id.in_(opex_account_ids),
-            Account.is_active == True,
-            Account.is_header == False
-        )
-
-        if site_id:
-            opex_query = opex_query.filter(
-                or_(
-                    JournalEntryLine.site_id == site_id,
-                    JournalEntryLine.site_id == None
-                )
-            )
-
-        if business_unit_id:
-            opex_query = opex_query.filter(
-                or_(
-                    JournalEntryLine.business_unit_id == business_unit_id,
-                    JournalEntryLine.business_unit_id == None
-                )
-            )
-
-        opex_results = opex_query.group_by(
-            Account.id, Account.code, Account.name
-        ).order_by(Account.code).all()
-
-        for row in opex_results:
-            amount = float(row.total_debit) - float(row.total_credit)
-            if amount != 0:
-                operating_items.append(PLLineItem(
-                    account_id=row.id,
-                    account_code=row.code,
-                    account_name=row.name,
-                    amount=amount,
-                    percentage=round((amount / total_revenue) * 100, 2) if total_revenue > 0 else 0.0
-                ))
-                total_operating_expenses += amount
+    # Get Operating Expenses (all accounts under 5200 and 5300)
+    operating_items, total_operating_expenses = expense_items(["5200", "5300"])
 
     # Calculate Net Income
     net_income = gross_profit - total_operating_expenses
@@ -1799,90 +1434,51 @@ def get_balance_sheet(
     if not all([asset_type_id, liability_type_id, equity_type_id]):
         raise HTTPException(status_code=400, detail="Chart of accounts not properly initialized")
 
-    # Helper function to get all descendant account IDs under a parent account (recursive)
-    def get_descendant_ids(parent_id: int) -> list:
-        """Get all descendant account IDs under a parent account"""
-        if not parent_id:
-            return []
-        descendant_ids = []
-        children = db.query(Account.id).filter(
-            Account.company_id == company_id,
-            Account.parent_id == parent_id
-        ).all()
-        for child in children:
-            descendant_ids.append(child.id)
-            descendant_ids.extend(get_descendant_ids(child.id))
-        return descendant_ids
+    # Net debit per account up to as_of_date (closed-period balances + open tail lines)
+    balances = account_balances_as_of(
+        db, company_id, as_of_date,
+        site_id=site_id, business_unit_id=business_unit_id, include_unassigned=True
+    )
 
-    # Helper to get account balances
+    # Helper to get the accounts of a type under a header account
     def get_account_balances(account_type_id: int, parent_code: str = None):
-        query = db.query(
-            Account.id,
-            Account.code,
-            Account.name,
-            Account.parent_id,
-            AccountType.normal_balance,
-            func.coalesce(func.sum(JournalEntryLine.debit), 0).label('total_debit'),
-            func.coalesce(func.sum(JournalEntryLine.credit), 0).label('total_credit')
-        ).join(
-            AccountType, Account.account_type_id == AccountType.id
-        ).outerjoin(
-            JournalEntryLine, Account.id == JournalEntryLine.account_id
-        ).outerjoin(
-            JournalEntry, and_(
-                JournalEntryLine.journal_entry_id == JournalEntry.id,
-                JournalEntry.status == "posted",
-                JournalEntry.entry_date <= as_of_date
-            )
-        ).filter(
-            Account.company_id == company_id,
-            Account.account_type_id == account_type_id,
-            Account.is_active == True,
-            Account.is_header == False
-        )
-
-        if site_id:
-            query = query.filter(
-                or_(
-                    JournalEntryLine.site_id == site_id,
-                    JournalEntryLine.site_id == None
-                )
-            )
-
-        if business_unit_id:
-            query = query.filter(
-                or_(
-                    JournalEntryLine.business_unit_id == business_unit_id,
-                    JournalEntryLine.business_unit_id == None
-                )
-            )
+        filters = [Account.account_type_id == account_type_id]
 
         if parent_code:
-            parent = db.query(Account).filter(
+            parent = db.query(Account.id).filter(
                 Account.company_id == company_id,
                 Account.code == parent_code
             ).first()
             if parent:
-                # Get all descendant account IDs under this parent (recursive)
-                descendant_ids = get_descendant_ids(parent.id)
-                if descendant_ids:
-                    query = query.filter(Account.id.in_(descendant_ids))
-                else:
+                # All accounts under this parent, at any depth
+                descendant_ids = descendant_account_ids(db, company_id, [parent.id])
+                if not descendant_ids:
                     # No descendants, return empty result
                     return []
+                filters.append(Account.id.in_(descendant_ids))
 
-        query = query.group_by(
-            Account.id, Account.code, Account.name, Account.parent_id, AccountType.normal_balance
-        ).order_by(Account.code)
-
-        return query.all()
+        return db.query(
+            Account.id,
+            Account.code,
+            Account.name,
+            Account.parent_id,
+            AccountType.normal_balance
+        ).join(
+            AccountType, Account.account_type_id == AccountType.id
+        ).filter(
+            Account.company_id == company_id,
+            Account.is_active == True,
+            Account.is_header == False,
+            *filters
+        ).order_by(Account.code).all()
 
     def calculate_balance(row):
         """Calculate balance based on normal balance type"""
+        net_debit = float(balances.get(row.id, 0))
         if row.normal_balance == "debit":
-            return float(row.total_debit) - float(row.total_credit)
+            return net_debit
         else:
-            return float(row.total_credit) - float(row.total_debit)
+            return -net_debit
 
     # Get Current Assets (parent code 1100)
     current_asset_results = get_account_balances(asset_type_id, "1100")
@@ -1958,75 +1554,22 @@ def get_balance_sheet(
     # Get start of current fiscal year
     current_year_start = date(as_of_date.year, 1, 1)
 
-    # Revenue for current period
-    revenue_query = db.query(
-        func.coalesce(func.sum(JournalEntryLine.credit), 0).label('total_credit'),
-        func.coalesce(func.sum(JournalEntryLine.debit), 0).label('total_debit')
-    ).join(
-        Account, JournalEntryLine.account_id == Account.id
-    ).join(
-        JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id
-    ).filter(
-        Account.company_id == company_id,
-        Account.account_type_id == revenue_type_id,
-        JournalEntry.status == "posted",
-        JournalEntry.entry_date >= current_year_start,
-        JournalEntry.entry_date <= as_of_date
+    # Revenue and expense activity since the start of the year
+    year_opening = account_balances_as_of(
+        db, company_id, current_year_start - timedelta(days=1),
+        site_id=site_id, business_unit_id=business_unit_id, include_unassigned=True
     )
-
-    if site_id:
-        revenue_query = revenue_query.filter(
-            or_(
-                JournalEntryLine.site_id == site_id,
-                JournalEntryLine.site_id == None
-            )
-        )
-
-    if business_unit_id:
-        revenue_query = revenue_query.filter(
-            or_(
-                JournalEntryLine.business_unit_id == business_unit_id,
-                JournalEntryLine.business_unit_id == None
-            )
-        )
-
-    revenue_result = revenue_query.first()
-    total_revenue = float(revenue_result.total_credit or 0) - float(revenue_result.total_debit or 0)
-
-    # Expenses for current period
-    expense_query = db.query(
-        func.coalesce(func.sum(JournalEntryLine.debit), 0).label('total_debit'),
-        func.coalesce(func.sum(JournalEntryLine.credit), 0).label('total_credit')
-    ).join(
-        Account, JournalEntryLine.account_id == Account.id
-    ).join(
-        JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id
-    ).filter(
+    total_revenue = 0.0
+    total_expenses = 0.0
+    for account_id, account_type_id in db.query(Account.id, Account.account_type_id).filter(
         Account.company_id == company_id,
-        Account.account_type_id == expense_type_id,
-        JournalEntry.status == "posted",
-        JournalEntry.entry_date >= current_year_start,
-        JournalEntry.entry_date <= as_of_date
-    )
-
-    if site_id:
-        expense_query = expense_query.filter(
-            or_(
-                JournalEntryLine.site_id == site_id,
-                JournalEntryLine.site_id == None
-            )
-        )
-
-    if business_unit_id:
-        expense_query = expense_query.filter(
-            or_(
-                JournalEntryLine.business_unit_id == business_unit_id,
-                JournalEntryLine.business_unit_id == None
-            )
-        )
-
-    expense_result = expense_query.first()
-    total_expenses = float(expense_result.total_debit or 0) - float(expense_result.total_credit or 0)
+        Account.account_type_id.in_([revenue_type_id, expense_type_id])
+    ):
+        net_debit = float(balances.get(account_id, 0) - year_opening.get(account_id, 0))
+        if account_type_id == revenue_type_id:
+            total_revenue -= net_debit
+        else:
+            total_expenses += net_debit
 
     current_period_earnings = total_revenue - total_expenses
 
@@ -25,6 +25,9 @@ logger = logging.getLogger(__name__)
 from app.database import get_db
 from app.models import AddressBook, AddressBookContact, BusinessUnit, User, Client
 from app.api.auth import get_current_user
+from app.services.sequences import reserve
+from app.services.cache import cache_service
+from app.utils.concurrency import run_async
 from app.schemas import (
     AddressBookCreate, AddressBookUpdate, AddressBookResponse,
     AddressBookBrief, AddressBookWithChildren, AddressBookHierarchy,
@@ -37,6 +40,9 @@ router = APIRouter()
 # Valid search types
 VALID_SEARCH_TYPES = {"V", "C", "CB", "E", "MT"}
 
+# Document sequence of address numbers (plain 8-digit numbers, no prefix)
+ADDRESS_NUMBER_SEQUENCE = "ADDRESS"
+
 # Parent type constraints: child_type -> allowed parent types
 PARENT_TYPE_CONSTRAINTS = {
     "CB": {"C"},  # Client Branch must have Customer parent
@@ -51,9 +57,8 @@ PARENT_TYPE_CONSTRAINTS = {
 # Helper Functions
 # =============================================================================
 
-def generate_next_address_number(db: Session, company_id: int) -> str:
-    """Generate next sequential address number for company (8-digit padded)"""
-    # Find the maximum numeric address number for this company
+def max_address_number(db: Session, company_id: int) -> int:
+    """Highest numeric address number in use by the company (0 if none)"""
     # We need to handle both numeric and non-numeric address numbers
     entries = db.query(AddressBook.address_number).filter(
         AddressBook.company_id == company_id
@@ -69,7 +74,29 @@ def generate_next_address_number(db: Session, company_id: int) -> str:
             # Skip non-numeric address numbers
             pass
 
-    return str(max_num + 1).zfill(8)
+    return max_num
+
+
+def reserve_address_numbers(db: Session, company_id: int, count: int) -> List[str]:
+    """Reserve count consecutive address numbers (8-digit padded) in one round-trip"""
+    last = reserve(
+        db, company_id, ADDRESS_NUMBER_SEQUENCE, count,
+        seed=lambda: max_address_number(db, company_id)
+    )
+    return [str(num).zfill(8) for num in range(last - count + 1, last + 1)]
+
+
+def generate_next_address_number(db: Session, company_id: int) -> str:
+    """Generate next sequential address number for company (8-digit padded)"""
+    while True:
+        address_number = reserve_address_numbers(db, company_id, 1)[0]
+        # Numbers entered by hand are not tracked by the sequence: skip them
+        taken = db.query(AddressBook.id).filter(
+            AddressBook.company_id == company_id,
+            AddressBook.address_number == address_number
+        ).first()
+        if not taken:
+            return address_number
 
 
 def validate_parent_address_book(
@@ -100,6 +127,12 @@ def validate_parent_address_book(
     return parent
 
 
+def invalidate_vendor_lookups(company_id: int, *search_types: str):
+    """Cached document processing results carry the vendor lookup: drop them when a vendor changes"""
+    if 'V' in search_types:
+        run_async(cache_service.invalidate_document_results, company_id)
+
+
 def build_address_book_response(ab: AddressBook) -> dict:
     """Build standardized response dict from AddressBook model"""
     # Calculate totals for salary summary
@@ -267,7 +300,7 @@ def compute_hourly_rate(
 # =============================================================================
 
 @router.post("/address-book", response_model=AddressBookResponse, status_code=status.HTTP_201_CREATED)
-async def create_address_book_entry(
+def create_address_book_entry(
     data: AddressBookCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -448,7 +481,7 @@ async def create_address_book_entry(
 
 
 @router.get("/address-book", response_model=List[AddressBookResponse])
-async def list_address_book_entries(
+def list_address_book_entries(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     search_type: Optional[str] = Query(None, description="Filter by search type: V, C, CB, E, MT"),
@@ -502,7 +535,7 @@ async def list_address_book_entries(
 
 
 @router.get("/address-book/brief", response_model=List[AddressBookBrief])
-async def list_address_book_brief(
+def list_address_book_brief(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     search_type: Optional[str] = Query(None, description="Filter by search type"),
@@ -526,7 +559,7 @@ async def list_address_book_brief(
 
 
 @router.get("/address-book/hierarchy", response_model=AddressBookHierarchy)
-async def get_address_book_hierarchy(
+def get_address_book_hierarchy(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -564,7 +597,7 @@ async def get_address_book_hierarchy(
 # =============================================================================
 
 @router.get("/address-book/vendors", response_model=List[AddressBookResponse])
-async def list_vendors(
+def list_vendors(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     is_active: Optional[bool] = Query(None),
@@ -597,7 +630,7 @@ async def list_vendors(
 
 
 @router.get("/address-book/customers", response_model=List[AddressBookResponse])
-async def list_customers(
+def list_customers(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     is_active: Optional[bool] = Query(None),
@@ -630,7 +663,7 @@ async def list_customers(
 
 
 @router.get("/address-book/branches", response_model=List[AddressBookResponse])
-async def list_branches(
+def list_branches(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     parent_id: Optional[int] = Query(None, description="Filter by parent customer ID"),
@@ -668,7 +701,7 @@ async def list_branches(
 
 
 @router.get("/address-book/employees", response_model=List[AddressBookResponse])
-async def list_employees(
+def list_employees(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     is_active: Optional[bool] = Query(None),
@@ -701,7 +734,7 @@ async def list_employees(
 
 
 @router.get("/address-book/teams", response_model=List[AddressBookResponse])
-async def list_teams(
+def list_teams(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     is_active: Optional[bool] = Query(None),
@@ -739,7 +772,7 @@ async def list_teams(
 # =============================================================================
 
 @router.get("/address-book/{ab_id}", response_model=AddressBookWithChildren)
-async def get_address_book_entry(
+def get_address_book_entry(
     ab_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -770,7 +803,7 @@ async def get_address_book_entry(
 
 
 @router.put("/address-book/{ab_id}", response_model=AddressBookResponse)
-async def update_address_book_entry(
+def update_address_book_entry(
     ab_id: int,
     data: AddressBookUpdate,
     current_user: User = Depends(get_current_user),
@@ -805,6 +838,7 @@ async def update_address_book_entry(
             )
 
     # Update fields
+    previous_search_type = ab.search_type
     update_data = data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(ab, field, value)
@@ -835,12 +869,13 @@ async def update_address_book_entry(
 
     db.commit()
     db.refresh(ab)
+    invalidate_vendor_lookups(current_user.company_id, previous_search_type, ab.search_type)
 
     return build_address_book_response(ab)
 
 
 @router.patch("/address-book/{ab_id}/toggle-status", response_model=AddressBookResponse)
-async def toggle_address_book_status(
+def toggle_address_book_status(
     ab_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -865,12 +900,13 @@ async def toggle_address_book_status(
 
     db.commit()
     db.refresh(ab)
+    invalidate_vendor_lookups(current_user.company_id, ab.search_type)
 
     return build_address_book_response(ab)
 
 
 @router.delete("/address-book/{ab_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_address_book_entry(
+def delete_address_book_entry(
     ab_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -905,6 +941,7 @@ async def delete_address_book_entry(
     ab.updated_at = datetime.utcnow()
 
     db.commit()
+    invalidate_vendor_lookups(current_user.company_id, ab.search_type)
 
 
 # =============================================================================
@@ -912,7 +949,7 @@ async def delete_address_book_entry(
 # =============================================================================
 
 @router.get("/address-book/lookup/by-name", response_model=List[AddressBookBrief])
-async def lookup_by_name(
+def lookup_by_name(
     name: str = Query(..., description="Name to search for"),
     search_type: Optional[str] = Query(None, description="Filter by search type"),
     current_user: User = Depends(get_current_user),
@@ -935,7 +972,7 @@ async def lookup_by_name(
 
 
 @router.get("/address-book/lookup/by-tax-id", response_model=List[AddressBookBrief])
-async def lookup_by_tax_id(
+def lookup_by_tax_id(
     tax_id: str = Query(..., description="Tax ID to search for"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -956,7 +993,7 @@ async def lookup_by_tax_id(
 # =============================================================================
 
 @router.post("/address-book/{ab_id}/contacts", response_model=AddressBookContactSchema, status_code=status.HTTP_201_CREATED)
-async def add_contact(
+def add_contact(
     ab_id: int,
     data: AddressBookContactCreate,
     current_user: User = Depends(get_current_user),
@@ -1008,7 +1045,7 @@ async def add_contact(
 
 
 @router.get("/address-book/{ab_id}/contacts", response_model=List[AddressBookContactSchema])
-async def list_contacts(
+def list_contacts(
     ab_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1035,7 +1072,7 @@ async def list_contacts(
 
 
 @router.put("/address-book/{ab_id}/contacts/{contact_id}", response_model=AddressBookContactSchema)
-async def update_contact(
+def update_contact(
     ab_id: int,
     contact_id: int,
     data: AddressBookContactUpdate,
@@ -1080,7 +1117,7 @@ async def update_contact(
 
 
 @router.delete("/address-book/{ab_id}/contacts/{contact_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_contact(
+def delete_contact(
     ab_id: int,
     contact_id: int,
     current_user: User = Depends(get_current_user),
@@ -1120,7 +1157,7 @@ async def delete_contact(
 # =============================================================================
 
 @router.get("/address-book/{ab_id}/children", response_model=List[AddressBookResponse])
-async def get_children(
+def get_children(
     ab_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
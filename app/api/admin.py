@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
@@ -7,10 +7,10 @@ from typing import List, Optional, Tuple, Dict, Any
 from datetime import datetime
 from decimal import Decimal
 from app.database import get_db
-from app.models import User, InvoiceItem, ItemMaster, Warehouse, ItemStock, ItemLedger, ItemAlias, Company
-from app.utils.security import verify_password, create_access_token, verify_token
+from app.models import User, InvoiceItem, ItemMaster, Warehouse, ItemStock, ItemLedger, ItemAlias
+from app.utils.security import verify_password, create_access_token
+from app.services.auth_context import get_auth_context
 from app.services.journal_posting import JournalPostingService
-import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,51 +22,35 @@ security = HTTPBearer()
 def check_duplicate_invoice(db: Session, invoice_number: str, supplier_name: str = None, company_id: int = None) -> Tuple[bool, Optional[int]]:
     """
     Check if an invoice with the same invoice number already exists for the same company.
+    Uses the indexed normalized invoice number / supplier name columns on processed_images.
     Returns (is_duplicate, existing_image_id)
     """
-    from app.models import ProcessedImage
+    from app.models import ProcessedImage, normalize_duplicate_key
 
-    if not invoice_number or invoice_number.strip() == "":
+    normalized_invoice_number = normalize_duplicate_key(invoice_number)
+    if not normalized_invoice_number:
         return False, None
 
-    # Normalize the invoice number for comparison
-    normalized_invoice_number = invoice_number.strip().upper()
-
-    # Query processed images with structured data, filtered by company if provided
-    query = db.query(ProcessedImage).filter(
-        ProcessedImage.has_structured_data == True,
-        ProcessedImage.structured_data.isnot(None)
+    query = db.query(ProcessedImage.id).filter(
+        ProcessedImage.invoice_number_normalized == normalized_invoice_number,
+        ProcessedImage.has_structured_data == True
     )
 
+    # Optional: also check supplier name for stricter matching - the same number
+    # from a different supplier is a different invoice
+    normalized_supplier_name = normalize_duplicate_key(supplier_name)
+    if normalized_supplier_name:
+        query = query.filter(ProcessedImage.supplier_name_normalized == normalized_supplier_name)
+
     # Filter by company through the user relationship
     if company_id:
         query = query.join(User, ProcessedImage.user_id == User.id).filter(
             User.company_id == company_id
         )
 
-    existing_images = query.all()
-
-    for image in existing_images:
-        try:
-            if image.structured_data:
-                data = json.loads(image.structured_data)
-                existing_invoice_num = data.get("document_info", {}).get("invoice_number", "")
-
-                if existing_invoice_num:
-                    # Normalize for comparison
-                    normalized_existing = existing_invoice_num.strip().upper()
-
-                    if normalized_existing == normalized_invoice_number:
-                        # Optional: also check supplier name if provided for stricter matching
-                        if supplier_name:
-                            existing_supplier = data.get("supplier", {}).get("company_name", "")
-                            if existing_supplier and existing_supplier.strip().upper() == supplier_name.strip().upper():
-                                return True, image.id
-                            # If supplier doesn't match, might be different invoice with same number
-                            continue
-                        return True, image.id
-        except (json.JSONDecodeError, TypeError):
-            continue
+    existing = query.order_by(ProcessedImage.id).first()
+    if existing:
+        return True, existing.id
 
     return False, None
 
@@ -150,10 +134,12 @@ def find_best_match_by_description(
     db: Session,
     company_id: int,
     description: str,
-    min_confidence: float = 0.5
+    min_confidence: float = 0.5,
+    items: Optional[List[Any]] = None
 ) -> Tuple[Optional[Any], float, List[Dict]]:
     """
     Find the best matching item in Item Master by description using fuzzy matching.
+    Pass items (the company's active ItemMaster rows) to skip loading them again.
 
     Returns:
         - matched_item: The best matching ItemMaster or None
@@ -164,10 +150,11 @@ def find_best_match_by_description(
         return None, 0.0, []
 
     # Get all active items for the company
-    items = db.query(ItemMaster).filter(
-        ItemMaster.company_id == company_id,
-        ItemMaster.is_active == True
-    ).all()
+    if items is None:
+        items = db.query(ItemMaster).filter(
+            ItemMaster.company_id == company_id,
+            ItemMaster.is_active == True
+        ).all()
 
     if not items:
         return None, 0.0, []
@@ -217,12 +204,50 @@ def find_best_match_by_description(
         return None, best_match["confidence"], suggestions
 
 
+class ItemLookupCache:
+    """
+    A company's active Item Master rows and aliases, indexed for line item matching.
+
+    Bulk uploads build one per batch and pass it to process_invoice_line_items,
+    so matching all line items costs two queries instead of up to three per
+    line plus a full Item Master load for every fuzzy match.
+    """
+
+    def __init__(self, db: Session, company_id: int):
+        self.items = db.query(ItemMaster).filter(
+            ItemMaster.company_id == company_id,
+            ItemMaster.is_active == True
+        ).all()
+
+        items_by_id = {}
+        self.by_item_number = {}
+        self.by_short_item_no = {}
+        for item in self.items:
+            items_by_id[item.id] = item
+            if item.item_number:
+                self.by_item_number.setdefault(item.item_number.upper(), item)
+            if item.short_item_no is not None:
+                self.by_short_item_no.setdefault(item.short_item_no, item)
+
+        self.by_alias = {}
+        aliases = db.query(ItemAlias).filter(
+            ItemAlias.company_id == company_id,
+            ItemAlias.is_active == True
+        ).all()
+        for alias in aliases:
+            item = items_by_id.get(alias.item_id)
+            if item and alias.alias_code:
+                self.by_alias.setdefault(alias.alias_code.upper(), item)
+
+
 def process_invoice_line_items(
     db: Session,
     invoice_id: int,
     structured_data: dict,
     company_id: int,
-    user_id: int
+    user_id: int,
+    item_lookup: Optional[ItemLookupCache] = None,
+    commit: bool = True
 ) -> Dict[str, Any]:
     """
     Process invoice line items:
@@ -237,6 +262,9 @@ def process_invoice_line_items(
 
     This ensures proper three-way matching and Journal Entry creation.
 
+    Pass item_lookup to match against preloaded Item Master data, and
+    commit=False to leave the commit to the caller (bulk uploads commit once).
+
     Returns summary of processed items including items needing manual review.
     """
     if not structured_data:
@@ -295,41 +323,50 @@ def process_invoice_line_items(
 
             # Priority 1: Match by item_number (exact match, case-insensitive)
             if item_code and item_code.strip():
-                matched_item = db.query(ItemMaster).filter(
-                    ItemMaster.company_id == company_id,
-                    func.upper(ItemMaster.item_number) == item_code.strip().upper(),
-                    ItemMaster.is_active == True
-                ).first()
+                if item_lookup is not None:
+                    matched_item = item_lookup.by_item_number.get(item_code.strip().upper())
+                else:
+                    matched_item = db.query(ItemMaster).filter(
+                        ItemMaster.company_id == company_id,
+                        func.upper(ItemMaster.item_number) == item_code.strip().upper(),
+                        ItemMaster.is_active == True
+                    ).first()
                 if matched_item:
                     match_method = "item_number"
                     match_confidence = 1.0
 
             # Priority 1.5: Match by alias (vendor/supplier item code)
             if not matched_item and item_code and item_code.strip():
-                alias = db.query(ItemAlias).filter(
-                    ItemAlias.company_id == company_id,
-                    func.upper(ItemAlias.alias_code) == item_code.strip().upper(),
-                    ItemAlias.is_active == True
-                ).first()
-                if alias:
-                    matched_item = db.query(ItemMaster).filter(
-                        ItemMaster.id == alias.item_id,
-                        ItemMaster.is_active == True
+                if item_lookup is not None:
+                    matched_item = item_lookup.by_alias.get(item_code.strip().upper())
+                else:
+                    alias = db.query(ItemAlias).filter(
+                        ItemAlias.company_id == company_id,
+                        func.upper(ItemAlias.alias_code) == item_code.strip().upper(),
+                        ItemAlias.is_active == True
                     ).first()
-                    if matched_item:
-                        match_method = "alias"
-                        match_confidence = 1.0
-                        logger.info(f"Matched by alias '{item_code}' to item '{matched_item.item_number}'")
+                    if alias:
+                        matched_item = db.query(ItemMaster).filter(
+                            ItemMaster.id == alias.item_id,
+                            ItemMaster.is_active == True
+                        ).first()
+                if matched_item:
+                    match_method = "alias"
+                    match_confidence = 1.0
+                    logger.info(f"Matched by alias '{item_code}' to item '{matched_item.item_number}'")
 
             # Priority 2: Match by short_item_no
             if not matched_item and item_code and item_code.strip():
                 try:
                     short_no = int(item_code.strip())
-                    matched_item = db.query(ItemMaster).filter(
-                        ItemMaster.company_id == company_id,
-                        ItemMaster.short_item_no == short_no,
-                        ItemMaster.is_active == True
-                    ).first()
+                    if item_lookup is not None:
+                        matched_item = item_lookup.by_short_item_no.get(short_no)
+                    else:
+                        matched_item = db.query(ItemMaster).filter(
+                            ItemMaster.company_id == company_id,
+                            ItemMaster.short_item_no == short_no,
+                            ItemMaster.is_active == True
+                        ).first()
                     if matched_item:
                         match_method = "short_item_no"
                         match_confidence = 1.0
@@ -339,7 +376,8 @@ def process_invoice_line_items(
             # Priority 3: Fuzzy match by description
             if not matched_item and description:
                 fuzzy_match, confidence, fuzzy_suggestions = find_best_match_by_description(
-                    db, company_id, description, min_confidence=0.6
+                    db, company_id, description, min_confidence=0.6,
+                    items=item_lookup.items if item_lookup is not None else None
                 )
                 if fuzzy_match:
                     matched_item = fuzzy_match
@@ -400,7 +438,8 @@ def process_invoice_line_items(
 
     # Commit all changes
     try:
-        db.commit()
+        if commit:
+            db.commit()
     except Exception as commit_error:
         db.rollback()
         logger.error(f"Error committing invoice items: {commit_error}")
@@ -423,19 +462,18 @@ def process_invoice_line_items(
     }
 
 
-def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)) -> User:
+def get_current_admin(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """Validate JWT token and return the admin user."""
-    token = credentials.credentials
-    email = verify_token(token)
-    if email is None:
+    # Token and user are resolved once per request and shared with the middlewares
+    auth = get_auth_context(request, credentials.credentials)
+    if auth.subject is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token. Please log in again.",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    # Find user in database
-    user = db.query(User).filter(User.email == email).first()
+    user = auth.user
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -462,7 +500,7 @@ class AdminLoginResponse(BaseModel):
     user: dict
 
 @router.post("/admin/login", response_model=AdminLoginResponse)
-async def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db)):
+def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db)):
     """Admin login endpoint - authenticates admin users from database"""
 
     # Find user in database
@@ -516,7 +554,7 @@ async def admin_login(request: AdminLoginRequest, db: Session = Depends(get_db))
     )
 
 @router.get("/admin/invoices")
-async def get_all_invoices(
+def get_all_invoices(
     admin_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -663,7 +701,7 @@ async def get_all_invoices(
     return invoices
 
 @router.get("/admin/stats")
-async def get_admin_stats(
+def get_admin_stats(
     admin_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -724,868 +762,9 @@ async def get_admin_stats(
         "recent_activity": recent_activity
     }
 
-def get_company_image(image_id: int, admin_user: User, db: Session):
-    """Helper to get an image and verify it belongs to the admin's company"""
-    from app.models import ProcessedImage, User as UserModel
-
-    image = db.query(ProcessedImage).filter(ProcessedImage.id == image_id).first()
-
-    if not image:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Image not found"
-        )
-
-    # Verify the image belongs to a user in the same company
-    image_owner = db.query(UserModel).filter(UserModel.id == image.user_id).first()
-
-    if admin_user.company_id:
-        if not image_owner or image_owner.company_id != admin_user.company_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this image"
-            )
-    else:
-        # If admin has no company, only allow access to their own images
-        if image.user_id != admin_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You don't have access to this image"
-            )
-
-    return image
-
-
-@router.get("/admin/images/{image_id}/url")
-async def get_admin_image_url(
-    image_id: int,
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Get image URL for admin (admin only)"""
-
-    from app.services.s3 import generate_presigned_url
-
-    image = get_company_image(image_id, admin_user, db)
-
-    if not image:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Image not found"
-        )
-
-    # Handle S3 images
-    if image.s3_key and not image.s3_key.startswith("local/"):
-        presigned_url = generate_presigned_url(image.s3_key, expiration=3600)
-        if presigned_url:
-            return {"url": presigned_url, "type": "s3"}
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to generate image access URL"
-            )
-
-    # Handle local images
-    elif image.s3_key and image.s3_key.startswith("local/"):
-        filename = image.s3_key.replace("local/", "")
-        local_url = f"http://localhost:8000/uploads/{filename}"
-        return {"url": local_url, "type": "local"}
-
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Image file not found"
-        )
-
-
-@router.post("/admin/images/{image_id}/reprocess")
-async def reprocess_image(
-    image_id: int,
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Reprocess an image with AI extraction (admin only)"""
-
-    from app.services.s3 import download_file_from_s3
-    from app.services.enhanced_invoice_processing import process_invoice_image_enhanced
-    import json
-    import os
-
-    image = get_company_image(image_id, admin_user, db)
-
-    try:
-        # Get the image file bytes
-        file_bytes = None
-
-        # Handle S3 images
-        if image.s3_key and not image.s3_key.startswith("local/"):
-            file_bytes = download_file_from_s3(image.s3_key)
-        # Handle local images
-        elif image.s3_key and image.s3_key.startswith("local/"):
-            filename = image.s3_key.replace("local/", "")
-            local_path = os.path.join("uploads", filename)
-            if os.path.exists(local_path):
-                with open(local_path, "rb") as f:
-                    file_bytes = f.read()
-
-        if not file_bytes:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Image file not found or could not be retrieved"
-            )
-
-        # Reprocess with enhanced OCR (with vendor lookup)
-        result = process_invoice_image_enhanced(file_bytes, db)
-
-        if result.get("success") and result.get("structured_data"):
-            # Update the database record
-            image.structured_data = json.dumps(result["structured_data"])
-            image.processing_method = "ENHANCED"
-            image.extraction_confidence = result.get("average_confidence", 0.0)
-            image.ocr_extracted_words = result.get("total_words_extracted", 0)
-            image.ocr_average_confidence = result.get("average_confidence", 0.0)
-            image.processing_status = "completed"
-
-            db.commit()
-
-            return {
-                "success": True,
-                "message": "Image reprocessed successfully",
-                "image_id": image_id,
-                "processing_method": "ENHANCED",
-                "confidence_score": result.get("average_confidence", 0.0),
-                "structured_data": result.get("structured_data")
-            }
-        else:
-            error_msg = result.get("error", "AI processing failed")
-            return {
-                "success": False,
-                "message": f"Reprocessing failed: {error_msg}",
-                "image_id": image_id
-            }
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error reprocessing image: {str(e)}"
-        )
-
-
-@router.delete("/admin/images/{image_id}")
-async def delete_admin_image(
-    image_id: int,
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Delete an image (admin only)"""
-    from app.services.s3 import delete_from_s3
-    from app.models import PurchaseOrderInvoice, PurchaseOrder
-    import os
-
-    image = get_company_image(image_id, admin_user, db)
-
-    # Check if invoice is linked to an active (non-cancelled) Purchase Order
-    po_link = db.query(PurchaseOrderInvoice).join(
-        PurchaseOrder, PurchaseOrder.id == PurchaseOrderInvoice.purchase_order_id
-    ).filter(
-        PurchaseOrderInvoice.invoice_id == image_id,
-        PurchaseOrder.status != 'cancelled'
-    ).first()
-
-    if po_link:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot delete invoice - it is linked to an active Purchase Order. Please unlink the invoice from the PO first."
-        )
-
-    # Clean up any orphaned PO links (from cancelled POs)
-    db.query(PurchaseOrderInvoice).filter(
-        PurchaseOrderInvoice.invoice_id == image_id
-    ).delete()
-
-    errors = []
-
-    try:
-        # Delete from S3 if stored there
-        if image.s3_key and not image.s3_key.startswith("local/"):
-            if not delete_from_s3(image.s3_key):
-                errors.append(f"Failed to delete S3 object: {image.s3_key}")
-
-        # Delete local files if stored locally
-        elif image.s3_key and image.s3_key.startswith("local/"):
-            filename = image.s3_key.replace("local/", "")
-            local_file_path = f"uploads/{filename}"
-            if os.path.exists(local_file_path):
-                os.remove(local_file_path)
-
-        # Clear invoice reference from ledger entries (keep for audit trail)
-        db.query(ItemLedger).filter(ItemLedger.invoice_id == image_id).update(
-            {"invoice_id": None}, synchronize_session=False
-        )
-
-        # Delete associated invoice items first (cascade)
-        db.query(InvoiceItem).filter(InvoiceItem.invoice_id == image_id).delete()
-
-        # Delete from database
-        db.delete(image)
-        db.commit()
-
-        return {
-            "success": True,
-            "message": "Invoice deleted successfully",
-            "errors": errors if errors else None
-        }
-
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error deleting image: {str(e)}"
-        )
-
-
-class InvoiceUpdateData(BaseModel):
-    invoice_category: Optional[str] = None
-    document_info: Optional[dict] = None
-    supplier: Optional[dict] = None
-    customer: Optional[dict] = None
-    financial_details: Optional[dict] = None
-
-
-@router.put("/admin/images/{image_id}")
-async def update_admin_invoice(
-    image_id: int,
-    update_data: InvoiceUpdateData,
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Update invoice structured data (admin only)"""
-    import json
-
-    image = get_company_image(image_id, admin_user, db)
-
-    try:
-        # Update invoice_category if provided (can be set to empty string to clear)
-        if update_data.invoice_category is not None:
-            # Allow empty string to clear category, or validate against allowed values
-            allowed_categories = ['', 'service', 'spare_parts', 'expense', 'equipment', 'utilities']
-            if update_data.invoice_category not in allowed_categories:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid invoice category. Allowed values: {', '.join(allowed_categories)}"
-                )
-            image.invoice_category = update_data.invoice_category if update_data.invoice_category else None
-
-        # Parse existing structured data
-        structured_data = {}
-        if image.structured_data:
-            try:
-                structured_data = json.loads(image.structured_data)
-            except (json.JSONDecodeError, TypeError):
-                structured_data = {}
-
-        # Update document_info
-        if update_data.document_info:
-            if "document_info" not in structured_data:
-                structured_data["document_info"] = {}
-            for key, value in update_data.document_info.items():
-                if value is not None:
-                    structured_data["document_info"][key] = value
-
-        # Update supplier
-        if update_data.supplier:
-            if "supplier" not in structured_data:
-                structured_data["supplier"] = {}
-            for key, value in update_data.supplier.items():
-                if value is not None:
-                    structured_data["supplier"][key] = value
-
-        # Update customer
-        if update_data.customer:
-            if "customer" not in structured_data:
-                structured_data["customer"] = {}
-            for key, value in update_data.customer.items():
-                if value is not None:
-                    structured_data["customer"][key] = value
-
-        # Update financial_details
-        if update_data.financial_details:
-            if "financial_details" not in structured_data:
-                structured_data["financial_details"] = {}
-            for key, value in update_data.financial_details.items():
-                if value is not None:
-                    structured_data["financial_details"][key] = value
-
-        # Save updated structured data
-        image.structured_data = json.dumps(structured_data)
-        db.commit()
-
-        logger.info(f"Invoice {image_id} updated by admin {admin_user.email}")
-
-        return {
-            "success": True,
-            "message": "Invoice updated successfully",
-            "image_id": image_id,
-            "structured_data": structured_data
-        }
-
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error updating invoice {image_id}: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error updating invoice: {str(e)}"
-        )
-
-
-@router.get("/admin/images/{image_id}/vendor-lookup")
-async def admin_get_vendor_lookup(
-    image_id: int,
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Get vendor lookup for an image (admin only). Uses Address Book with search_type='V'."""
-    from app.models import AddressBook
-    import json
-
-    image = get_company_image(image_id, admin_user, db)
-
-    # Extract supplier name from structured data
-    supplier_name = None
-    if image.structured_data:
-        try:
-            structured_data = json.loads(image.structured_data)
-            supplier_name = structured_data.get("supplier", {}).get("company_name")
-        except (json.JSONDecodeError, TypeError):
-            pass
-
-    if not supplier_name:
-        return {
-            "found": False,
-            "vendor": None,
-            "suggestions": [],
-            "extracted_name": None,
-            "message": "No supplier name found in document"
-        }
-
-    # Try exact match first using Address Book (search_type='V')
-    vendor = db.query(AddressBook).filter(
-        AddressBook.alpha_name.ilike(supplier_name),
-        AddressBook.search_type == 'V',
-        AddressBook.is_active == True,
-        AddressBook.company_id == admin_user.company_id
-    ).first()
-
-    if vendor:
-        return {
-            "found": True,
-            "vendor": {
-                "id": vendor.id,
-                "address_number": vendor.address_number,
-                "name": vendor.alpha_name,
-                "display_name": vendor.alpha_name
-            },
-            "suggestions": [],
-            "extracted_name": supplier_name
-        }
-
-    # No exact match - get suggestions
-    search_term = f"%{supplier_name}%"
-    similar_vendors = db.query(AddressBook).filter(
-        AddressBook.alpha_name.ilike(search_term),
-        AddressBook.search_type == 'V',
-        AddressBook.is_active == True,
-        AddressBook.company_id == admin_user.company_id
-    ).limit(5).all()
-
-    return {
-        "found": False,
-        "vendor": None,
-        "suggestions": [
-            {
-                "id": v.id,
-                "address_number": v.address_number,
-                "name": v.alpha_name,
-                "display_name": v.alpha_name
-            }
-            for v in similar_vendors
-        ],
-        "extracted_name": supplier_name
-    }
-
-
-@router.post("/admin/images/{image_id}/link-vendor")
-async def admin_link_vendor_to_image(
-    image_id: int,
-    address_book_id: int = Query(..., description="Address Book ID (search_type='V')"),
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Link a vendor (Address Book entry) to an image (admin only)"""
-    from app.models import AddressBook
-    import json
-
-    image = get_company_image(image_id, admin_user, db)
-
-    vendor = db.query(AddressBook).filter(
-        AddressBook.id == address_book_id,
-        AddressBook.search_type == 'V',
-        AddressBook.is_active == True,
-        AddressBook.company_id == admin_user.company_id
-    ).first()
-
-    if not vendor:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Vendor not found in Address Book"
-        )
-
-    # Update structured data with vendor info
-    try:
-        structured_data = {}
-        if image.structured_data:
-            structured_data = json.loads(image.structured_data)
-
-        # Update supplier info with Address Book data
-        if "supplier" not in structured_data:
-            structured_data["supplier"] = {}
-
-        structured_data["supplier"]["company_name"] = vendor.alpha_name
-        structured_data["supplier"]["address_book_id"] = vendor.id
-        if vendor.email:
-            structured_data["supplier"]["email"] = vendor.email
-        if vendor.phone_primary:
-            structured_data["supplier"]["phone"] = vendor.phone_primary
-        if vendor.address_line_1:
-            structured_data["supplier"]["company_address"] = " ".join(filter(None, [
-                vendor.address_line_1, vendor.city, vendor.country
-            ]))
-        if vendor.tax_id:
-            structured_data["supplier"]["tax_number"] = vendor.tax_id
-
-        image.structured_data = json.dumps(structured_data)
-        image.address_book_id = vendor.id  # Link to Address Book
-        db.commit()
-        db.refresh(image)
-
-        return {
-            "success": True,
-            "message": f"Vendor '{vendor.alpha_name}' linked to invoice successfully",
-            "vendor": {
-                "id": vendor.id,
-                "address_number": vendor.address_number,
-                "name": vendor.alpha_name,
-                "display_name": vendor.alpha_name
-            },
-            "image_id": image_id
-        }
-
-    except json.JSONDecodeError:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error parsing structured data"
-        )
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error linking vendor: {str(e)}"
-        )
-
-
-@router.post("/admin/images/upload")
-async def admin_upload_image(
-    file: UploadFile = File(...),
-    document_type: str = "invoice",
-    invoice_category: str = None,
-    site_id: int = None,
-    contract_id: int = None,
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Upload and process an image (admin only) - creates document under admin's account."""
-    from app.models import ProcessedImage
-    from app.services.s3 import upload_to_s3, process_image
-    import uuid
-    import os
-    import json
-
-    # Supported file types
-    SUPPORTED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff"]
-    SUPPORTED_PDF_TYPE = "application/pdf"
-
-    # Check file type
-    is_image = file.content_type in SUPPORTED_IMAGE_TYPES
-    is_pdf = file.content_type == SUPPORTED_PDF_TYPE
-
-    if not is_image and not is_pdf:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File must be an image or PDF. Supported types: {', '.join(SUPPORTED_IMAGE_TYPES + [SUPPORTED_PDF_TYPE])}"
-        )
-
-    # Read file content
-    content = await file.read()
-
-    # Convert PDF to image if necessary
-    if is_pdf:
-        from app.api.images import convert_pdf_to_image
-        content = convert_pdf_to_image(content)
-        unique_filename = f"{uuid.uuid4()}.png"
-    else:
-        file_extension = file.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-
-    # Ensure uploads directory exists
-    os.makedirs("uploads", exist_ok=True)
-
-    # Save file temporarily
-    temp_file_path = f"uploads/{unique_filename}"
-    with open(temp_file_path, "wb") as buffer:
-        buffer.write(content)
-
-    try:
-        # Read file content for invoice processing
-        with open(temp_file_path, 'rb') as f:
-            file_bytes = f.read()
-
-        # Process image (resize, compress, OCR, AI extraction) - pass db and company_id for vendor lookup/creation
-        processed_image_path, invoice_results = process_image(temp_file_path, file_bytes, db, admin_user.company_id)
-
-        # Increment company's document usage counter IMMEDIATELY after OCR processing
-        # This counts the API usage regardless of whether the invoice is a duplicate
-        if admin_user.company_id:
-            company = db.query(Company).filter(Company.id == admin_user.company_id).first()
-            if company:
-                old_count = company.documents_used_this_month
-                company.documents_used_this_month += 1
-                db.commit()
-                logger.info(f"[DOCUMENT_COUNTER] Admin upload - Company {company.id} ({company.name}): {old_count} -> {company.documents_used_this_month}")
-
-        # Try to upload to S3, fallback to local if it fails
-        try:
-            s3_key, s3_url = upload_to_s3(processed_image_path, unique_filename)
-            processing_status = "completed"
-            s3_url = s3_key
-
-            if os.path.exists(processed_image_path):
-                os.remove(processed_image_path)
-
-        except Exception as s3_error:
-            print(f"S3 upload failed, using local storage: {s3_error}")
-            s3_key = f"local/{unique_filename}"
-            s3_url = f"local/{unique_filename}"
-            processing_status = "completed_local"
-
-            final_file_path = f"uploads/{unique_filename}"
-            if processed_image_path != temp_file_path:
-                import shutil
-                shutil.move(processed_image_path, final_file_path)
-
-        # Prepare structured data for storage
-        structured_data_json = None
-        extraction_confidence = 0.0
-
-        if invoice_results.get("structured_data"):
-            structured_data_json = json.dumps(invoice_results["structured_data"])
-            if isinstance(invoice_results["structured_data"], dict):
-                validation = invoice_results["structured_data"].get("validation", {})
-                extraction_confidence = float(validation.get("confidence_score", 0))
-
-                # Check for duplicate invoice (within same company)
-                invoice_number, supplier_name = extract_invoice_info_for_duplicate_check(
-                    invoice_results["structured_data"]
-                )
-                is_duplicate, existing_id = check_duplicate_invoice(db, invoice_number, supplier_name, admin_user.company_id)
-
-                if is_duplicate:
-                    # Clean up temporary files
-                    if os.path.exists(temp_file_path):
-                        os.remove(temp_file_path)
-                    if processed_image_path and os.path.exists(processed_image_path):
-                        os.remove(processed_image_path)
-
-                    raise HTTPException(
-                        status_code=status.HTTP_409_CONFLICT,
-                        detail=f"Duplicate invoice detected. Invoice number '{invoice_number}' already exists (ID: {existing_id})"
-                    )
-
-        enhancement_features = invoice_results.get("enhancement_features", {})
-
-        # Create database record using the authenticated admin user
-        db_image = ProcessedImage(
-            user_id=admin_user.id,
-            original_filename=file.filename,
-            s3_key=s3_key,
-            s3_url=s3_url,
-            processing_status=processing_status,
-            document_type=document_type,
-            invoice_category=invoice_category if document_type == "invoice" else None,
-            site_id=site_id,
-            contract_id=contract_id,
-            ocr_extracted_words=int(invoice_results.get("total_words_extracted", 0)),
-            ocr_average_confidence=float(invoice_results.get("average_confidence", 0.0)),
-            ocr_preprocessing_methods=int(enhancement_features.get("multiple_preprocessing", 1)),
-            patterns_detected=int(enhancement_features.get("pattern_recognition", 0)),
-            has_structured_data=bool(invoice_results.get("structured_data")),
-            structured_data=structured_data_json,
-            extraction_confidence=float(extraction_confidence),
-            processing_method="enhanced"
-        )
-
-        db.add(db_image)
-        db.commit()
-        db.refresh(db_image)
-
-        # Process line items: match with Item Master, create InvoiceItem records,
-        # and auto-receive matched items to main warehouse
-        line_items_result = None
-        if invoice_results.get("structured_data") and document_type == "invoice":
-            line_items_result = process_invoice_line_items(
-                db=db,
-                invoice_id=db_image.id,
-                structured_data=invoice_results["structured_data"],
-                company_id=admin_user.company_id,
-                user_id=admin_user.id
-            )
-            logger.info(f"Line items processing: {line_items_result}")
-
-        # Return response matching the UploadResponse interface
-        return {
-            "id": db_image.id,
-            "original_filename": db_image.original_filename,
-            "processing_status": db_image.processing_status,
-            "document_type": db_image.document_type,
-            "invoice_category": db_image.invoice_category,
-            "created_at": db_image.created_at.isoformat(),
-            "structured_data": structured_data_json,
-            "vendor_lookup": invoice_results.get("vendor_lookup"),
-            "line_items_processing": line_items_result
-        }
-
-    except Exception as e:
-        if os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing image: {str(e)}"
-        )
-
-
-@router.post("/admin/images/upload-bulk")
-async def admin_upload_bulk_images(
-    files: List[UploadFile] = File(...),
-    document_type: str = "invoice",
-    invoice_category: str = None,
-    admin_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
-):
-    """Upload and process multiple images (admin only) - creates documents under admin's account."""
-    from app.models import ProcessedImage
-    from app.services.s3 import upload_to_s3, process_image
-    from app.api.images import convert_pdf_to_image
-    import uuid
-    import os
-    import json
-    import shutil
-
-    # Supported file types
-    SUPPORTED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff"]
-    SUPPORTED_PDF_TYPE = "application/pdf"
-
-    # Validate file count
-    if len(files) == 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No files provided"
-        )
-
-    if len(files) > 50:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Maximum 50 files allowed per upload"
-        )
-
-    # admin_user is already authenticated via get_current_admin dependency
-
-    results = []
-    errors = []
-
-    for file in files:
-        temp_file_path = None
-        try:
-            # Check file type
-            is_image = file.content_type in SUPPORTED_IMAGE_TYPES
-            is_pdf = file.content_type == SUPPORTED_PDF_TYPE
-
-            if not is_image and not is_pdf:
-                errors.append({
-                    "filename": file.filename,
-                    "error": f"Unsupported file type: {file.content_type}"
-                })
-                continue
-
-            # Read file content
-            content = await file.read()
-
-            # Convert PDF to image if necessary
-            if is_pdf:
-                content = convert_pdf_to_image(content)
-                unique_filename = f"{uuid.uuid4()}.png"
-            else:
-                file_extension = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-                unique_filename = f"{uuid.uuid4()}.{file_extension}"
-
-            # Ensure uploads directory exists
-            os.makedirs("uploads", exist_ok=True)
-
-            # Save file temporarily
-            temp_file_path = f"uploads/{unique_filename}"
-            with open(temp_file_path, "wb") as buffer:
-                buffer.write(content)
-
-            # Read file content for invoice processing
-            with open(temp_file_path, 'rb') as f:
-                file_bytes = f.read()
-
-            # Process image (resize, compress, OCR, AI extraction) - pass company_id for vendor auto-creation
-            processed_image_path, invoice_results = process_image(temp_file_path, file_bytes, db, admin_user.company_id)
-
-            # Increment company's document usage counter IMMEDIATELY after OCR processing
-            # This counts the API usage regardless of whether the invoice is a duplicate
-            if admin_user.company_id:
-                company = db.query(Company).filter(Company.id == admin_user.company_id).first()
-                if company:
-                    company.documents_used_this_month += 1
-                    db.commit()
-                    logger.info(f"[DOCUMENT_COUNTER] Bulk upload - Company {company.id}: incremented to {company.documents_used_this_month}")
-
-            # Try to upload to S3, fallback to local if it fails
-            try:
-                s3_key, s3_url = upload_to_s3(processed_image_path, unique_filename)
-                processing_status = "completed"
-                s3_url = s3_key
-
-                if os.path.exists(processed_image_path):
-                    os.remove(processed_image_path)
-
-            except Exception as s3_error:
-                print(f"S3 upload failed for {file.filename}, using local storage: {s3_error}")
-                s3_key = f"local/{unique_filename}"
-                s3_url = f"local/{unique_filename}"
-                processing_status = "completed_local"
-
-                final_file_path = f"uploads/{unique_filename}"
-                if processed_image_path != temp_file_path:
-                    shutil.move(processed_image_path, final_file_path)
-
-            # Prepare structured data for storage
-            structured_data_json = None
-            extraction_confidence = 0.0
-            is_duplicate = False
-            duplicate_invoice_number = None
-
-            if invoice_results.get("structured_data"):
-                structured_data_json = json.dumps(invoice_results["structured_data"])
-                if isinstance(invoice_results["structured_data"], dict):
-                    validation = invoice_results["structured_data"].get("validation", {})
-                    extraction_confidence = float(validation.get("confidence_score", 0))
-
-                    # Check for duplicate invoice (within same company)
-                    invoice_number, supplier_name = extract_invoice_info_for_duplicate_check(
-                        invoice_results["structured_data"]
-                    )
-                    is_duplicate, existing_id = check_duplicate_invoice(db, invoice_number, supplier_name, admin_user.company_id)
-
-                    if is_duplicate:
-                        duplicate_invoice_number = invoice_number
-                        # Clean up files for duplicate
-                        if temp_file_path and os.path.exists(temp_file_path):
-                            os.remove(temp_file_path)
-                        if processed_image_path and os.path.exists(processed_image_path):
-                            os.remove(processed_image_path)
-
-                        errors.append({
-                            "filename": file.filename,
-                            "error": f"Duplicate invoice - Invoice number '{invoice_number}' already exists (ID: {existing_id})",
-                            "is_duplicate": True,
-                            "existing_id": existing_id
-                        })
-                        continue
-
-            enhancement_features = invoice_results.get("enhancement_features", {})
-
-            # Create database record
-            db_image = ProcessedImage(
-                user_id=admin_user.id,
-                original_filename=file.filename,
-                s3_key=s3_key,
-                s3_url=s3_url,
-                processing_status=processing_status,
-                document_type=document_type,
-                invoice_category=invoice_category if document_type == "invoice" else None,
-                ocr_extracted_words=int(invoice_results.get("total_words_extracted", 0)),
-                ocr_average_confidence=float(invoice_results.get("average_confidence", 0.0)),
-                ocr_preprocessing_methods=int(enhancement_features.get("multiple_preprocessing", 1)),
-                patterns_detected=int(enhancement_features.get("pattern_recognition", 0)),
-                has_structured_data=bool(invoice_results.get("structured_data")),
-                structured_data=structured_data_json,
-                extraction_confidence=float(extraction_confidence),
-                processing_method="enhanced"
-            )
-
-            db.add(db_image)
-            db.commit()
-            db.refresh(db_image)
-
-            # Process line items: match with Item Master, create InvoiceItem records,
-            # and auto-receive matched items to main warehouse
-            line_items_result = None
-            if invoice_results.get("structured_data") and document_type == "invoice":
-                line_items_result = process_invoice_line_items(
-                    db=db,
-                    invoice_id=db_image.id,
-                    structured_data=invoice_results["structured_data"],
-                    company_id=admin_user.company_id,
-                    user_id=admin_user.id
-                )
-
-            results.append({
-                "id": db_image.id,
-                "original_filename": db_image.original_filename,
-                "processing_status": db_image.processing_status,
-                "document_type": db_image.document_type,
-                "created_at": db_image.created_at.isoformat(),
-                "structured_data": structured_data_json,
-                "vendor_lookup": invoice_results.get("vendor_lookup"),
-                "line_items_processing": line_items_result
-            })
-
-        except Exception as e:
-            errors.append({
-                "filename": file.filename,
-                "error": str(e)
-            })
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
-
-    # Count duplicates separately
-    duplicates = [e for e in errors if e.get("is_duplicate")]
-    other_errors = [e for e in errors if not e.get("is_duplicate")]
-
-    return {
-        "success": len(results) > 0,
-        "total_files": len(files),
-        "successful": len(results),
-        "failed": len(other_errors),
-        "skipped_duplicates": len(duplicates),
-        "results": results,
-        "errors": errors
-    }
-
 
 @router.post("/admin/invoices/{invoice_id}/post")
-async def post_invoice_items(
+def post_invoice_items(
     invoice_id: int,
     admin_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
@@ -1856,7 +1035,7 @@ async def post_invoice_items(
                 # DR: Inventory (net amount)
                 if mapping.debit_account_id:
                     inv_line = JournalEntryLine(
-                        journal_entry_id=entry.id,
+                        journal_entry=entry,
                         account_id=mapping.debit_account_id,
                         debit=float(total_inventory_cost),
                         credit=0,
@@ -1879,7 +1058,7 @@ async def post_invoice_items(
 
                     if vat_mapping and vat_mapping.debit_account_id:
                         vat_line = JournalEntryLine(
-                            journal_entry_id=entry.id,
+                            journal_entry=entry,
                             account_id=vat_mapping.debit_account_id,
                             debit=float(vat_amount),
                             credit=0,
@@ -1896,7 +1075,7 @@ async def post_invoice_items(
                 total_credit = total_inventory_cost + vat_amount
                 if mapping.credit_account_id:
                     ap_line = JournalEntryLine(
-                        journal_entry_id=entry.id,
+                        journal_entry=entry,
                         account_id=mapping.credit_account_id,
                         debit=0,
                         credit=float(total_credit),
@@ -1957,7 +1136,7 @@ async def post_invoice_items(
 
 
 @router.post("/admin/invoices/{invoice_id}/reverse")
-async def reverse_invoice_posting(
+def reverse_invoice_posting(
     invoice_id: int,
     admin_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
@@ -2212,7 +1391,7 @@ async def reverse_invoice_posting(
                 # CR: Inventory (was DR in original)
                 if mapping.debit_account_id:
                     inv_line = JournalEntryLine(
-                        journal_entry_id=entry.id,
+                        journal_entry=entry,
                         account_id=mapping.debit_account_id,
                         debit=0,
                         credit=float(total_reversed_cost),  # CREDIT instead of debit
@@ -2234,7 +1413,7 @@ async def reverse_invoice_posting(
 
                     if vat_mapping and vat_mapping.debit_account_id:
                         vat_line = JournalEntryLine(
-                            journal_entry_id=entry.id,
+                            journal_entry=entry,
                             account_id=vat_mapping.debit_account_id,
                             debit=0,
                             credit=float(vat_amount),  # CREDIT instead of debit
@@ -2250,7 +1429,7 @@ async def reverse_invoice_posting(
                 total_debit = total_reversed_cost + vat_amount
                 if mapping.credit_account_id:
                     ap_line = JournalEntryLine(
-                        journal_entry_id=entry.id,
+                        journal_entry=entry,
                         account_id=mapping.credit_account_id,
                         debit=float(total_debit),  # DEBIT instead of credit
                         credit=0,
@@ -2304,4 +1483,4 @@ async def reverse_invoice_posting(
         "vat_amount": float(vat_amount),
         "journal_entry": journal_entry_number,
         "errors": errors if errors else None
-    }
\ No newline at end of file
+    }
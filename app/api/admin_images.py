@@ -0,0 +1,781 @@
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models import User, InvoiceItem, ItemLedger, Company
+from app.utils.concurrency import run_async, run_sync
+from app.api.admin import (
+    get_current_admin, check_duplicate_invoice, extract_invoice_info_for_duplicate_check,
+    process_invoice_line_items
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Admin image/document routes (/api/admin/images/*), mounted by the documents
+# profile; the rest of the admin API lives in app/api/admin.py
+router = APIRouter()
+
+
+def get_company_image(image_id: int, admin_user: User, db: Session):
+    """Helper to get an image and verify it belongs to the admin's company"""
+    from app.models import ProcessedImage, User as UserModel
+
+    image = db.query(ProcessedImage).filter(ProcessedImage.id == image_id).first()
+
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    # Verify the image belongs to a user in the same company
+    image_owner = db.query(UserModel).filter(UserModel.id == image.user_id).first()
+
+    if admin_user.company_id:
+        if not image_owner or image_owner.company_id != admin_user.company_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this image"
+            )
+    else:
+        # If admin has no company, only allow access to their own images
+        if image.user_id != admin_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You don't have access to this image"
+            )
+
+    return image
+
+
+@router.get("/admin/images/{image_id}/url")
+def get_admin_image_url(
+    image_id: int,
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get image URL for admin (admin only)"""
+
+    from app.services.s3 import generate_presigned_url
+
+    image = get_company_image(image_id, admin_user, db)
+
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    # Handle S3 images
+    if image.s3_key and not image.s3_key.startswith("local/"):
+        presigned_url = generate_presigned_url(image.s3_key, expiration=3600)
+        if presigned_url:
+            return {"url": presigned_url, "type": "s3"}
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate image access URL"
+            )
+
+    # Handle local images
+    elif image.s3_key and image.s3_key.startswith("local/"):
+        filename = image.s3_key.replace("local/", "")
+        local_url = f"http://localhost:8000/uploads/{filename}"
+        return {"url": local_url, "type": "local"}
+
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image file not found"
+        )
+
+
+@router.post("/admin/images/{image_id}/reprocess")
+def reprocess_image(
+    image_id: int,
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Reprocess an image with AI extraction (admin only)"""
+
+    from app.services.s3 import download_file_from_s3
+    from app.services.enhanced_invoice_processing import process_invoice_image_enhanced
+    import json
+    import os
+
+    image = get_company_image(image_id, admin_user, db)
+
+    try:
+        # Get the image file bytes
+        file_bytes = None
+
+        # Handle S3 images
+        if image.s3_key and not image.s3_key.startswith("local/"):
+            file_bytes = download_file_from_s3(image.s3_key)
+        # Handle local images
+        elif image.s3_key and image.s3_key.startswith("local/"):
+            filename = image.s3_key.replace("local/", "")
+            local_path = os.path.join("uploads", filename)
+            if os.path.exists(local_path):
+                with open(local_path, "rb") as f:
+                    file_bytes = f.read()
+
+        if not file_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Image file not found or could not be retrieved"
+            )
+
+        # Reprocess with enhanced OCR (with vendor lookup)
+        result = process_invoice_image_enhanced(file_bytes, db)
+
+        if result.get("success") and result.get("structured_data"):
+            # Update the database record
+            image.structured_data = json.dumps(result["structured_data"])
+            image.processing_method = "ENHANCED"
+            image.extraction_confidence = result.get("average_confidence", 0.0)
+            image.ocr_extracted_words = result.get("total_words_extracted", 0)
+            image.ocr_average_confidence = result.get("average_confidence", 0.0)
+            image.processing_status = "completed"
+
+            db.commit()
+
+            return {
+                "success": True,
+                "message": "Image reprocessed successfully",
+                "image_id": image_id,
+                "processing_method": "ENHANCED",
+                "confidence_score": result.get("average_confidence", 0.0),
+                "structured_data": result.get("structured_data")
+            }
+        else:
+            error_msg = result.get("error", "AI processing failed")
+            return {
+                "success": False,
+                "message": f"Reprocessing failed: {error_msg}",
+                "image_id": image_id
+            }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reprocessing image: {str(e)}"
+        )
+
+
+@router.delete("/admin/images/{image_id}")
+def delete_admin_image(
+    image_id: int,
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Delete an image (admin only)"""
+    from app.services.s3 import delete_from_s3
+    from app.models import PurchaseOrderInvoice, PurchaseOrder
+    import os
+
+    image = get_company_image(image_id, admin_user, db)
+
+    # Check if invoice is linked to an active (non-cancelled) Purchase Order
+    po_link = db.query(PurchaseOrderInvoice).join(
+        PurchaseOrder, PurchaseOrder.id == PurchaseOrderInvoice.purchase_order_id
+    ).filter(
+        PurchaseOrderInvoice.invoice_id == image_id,
+        PurchaseOrder.status != 'cancelled'
+    ).first()
+
+    if po_link:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cannot delete invoice - it is linked to an active Purchase Order. Please unlink the invoice from the PO first."
+        )
+
+    # Clean up any orphaned PO links (from cancelled POs)
+    db.query(PurchaseOrderInvoice).filter(
+        PurchaseOrderInvoice.invoice_id == image_id
+    ).delete()
+
+    errors = []
+
+    try:
+        # Delete from S3 if stored there
+        if image.s3_key and not image.s3_key.startswith("local/"):
+            if not delete_from_s3(image.s3_key):
+                errors.append(f"Failed to delete S3 object: {image.s3_key}")
+
+        # Delete local files if stored locally
+        elif image.s3_key and image.s3_key.startswith("local/"):
+            filename = image.s3_key.replace("local/", "")
+            local_file_path = f"uploads/{filename}"
+            if os.path.exists(local_file_path):
+                os.remove(local_file_path)
+
+        # Clear invoice reference from ledger entries (keep for audit trail)
+        db.query(ItemLedger).filter(ItemLedger.invoice_id == image_id).update(
+            {"invoice_id": None}, synchronize_session=False
+        )
+
+        # Delete associated invoice items first (cascade)
+        db.query(InvoiceItem).filter(InvoiceItem.invoice_id == image_id).delete()
+
+        # Delete from database
+        db.delete(image)
+        db.commit()
+
+        return {
+            "success": True,
+            "message": "Invoice deleted successfully",
+            "errors": errors if errors else None
+        }
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error deleting image: {str(e)}"
+        )
+
+
+class InvoiceUpdateData(BaseModel):
+    invoice_category: Optional[str] = None
+    document_info: Optional[dict] = None
+    supplier: Optional[dict] = None
+    customer: Optional[dict] = None
+    financial_details: Optional[dict] = None
+
+
+@router.put("/admin/images/{image_id}")
+def update_admin_invoice(
+    image_id: int,
+    update_data: InvoiceUpdateData,
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Update invoice structured data (admin only)"""
+    import json
+
+    image = get_company_image(image_id, admin_user, db)
+
+    try:
+        # Update invoice_category if provided (can be set to empty string to clear)
+        if update_data.invoice_category is not None:
+            # Allow empty string to clear category, or validate against allowed values
+            allowed_categories = ['', 'service', 'spare_parts', 'expense', 'equipment', 'utilities']
+            if update_data.invoice_category not in allowed_categories:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid invoice category. Allowed values: {', '.join(allowed_categories)}"
+                )
+            image.invoice_category = update_data.invoice_category if update_data.invoice_category else None
+
+        # Parse existing structured data
+        structured_data = {}
+        if image.structured_data:
+            try:
+                structured_data = json.loads(image.structured_data)
+            except (json.JSONDecodeError, TypeError):
+                structured_data = {}
+
+        # Update document_info
+        if update_data.document_info:
+            if "document_info" not in structured_data:
+                structured_data["document_info"] = {}
+            for key, value in update_data.document_info.items():
+                if value is not None:
+                    structured_data["document_info"][key] = value
+
+        # Update supplier
+        if update_data.supplier:
+            if "supplier" not in structured_data:
+                structured_data["supplier"] = {}
+            for key, value in update_data.supplier.items():
+                if value is not None:
+                    structured_data["supplier"][key] = value
+
+        # Update customer
+        if update_data.customer:
+            if "customer" not in structured_data:
+                structured_data["customer"] = {}
+            for key, value in update_data.customer.items():
+                if value is not None:
+                    structured_data["customer"][key] = value
+
+        # Update financial_details
+        if update_data.financial_details:
+            if "financial_details" not in structured_data:
+                structured_data["financial_details"] = {}
+            for key, value in update_data.financial_details.items():
+                if value is not None:
+                    structured_data["financial_details"][key] = value
+
+        # Save updated structured data
+        image.structured_data = json.dumps(structured_data)
+        db.commit()
+
+        logger.info(f"Invoice {image_id} updated by admin {admin_user.email}")
+
+        return {
+            "success": True,
+            "message": "Invoice updated successfully",
+            "image_id": image_id,
+            "structured_data": structured_data
+        }
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error updating invoice {image_id}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error updating invoice: {str(e)}"
+        )
+
+
+@router.get("/admin/images/{image_id}/vendor-lookup")
+def admin_get_vendor_lookup(
+    image_id: int,
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get vendor lookup for an image (admin only). Uses Address Book with search_type='V'."""
+    from app.models import AddressBook
+    import json
+
+    image = get_company_image(image_id, admin_user, db)
+
+    # Extract supplier name from structured data
+    supplier_name = None
+    if image.structured_data:
+        try:
+            structured_data = json.loads(image.structured_data)
+            supplier_name = structured_data.get("supplier", {}).get("company_name")
+        except (json.JSONDecodeError, TypeError):
+            pass
+
+    if not supplier_name:
+        return {
+            "found": False,
+            "vendor": None,
+            "suggestions": [],
+            "extracted_name": None,
+            "message": "No supplier name found in document"
+        }
+
+    # Try exact match first using Address Book (search_type='V')
+    vendor = db.query(AddressBook).filter(
+        AddressBook.alpha_name.ilike(supplier_name),
+        AddressBook.search_type == 'V',
+        AddressBook.is_active == True,
+        AddressBook.company_id == admin_user.company_id
+    ).first()
+
+    if vendor:
+        return {
+            "found": True,
+            "vendor": {
+                "id": vendor.id,
+                "address_number": vendor.address_number,
+                "name": vendor.alpha_name,
+                "display_name": vendor.alpha_name
+            },
+            "suggestions": [],
+            "extracted_name": supplier_name
+        }
+
+    # No exact match - get suggestions
+    search_term = f"%{supplier_name}%"
+    similar_vendors = db.query(AddressBook).filter(
+        AddressBook.alpha_name.ilike(search_term),
+        AddressBook.search_type == 'V',
+        AddressBook.is_active == True,
+        AddressBook.company_id == admin_user.company_id
+    ).limit(5).all()
+
+    return {
+        "found": False,
+        "vendor": None,
+        "suggestions": [
+            {
+                "id": v.id,
+                "address_number": v.address_number,
+                "name": v.alpha_name,
+                "display_name": v.alpha_name
+            }
+            for v in similar_vendors
+        ],
+        "extracted_name": supplier_name
+    }
+
+
+@router.post("/admin/images/{image_id}/link-vendor")
+def admin_link_vendor_to_image(
+    image_id: int,
+    address_book_id: int = Query(..., description="Address Book ID (search_type='V')"),
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Link a vendor (Address Book entry) to an image (admin only)"""
+    from app.models import AddressBook
+    import json
+
+    image = get_company_image(image_id, admin_user, db)
+
+    vendor = db.query(AddressBook).filter(
+        AddressBook.id == address_book_id,
+        AddressBook.search_type == 'V',
+        AddressBook.is_active == True,
+        AddressBook.company_id == admin_user.company_id
+    ).first()
+
+    if not vendor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vendor not found in Address Book"
+        )
+
+    # Update structured data with vendor info
+    try:
+        structured_data = {}
+        if image.structured_data:
+            structured_data = json.loads(image.structured_data)
+
+        # Update supplier info with Address Book data
+        if "supplier" not in structured_data:
+            structured_data["supplier"] = {}
+
+        structured_data["supplier"]["company_name"] = vendor.alpha_name
+        structured_data["supplier"]["address_book_id"] = vendor.id
+        if vendor.email:
+            structured_data["supplier"]["email"] = vendor.email
+        if vendor.phone_primary:
+            structured_data["supplier"]["phone"] = vendor.phone_primary
+        if vendor.address_line_1:
+            structured_data["supplier"]["company_address"] = " ".join(filter(None, [
+                vendor.address_line_1, vendor.city, vendor.country
+            ]))
+        if vendor.tax_id:
+            structured_data["supplier"]["tax_number"] = vendor.tax_id
+
+        image.structured_data = json.dumps(structured_data)
+        image.address_book_id = vendor.id  # Link to Address Book
+        db.commit()
+        db.refresh(image)
+
+        return {
+            "success": True,
+            "message": f"Vendor '{vendor.alpha_name}' linked to invoice successfully",
+            "vendor": {
+                "id": vendor.id,
+                "address_number": vendor.address_number,
+                "name": vendor.alpha_name,
+                "display_name": vendor.alpha_name
+            },
+            "image_id": image_id
+        }
+
+    except json.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error parsing structured data"
+        )
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error linking vendor: {str(e)}"
+        )
+
+
+@router.post("/admin/images/upload")
+def admin_upload_image(
+    file: UploadFile = File(...),
+    document_type: str = "invoice",
+    invoice_category: str = None,
+    site_id: int = None,
+    contract_id: int = None,
+    use_cache: bool = Query(True, description="Reuse the processing result of an identical earlier upload"),
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Upload and process an image (admin only) - creates document under admin's account."""
+    from app.models import ProcessedImage
+    from app.services.s3 import upload_to_s3, process_image
+    from app.services.cache import cache_service, hash_document
+    from app.config import settings
+    import uuid
+    import os
+    import json
+
+    # Supported file types
+    SUPPORTED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff"]
+    SUPPORTED_PDF_TYPE = "application/pdf"
+
+    # Check file type
+    is_image = file.content_type in SUPPORTED_IMAGE_TYPES
+    is_pdf = file.content_type == SUPPORTED_PDF_TYPE
+
+    if not is_image and not is_pdf:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File must be an image or PDF. Supported types: {', '.join(SUPPORTED_IMAGE_TYPES + [SUPPORTED_PDF_TYPE])}"
+        )
+
+    # Read file content
+    content = file.file.read()
+
+    # Identical uploads reuse the earlier OCR/AI result
+    content_hash = None
+    cached_results = None
+    if use_cache and settings.document_cache_enabled and admin_user.company_id:
+        content_hash = hash_document(content)
+        cached_results = run_async(cache_service.get_document_result, admin_user.company_id, content_hash)
+        if cached_results:
+            logger.info(f"[DOCUMENT_CACHE] Admin upload - reusing processing result for {content_hash[:12]}")
+
+    # Convert PDF to image if necessary (the original PDF is kept for multi-page extraction)
+    pdf_bytes = content if is_pdf else None
+    if is_pdf:
+        from app.api.images import convert_pdf_to_image
+        content = convert_pdf_to_image(content)
+        unique_filename = f"{uuid.uuid4()}.png"
+    else:
+        file_extension = file.filename.split(".")[-1]
+        unique_filename = f"{uuid.uuid4()}.{file_extension}"
+
+    # Ensure uploads directory exists
+    os.makedirs("uploads", exist_ok=True)
+
+    # Save file temporarily
+    temp_file_path = f"uploads/{unique_filename}"
+    with open(temp_file_path, "wb") as buffer:
+        buffer.write(content)
+
+    try:
+        # Read file content for invoice processing
+        with open(temp_file_path, 'rb') as f:
+            file_bytes = f.read()
+
+        # Process image (resize, compress, OCR, AI extraction) - pass db and company_id for vendor lookup/creation
+        processed_image_path, invoice_results = process_image(
+            temp_file_path, file_bytes, db, admin_user.company_id,
+            invoice_results=cached_results, pdf_bytes=pdf_bytes
+        )
+
+        if content_hash and not cached_results:
+            run_async(cache_service.set_document_result, admin_user.company_id, content_hash, invoice_results)
+
+        # Increment company's document usage counter IMMEDIATELY after OCR processing
+        # This counts every stored document, duplicate or served from the result cache
+        if admin_user.company_id:
+            company = db.query(Company).filter(Company.id == admin_user.company_id).first()
+            if company:
+                old_count = company.documents_used_this_month
+                company.documents_used_this_month += 1
+                db.commit()
+                logger.info(f"[DOCUMENT_COUNTER] Admin upload - Company {company.id} ({company.name}): {old_count} -> {company.documents_used_this_month}")
+
+        # Try to upload to S3, fallback to local if it fails
+        try:
+            s3_key, s3_url = upload_to_s3(processed_image_path, unique_filename)
+            processing_status = "completed"
+            s3_url = s3_key
+
+            if os.path.exists(processed_image_path):
+                os.remove(processed_image_path)
+
+        except Exception as s3_error:
+            print(f"S3 upload failed, using local storage: {s3_error}")
+            s3_key = f"local/{unique_filename}"
+            s3_url = f"local/{unique_filename}"
+            processing_status = "completed_local"
+
+            final_file_path = f"uploads/{unique_filename}"
+            if processed_image_path != temp_file_path:
+                import shutil
+                shutil.move(processed_image_path, final_file_path)
+
+        # Prepare structured data for storage
+        structured_data_json = None
+        extraction_confidence = 0.0
+
+        if invoice_results.get("structured_data"):
+            structured_data_json = json.dumps(invoice_results["structured_data"])
+            if isinstance(invoice_results["structured_data"], dict):
+                validation = invoice_results["structured_data"].get("validation", {})
+                extraction_confidence = float(validation.get("confidence_score", 0))
+
+                # Check for duplicate invoice (within same company)
+                invoice_number, supplier_name = extract_invoice_info_for_duplicate_check(
+                    invoice_results["structured_data"]
+                )
+                is_duplicate, existing_id = check_duplicate_invoice(db, invoice_number, supplier_name, admin_user.company_id)
+
+                if is_duplicate:
+                    # Clean up temporary files
+                    if os.path.exists(temp_file_path):
+                        os.remove(temp_file_path)
+                    if processed_image_path and os.path.exists(processed_image_path):
+                        os.remove(processed_image_path)
+
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Duplicate invoice detected. Invoice number '{invoice_number}' already exists (ID: {existing_id})"
+                    )
+
+        enhancement_features = invoice_results.get("enhancement_features", {})
+
+        # Create database record using the authenticated admin user
+        db_image = ProcessedImage(
+            user_id=admin_user.id,
+            original_filename=file.filename,
+            s3_key=s3_key,
+            s3_url=s3_url,
+            processing_status=processing_status,
+            document_type=document_type,
+            invoice_category=invoice_category if document_type == "invoice" else None,
+            site_id=site_id,
+            contract_id=contract_id,
+            ocr_extracted_words=int(invoice_results.get("total_words_extracted", 0)),
+            ocr_average_confidence=float(invoice_results.get("average_confidence", 0.0)),
+            ocr_preprocessing_methods=int(enhancement_features.get("multiple_preprocessing", 1)),
+            patterns_detected=int(enhancement_features.get("pattern_recognition", 0)),
+            has_structured_data=bool(invoice_results.get("structured_data")),
+            structured_data=structured_data_json,
+            extraction_confidence=float(extraction_confidence),
+            processing_method="enhanced"
+        )
+
+        db.add(db_image)
+        db.commit()
+        db.refresh(db_image)
+
+        # Process line items: match with Item Master, create InvoiceItem records,
+        # and auto-receive matched items to main warehouse
+        line_items_result = None
+        if invoice_results.get("structured_data") and document_type == "invoice":
+            line_items_result = process_invoice_line_items(
+                db=db,
+                invoice_id=db_image.id,
+                structured_data=invoice_results["structured_data"],
+                company_id=admin_user.company_id,
+                user_id=admin_user.id
+            )
+            logger.info(f"Line items processing: {line_items_result}")
+
+        # Return response matching the UploadResponse interface
+        return {
+            "id": db_image.id,
+            "original_filename": db_image.original_filename,
+            "processing_status": db_image.processing_status,
+            "document_type": db_image.document_type,
+            "invoice_category": db_image.invoice_category,
+            "created_at": db_image.created_at.isoformat(),
+            "structured_data": structured_data_json,
+            "vendor_lookup": invoice_results.get("vendor_lookup"),
+            "line_items_processing": line_items_result
+        }
+
+    except Exception as e:
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error processing image: {str(e)}"
+        )
+
+
+@router.post("/admin/images/upload-bulk")
+async def admin_upload_bulk_images(
+    files: List[UploadFile] = File(...),
+    document_type: str = "invoice",
+    invoice_category: str = None,
+    use_cache: bool = Query(True, description="Reuse the processing result of identical earlier uploads"),
+    background: bool = Query(False, description="Return a batch id immediately and process in the background"),
+    admin_user: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload and process multiple images (admin only) - creates documents under admin's account.
+
+    Files are processed concurrently (see app/services/bulk_upload.py) and saved in one
+    commit. With background=true the response only carries the batch_id; poll
+    GET /admin/images/upload-bulk/{batch_id} for progress and the results.
+    """
+    from app.services.cache import cache_service, hash_document
+    from app.services.bulk_upload import bulk_upload_pipeline
+    from app.config import settings
+
+    # Supported file types
+    SUPPORTED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp", "image/tiff"]
+    SUPPORTED_PDF_TYPE = "application/pdf"
+
+    # Validate file count
+    if len(files) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No files provided"
+        )
+
+    if len(files) > 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Maximum 50 files allowed per upload"
+        )
+
+    # admin_user is already authenticated via get_current_admin dependency
+
+    batch = bulk_upload_pipeline.create_batch(
+        admin_user.id, admin_user.company_id, document_type, invoice_category
+    )
+
+    use_document_cache = use_cache and settings.document_cache_enabled and admin_user.company_id
+    uploads = []
+    for file in files:
+        # Check file type
+        is_image = file.content_type in SUPPORTED_IMAGE_TYPES
+        is_pdf = file.content_type == SUPPORTED_PDF_TYPE
+
+        if not is_image and not is_pdf:
+            batch.add_rejected(file.filename, f"Unsupported file type: {file.content_type}")
+            continue
+
+        content = await file.read()
+        content_hash = await run_sync(hash_document, content) if use_document_cache else None
+        uploads.append(batch.add_file(file.filename, content, is_pdf, content_hash))
+
+    # Identical uploads reuse the earlier OCR/AI result (one cache round-trip for the batch)
+    if use_document_cache and uploads:
+        cached = await cache_service.get_document_results(
+            admin_user.company_id, [upload.content_hash for upload in uploads]
+        )
+        for upload, cached_results in zip(uploads, cached):
+            upload.cached_results = cached_results
+
+    if background:
+        bulk_upload_pipeline.start(batch)
+        return {
+            "success": True,
+            "batch_id": batch.batch_id,
+            "status": batch.status,
+            "total_files": len(batch.files)
+        }
+
+    return await bulk_upload_pipeline.run(batch)
+
+
+@router.get("/admin/images/upload-bulk/{batch_id}")
+async def get_bulk_upload_status(
+    batch_id: str,
+    admin_user: User = Depends(get_current_admin)
+):
+    """Per-file progress of a bulk upload; includes results and errors once completed."""
+    from app.services.bulk_upload import bulk_upload_pipeline
+
+    snapshot = await bulk_upload_pipeline.get_status(batch_id, admin_user.company_id)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Bulk upload batch not found"
+        )
+    return snapshot
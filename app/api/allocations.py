@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import Optional, List
@@ -13,35 +12,13 @@ from app.models import (
     Site, Project, Client, Account
 )
 from app.services.journal_posting import JournalPostingService
-from app.utils.security import verify_token
+from app.services.sequences import reserve_numbers, max_suffix
+from app.services.dependency import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 # ============================================================================
@@ -76,6 +53,12 @@ class RecognizePeriodRequest(BaseModel):
     notes: Optional[str] = Field(None, description="Comments/reason for recognition")
 
 
+class RecognizePeriodsBatchRequest(BaseModel):
+    period_ids: List[int] = Field(..., min_length=1, max_length=1000, description="Periods to recognize")
+    reference: Optional[str] = Field(None, max_length=100, description="External reference (payment voucher, check #)")
+    notes: Optional[str] = Field(None, description="Comments/reason for recognition")
+
+
 class AllocationPeriodResponse(BaseModel):
     id: int
     period_start: date
@@ -301,7 +284,7 @@ def get_allocation_with_access_check(
 # ============================================================================
 
 @router.post("", status_code=status.HTTP_201_CREATED)
-async def create_allocation(
+def create_allocation(
     allocation_data: AllocationCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -463,7 +446,7 @@ async def create_allocation(
 
 
 @router.get("", response_model=List[AllocationResponse])
-async def get_allocations(
+def get_allocations(
     contract_id: Optional[int] = Query(None),
     site_id: Optional[int] = Query(None),
     project_id: Optional[int] = Query(None),
@@ -522,7 +505,7 @@ async def get_allocations(
 
 
 @router.get("/{allocation_id}")
-async def get_allocation(
+def get_allocation(
     allocation_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -538,7 +521,7 @@ async def get_allocation(
 
 
 @router.put("/{allocation_id}")
-async def update_allocation(
+def update_allocation(
     allocation_id: int,
     update_data: AllocationUpdate,
     db: Session = Depends(get_db),
@@ -608,7 +591,7 @@ async def update_allocation(
 
 
 @router.delete("/{allocation_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_allocation(
+def delete_allocation(
     allocation_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -639,7 +622,7 @@ async def delete_allocation(
 
 
 @router.post("/{allocation_id}/cancel")
-async def cancel_allocation(
+def cancel_allocation(
     allocation_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -701,30 +684,27 @@ def get_period_with_access_check(db: Session, period_id: int, company_id: int) -
     return period if has_access else None
 
 
-def generate_recognition_number(db: Session) -> str:
-    """Generate a unique recognition number in format REC-YYYY-XXXX"""
-    year = datetime.utcnow().year
-
-    # Get the highest recognition number for this year
-    latest = db.query(AllocationPeriod).filter(
-        AllocationPeriod.recognition_number.like(f"REC-{year}-%")
-    ).order_by(AllocationPeriod.recognition_number.desc()).first()
+def reserve_recognition_numbers(db: Session, count: int = 1) -> List[str]:
+    """
+    Reserve count consecutive recognition numbers (REC-YYYY-XXXX) on the REC
+    sequence shared by all companies, so numbers stay globally unique like the
+    recognition_number_seq they replace. The first reservation continues after
+    the highest number in use.
+    """
+    prefix = f"REC-{datetime.utcnow().year}-"
+    return reserve_numbers(
+        db, None, prefix, count, width=4,
+        seed=lambda: max_suffix(db, AllocationPeriod.recognition_number, None, None, prefix)
+    )
 
-    if latest and latest.recognition_number:
-        # Extract the sequence number and increment
-        try:
-            seq = int(latest.recognition_number.split('-')[-1])
-            seq += 1
-        except:
-            seq = 1
-    else:
-        seq = 1
 
-    return f"REC-{year}-{str(seq).zfill(4)}"
+def generate_recognition_number(db: Session) -> str:
+    """Generate a unique recognition number in format REC-YYYY-XXXX"""
+    return reserve_recognition_numbers(db)[0]
 
 
 @router.post("/periods/{period_id}/recognize")
-async def recognize_period(
+def recognize_period(
     period_id: int,
     request: RecognizePeriodRequest = None,
     db: Session = Depends(get_db),
@@ -804,8 +784,94 @@ async def recognize_period(
     }
 
 
+@router.post("/periods/recognize-batch")
+def recognize_periods_batch(
+    request: RecognizePeriodsBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Recognize many periods at once (period-end recognition run).
+    Recognition works like the single-period endpoint; the journal entries are
+    then posted as one batch in a single transaction.
+    """
+    results = {}
+    periods = []
+    for period_id in dict.fromkeys(request.period_ids):
+        period = get_period_with_access_check(db, period_id, current_user.company_id)
+        if not period:
+            results[period_id] = {
+                "period_id": period_id, "status": "failed", "recognition_number": None,
+                "journal_entry_number": None, "error": "Period not found"
+            }
+        elif period.is_recognized:
+            results[period_id] = {
+                "period_id": period_id, "status": "failed", "recognition_number": None,
+                "journal_entry_number": None, "error": "Period already recognized"
+            }
+        else:
+            periods.append(period)
+
+    # One block of consecutive recognition numbers, reserved on the sequence row
+    recognition_numbers = reserve_recognition_numbers(db, len(periods)) if periods else []
+    now = datetime.utcnow()
+    for period, recognition_number in zip(periods, recognition_numbers):
+        period.is_recognized = True
+        period.recognized_at = now
+        period.recognition_number = recognition_number
+        period.recognition_reference = request.reference
+        period.recognition_notes = request.notes
+        period.recognized_by = current_user.id
+        db.add(RecognitionLog(
+            period_id=period.id,
+            action="recognized",
+            recognition_number=recognition_number,
+            previous_status=False,
+            new_status=True,
+            reference=request.reference,
+            notes=request.notes,
+            user_id=current_user.id
+        ))
+        results[period.id] = {
+            "period_id": period.id, "status": "recognized", "recognition_number": recognition_number,
+            "journal_entry_number": None, "error": None
+        }
+
+    db.commit()
+
+    logger.info(f"Recognized {len(periods)} periods by user {current_user.id}")
+
+    # Auto-post the journal entries if accounting is set up
+    journal_summary = None
+    if periods:
+        try:
+            has_accounts = db.query(Account).filter(
+                Account.company_id == current_user.company_id
+            ).first()
+
+            if has_accounts:
+                journal_service = JournalPostingService(db, current_user.company_id, current_user.id)
+                batch = journal_service.post_batch(journal_service.post_invoice_allocation, periods, post_immediately=True)
+                for result in batch["results"]:
+                    results[result["source_id"]]["journal_entry_number"] = result["entry_number"]
+                    results[result["source_id"]]["error"] = result["error"]
+                journal_summary = {key: batch[key] for key in ("posted", "skipped", "failed")}
+        except Exception as e:
+            logger.warning(f"Failed to auto-post journal entries for {len(periods)} periods: {e}")
+            # Don't fail the recognition if journal posting fails
+            for period in periods:
+                results[period.id]["error"] = f"Journal posting failed: {e}"
+
+    return {
+        "message": f"Recognized {len(periods)} of {len(results)} periods",
+        "recognized": len(periods),
+        "journal_entries": journal_summary,
+        "results": list(results.values())
+    }
+
+
 @router.post("/periods/{period_id}/unrecognize")
-async def unrecognize_period(
+def unrecognize_period(
     period_id: int,
     request: RecognizePeriodRequest = None,
     db: Session = Depends(get_db),
@@ -862,7 +928,7 @@ async def unrecognize_period(
 
 
 @router.get("/periods/{period_id}/history")
-async def get_period_recognition_history(
+def get_period_recognition_history(
     period_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -901,7 +967,7 @@ async def get_period_recognition_history(
 
 
 @router.get("/contract/{contract_id}/summary")
-async def get_contract_allocation_summary(
+def get_contract_allocation_summary(
     contract_id: int,
     period_start: Optional[date] = Query(None),
     period_end: Optional[date] = Query(None),
@@ -1071,7 +1137,7 @@ def build_allocation_response(allocation: InvoiceAllocation, db: Session) -> dic
 
 
 @router.get("/clients/{client_id}/cost-center")
-async def get_client_cost_center(
+def get_client_cost_center(
     client_id: int,
     period_start: Optional[date] = Query(None),
     period_end: Optional[date] = Query(None),
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -7,7 +7,8 @@ from datetime import date
 from app.database import get_db
 from app.models import User, Site, AddressBook, Floor, Room, Equipment, SubEquipment, HandHeldDevice
 import os
-from app.utils.security import verify_token
+from app.services.auth_context import get_auth_context
+from app.services.dependency import get_current_user
 from jose import jwt
 from app.config import settings
 import logging
@@ -40,29 +41,8 @@ def verify_token_payload(token: str) -> Optional[dict]:
         return None
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
-
-
 def get_current_user_or_hhd(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -71,7 +51,9 @@ def get_current_user_or_hhd(
     Returns User object for admin tokens, or HHDContext for mobile tokens.
     """
     token = credentials.credentials
-    payload = verify_token_payload(token)
+    # Decoded once per request and shared with the middlewares
+    auth = get_auth_context(request, token)
+    payload = auth.payload
 
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
@@ -105,7 +87,7 @@ def get_current_user_or_hhd(
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = auth.user
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
@@ -393,7 +375,7 @@ def floor_to_response(floor: Floor, include_children: bool = False) -> dict:
 # ============================================================================
 
 @router.get("/sites/{site_id}/assets")
-async def get_site_assets(
+def get_site_assets(
     site_id: int,
     include_inactive: bool = False,
     user: User = Depends(get_current_user),
@@ -425,7 +407,7 @@ async def get_site_assets(
 
 
 @router.get("/sites/{site_id}/assets/summary")
-async def get_site_assets_summary(
+def get_site_assets_summary(
     site_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -488,7 +470,7 @@ async def get_site_assets_summary(
 # ============================================================================
 
 @router.get("/floors/")
-async def get_floors(
+def get_floors(
     site_id: int,
     include_inactive: bool = False,
     auth_context = Depends(get_current_user_or_hhd),
@@ -506,7 +488,7 @@ async def get_floors(
 
 
 @router.get("/floors/{floor_id}")
-async def get_floor(
+def get_floor(
     floor_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -521,7 +503,7 @@ async def get_floor(
 
 
 @router.post("/floors/")
-async def create_floor(
+def create_floor(
     data: FloorCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -547,7 +529,7 @@ async def create_floor(
 
 
 @router.put("/floors/{floor_id}")
-async def update_floor(
+def update_floor(
     floor_id: int,
     data: FloorUpdate,
     user: User = Depends(require_admin),
@@ -572,7 +554,7 @@ async def update_floor(
 
 
 @router.delete("/floors/{floor_id}")
-async def delete_floor(
+def delete_floor(
     floor_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -596,7 +578,7 @@ async def delete_floor(
 # ============================================================================
 
 @router.get("/rooms/")
-async def get_rooms(
+def get_rooms(
     floor_id: int,
     include_inactive: bool = False,
     auth_context = Depends(get_current_user_or_hhd),
@@ -618,7 +600,7 @@ async def get_rooms(
 
 
 @router.get("/rooms/{room_id}")
-async def get_room(
+def get_room(
     room_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -633,7 +615,7 @@ async def get_room(
 
 
 @router.post("/rooms/")
-async def create_room(
+def create_room(
     data: RoomCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -664,7 +646,7 @@ async def create_room(
 
 
 @router.put("/rooms/{room_id}")
-async def update_room(
+def update_room(
     room_id: int,
     data: RoomUpdate,
     user: User = Depends(require_admin),
@@ -689,7 +671,7 @@ async def update_room(
 
 
 @router.delete("/rooms/{room_id}")
-async def delete_room(
+def delete_room(
     room_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -713,7 +695,7 @@ async def delete_room(
 # ============================================================================
 
 @router.get("/equipment/")
-async def get_equipment(
+def get_equipment(
     room_id: Optional[int] = None,
     site_id: Optional[int] = None,
     category: Optional[str] = None,
@@ -759,7 +741,7 @@ async def get_equipment(
 
 
 @router.get("/equipment/{equipment_id}")
-async def get_equipment_item(
+def get_equipment_item(
     equipment_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -774,7 +756,7 @@ async def get_equipment_item(
 
 
 @router.post("/equipment/")
-async def create_equipment(
+def create_equipment(
     data: EquipmentCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -824,7 +806,7 @@ async def create_equipment(
 
 
 @router.put("/equipment/{equipment_id}")
-async def update_equipment(
+def update_equipment(
     equipment_id: int,
     data: EquipmentUpdate,
     user: User = Depends(require_admin),
@@ -856,7 +838,7 @@ async def update_equipment(
 
 
 @router.delete("/equipment/{equipment_id}")
-async def delete_equipment(
+def delete_equipment(
     equipment_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -881,7 +863,7 @@ async def delete_equipment(
 # ============================================================================
 
 @router.get("/sub-equipment/")
-async def get_sub_equipment(
+def get_sub_equipment(
     equipment_id: int,
     include_inactive: bool = False,
     user: User = Depends(get_current_user),
@@ -903,7 +885,7 @@ async def get_sub_equipment(
 
 
 @router.get("/sub-equipment/{sub_equipment_id}")
-async def get_sub_equipment_item(
+def get_sub_equipment_item(
     sub_equipment_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -918,7 +900,7 @@ async def get_sub_equipment_item(
 
 
 @router.post("/sub-equipment/")
-async def create_sub_equipment(
+def create_sub_equipment(
     data: SubEquipmentCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -956,7 +938,7 @@ async def create_sub_equipment(
 
 
 @router.put("/sub-equipment/{sub_equipment_id}")
-async def update_sub_equipment(
+def update_sub_equipment(
     sub_equipment_id: int,
     data: SubEquipmentUpdate,
     user: User = Depends(require_admin),
@@ -981,7 +963,7 @@ async def update_sub_equipment(
 
 
 @router.delete("/sub-equipment/{sub_equipment_id}")
-async def delete_sub_equipment(
+def delete_sub_equipment(
     sub_equipment_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -1007,7 +989,7 @@ async def delete_sub_equipment(
 # ============================================================================
 
 @router.post("/bulk-import")
-async def bulk_import_assets(
+def bulk_import_assets(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -2,7 +2,6 @@
 Attendance API endpoints for tracking technician availability
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from pydantic import BaseModel
@@ -12,11 +11,10 @@ from decimal import Decimal
 import logging
 
 from app.database import get_db
+from app.services.dependency import get_current_user
 from app.models import User, Technician, TechnicianAttendance, AddressBook
-from app.api.auth import verify_token
 
 router = APIRouter()
-security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
 
@@ -83,18 +81,6 @@ class BulkEmployeeAttendanceCreate(BaseModel):
 
 # ============ Dependencies ============
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
-
 def require_admin_or_accounting(user: User = Depends(get_current_user)):
     """Require admin or accounting role"""
     if user.role not in ["admin", "accounting"]:
@@ -177,7 +163,7 @@ def attendance_to_response(attendance: TechnicianAttendance, include_technician:
 # ============ Endpoints ============
 
 @router.get("/attendance/")
-async def get_attendance_records(
+def get_attendance_records(
     start_date: Optional[date] = Query(None, description="Start date for filtering"),
     end_date: Optional[date] = Query(None, description="End date for filtering"),
     technician_id: Optional[int] = Query(None, description="Filter by technician"),
@@ -211,7 +197,7 @@ async def get_attendance_records(
 
 
 @router.get("/attendance/daily/{record_date}")
-async def get_daily_attendance(
+def get_daily_attendance(
     record_date: date,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -274,7 +260,7 @@ async def get_daily_attendance(
 
 
 @router.get("/attendance/summary")
-async def get_attendance_summary(
+def get_attendance_summary(
     start_date: date = Query(..., description="Start date"),
     end_date: date = Query(..., description="End date"),
     technician_id: Optional[int] = Query(None, description="Filter by technician"),
@@ -347,7 +333,7 @@ async def get_attendance_summary(
 
 
 @router.get("/attendance/{attendance_id}")
-async def get_attendance_record(
+def get_attendance_record(
     attendance_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -368,7 +354,7 @@ async def get_attendance_record(
 
 
 @router.post("/attendance/")
-async def create_attendance_record(
+def create_attendance_record(
     data: AttendanceCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -437,7 +423,7 @@ async def create_attendance_record(
 
 
 @router.post("/attendance/bulk")
-async def create_bulk_attendance(
+def create_bulk_attendance(
     data: BulkAttendanceCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -519,7 +505,7 @@ async def create_bulk_attendance(
 
 
 @router.put("/attendance/{attendance_id}")
-async def update_attendance_record(
+def update_attendance_record(
     attendance_id: int,
     data: AttendanceUpdate,
     user: User = Depends(get_current_user),
@@ -567,7 +553,7 @@ async def update_attendance_record(
 
 
 @router.delete("/attendance/{attendance_id}")
-async def delete_attendance_record(
+def delete_attendance_record(
     attendance_id: int,
     user: User = Depends(require_admin_or_accounting),
     db: Session = Depends(get_db)
@@ -596,7 +582,7 @@ async def delete_attendance_record(
 
 
 @router.patch("/attendance/{attendance_id}/approve-leave")
-async def approve_leave(
+def approve_leave(
     attendance_id: int,
     approved: bool = True,
     user: User = Depends(require_admin_or_accounting),
@@ -631,7 +617,7 @@ async def approve_leave(
 
 
 @router.get("/attendance/technician/{technician_id}/monthly")
-async def get_technician_monthly_attendance(
+def get_technician_monthly_attendance(
     technician_id: int,
     year: int = Query(..., description="Year"),
     month: int = Query(..., description="Month (1-12)"),
@@ -705,7 +691,7 @@ async def get_technician_monthly_attendance(
 # ============ Employee Attendance Endpoints (AddressBook-based) ============
 
 @router.get("/attendance/employees/")
-async def get_employee_attendance_records(
+def get_employee_attendance_records(
     start_date: Optional[date] = Query(None, description="Start date for filtering"),
     end_date: Optional[date] = Query(None, description="End date for filtering"),
     address_book_id: Optional[int] = Query(None, description="Filter by employee (AddressBook ID)"),
@@ -737,7 +723,7 @@ async def get_employee_attendance_records(
 
 
 @router.get("/attendance/employees/daily/{record_date}")
-async def get_daily_employee_attendance(
+def get_daily_employee_attendance(
     record_date: date,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -806,7 +792,7 @@ async def get_daily_employee_attendance(
 
 
 @router.post("/attendance/employees/")
-async def create_employee_attendance_record(
+def create_employee_attendance_record(
     data: EmployeeAttendanceCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -876,7 +862,7 @@ async def create_employee_attendance_record(
 
 
 @router.post("/attendance/employees/bulk")
-async def create_bulk_employee_attendance(
+def create_bulk_employee_attendance(
     data: BulkEmployeeAttendanceCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -954,7 +940,7 @@ async def create_bulk_employee_attendance(
 
 
 @router.get("/attendance/employees/{address_book_id}/monthly")
-async def get_employee_monthly_attendance(
+def get_employee_monthly_attendance(
     address_book_id: int,
     year: int = Query(..., description="Year"),
     month: int = Query(..., description="Month (1-12)"),
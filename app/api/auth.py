@@ -8,11 +8,12 @@ import os
 from app.database import get_db
 from app.schemas import UserCreate, UserLogin, Token, User as UserSchema, PasswordReset, PasswordResetConfirm, UserUpdate, RefreshTokenRequest
 from app.services.auth import create_user, authenticate_user, get_user_by_email, get_user_by_id, update_user_profile
-from app.utils.security import create_access_token, verify_token, get_password_hash, generate_refresh_token, get_refresh_token_expiry
+from app.utils.security import create_access_token, get_password_hash, generate_refresh_token, get_refresh_token_expiry
 from app.utils.rate_limiter import limiter, RateLimits
 from app.config import settings
 from app.services.otp import OTPService
 from app.models import RefreshToken, Company
+from app.services.auth_context import get_auth_context
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
@@ -92,9 +93,9 @@ def check_subscription_active(user, db: Session) -> dict:
     return {"active": info["active"], "reason": info["reason"]}
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+def get_current_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     import logging
     logger = logging.getLogger(__name__)
@@ -112,23 +113,25 @@ async def get_current_user(
 
     #logger.info(f"[get_current_user] Credentials scheme: {credentials.scheme}, token length: {len(credentials.credentials) if credentials.credentials else 0}")
 
-    email = verify_token(credentials.credentials)
-    if email is None:
+    # Token and user are resolved once per request and shared with the middlewares
+    auth = get_auth_context(request, credentials.credentials)
+    if auth.subject is None:
         #logger.error("[get_current_user] Token verification failed - email is None")
         raise credentials_exception
 
-    #logger.info(f"[get_current_user] Token verified for email: {email}")
+    #logger.info(f"[get_current_user] Token verified for email: {auth.subject}")
 
-    user = get_user_by_email(db, email=email)
+    user = auth.user
     if user is None:
-        #logger.error(f"[get_current_user] User not found for email: {email}")
+        #logger.error(f"[get_current_user] User not found for email: {auth.subject}")
         raise credentials_exception
 
     #logger.info(f"[get_current_user] User found: {user.email}")
     return user
 
 
-async def get_current_active_user(
+def get_current_active_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -136,7 +139,7 @@ async def get_current_active_user(
     Get current user and verify their subscription is active.
     Use this for protected routes that require an active subscription.
     """
-    user = await get_current_user(credentials, db)
+    user = get_current_user(request, credentials)
 
     subscription_check = check_subscription_active(user, db)
     if not subscription_check["active"]:
@@ -150,7 +153,7 @@ async def get_current_active_user(
 
 @router.post("/register", response_model=UserSchema)
 @limiter.limit(RateLimits.REGISTER)
-async def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
+def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
     try:
         db_user = create_user(db=db, user=user)
         return db_user
@@ -165,7 +168,7 @@ async def register(request: Request, user: UserCreate, db: Session = Depends(get
 
 @router.post("/login", response_model=Token)
 @limiter.limit(RateLimits.LOGIN)
-async def login(request: Request, user_credentials: UserLogin, db: Session = Depends(get_db)):
+def login(request: Request, user_credentials: UserLogin, db: Session = Depends(get_db)):
     user = authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
@@ -210,7 +213,7 @@ async def login(request: Request, user_credentials: UserLogin, db: Session = Dep
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
     """Get a new access token using a refresh token"""
     # Find the refresh token in database
     db_token = db.query(RefreshToken).filter(
@@ -277,7 +280,7 @@ async def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_
 
 
 @router.post("/logout")
-async def logout(
+def logout(
     request: RefreshTokenRequest,
     db: Session = Depends(get_db),
     current_user: UserSchema = Depends(get_current_user)
@@ -298,12 +301,12 @@ async def logout(
 
 
 @router.get("/me", response_model=UserSchema)
-async def read_users_me(current_user: UserSchema = Depends(get_current_user)):
+def read_users_me(current_user: UserSchema = Depends(get_current_user)):
     return current_user
 
 
 @router.get("/quota")
-async def get_user_quota(
+def get_user_quota(
     response: Response,
     current_user: UserSchema = Depends(get_current_user)
 ):
@@ -321,7 +324,7 @@ async def get_user_quota(
 
 
 @router.get("/login-page", response_class=HTMLResponse)
-async def login_page():
+def login_page():
     """Serve the login HTML page"""
     template_path = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "login.html")
     
@@ -337,7 +340,7 @@ async def login_page():
 
 
 @router.get("/dashboard", response_class=HTMLResponse)
-async def quota_dashboard():
+def quota_dashboard():
     """Serve the quota dashboard HTML page"""
     template_path = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "quota_dashboard.html")
     
@@ -353,7 +356,7 @@ async def quota_dashboard():
 
 
 @router.put("/profile", response_model=UserSchema)
-async def update_profile(
+def update_profile(
     user_update: UserUpdate,
     current_user: UserSchema = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -373,7 +376,7 @@ async def update_profile(
 
 @router.post("/forgot-password")
 @limiter.limit(RateLimits.FORGOT_PASSWORD)
-async def forgot_password(request: Request, password_reset: PasswordReset, db: Session = Depends(get_db)):
+def forgot_password(request: Request, password_reset: PasswordReset, db: Session = Depends(get_db)):
     """
     Request a password reset OTP.
     Sends an OTP code to the user's email if it exists.
@@ -412,7 +415,7 @@ async def forgot_password(request: Request, password_reset: PasswordReset, db: S
 
 
 @router.post("/reset-password")
-async def reset_password(password_reset: PasswordResetConfirm, db: Session = Depends(get_db)):
+def reset_password(password_reset: PasswordResetConfirm, db: Session = Depends(get_db)):
     """
     Reset password using OTP code.
     Verifies the OTP and updates the user's password.
@@ -451,7 +454,7 @@ async def reset_password(password_reset: PasswordResetConfirm, db: Session = Dep
 
 
 @router.get("/subscription-status")
-async def get_subscription_status(
+def get_subscription_status(
     current_user: UserSchema = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -99,7 +99,7 @@ def validate_bu_code(code: str) -> str:
 # =============================================================================
 
 @router.get("/business-units", response_model=List[BusinessUnitSchema])
-async def list_business_units(
+def list_business_units(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     bu_type: Optional[str] = Query(None, description="Filter by type: balance_sheet or profit_loss"),
@@ -148,7 +148,7 @@ async def list_business_units(
 
 
 @router.get("/business-units/brief", response_model=List[BusinessUnitBrief])
-async def list_business_units_brief(
+def list_business_units_brief(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     bu_type: Optional[str] = Query(None, description="Filter by type"),
@@ -173,7 +173,7 @@ async def list_business_units_brief(
 
 
 @router.get("/business-units/hierarchy", response_model=BusinessUnitHierarchy)
-async def get_business_unit_hierarchy(
+def get_business_unit_hierarchy(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -207,7 +207,7 @@ async def get_business_unit_hierarchy(
 
 
 @router.post("/business-units", response_model=BusinessUnitSchema, status_code=status.HTTP_201_CREATED)
-async def create_business_unit(
+def create_business_unit(
     bu_data: BusinessUnitCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -285,7 +285,7 @@ async def create_business_unit(
 
 
 @router.get("/business-units/{bu_id}", response_model=BusinessUnitWithChildren)
-async def get_business_unit(
+def get_business_unit(
     bu_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -386,7 +386,7 @@ async def get_business_unit(
 
 
 @router.put("/business-units/{bu_id}", response_model=BusinessUnitSchema)
-async def update_business_unit(
+def update_business_unit(
     bu_id: int,
     bu_data: BusinessUnitUpdate,
     current_user: User = Depends(get_current_user),
@@ -440,7 +440,7 @@ async def update_business_unit(
 
 
 @router.delete("/business-units/{bu_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_business_unit(
+def delete_business_unit(
     bu_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -542,7 +542,7 @@ async def delete_business_unit(
 # =============================================================================
 
 @router.post("/business-units/{bu_id}/link-warehouse/{warehouse_id}")
-async def link_warehouse_to_bu(
+def link_warehouse_to_bu(
     bu_id: int,
     warehouse_id: int,
     current_user: User = Depends(get_current_user),
@@ -581,7 +581,7 @@ async def link_warehouse_to_bu(
 
 
 @router.post("/business-units/{bu_id}/unlink-warehouse/{warehouse_id}")
-async def unlink_warehouse_from_bu(
+def unlink_warehouse_from_bu(
     bu_id: int,
     warehouse_id: int,
     current_user: User = Depends(get_current_user),
@@ -613,7 +613,7 @@ async def unlink_warehouse_from_bu(
 # =============================================================================
 
 @router.get("/business-units/{bu_id}/ledger", response_model=BusinessUnitLedgerReport)
-async def get_business_unit_ledger(
+def get_business_unit_ledger(
     bu_id: int,
     start_date: date = Query(..., description="Start date for the report"),
     end_date: date = Query(..., description="End date for the report"),
@@ -700,7 +700,7 @@ async def get_business_unit_ledger(
 
 
 @router.get("/business-units/summary/all", response_model=List[BusinessUnitSummary])
-async def get_all_business_units_summary(
+def get_all_business_units_summary(
     as_of_date: Optional[date] = Query(None, description="Calculate balances as of this date"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -760,7 +760,7 @@ async def get_all_business_units_summary(
 # =============================================================================
 
 @router.post("/business-units/setup-defaults")
-async def setup_default_business_units(
+def setup_default_business_units(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1,7 +1,7 @@
 """
 Calendar & Scheduling API endpoints for work order visit scheduling
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_
@@ -12,11 +12,12 @@ import json
 import logging
 
 from app.database import get_db
+from app.services.auth_context import get_auth_context
+from app.services.dependency import get_current_user
 from app.models import (
-    User, WorkOrder, CalendarSlot, WorkOrderSlotAssignment, CalendarTemplate,
+    WorkOrder, CalendarSlot, WorkOrderSlotAssignment, CalendarTemplate,
     Technician, Site, HandHeldDevice
 )
-from app.api.auth import verify_token
 from jose import jwt
 from app.config import settings
 
@@ -48,12 +49,15 @@ def verify_token_payload(token: str) -> Optional[dict]:
 
 
 def get_current_user_or_hhd(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
     """Authenticate either a User or HHD device"""
     token = credentials.credentials
-    payload = verify_token_payload(token)
+    # Decoded once per request and shared with the middlewares
+    auth = get_auth_context(request, token)
+    payload = auth.payload
 
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
@@ -84,25 +88,13 @@ def get_current_user_or_hhd(
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = auth.user
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
     return user
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get authenticated user (admin portal only)"""
-    token = credentials.credentials
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
-
 # ============ Pydantic Schemas ============
 
 class CalendarSlotCreate(BaseModel):
@@ -245,7 +237,7 @@ def update_slot_status(slot: CalendarSlot):
 # ============ Calendar Slot Endpoints ============
 
 @router.get("/slots")
-async def list_calendar_slots(
+def list_calendar_slots(
     start_date: Optional[date] = Query(None, description="Filter by start date"),
     end_date: Optional[date] = Query(None, description="Filter by end date"),
     technician_id: Optional[int] = Query(None),
@@ -293,7 +285,7 @@ async def list_calendar_slots(
 
 
 @router.get("/slots/{slot_id}")
-async def get_calendar_slot(
+def get_calendar_slot(
     slot_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -318,7 +310,7 @@ async def get_calendar_slot(
 
 
 @router.post("/slots")
-async def create_calendar_slot(
+def create_calendar_slot(
     slot_data: CalendarSlotCreate,
     auth_context = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -368,7 +360,7 @@ async def create_calendar_slot(
 
 
 @router.post("/slots/bulk")
-async def create_calendar_slots_bulk(
+def create_calendar_slots_bulk(
     bulk_data: CalendarSlotBulkCreate,
     auth_context = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -447,7 +439,7 @@ async def create_calendar_slots_bulk(
 
 
 @router.put("/slots/{slot_id}")
-async def update_calendar_slot(
+def update_calendar_slot(
     slot_id: int,
     update_data: CalendarSlotUpdate,
     auth_context = Depends(get_current_user),
@@ -480,7 +472,7 @@ async def update_calendar_slot(
 
 
 @router.delete("/slots/{slot_id}")
-async def delete_calendar_slot(
+def delete_calendar_slot(
     slot_id: int,
     auth_context = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -514,7 +506,7 @@ async def delete_calendar_slot(
 # ============ Work Order Assignment Endpoints ============
 
 @router.post("/slots/{slot_id}/assign")
-async def assign_work_order_to_slot(
+def assign_work_order_to_slot(
     slot_id: int,
     assign_data: WorkOrderAssign,
     auth_context = Depends(get_current_user),
@@ -595,7 +587,7 @@ async def assign_work_order_to_slot(
 
 
 @router.delete("/slots/{slot_id}/assign/{work_order_id}")
-async def remove_work_order_from_slot(
+def remove_work_order_from_slot(
     slot_id: int,
     work_order_id: int,
     auth_context = Depends(get_current_user),
@@ -629,7 +621,7 @@ async def remove_work_order_from_slot(
 
 
 @router.get("/work-order/{work_order_id}/slots")
-async def get_work_order_slots(
+def get_work_order_slots(
     work_order_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -665,7 +657,7 @@ async def get_work_order_slots(
 # ============ Calendar View Endpoints ============
 
 @router.get("/week")
-async def get_week_view(
+def get_week_view(
     week_start: Optional[date] = Query(None, description="Start of week (defaults to current week Monday)"),
     technician_id: Optional[int] = Query(None),
     site_id: Optional[int] = Query(None),
@@ -767,7 +759,7 @@ async def get_week_view(
 
 
 @router.get("/month")
-async def get_month_view(
+def get_month_view(
     year: Optional[int] = Query(None),
     month: Optional[int] = Query(None),
     technician_id: Optional[int] = Query(None),
@@ -835,7 +827,7 @@ async def get_month_view(
 
 
 @router.get("/day/{day_date}")
-async def get_day_view(
+def get_day_view(
     day_date: date,
     technician_id: Optional[int] = Query(None),
     site_id: Optional[int] = Query(None),
@@ -871,7 +863,7 @@ async def get_day_view(
 
 
 @router.get("/technician/{technician_id}")
-async def get_technician_schedule(
+def get_technician_schedule(
     technician_id: int,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
@@ -923,7 +915,7 @@ async def get_technician_schedule(
 # ============ Template Endpoints ============
 
 @router.get("/templates")
-async def list_templates(
+def list_templates(
     auth_context = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -957,7 +949,7 @@ async def list_templates(
 
 
 @router.post("/templates")
-async def create_template(
+def create_template(
     template_data: CalendarTemplateCreate,
     auth_context = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -998,7 +990,7 @@ async def create_template(
 
 
 @router.put("/templates/{template_id}")
-async def update_template(
+def update_template(
     template_id: int,
     update_data: CalendarTemplateUpdate,
     auth_context = Depends(get_current_user),
@@ -1044,7 +1036,7 @@ async def update_template(
 
 
 @router.delete("/templates/{template_id}")
-async def delete_template(
+def delete_template(
     template_id: int,
     auth_context = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1068,7 +1060,7 @@ async def delete_template(
 
 
 @router.post("/slots/generate")
-async def generate_slots_from_template(
+def generate_slots_from_template(
     request: GenerateSlotsRequest,
     auth_context = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -87,7 +87,7 @@ def send_client_invitation_email(client: ClientUser, invitation_url: str, compan
 
 
 @router.get("", response_model=ClientUserList)
-async def list_client_users(
+def list_client_users(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     status_filter: Optional[str] = Query(None, alias="status"),
@@ -160,7 +160,7 @@ async def list_client_users(
 
 
 @router.post("/invite", response_model=ClientUserWithAddressBook)
-async def invite_client_user(
+def invite_client_user(
     invite_data: ClientUserInvite,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -250,7 +250,7 @@ async def invite_client_user(
 
 
 @router.get("/{client_id}", response_model=ClientUserWithAddressBook)
-async def get_client_user(
+def get_client_user(
     client_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -288,7 +288,7 @@ async def get_client_user(
 
 
 @router.put("/{client_id}", response_model=ClientUserWithAddressBook)
-async def update_client_user(
+def update_client_user(
     client_id: int,
     update_data: ClientUserInvite,
     db: Session = Depends(get_db),
@@ -367,7 +367,7 @@ async def update_client_user(
 
 
 @router.delete("/{client_id}")
-async def deactivate_client_user(
+def deactivate_client_user(
     client_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -393,7 +393,7 @@ async def deactivate_client_user(
 
 
 @router.post("/{client_id}/reactivate")
-async def reactivate_client_user(
+def reactivate_client_user(
     client_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -419,7 +419,7 @@ async def reactivate_client_user(
 
 
 @router.post("/{client_id}/resend-invitation")
-async def resend_invitation(
+def resend_invitation(
     client_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
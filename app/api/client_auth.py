@@ -92,7 +92,7 @@ def get_invitation_token_expiry() -> datetime:
     return datetime.utcnow() + timedelta(days=CLIENT_INVITATION_EXPIRE_DAYS)
 
 
-async def get_current_client(
+def get_current_client(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> ClientUser:
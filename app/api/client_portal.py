@@ -44,7 +44,7 @@ router = APIRouter(prefix="/client", tags=["Client Portal"])
 
 @router.post("/login", response_model=ClientToken)
 @limiter.limit(RateLimits.CLIENT_LOGIN)
-async def client_login(
+def client_login(
     request: Request,
     credentials: ClientUserLogin,
     db: Session = Depends(get_db)
@@ -62,7 +62,7 @@ async def client_login(
 
 
 @router.post("/accept-invitation", response_model=ClientToken)
-async def accept_invitation(
+def accept_invitation(
     data: ClientUserAcceptInvitation,
     db: Session = Depends(get_db)
 ):
@@ -100,7 +100,7 @@ async def accept_invitation(
 
 
 @router.post("/refresh", response_model=ClientToken)
-async def refresh_token(
+def refresh_token(
     request: ClientRefreshTokenRequest,
     db: Session = Depends(get_db)
 ):
@@ -126,7 +126,7 @@ async def refresh_token(
 
 
 @router.post("/logout")
-async def client_logout(
+def client_logout(
     request: ClientRefreshTokenRequest,
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
@@ -137,7 +137,7 @@ async def client_logout(
 
 
 @router.get("/me", response_model=ClientUserResponse)
-async def get_current_client_user(
+def get_current_client_user(
     current_client: ClientUser = Depends(get_current_client)
 ):
     """Get current client user profile"""
@@ -145,7 +145,7 @@ async def get_current_client_user(
 
 
 @router.put("/profile", response_model=ClientUserResponse)
-async def update_client_profile(
+def update_client_profile(
     profile_data: ClientProfileUpdate,
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
@@ -164,7 +164,7 @@ async def update_client_profile(
 
 
 @router.post("/change-password")
-async def change_client_password(
+def change_client_password(
     password_data: ClientPasswordChange,
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
@@ -197,7 +197,7 @@ async def change_client_password(
 # =============================================================================
 
 @router.get("/dashboard", response_model=ClientDashboard)
-async def get_client_dashboard(
+def get_client_dashboard(
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
 ):
@@ -296,7 +296,7 @@ async def get_client_dashboard(
 # =============================================================================
 
 @router.get("/sites")
-async def list_client_sites(
+def list_client_sites(
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
 ):
@@ -324,7 +324,7 @@ async def list_client_sites(
 # =============================================================================
 
 @router.get("/tickets", response_model=TicketList)
-async def list_client_tickets(
+def list_client_tickets(
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client),
     status: Optional[str] = None,
@@ -384,7 +384,7 @@ async def list_client_tickets(
 
 
 @router.get("/tickets/{ticket_id}")
-async def get_client_ticket(
+def get_client_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
@@ -408,7 +408,7 @@ async def get_client_ticket(
 
 
 @router.post("/tickets")
-async def create_client_ticket(
+def create_client_ticket(
     ticket_data: ClientTicketCreate,
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
@@ -491,7 +491,7 @@ async def create_client_ticket(
 
 
 @router.get("/tickets/{ticket_id}/timeline")
-async def get_client_ticket_timeline(
+def get_client_ticket_timeline(
     ticket_id: int,
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
@@ -535,7 +535,7 @@ async def get_client_ticket_timeline(
 # =============================================================================
 
 @router.get("/work-orders", response_model=ClientWorkOrderList)
-async def list_client_work_orders(
+def list_client_work_orders(
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client),
     status: Optional[str] = None,
@@ -616,7 +616,7 @@ async def list_client_work_orders(
 
 
 @router.get("/work-orders/{wo_id}", response_model=ClientWorkOrderBrief)
-async def get_client_work_order(
+def get_client_work_order(
     wo_id: int,
     db: Session = Depends(get_db),
     current_client: ClientUser = Depends(get_current_client)
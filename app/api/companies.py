@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from sqlalchemy import text
@@ -7,7 +6,8 @@ from typing import Optional, List
 from datetime import datetime, timedelta
 from app.database import get_db
 from app.models import Company, User, Plan, Role
-from app.utils.security import get_password_hash, create_access_token, verify_token
+from app.utils.security import get_password_hash, create_access_token
+from app.services.dependency import get_current_user
 from app.utils.pm_seed import seed_pm_checklists_for_company
 from app.utils.company_seed import seed_company_defaults
 from app.utils.crm_seed import seed_crm_defaults
@@ -20,30 +20,8 @@ import uuid
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)  # verify_token returns the email directly
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
-
 def get_or_create_admin_role(db: Session, company_id: int) -> Role:
     """
     Ensure an Admin role exists for the given company.
@@ -156,7 +134,7 @@ SUPPORTED_CURRENCIES = [
 
 
 @router.post("/companies/register")
-async def register_company(data: CompanyRegister, db: Session = Depends(get_db)):
+def register_company(data: CompanyRegister, db: Session = Depends(get_db)):
     """Register a new company with admin user"""
 
     # Check if admin email already exists
@@ -366,7 +344,7 @@ async def register_company(data: CompanyRegister, db: Session = Depends(get_db))
 
 
 @router.get("/companies/me")
-async def get_my_company(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_my_company(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get current user's company details"""
     if not user.company_id:
         raise HTTPException(
@@ -437,7 +415,7 @@ async def get_my_company(user: User = Depends(get_current_user), db: Session = D
 
 
 @router.put("/companies/me")
-async def update_my_company(
+def update_my_company(
     data: CompanyUpdate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -492,7 +470,7 @@ async def update_my_company(
 
 
 @router.get("/companies/stats")
-async def get_company_stats(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_company_stats(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get company statistics"""
     from app.models import Client, Site, Project, ProcessedImage, AddressBook
 
@@ -545,7 +523,7 @@ async def get_company_stats(user: User = Depends(get_current_user), db: Session
 
 
 @router.get("/companies/document-counter-debug")
-async def debug_document_counter(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def debug_document_counter(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Debug endpoint to check document counter vs actual processed images"""
     from app.models import ProcessedImage
     from datetime import datetime
@@ -582,7 +560,7 @@ async def debug_document_counter(user: User = Depends(get_current_user), db: Ses
 
 
 @router.get("/companies/currencies")
-async def get_supported_currencies():
+def get_supported_currencies():
     """Get list of supported currencies"""
     return {
         "currencies": SUPPORTED_CURRENCIES
@@ -590,7 +568,7 @@ async def get_supported_currencies():
 
 
 @router.post("/companies/logo")
-async def upload_company_logo(
+def upload_company_logo(
     file: UploadFile = File(...),
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -618,7 +596,7 @@ async def upload_company_logo(
         )
 
     # Validate file size (max 5MB)
-    file_content = await file.read()
+    file_content = file.file.read()
     if len(file_content) > 5 * 1024 * 1024:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -670,7 +648,7 @@ async def upload_company_logo(
 
 
 @router.delete("/companies/logo")
-async def delete_company_logo(
+def delete_company_logo(
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -720,7 +698,7 @@ class FlushDataRequest(BaseModel):
 
 
 @router.post("/companies/flush-data")
-async def flush_company_data(
+def flush_company_data(
     request: FlushDataRequest,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -811,7 +789,9 @@ async def flush_company_data(
             ("journal_entry_lines", "DELETE FROM journal_entry_lines WHERE journal_entry_id IN (SELECT id FROM journal_entries WHERE company_id = :company_id)"),
             ("journal_entries", "DELETE FROM journal_entries WHERE company_id = :company_id"),
             ("account_balances", "DELETE FROM account_balances WHERE account_id IN (SELECT id FROM accounts WHERE company_id = :company_id)"),
+            ("account_closures", "DELETE FROM account_closures WHERE company_id = :company_id"),
             ("fiscal_periods", "DELETE FROM fiscal_periods WHERE company_id = :company_id"),
+            ("document_sequences", "DELETE FROM document_sequences WHERE company_id = :company_id"),
 
             # =================================================================
             # INVOICE ALLOCATIONS (linked via contract_id -> contracts.company_id)
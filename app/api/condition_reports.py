@@ -9,6 +9,7 @@ from datetime import datetime
 from app.database import get_db
 from app.models import ConditionReport, ConditionReportImage, User, Client, Site, Building, Floor, Space, AddressBook
 from app.api.auth import get_current_user
+from app.services.sequences import next_number, max_suffix
 from app.config import settings
 from jose import jwt
 import os
@@ -142,17 +143,11 @@ class ConditionReportResponse(BaseModel):
 
 def generate_report_number(db: Session, company_id: int) -> str:
     """Generate unique report number: CR-YYYYMMDD-XXX"""
-    today = datetime.now()
-    date_str = today.strftime("%Y%m%d")
-    prefix = f"CR-{date_str}-"
-
-    # Get count of reports today for this company
-    count = db.query(ConditionReport).filter(
-        ConditionReport.company_id == company_id,
-        ConditionReport.report_number.like(f"{prefix}%")
-    ).count()
-
-    return f"{prefix}{str(count + 1).zfill(3)}"
+    prefix = f"CR-{datetime.now().strftime('%Y%m%d')}-"
+    return next_number(
+        db, company_id, prefix, width=3,
+        seed=lambda: max_suffix(db, ConditionReport.report_number, ConditionReport.company_id, company_id, prefix)
+    )
 
 
 def image_to_response(image: ConditionReportImage) -> ConditionReportImageResponse:
@@ -226,7 +221,7 @@ def report_to_response(report: ConditionReport, db: Session = None) -> Condition
 # ============================================================================
 
 @router.get("/", response_model=List[ConditionReportResponse])
-async def get_condition_reports(
+def get_condition_reports(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     client_id: Optional[int] = Query(None, description="Filter by client (address_book_id or legacy client_id)"),
@@ -292,7 +287,7 @@ async def get_condition_reports(
 
 
 @router.get("/stats/summary")
-async def get_condition_reports_stats(
+def get_condition_reports_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     client_id: Optional[int] = Query(None, description="Filter by client (address_book_id or legacy client_id)")
@@ -341,7 +336,7 @@ async def get_condition_reports_stats(
 
 
 @router.get("/{report_id}", response_model=ConditionReportResponse)
-async def get_condition_report(
+def get_condition_report(
     report_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -371,7 +366,7 @@ async def get_condition_report(
 
 
 @router.post("/", response_model=ConditionReportResponse, status_code=status.HTTP_201_CREATED)
-async def create_condition_report(
+def create_condition_report(
     report_data: ConditionReportCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -506,7 +501,7 @@ async def create_condition_report(
 
 
 @router.put("/{report_id}", response_model=ConditionReportResponse)
-async def update_condition_report(
+def update_condition_report(
     report_id: int,
     report_data: ConditionReportUpdate,
     current_user: User = Depends(get_current_user),
@@ -580,7 +575,7 @@ async def update_condition_report(
 
 
 @router.delete("/{report_id}")
-async def delete_condition_report(
+def delete_condition_report(
     report_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -619,7 +614,7 @@ async def delete_condition_report(
 # ============================================================================
 
 @router.get("/{report_id}/images")
-async def get_condition_report_images(
+def get_condition_report_images(
     report_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -647,7 +642,7 @@ async def get_condition_report_images(
 
 
 @router.post("/{report_id}/images")
-async def upload_condition_report_image(
+def upload_condition_report_image(
     report_id: int,
     file: UploadFile = File(...),
     caption: Optional[str] = Form(None),
@@ -683,7 +678,7 @@ async def upload_condition_report_image(
 
     try:
         # Save file
-        content = await file.read()
+        content = file.file.read()
         with open(file_path, "wb") as f:
             f.write(content)
 
@@ -730,7 +725,7 @@ async def upload_condition_report_image(
 
 
 @router.get("/{report_id}/images/{image_id}/file")
-async def get_condition_report_image_file(
+def get_condition_report_image_file(
     report_id: int,
     image_id: int,
     token: str = Query(...),
@@ -794,7 +789,7 @@ async def get_condition_report_image_file(
 
 
 @router.patch("/{report_id}/images/{image_id}")
-async def update_condition_report_image(
+def update_condition_report_image(
     report_id: int,
     image_id: int,
     caption: Optional[str] = None,
@@ -832,7 +827,7 @@ async def update_condition_report_image(
 
 
 @router.delete("/{report_id}/images/{image_id}")
-async def delete_condition_report_image(
+def delete_condition_report_image(
     report_id: int,
     image_id: int,
     current_user: User = Depends(get_current_user),
@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_, func
 from typing import Optional, List
@@ -12,7 +11,7 @@ from app.models import (
     Technician, PettyCashTransaction, InvoiceAllocation, AllocationPeriod, ProcessedImage,
     JournalEntry, JournalEntryLine, Account, AccountType
 )
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 from app.schemas import (
     ContractCreate, ContractUpdate, Contract as ContractSchema, ContractList,
     ContractScopeCreate, ContractScopeUpdate, ContractScope as ContractScopeSchema,
@@ -23,29 +22,6 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 def require_admin(user: User = Depends(get_current_user)):
@@ -63,7 +39,7 @@ def require_admin(user: User = Depends(get_current_user)):
 # ============================================================================
 
 @router.get("/scopes/", response_model=List[ScopeSchema])
-async def get_scopes(
+def get_scopes(
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -78,7 +54,7 @@ async def get_scopes(
 
 
 @router.post("/scopes/", response_model=ScopeSchema, status_code=status.HTTP_201_CREATED)
-async def create_scope(
+def create_scope(
     scope_data: ScopeCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -106,7 +82,7 @@ async def create_scope(
 
 
 @router.put("/scopes/{scope_id}", response_model=ScopeSchema)
-async def update_scope(
+def update_scope(
     scope_id: int,
     scope_data: ScopeUpdate,
     db: Session = Depends(get_db),
@@ -133,7 +109,7 @@ async def update_scope(
 
 
 @router.delete("/scopes/{scope_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_scope(
+def delete_scope(
     scope_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -162,7 +138,7 @@ async def delete_scope(
 
 
 @router.post("/scopes/seed", response_model=List[ScopeSchema])
-async def seed_default_scopes(
+def seed_default_scopes(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
@@ -210,7 +186,7 @@ async def seed_default_scopes(
 # ============================================================================
 
 @router.get("/", response_model=List[ContractSchema])
-async def get_contracts(
+def get_contracts(
     client_id: Optional[int] = Query(None, description="Filter by client ID (legacy)"),
     address_book_id: Optional[int] = Query(None, description="Filter by Address Book ID (customer)"),
     site_id: Optional[int] = Query(None, description="Filter by site ID"),
@@ -253,7 +229,7 @@ async def get_contracts(
 
 
 @router.get("/expiring")
-async def get_expiring_contracts(
+def get_expiring_contracts(
     days: int = Query(30, description="Number of days to check for expiring contracts"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -288,7 +264,7 @@ async def get_expiring_contracts(
 
 
 @router.get("/{contract_id}", response_model=ContractSchema)
-async def get_contract(
+def get_contract(
     contract_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -309,7 +285,7 @@ async def get_contract(
 
 
 @router.post("/", response_model=ContractSchema, status_code=status.HTTP_201_CREATED)
-async def create_contract(
+def create_contract(
     contract_data: ContractCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -424,7 +400,7 @@ async def create_contract(
 
 
 @router.put("/{contract_id}", response_model=ContractSchema)
-async def update_contract(
+def update_contract(
     contract_id: int,
     contract_data: ContractUpdate,
     db: Session = Depends(get_db),
@@ -495,7 +471,7 @@ async def update_contract(
 
 
 @router.delete("/{contract_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_contract(
+def delete_contract(
     contract_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -516,7 +492,7 @@ async def delete_contract(
 
 
 @router.post("/{contract_id}/activate")
-async def activate_contract(
+def activate_contract(
     contract_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -542,7 +518,7 @@ async def activate_contract(
 
 
 @router.post("/{contract_id}/terminate")
-async def terminate_contract(
+def terminate_contract(
     contract_id: int,
     reason: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -571,7 +547,7 @@ async def terminate_contract(
 
 
 @router.post("/{contract_id}/renew", response_model=ContractSchema)
-async def renew_contract(
+def renew_contract(
     contract_id: int,
     new_end_date: date,
     new_value: Optional[float] = None,
@@ -616,7 +592,7 @@ async def renew_contract(
 # ============================================================================
 
 @router.get("/{contract_id}/scopes", response_model=List[ContractScopeSchema])
-async def get_contract_scopes(
+def get_contract_scopes(
     contract_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -638,7 +614,7 @@ async def get_contract_scopes(
 
 
 @router.post("/{contract_id}/scopes", response_model=ContractScopeSchema, status_code=status.HTTP_201_CREATED)
-async def add_contract_scope(
+def add_contract_scope(
     contract_id: int,
     scope_data: ContractScopeCreate,
     db: Session = Depends(get_db),
@@ -684,7 +660,7 @@ async def add_contract_scope(
 
 
 @router.put("/{contract_id}/scopes/{scope_id}", response_model=ContractScopeSchema)
-async def update_contract_scope(
+def update_contract_scope(
     contract_id: int,
     scope_id: int,
     scope_data: ContractScopeUpdate,
@@ -720,7 +696,7 @@ async def update_contract_scope(
 
 
 @router.delete("/{contract_id}/scopes/{scope_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def remove_contract_scope(
+def remove_contract_scope(
     contract_id: int,
     scope_id: int,
     db: Session = Depends(get_db),
@@ -828,7 +804,7 @@ def get_equipment_ids_for_sites(db: Session, site_ids: List[int]) -> List[int]:
 
 
 @router.get("/{contract_id}/cost-center")
-async def get_contract_cost_center(
+def get_contract_cost_center(
     contract_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -3,8 +3,7 @@ CRM Activities API
 Handles activity tracking (calls, emails, meetings, tasks)
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func, and_
@@ -12,36 +11,13 @@ from typing import Optional, List
 from datetime import datetime, date, time
 from app.database import get_db
 from app.models import CRMActivity, Lead, Opportunity, Client, User
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 # =============================================================================
@@ -153,7 +129,7 @@ def activity_to_response(act: CRMActivity, db: Session) -> dict:
 
 
 @router.get("/crm/activities")
-async def get_activities(
+def get_activities(
     activity_type: Optional[str] = None,
     status: Optional[str] = None,
     entity_type: Optional[str] = None,
@@ -211,7 +187,7 @@ async def get_activities(
 
 
 @router.get("/crm/activities/upcoming")
-async def get_upcoming_activities(
+def get_upcoming_activities(
     days: int = 7,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -235,7 +211,7 @@ async def get_upcoming_activities(
 
 
 @router.get("/crm/activities/overdue")
-async def get_overdue_activities(
+def get_overdue_activities(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -255,7 +231,7 @@ async def get_overdue_activities(
 
 
 @router.get("/crm/activities/stats")
-async def get_activity_stats(
+def get_activity_stats(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -322,7 +298,7 @@ async def get_activity_stats(
 
 
 @router.get("/crm/activities/{activity_id}")
-async def get_activity(
+def get_activity(
     activity_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -340,7 +316,7 @@ async def get_activity(
 
 
 @router.post("/crm/activities")
-async def create_activity(
+def create_activity(
     data: ActivityCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -395,7 +371,7 @@ async def create_activity(
 
 
 @router.put("/crm/activities/{activity_id}")
-async def update_activity(
+def update_activity(
     activity_id: int,
     data: ActivityUpdate,
     user: User = Depends(get_current_user),
@@ -437,7 +413,7 @@ async def update_activity(
 
 
 @router.post("/crm/activities/{activity_id}/complete")
-async def complete_activity(
+def complete_activity(
     activity_id: int,
     data: ActivityComplete,
     user: User = Depends(get_current_user),
@@ -467,7 +443,7 @@ async def complete_activity(
 
 
 @router.post("/crm/activities/{activity_id}/cancel")
-async def cancel_activity(
+def cancel_activity(
     activity_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -487,7 +463,7 @@ async def cancel_activity(
 
 
 @router.delete("/crm/activities/{activity_id}")
-async def delete_activity(
+def delete_activity(
     activity_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -511,7 +487,7 @@ async def delete_activity(
 # =============================================================================
 
 @router.get("/crm/timeline/{entity_type}/{entity_id}")
-async def get_entity_timeline(
+def get_entity_timeline(
     entity_type: str,
     entity_id: int,
     user: User = Depends(get_current_user),
@@ -3,8 +3,7 @@ CRM Campaigns API
 Handles marketing campaign management
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
@@ -12,35 +11,12 @@ from typing import Optional, List
 from datetime import datetime, date
 from app.database import get_db
 from app.models import Campaign, CampaignLead, Lead, User
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 # =============================================================================
@@ -159,7 +135,7 @@ def campaign_to_response(campaign: Campaign, db: Session) -> dict:
 
 
 @router.get("/crm/campaigns")
-async def get_campaigns(
+def get_campaigns(
     status: Optional[str] = None,
     campaign_type: Optional[str] = None,
     owner_id: Optional[int] = None,
@@ -198,7 +174,7 @@ async def get_campaigns(
 
 
 @router.get("/crm/campaigns/stats")
-async def get_campaign_stats(
+def get_campaign_stats(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -252,7 +228,7 @@ async def get_campaign_stats(
 
 
 @router.get("/crm/campaigns/{campaign_id}")
-async def get_campaign(
+def get_campaign(
     campaign_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -270,7 +246,7 @@ async def get_campaign(
 
 
 @router.post("/crm/campaigns")
-async def create_campaign(
+def create_campaign(
     data: CampaignCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -305,7 +281,7 @@ async def create_campaign(
 
 
 @router.put("/crm/campaigns/{campaign_id}")
-async def update_campaign(
+def update_campaign(
     campaign_id: int,
     data: CampaignUpdate,
     user: User = Depends(get_current_user),
@@ -328,7 +304,7 @@ async def update_campaign(
 
 
 @router.delete("/crm/campaigns/{campaign_id}")
-async def delete_campaign(
+def delete_campaign(
     campaign_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -355,7 +331,7 @@ async def delete_campaign(
 # =============================================================================
 
 @router.get("/crm/campaigns/{campaign_id}/leads")
-async def get_campaign_leads(
+def get_campaign_leads(
     campaign_id: int,
     status: Optional[str] = None,
     user: User = Depends(get_current_user),
@@ -393,7 +369,7 @@ async def get_campaign_leads(
 
 
 @router.post("/crm/campaigns/{campaign_id}/leads")
-async def add_leads_to_campaign(
+def add_leads_to_campaign(
     campaign_id: int,
     data: CampaignLeadAdd,
     user: User = Depends(get_current_user),
@@ -449,7 +425,7 @@ async def add_leads_to_campaign(
 
 
 @router.put("/crm/campaigns/{campaign_id}/leads/{lead_id}")
-async def update_campaign_lead(
+def update_campaign_lead(
     campaign_id: int,
     lead_id: int,
     data: CampaignLeadUpdate,
@@ -494,7 +470,7 @@ async def update_campaign_lead(
 
 
 @router.delete("/crm/campaigns/{campaign_id}/leads/{lead_id}")
-async def remove_lead_from_campaign(
+def remove_lead_from_campaign(
     campaign_id: int,
     lead_id: int,
     user: User = Depends(get_current_user),
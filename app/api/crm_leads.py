@@ -3,8 +3,7 @@ CRM Leads API
 Handles lead management, conversion to clients/opportunities
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
@@ -12,35 +11,13 @@ from typing import Optional, List
 from datetime import datetime
 from app.database import get_db
 from app.models import Lead, LeadSource, Client, Opportunity, PipelineStage, User, AddressBook
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
+from app.api.address_book import generate_next_address_number
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 # =============================================================================
@@ -127,7 +104,7 @@ class LeadConvertRequest(BaseModel):
 # =============================================================================
 
 @router.get("/crm/lead-sources")
-async def get_lead_sources(
+def get_lead_sources(
     include_inactive: bool = False,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -154,7 +131,7 @@ async def get_lead_sources(
 
 
 @router.post("/crm/lead-sources")
-async def create_lead_source(
+def create_lead_source(
     data: LeadSourceCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -178,7 +155,7 @@ async def create_lead_source(
 
 
 @router.put("/crm/lead-sources/{source_id}")
-async def update_lead_source(
+def update_lead_source(
     source_id: int,
     data: LeadSourceUpdate,
     user: User = Depends(get_current_user),
@@ -201,7 +178,7 @@ async def update_lead_source(
 
 
 @router.delete("/crm/lead-sources/{source_id}")
-async def delete_lead_source(
+def delete_lead_source(
     source_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -265,7 +242,7 @@ def lead_to_response(lead: Lead, db: Session) -> dict:
 
 
 @router.get("/crm/leads")
-async def get_leads(
+def get_leads(
     status: Optional[str] = None,
     rating: Optional[str] = None,
     source_id: Optional[int] = None,
@@ -314,7 +291,7 @@ async def get_leads(
 
 
 @router.get("/crm/leads/stats")
-async def get_lead_stats(
+def get_lead_stats(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -370,7 +347,7 @@ async def get_lead_stats(
 
 
 @router.get("/crm/leads/{lead_id}")
-async def get_lead(
+def get_lead(
     lead_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -388,7 +365,7 @@ async def get_lead(
 
 
 @router.post("/crm/leads")
-async def create_lead(
+def create_lead(
     data: LeadCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -432,7 +409,7 @@ async def create_lead(
 
 
 @router.put("/crm/leads/{lead_id}")
-async def update_lead(
+def update_lead(
     lead_id: int,
     data: LeadUpdate,
     user: User = Depends(get_current_user),
@@ -458,7 +435,7 @@ async def update_lead(
 
 
 @router.delete("/crm/leads/{lead_id}")
-async def delete_lead(
+def delete_lead(
     lead_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -481,7 +458,7 @@ async def delete_lead(
 
 
 @router.post("/crm/leads/{lead_id}/convert")
-async def convert_lead(
+def convert_lead(
     lead_id: int,
     data: LeadConvertRequest,
     user: User = Depends(get_current_user),
@@ -506,20 +483,7 @@ async def convert_lead(
     address_book_id = None
     if data.create_client:
         # Generate next address number for Address Book
-        entries = db.query(AddressBook.address_number).filter(
-            AddressBook.company_id == user.company_id
-        ).all()
-
-        max_num = 0
-        for (addr_num,) in entries:
-            try:
-                num = int(addr_num)
-                if num > max_num:
-                    max_num = num
-            except (ValueError, TypeError):
-                pass
-
-        address_number = str(max_num + 1).zfill(8)
+        address_number = generate_next_address_number(db, user.company_id)
 
         # Create Address Book entry with search_type='C' (Customer)
         # This will automatically create a Client record through the address_book.py logic
@@ -3,8 +3,7 @@ CRM Opportunities API
 Handles opportunity/deal management and pipeline tracking
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func, and_
@@ -12,35 +11,12 @@ from typing import Optional, List
 from datetime import datetime, date
 from app.database import get_db
 from app.models import Opportunity, PipelineStage, Client, Lead, Contract, User
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 # =============================================================================
@@ -121,7 +97,7 @@ class OpportunityWinLose(BaseModel):
 # =============================================================================
 
 @router.get("/crm/pipeline-stages")
-async def get_pipeline_stages(
+def get_pipeline_stages(
     include_inactive: bool = False,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -165,7 +141,7 @@ async def get_pipeline_stages(
 
 
 @router.post("/crm/pipeline-stages")
-async def create_pipeline_stage(
+def create_pipeline_stage(
     data: PipelineStageCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -192,7 +168,7 @@ async def create_pipeline_stage(
 
 
 @router.put("/crm/pipeline-stages/{stage_id}")
-async def update_pipeline_stage(
+def update_pipeline_stage(
     stage_id: int,
     data: PipelineStageUpdate,
     user: User = Depends(get_current_user),
@@ -215,7 +191,7 @@ async def update_pipeline_stage(
 
 
 @router.put("/crm/pipeline-stages/reorder")
-async def reorder_pipeline_stages(
+def reorder_pipeline_stages(
     stage_orders: List[dict],
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -234,7 +210,7 @@ async def reorder_pipeline_stages(
 
 
 @router.delete("/crm/pipeline-stages/{stage_id}")
-async def delete_pipeline_stage(
+def delete_pipeline_stage(
     stage_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -303,7 +279,7 @@ def opportunity_to_response(opp: Opportunity, db: Session) -> dict:
 
 
 @router.get("/crm/opportunities")
-async def get_opportunities(
+def get_opportunities(
     status: Optional[str] = None,
     stage_id: Optional[int] = None,
     client_id: Optional[int] = None,
@@ -346,7 +322,7 @@ async def get_opportunities(
 
 
 @router.get("/crm/opportunities/pipeline")
-async def get_pipeline_view(
+def get_pipeline_view(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -388,7 +364,7 @@ async def get_pipeline_view(
 
 
 @router.get("/crm/opportunities/stats")
-async def get_opportunity_stats(
+def get_opportunity_stats(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -472,7 +448,7 @@ async def get_opportunity_stats(
 
 
 @router.get("/crm/opportunities/{opp_id}")
-async def get_opportunity(
+def get_opportunity(
     opp_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -490,7 +466,7 @@ async def get_opportunity(
 
 
 @router.post("/crm/opportunities")
-async def create_opportunity(
+def create_opportunity(
     data: OpportunityCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -541,7 +517,7 @@ async def create_opportunity(
 
 
 @router.put("/crm/opportunities/{opp_id}")
-async def update_opportunity(
+def update_opportunity(
     opp_id: int,
     data: OpportunityUpdate,
     user: User = Depends(get_current_user),
@@ -570,7 +546,7 @@ async def update_opportunity(
 
 
 @router.put("/crm/opportunities/{opp_id}/stage")
-async def move_opportunity_stage(
+def move_opportunity_stage(
     opp_id: int,
     data: OpportunityMoveStage,
     user: User = Depends(get_current_user),
@@ -612,7 +588,7 @@ async def move_opportunity_stage(
 
 
 @router.post("/crm/opportunities/{opp_id}/close")
-async def close_opportunity(
+def close_opportunity(
     opp_id: int,
     data: OpportunityWinLose,
     user: User = Depends(get_current_user),
@@ -660,7 +636,7 @@ async def close_opportunity(
 
 
 @router.delete("/crm/opportunities/{opp_id}")
-async def delete_opportunity(
+def delete_opportunity(
     opp_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -11,16 +11,15 @@ from decimal import Decimal
 import logging
 
 from app.database import get_db
+from app.services.dependency import get_current_user
 from app.models import (
     User, CycleCount, CycleCountItem, ItemMaster, ItemStock,
     ItemLedger, ItemCategory, Warehouse
 )
-from app.api.auth import verify_token
 from app.services.journal_posting import JournalPostingService
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.services.sequences import next_number, max_suffix
 
 router = APIRouter()
-security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
 
@@ -33,69 +32,22 @@ def decimal_to_float(val):
     return float(val)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current user from token"""
-    token = credentials.credentials
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-    return user
-
-
 def generate_count_number(db: Session, company_id: int) -> str:
     """Generate next cycle count number for company"""
-    year = datetime.now().year
-    prefix = f"CC-{year}-"
-
-    last_count = db.query(CycleCount).filter(
-        CycleCount.company_id == company_id,
-        CycleCount.count_number.like(f"{prefix}%")
-    ).order_by(CycleCount.id.desc()).first()
-
-    if last_count:
-        try:
-            last_num = int(last_count.count_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:05d}"
+    prefix = f"CC-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, CycleCount.count_number, CycleCount.company_id, company_id, prefix)
+    )
 
 
 def generate_transaction_number(db: Session, company_id: int, prefix: str = "ADJ") -> str:
     """Generate transaction number for ledger entries"""
-    today = datetime.now().strftime("%Y%m%d")
-    tx_prefix = f"{prefix}-{today}-"
-
-    last_tx = db.query(ItemLedger).filter(
-        ItemLedger.company_id == company_id,
-        ItemLedger.transaction_number.like(f"{tx_prefix}%")
-    ).order_by(ItemLedger.id.desc()).first()
-
-    if last_tx:
-        try:
-            last_num = int(last_tx.transaction_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{tx_prefix}{next_num:05d}"
+    full_prefix = f"{prefix}-{datetime.now().strftime('%Y%m%d')}-"
+    return next_number(
+        db, company_id, full_prefix, width=5,
+        seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, company_id, full_prefix)
+    )
 
 
 # ============ Pydantic Schemas ============
@@ -179,7 +131,7 @@ def cycle_count_to_response(cc: CycleCount, include_items: bool = False) -> dict
 # ============ Cycle Count Endpoints ============
 
 @router.get("/cycle-counts/")
-async def get_cycle_counts(
+def get_cycle_counts(
     warehouse_id: Optional[int] = None,
     status: Optional[str] = None,
     from_date: Optional[datetime] = None,
@@ -229,7 +181,7 @@ async def get_cycle_counts(
 
 
 @router.get("/cycle-counts/{count_id}")
-async def get_cycle_count(
+def get_cycle_count(
     count_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -257,7 +209,7 @@ async def get_cycle_count(
 
 
 @router.post("/cycle-counts/")
-async def create_cycle_count(
+def create_cycle_count(
     data: CycleCountCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -389,7 +341,7 @@ async def create_cycle_count(
 
 
 @router.put("/cycle-counts/{count_id}/items/{item_id}")
-async def update_cycle_count_item(
+def update_cycle_count_item(
     count_id: int,
     item_id: int,
     data: CycleCountItemUpdate,
@@ -457,7 +409,7 @@ async def update_cycle_count_item(
 
 
 @router.post("/cycle-counts/{count_id}/bulk-update")
-async def bulk_update_cycle_count_items(
+def bulk_update_cycle_count_items(
     count_id: int,
     data: BulkCountUpdate,
     user: User = Depends(get_current_user),
@@ -521,7 +473,7 @@ async def bulk_update_cycle_count_items(
 
 
 @router.post("/cycle-counts/{count_id}/complete")
-async def complete_cycle_count(
+def complete_cycle_count(
     count_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -669,7 +621,7 @@ async def complete_cycle_count(
 
 
 @router.post("/cycle-counts/{count_id}/cancel")
-async def cancel_cycle_count(
+def cancel_cycle_count(
     count_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -696,7 +648,7 @@ async def cancel_cycle_count(
 
 
 @router.delete("/cycle-counts/{count_id}")
-async def delete_cycle_count(
+def delete_cycle_count(
     count_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -726,7 +678,7 @@ async def delete_cycle_count(
 
 
 @router.post("/cycle-counts/{count_id}/add-item")
-async def add_item_to_cycle_count(
+def add_item_to_cycle_count(
     count_id: int,
     item_id: int,
     user: User = Depends(get_current_user),
@@ -30,7 +30,7 @@ def decimal_to_float(val):
 
 
 @router.get("/dashboard/stats")
-async def get_dashboard_stats(
+def get_dashboard_stats(
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
     user: User = Depends(get_current_user),
@@ -152,7 +152,7 @@ async def get_dashboard_stats(
 
 
 @router.get("/dashboard/accounting")
-async def get_accounting_dashboard(
+def get_accounting_dashboard(
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
     user: User = Depends(get_current_user),
@@ -414,7 +414,7 @@ async def get_accounting_dashboard(
 
 
 @router.get("/dashboard/procurement")
-async def get_procurement_dashboard(
+def get_procurement_dashboard(
     month: int = Query(..., ge=1, le=12),
     year: int = Query(..., ge=2020, le=2100),
     user: User = Depends(get_current_user),
@@ -30,6 +30,8 @@ from app.schemas import (
     AvailableToolForDisposal, AvailableItemForDisposal
 )
 from app.api.auth import get_current_user
+from app.services.journal_posting import generate_entry_number
+from app.services.sequences import next_number, max_suffix
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -41,46 +43,16 @@ logger = logging.getLogger(__name__)
 
 def generate_disposal_number(db: Session, company_id: int) -> str:
     """Generate unique disposal number: DSP-YYYY-NNNNN"""
-    year = datetime.now().year
-    prefix = f"DSP-{year}-"
-
-    last_disposal = db.query(Disposal).filter(
-        Disposal.company_id == company_id,
-        Disposal.disposal_number.like(f"{prefix}%")
-    ).order_by(Disposal.id.desc()).first()
-
-    if last_disposal:
-        try:
-            last_num = int(last_disposal.disposal_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:05d}"
+    prefix = f"DSP-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, Disposal.disposal_number, Disposal.company_id, company_id, prefix)
+    )
 
 
 def generate_journal_entry_number(db: Session, company_id: int) -> str:
     """Generate unique journal entry number: JE-YYYY-NNNNNN"""
-    year = datetime.now().year
-    prefix = f"JE-{year}-"
-
-    last_entry = db.query(JournalEntry).filter(
-        JournalEntry.company_id == company_id,
-        JournalEntry.entry_number.like(f"{prefix}%")
-    ).order_by(JournalEntry.id.desc()).first()
-
-    if last_entry:
-        try:
-            last_num = int(last_entry.entry_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:06d}"
+    return generate_entry_number(db, company_id)
 
 
 def get_tool_current_location(tool: Tool) -> Optional[str]:
@@ -201,7 +173,7 @@ def item_line_to_response(line: DisposalItemLine) -> dict:
 # =============================================================================
 
 @router.get("/disposals", response_model=List[dict])
-async def list_disposals(
+def list_disposals(
     status: Optional[str] = Query(None, description="Filter by status"),
     reason: Optional[str] = Query(None, description="Filter by reason"),
     from_date: Optional[date] = Query(None, description="Filter from date"),
@@ -265,7 +237,7 @@ async def list_disposals(
 
 
 @router.post("/disposals", response_model=dict)
-async def create_disposal(
+def create_disposal(
     data: DisposalCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -387,7 +359,7 @@ async def create_disposal(
 
 # Helper endpoints for getting available assets - MUST be before {disposal_id} routes
 @router.get("/disposals/available-tools", response_model=List[dict])
-async def get_available_tools(
+def get_available_tools(
     search: Optional[str] = Query(None, description="Search by tool number or name"),
     category_id: Optional[int] = Query(None, description="Filter by category"),
     db: Session = Depends(get_db),
@@ -440,7 +412,7 @@ async def get_available_tools(
 
 
 @router.get("/disposals/available-items", response_model=List[dict])
-async def get_available_items(
+def get_available_items(
     search: Optional[str] = Query(None, description="Search by item number or name"),
     warehouse_id: Optional[int] = Query(None, description="Filter by warehouse"),
     db: Session = Depends(get_db),
@@ -496,7 +468,7 @@ async def get_available_items(
 
 
 @router.get("/disposals/{disposal_id}", response_model=dict)
-async def get_disposal(
+def get_disposal(
     disposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -523,7 +495,7 @@ async def get_disposal(
 
 
 @router.put("/disposals/{disposal_id}", response_model=dict)
-async def update_disposal(
+def update_disposal(
     disposal_id: int,
     data: DisposalUpdate,
     db: Session = Depends(get_db),
@@ -577,7 +549,7 @@ async def update_disposal(
 
 
 @router.delete("/disposals/{disposal_id}")
-async def delete_disposal(
+def delete_disposal(
     disposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -611,7 +583,7 @@ async def delete_disposal(
 # =============================================================================
 
 @router.post("/disposals/{disposal_id}/approve", response_model=dict)
-async def approve_disposal(
+def approve_disposal(
     disposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -661,7 +633,7 @@ async def approve_disposal(
 
 
 @router.post("/disposals/{disposal_id}/post", response_model=dict)
-async def post_disposal(
+def post_disposal(
     disposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1082,7 +1054,7 @@ async def post_disposal(
 
 
 @router.post("/disposals/{disposal_id}/cancel", response_model=dict)
-async def cancel_disposal(
+def cancel_disposal(
     disposal_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1127,7 +1099,7 @@ async def cancel_disposal(
 # =============================================================================
 
 @router.post("/disposals/{disposal_id}/tool-lines", response_model=dict)
-async def add_tool_line(
+def add_tool_line(
     disposal_id: int,
     data: DisposalToolLineCreate,
     db: Session = Depends(get_db),
@@ -1213,7 +1185,7 @@ async def add_tool_line(
 
 
 @router.put("/disposals/{disposal_id}/tool-lines/{line_id}", response_model=dict)
-async def update_tool_line(
+def update_tool_line(
     disposal_id: int,
     line_id: int,
     data: DisposalToolLineUpdate,
@@ -1267,7 +1239,7 @@ async def update_tool_line(
 
 
 @router.delete("/disposals/{disposal_id}/tool-lines/{line_id}")
-async def delete_tool_line(
+def delete_tool_line(
     disposal_id: int,
     line_id: int,
     db: Session = Depends(get_db),
@@ -1309,7 +1281,7 @@ async def delete_tool_line(
 
 
 @router.post("/disposals/{disposal_id}/item-lines", response_model=dict)
-async def add_item_line(
+def add_item_line(
     disposal_id: int,
     data: DisposalItemLineCreate,
     db: Session = Depends(get_db),
@@ -1394,7 +1366,7 @@ async def add_item_line(
 
 
 @router.put("/disposals/{disposal_id}/item-lines/{line_id}", response_model=dict)
-async def update_item_line(
+def update_item_line(
     disposal_id: int,
     line_id: int,
     data: DisposalItemLineUpdate,
@@ -1468,7 +1440,7 @@ async def update_item_line(
 
 
 @router.delete("/disposals/{disposal_id}/item-lines/{line_id}")
-async def delete_item_line(
+def delete_item_line(
     disposal_id: int,
     line_id: int,
     db: Session = Depends(get_db),
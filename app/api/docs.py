@@ -51,7 +51,7 @@ DOCS_METADATA = {
 
 
 @router.get("/")
-async def list_documentation():
+def list_documentation():
     """List all available documentation files with metadata"""
     docs = []
 
@@ -73,7 +73,7 @@ async def list_documentation():
 
 
 @router.get("/{slug}", response_class=PlainTextResponse)
-async def get_documentation(slug: str):
+def get_documentation(slug: str):
     """Get documentation content by slug"""
     # Sanitize slug to prevent directory traversal
     slug = re.sub(r'[^a-zA-Z0-9\-]', '', slug)
@@ -98,7 +98,7 @@ async def get_documentation(slug: str):
 
 
 @router.get("/search/{query}")
-async def search_documentation(query: str):
+def search_documentation(query: str):
     """Search across all documentation files"""
     results = []
     query_lower = query.lower()
@@ -41,7 +41,7 @@ class DocumentType(BaseModel):
 
 
 @router.get("/", response_model=List[DocumentType])
-async def get_document_types(
+def get_document_types(
     include_inactive: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -57,7 +57,7 @@ async def get_document_types(
 
 
 @router.get("/{doc_type_id}", response_model=DocumentType)
-async def get_document_type(
+def get_document_type(
     doc_type_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -75,7 +75,7 @@ async def get_document_type(
 
 
 @router.post("/", response_model=DocumentType)
-async def create_document_type(
+def create_document_type(
     doc_type: DocumentTypeCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -109,7 +109,7 @@ async def create_document_type(
 
 
 @router.put("/{doc_type_id}", response_model=DocumentType)
-async def update_document_type(
+def update_document_type(
     doc_type_id: int,
     doc_type_update: DocumentTypeUpdate,
     current_user: User = Depends(get_current_user),
@@ -142,7 +142,7 @@ async def update_document_type(
 
 
 @router.delete("/{doc_type_id}")
-async def delete_document_type(
+def delete_document_type(
     doc_type_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -175,7 +175,7 @@ async def delete_document_type(
 
 
 @router.post("/seed")
-async def seed_document_types(
+def seed_document_types(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
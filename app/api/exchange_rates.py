@@ -3,7 +3,6 @@ Exchange Rates API
 Endpoints for managing currency exchange rates.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Optional, List
@@ -12,33 +11,12 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models import User, Company, ExchangeRate, ExchangeRateLog
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 from app.services.exchange_rate import ExchangeRateService
+from app.utils.concurrency import run_async
 from app.api.companies import SUPPORTED_CURRENCIES
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 def require_admin(user: User = Depends(get_current_user)):
@@ -64,7 +42,7 @@ class ConvertRequest(BaseModel):
 
 
 @router.get("/exchange-rates")
-async def get_exchange_rates(
+def get_exchange_rates(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -85,7 +63,7 @@ async def get_exchange_rates(
     base_currency = company.primary_currency or "USD"
 
     # Get API rates
-    api_rates = await ExchangeRateService.fetch_rates_from_api(base_currency)
+    api_rates = run_async(ExchangeRateService.fetch_rates_from_api, base_currency)
 
     # Get manual overrides
     manual_rates = ExchangeRateService.get_manual_rates(db, company.id)
@@ -149,7 +127,7 @@ async def get_exchange_rates(
 
 
 @router.get("/exchange-rates/convert")
-async def convert_amount(
+def convert_amount(
     amount: float = Query(..., description="Amount to convert"),
     from_currency: str = Query(..., description="Source currency code"),
     to_currency: str = Query(..., description="Target currency code"),
@@ -163,7 +141,8 @@ async def convert_amount(
             detail="No company associated with this user"
         )
 
-    result = await ExchangeRateService.convert_amount(
+    result = run_async(
+        ExchangeRateService.convert_amount,
         db,
         user.company_id,
         Decimal(str(amount)),
@@ -178,7 +157,7 @@ async def convert_amount(
         )
 
     # Get rate used
-    rate = await ExchangeRateService.get_rate(db, user.company_id, from_currency, to_currency)
+    rate = run_async(ExchangeRateService.get_rate, db, user.company_id, from_currency, to_currency)
 
     return {
         "original_amount": amount,
@@ -190,7 +169,7 @@ async def convert_amount(
 
 
 @router.post("/exchange-rates/manual")
-async def set_manual_rate(
+def set_manual_rate(
     data: ManualRateRequest,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -244,7 +223,7 @@ async def set_manual_rate(
 
 
 @router.delete("/exchange-rates/manual")
-async def delete_manual_rate(
+def delete_manual_rate(
     from_currency: str = Query(...),
     to_currency: str = Query(...),
     user: User = Depends(require_admin),
@@ -277,7 +256,7 @@ async def delete_manual_rate(
 
 
 @router.post("/exchange-rates/refresh")
-async def refresh_rates(
+def refresh_rates(
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -296,7 +275,7 @@ async def refresh_rates(
         )
 
     base_currency = company.primary_currency or "USD"
-    result = await ExchangeRateService.refresh_rates(db, company.id, base_currency)
+    result = run_async(ExchangeRateService.refresh_rates, db, company.id, base_currency)
 
     if not result["success"]:
         raise HTTPException(
@@ -308,7 +287,7 @@ async def refresh_rates(
 
 
 @router.get("/exchange-rates/history")
-async def get_rate_history(
+def get_rate_history(
     from_currency: Optional[str] = None,
     to_currency: Optional[str] = None,
     limit: int = Query(default=50, le=200),
@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from app.database import get_db
 from app.models import Vehicle, VehicleMaintenance, VehicleFuelLog, AddressBook, Site, User
 from app.api.auth import get_current_user
+from app.services.sequences import next_number, max_suffix
 
 router = APIRouter()
 
@@ -273,7 +274,7 @@ def fuel_log_to_response(f: VehicleFuelLog) -> dict:
 # ============================================================================
 
 @router.get("/vehicles/")
-async def get_vehicles(
+def get_vehicles(
     status: Optional[str] = None,
     vehicle_type: Optional[str] = None,
     assigned_site_id: Optional[int] = None,
@@ -312,7 +313,7 @@ async def get_vehicles(
 
 
 @router.get("/vehicles/{vehicle_id}")
-async def get_vehicle(
+def get_vehicle(
     vehicle_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -333,7 +334,7 @@ async def get_vehicle(
 
 
 @router.post("/vehicles/")
-async def create_vehicle(
+def create_vehicle(
     vehicle_data: VehicleCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -375,7 +376,7 @@ async def create_vehicle(
 
 
 @router.put("/vehicles/{vehicle_id}")
-async def update_vehicle(
+def update_vehicle(
     vehicle_id: int,
     vehicle_data: VehicleUpdate,
     current_user: User = Depends(get_current_user),
@@ -428,7 +429,7 @@ async def update_vehicle(
 
 
 @router.delete("/vehicles/{vehicle_id}")
-async def delete_vehicle(
+def delete_vehicle(
     vehicle_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -449,7 +450,7 @@ async def delete_vehicle(
 
 
 @router.get("/vehicles/stats/summary")
-async def get_vehicle_stats(
+def get_vehicle_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -512,7 +513,7 @@ async def get_vehicle_stats(
 # ============================================================================
 
 @router.get("/vehicles/maintenance/")
-async def get_all_maintenance(
+def get_all_maintenance(
     vehicle_id: Optional[int] = None,
     maintenance_type: Optional[str] = None,
     status: Optional[str] = None,
@@ -544,7 +545,7 @@ async def get_all_maintenance(
 
 
 @router.get("/vehicles/maintenance/{maintenance_id}")
-async def get_maintenance(
+def get_maintenance(
     maintenance_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -566,7 +567,7 @@ async def get_maintenance(
 
 
 @router.post("/vehicles/maintenance/")
-async def create_maintenance(
+def create_maintenance(
     data: MaintenanceCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -581,19 +582,11 @@ async def create_maintenance(
         raise HTTPException(status_code=404, detail="Vehicle not found")
 
     # Generate maintenance number
-    year = date.today().year
-    last_mnt = db.query(VehicleMaintenance).filter(
-        VehicleMaintenance.company_id == current_user.company_id,
-        VehicleMaintenance.maintenance_number.like(f'MNT-{year}-%')
-    ).order_by(VehicleMaintenance.maintenance_number.desc()).first()
-
-    if last_mnt:
-        last_num = int(last_mnt.maintenance_number.split('-')[-1])
-        new_num = last_num + 1
-    else:
-        new_num = 1
-
-    maintenance_number = f"MNT-{year}-{new_num:05d}"
+    prefix = f"MNT-{date.today().year}-"
+    maintenance_number = next_number(
+        db, current_user.company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, VehicleMaintenance.maintenance_number, VehicleMaintenance.company_id, current_user.company_id, prefix)
+    )
 
     # Calculate total cost
     labor_cost = Decimal(str(data.labor_cost or 0))
@@ -637,7 +630,7 @@ async def create_maintenance(
 
 
 @router.put("/vehicles/maintenance/{maintenance_id}")
-async def update_maintenance(
+def update_maintenance(
     maintenance_id: int,
     data: MaintenanceUpdate,
     current_user: User = Depends(get_current_user),
@@ -677,7 +670,7 @@ async def update_maintenance(
 
 
 @router.delete("/vehicles/maintenance/{maintenance_id}")
-async def delete_maintenance(
+def delete_maintenance(
     maintenance_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -702,7 +695,7 @@ async def delete_maintenance(
 # ============================================================================
 
 @router.get("/vehicles/fuel-logs/")
-async def get_all_fuel_logs(
+def get_all_fuel_logs(
     vehicle_id: Optional[int] = None,
     driver_id: Optional[int] = None,
     from_date: Optional[date] = None,
@@ -731,7 +724,7 @@ async def get_all_fuel_logs(
 
 
 @router.get("/vehicles/fuel-logs/{fuel_log_id}")
-async def get_fuel_log(
+def get_fuel_log(
     fuel_log_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -753,7 +746,7 @@ async def get_fuel_log(
 
 
 @router.post("/vehicles/fuel-logs/")
-async def create_fuel_log(
+def create_fuel_log(
     data: FuelLogCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -768,19 +761,11 @@ async def create_fuel_log(
         raise HTTPException(status_code=404, detail="Vehicle not found")
 
     # Generate fuel log number
-    year = date.today().year
-    last_log = db.query(VehicleFuelLog).filter(
-        VehicleFuelLog.company_id == current_user.company_id,
-        VehicleFuelLog.fuel_log_number.like(f'FUEL-{year}-%')
-    ).order_by(VehicleFuelLog.fuel_log_number.desc()).first()
-
-    if last_log:
-        last_num = int(last_log.fuel_log_number.split('-')[-1])
-        new_num = last_num + 1
-    else:
-        new_num = 1
-
-    fuel_log_number = f"FUEL-{year}-{new_num:05d}"
+    prefix = f"FUEL-{date.today().year}-"
+    fuel_log_number = next_number(
+        db, current_user.company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, VehicleFuelLog.fuel_log_number, VehicleFuelLog.company_id, current_user.company_id, prefix)
+    )
 
     # Calculate fuel efficiency if full tank
     km_since_last = None
@@ -829,7 +814,7 @@ async def create_fuel_log(
 
 
 @router.put("/vehicles/fuel-logs/{fuel_log_id}")
-async def update_fuel_log(
+def update_fuel_log(
     fuel_log_id: int,
     data: FuelLogUpdate,
     current_user: User = Depends(get_current_user),
@@ -866,7 +851,7 @@ async def update_fuel_log(
 
 
 @router.delete("/vehicles/fuel-logs/{fuel_log_id}")
-async def delete_fuel_log(
+def delete_fuel_log(
     fuel_log_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -887,7 +872,7 @@ async def delete_fuel_log(
 
 
 @router.get("/vehicles/fuel-logs/stats/summary")
-async def get_fuel_stats(
+def get_fuel_stats(
     vehicle_id: Optional[int] = None,
     from_date: Optional[date] = None,
     to_date: Optional[date] = None,
@@ -27,7 +27,8 @@ from app.models import (
     PurchaseOrderInvoice, AddressBook, SupplierInvoice
 )
 from app.api.auth import get_current_user
-from app.services.journal_posting import JournalPostingService
+from app.services.journal_posting import JournalPostingService, generate_entry_number
+from app.services.sequences import next_number, max_suffix
 from app.services.landed_cost import LandedCostService, get_effective_unit_cost, get_effective_total_cost
 
 router = APIRouter()
@@ -249,24 +250,11 @@ class GoodsReceiptExtraCostUpdate(BaseModel):
 
 def generate_grn_number(db: Session, company_id: int) -> str:
     """Generate next GRN number for company"""
-    year = datetime.now().year
-    prefix = f"GRN-{year}-"
-
-    last_grn = db.query(GoodsReceipt).filter(
-        GoodsReceipt.company_id == company_id,
-        GoodsReceipt.grn_number.like(f"{prefix}%")
-    ).order_by(GoodsReceipt.id.desc()).first()
-
-    if last_grn:
-        try:
-            last_num = int(last_grn.grn_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:05d}"
+    prefix = f"GRN-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, GoodsReceipt.grn_number, GoodsReceipt.company_id, company_id, prefix)
+    )
 
 
 def grn_to_response(grn: GoodsReceipt, include_lines: bool = True, include_extra_costs: bool = True) -> dict:
@@ -451,21 +439,10 @@ def update_inventory(db: Session, grn_line: GoodsReceiptLine, company_id: int, u
     # Generate transaction number
     today = datetime.now().strftime("%Y%m%d")
     tx_prefix = f"GRN-{today}-"
-    last_tx = db.query(ItemLedger).filter(
-        ItemLedger.company_id == company_id,
-        ItemLedger.transaction_number.like(f"{tx_prefix}%")
-    ).order_by(ItemLedger.id.desc()).first()
-
-    if last_tx:
-        try:
-            last_num = int(last_tx.transaction_number.split("-")[-1])
-            next_num = last_num + 1
-        except:
-            next_num = 1
-    else:
-        next_num = 1
-
-    tx_number = f"{tx_prefix}{next_num:05d}"
+    tx_number = next_number(
+        db, company_id, tx_prefix, width=5,
+        seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, company_id, tx_prefix)
+    )
 
     # Create ItemLedger entry with landed cost
     grn = grn_line.goods_receipt
@@ -507,7 +484,7 @@ def update_inventory(db: Session, grn_line: GoodsReceiptLine, company_id: int, u
 # =============================================================================
 
 @router.post("/", response_model=dict)
-async def create_goods_receipt(
+def create_goods_receipt(
     grn_data: GoodsReceiptCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -667,7 +644,7 @@ async def create_goods_receipt(
     return grn_to_response(grn)
 
 @router.get("/", response_model=dict)
-async def list_goods_receipts(
+def list_goods_receipts(
     purchase_order_id: Optional[int] = None,
     status: Optional[str] = None,
     warehouse_id: Optional[int] = None,
@@ -722,7 +699,7 @@ async def list_goods_receipts(
 
 
 @router.get("/{grn_id}", response_model=dict)
-async def get_goods_receipt(
+def get_goods_receipt(
     grn_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -747,7 +724,7 @@ async def get_goods_receipt(
 
 
 @router.put("/{grn_id}", response_model=dict)
-async def update_goods_receipt(
+def update_goods_receipt(
     grn_id: int,
     grn_data: GoodsReceiptUpdate,
     current_user: User = Depends(get_current_user),
@@ -791,7 +768,7 @@ async def update_goods_receipt(
 
 
 @router.post("/{grn_id}/post", response_model=dict)
-async def post_goods_receipt(
+def post_goods_receipt(
     grn_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -920,7 +897,7 @@ async def post_goods_receipt(
 
 
 @router.post("/{grn_id}/inspect", response_model=dict)
-async def inspect_goods_receipt(
+def inspect_goods_receipt(
     grn_id: int,
     inspection: GRNInspectionRequest,
     current_user: User = Depends(get_current_user),
@@ -1014,7 +991,7 @@ async def inspect_goods_receipt(
 
 
 @router.delete("/{grn_id}")
-async def delete_goods_receipt(
+def delete_goods_receipt(
     grn_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1041,7 +1018,7 @@ async def delete_goods_receipt(
 
 
 @router.post("/{grn_id}/reverse", response_model=dict)
-async def reverse_goods_receipt(
+def reverse_goods_receipt(
     grn_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1160,24 +1137,7 @@ async def reverse_goods_receipt(
             if original_je:
                 # Generate reversal entry number
                 today = date.today()
-                year = today.year
-
-                # Get next sequence number for this year
-                last_entry = db.query(JournalEntry).filter(
-                    JournalEntry.company_id == current_user.company_id,
-                    JournalEntry.entry_number.like(f'JE-{year}-%')
-                ).order_by(JournalEntry.entry_number.desc()).first()
-
-                if last_entry:
-                    try:
-                        last_seq = int(last_entry.entry_number.split('-')[-1])
-                        next_seq = last_seq + 1
-                    except ValueError:
-                        next_seq = 1
-                else:
-                    next_seq = 1
-
-                reversal_entry_number = f"JE-{year}-{next_seq:06d}"
+                reversal_entry_number = generate_entry_number(db, current_user.company_id)
 
                 # Create reversal journal entry
                 reversal_je = JournalEntry(
@@ -1314,21 +1274,10 @@ def reverse_inventory(db: Session, grn_line: GoodsReceiptLine, company_id: int,
     # Generate transaction number for reversal
     today = datetime.now().strftime("%Y%m%d")
     tx_prefix = f"GRN-REV-{today}-"
-    last_tx = db.query(ItemLedger).filter(
-        ItemLedger.company_id == company_id,
-        ItemLedger.transaction_number.like(f"{tx_prefix}%")
-    ).order_by(ItemLedger.id.desc()).first()
-
-    if last_tx:
-        try:
-            last_num = int(last_tx.transaction_number.split("-")[-1])
-            next_num = last_num + 1
-        except:
-            next_num = 1
-    else:
-        next_num = 1
-
-    tx_number = f"{tx_prefix}{next_num:05d}"
+    tx_number = next_number(
+        db, company_id, tx_prefix, width=5,
+        seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, company_id, tx_prefix)
+    )
 
     grn = grn_line.goods_receipt
 
@@ -1366,7 +1315,7 @@ def reverse_inventory(db: Session, grn_line: GoodsReceiptLine, company_id: int,
 # =============================================================================
 
 @router.get("/po/{po_id}/receiving-status", response_model=dict)
-async def get_po_receiving_status(
+def get_po_receiving_status(
     po_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1432,7 +1381,7 @@ async def get_po_receiving_status(
 # =============================================================================
 
 @router.get("/po/{po_id}/three-way-match", response_model=dict)
-async def three_way_match(
+def three_way_match(
     po_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1565,7 +1514,7 @@ async def three_way_match(
 # =============================================================================
 
 @router.get("/{grn_id}/extra-costs", response_model=List[dict])
-async def list_extra_costs(
+def list_extra_costs(
     grn_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1604,7 +1553,7 @@ async def list_extra_costs(
 
 
 @router.post("/{grn_id}/extra-costs", response_model=dict)
-async def add_extra_cost(
+def add_extra_cost(
     grn_id: int,
     cost_data: GoodsReceiptExtraCostCreate,
     current_user: User = Depends(get_current_user),
@@ -1681,7 +1630,7 @@ async def add_extra_cost(
 
 
 @router.put("/{grn_id}/extra-costs/{cost_id}", response_model=dict)
-async def update_extra_cost(
+def update_extra_cost(
     grn_id: int,
     cost_id: int,
     cost_data: GoodsReceiptExtraCostUpdate,
@@ -1767,7 +1716,7 @@ async def update_extra_cost(
 
 
 @router.delete("/{grn_id}/extra-costs/{cost_id}", response_model=dict)
-async def delete_extra_cost(
+def delete_extra_cost(
     grn_id: int,
     cost_id: int,
     current_user: User = Depends(get_current_user),
@@ -1812,7 +1761,7 @@ async def delete_extra_cost(
 
 
 @router.post("/{grn_id}/recalculate-landed-costs", response_model=dict)
-async def recalculate_landed_costs(
+def recalculate_landed_costs(
     grn_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1854,7 +1803,7 @@ async def recalculate_landed_costs(
 
 
 @router.get("/{grn_id}/landed-cost-summary", response_model=dict)
-async def get_landed_cost_summary(
+def get_landed_cost_summary(
     grn_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1876,7 +1825,7 @@ async def get_landed_cost_summary(
 
 
 @router.put("/{grn_id}/mark-as-import", response_model=dict)
-async def mark_as_import(
+def mark_as_import(
     grn_id: int,
     is_import: bool = True,
     current_user: User = Depends(get_current_user),
@@ -1911,7 +1860,7 @@ async def mark_as_import(
 
 
 @router.get("/extra-cost-types", response_model=List[dict])
-async def get_extra_cost_types(
+def get_extra_cost_types(
     current_user: User = Depends(get_current_user)
 ):
     """Get list of available extra cost types"""
@@ -1,40 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
 from app.database import get_db
 from app.models import User, Company, HandHeldDevice, Technician, handheld_device_technicians, handheld_device_technicians_ab, Warehouse, AddressBook
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 def require_admin(user: User = Depends(get_current_user)):
@@ -162,7 +138,7 @@ def device_to_response(device: HandHeldDevice, db: Session) -> dict:
 
 
 @router.get("/handheld-devices/")
-async def get_handheld_devices(
+def get_handheld_devices(
     include_inactive: bool = False,
     search: Optional[str] = None,
     status: Optional[str] = None,
@@ -198,7 +174,7 @@ async def get_handheld_devices(
 
 
 @router.get("/handheld-devices/available-technicians")
-async def get_available_technicians(
+def get_available_technicians(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -238,7 +214,7 @@ async def get_available_technicians(
 
 
 @router.get("/handheld-devices/{device_id}")
-async def get_handheld_device(
+def get_handheld_device(
     device_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -265,7 +241,7 @@ async def get_handheld_device(
 
 
 @router.post("/handheld-devices/")
-async def create_handheld_device(
+def create_handheld_device(
     data: HandHeldDeviceCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -334,7 +310,7 @@ async def create_handheld_device(
 
 
 @router.put("/handheld-devices/{device_id}")
-async def update_handheld_device(
+def update_handheld_device(
     device_id: int,
     data: HandHeldDeviceUpdate,
     user: User = Depends(require_admin),
@@ -407,7 +383,7 @@ async def update_handheld_device(
 
 
 @router.delete("/handheld-devices/{device_id}")
-async def delete_handheld_device(
+def delete_handheld_device(
     device_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -459,7 +435,7 @@ async def delete_handheld_device(
 
 
 @router.patch("/handheld-devices/{device_id}/assign")
-async def assign_technician_to_device(
+def assign_technician_to_device(
     device_id: int,
     data: TechnicianAssignment,
     user: User = Depends(require_admin),
@@ -569,7 +545,7 @@ async def assign_technician_to_device(
 
 
 @router.patch("/handheld-devices/{device_id}/assign-technicians")
-async def assign_technicians_to_device(
+def assign_technicians_to_device(
     device_id: int,
     data: TechniciansAssignment,
     user: User = Depends(require_admin),
@@ -657,7 +633,7 @@ async def assign_technicians_to_device(
 
 
 @router.post("/handheld-devices/{device_id}/add-technician")
-async def add_technician_to_device(
+def add_technician_to_device(
     device_id: int,
     data: TechnicianAssignment,
     user: User = Depends(require_admin),
@@ -759,7 +735,7 @@ async def add_technician_to_device(
 
 
 @router.delete("/handheld-devices/{device_id}/remove-technician/{technician_id}")
-async def remove_technician_from_device(
+def remove_technician_from_device(
     device_id: int,
     technician_id: int,
     user: User = Depends(require_admin),
@@ -854,7 +830,7 @@ async def remove_technician_from_device(
 
 
 @router.patch("/handheld-devices/{device_id}/toggle-status")
-async def toggle_device_status(
+def toggle_device_status(
     device_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -11,7 +11,7 @@ import hashlib
 
 from app.database import get_db
 from app.models import HandHeldDevice, Technician, Company, AddressBook, handheld_device_technicians, handheld_device_technicians_ab
-from app.utils.security import create_access_token, verify_token
+from app.utils.security import create_access_token
 from app.utils.rate_limiter import limiter, RateLimits
 
 router = APIRouter()
@@ -69,7 +69,7 @@ def hash_pin(pin: str, salt: str) -> str:
 
 @router.post("/hhd/login", response_model=HHDLoginResponse)
 @limiter.limit(RateLimits.HHD_LOGIN)
-async def hhd_login(
+def hhd_login(
     request: Request,
     data: HHDLoginRequest,
     db: Session = Depends(get_db)
@@ -241,7 +241,7 @@ async def hhd_login(
 
 @router.post("/hhd/refresh")
 @limiter.limit(RateLimits.HHD_REFRESH)
-async def hhd_refresh_token(
+def hhd_refresh_token(
     request: Request,
     data: HHDTokenRefreshRequest,
     db: Session = Depends(get_db)
@@ -331,7 +331,7 @@ async def hhd_refresh_token(
 
 
 @router.post("/hhd/logout")
-async def hhd_logout(
+def hhd_logout(
     data: HHDTokenRefreshRequest,
     db: Session = Depends(get_db)
 ):
@@ -382,7 +382,7 @@ def get_device_id_from_token(request: Request) -> Optional[int]:
 
 
 @router.post("/hhd/fcm-token")
-async def register_fcm_token(
+def register_fcm_token(
     request: Request,
     data: FCMTokenRequest,
     db: Session = Depends(get_db)
@@ -419,7 +419,7 @@ async def register_fcm_token(
 
 
 @router.delete("/hhd/fcm-token")
-async def unregister_fcm_token(
+def unregister_fcm_token(
     request: Request,
     db: Session = Depends(get_db)
 ):
@@ -452,7 +452,7 @@ class TestNotificationRequest(BaseModel):
 
 
 @router.post("/hhd/test-notification")
-async def send_test_notification(
+def send_test_notification(
     request: Request,
     data: TestNotificationRequest,
     db: Session = Depends(get_db)
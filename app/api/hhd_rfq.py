@@ -184,7 +184,7 @@ class ItemSearchResult(BaseModel):
 # =============================================================================
 
 @router.get("/items/search")
-async def search_items(
+def search_items(
     q: str = Query(..., min_length=2, description="Search query"),
     limit: int = Query(20, ge=1, le=50),
     db: Session = Depends(get_db),
@@ -222,7 +222,7 @@ async def search_items(
 # =============================================================================
 
 @router.post("/uploads/rfq-image")
-async def upload_rfq_image(
+def upload_rfq_image(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     hhd: HHDContext = Depends(get_hhd_auth)
@@ -239,7 +239,7 @@ async def upload_rfq_image(
         )
 
     # Validate file size (max 10MB)
-    content = await file.read()
+    content = file.file.read()
     if len(content) > 10 * 1024 * 1024:
         raise HTTPException(
             status_code=400,
@@ -314,7 +314,7 @@ async def upload_rfq_image(
 # =============================================================================
 
 @router.get("/rfqs")
-async def list_my_rfqs(
+def list_my_rfqs(
     status: Optional[str] = None,
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=50),
@@ -379,7 +379,7 @@ async def list_my_rfqs(
 # =============================================================================
 
 @router.get("/rfqs/{rfq_id}")
-async def get_rfq_detail(
+def get_rfq_detail(
     rfq_id: int,
     db: Session = Depends(get_db),
     hhd: HHDContext = Depends(get_hhd_auth)
@@ -451,7 +451,7 @@ async def get_rfq_detail(
 # =============================================================================
 
 @router.post("/rfqs")
-async def create_rfq(
+def create_rfq(
     rfq_data: MobileRFQCreate,
     db: Session = Depends(get_db),
     hhd: HHDContext = Depends(get_hhd_auth)
@@ -6,13 +6,18 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from PIL import Image
 
 from app.database import get_db
 from app.schemas import ProcessedImage, ProcessedImageList
 from app.models import ProcessedImage as ProcessedImageModel, User, InvoiceItem, ItemLedger, PurchaseOrderInvoice, PurchaseOrder, InvoiceAllocation, AllocationPeriod, Company
 from app.api.auth import get_current_user
 from app.services.s3 import upload_to_s3, process_image, generate_presigned_url, delete_from_s3
+from app.services.document_queue import (
+    document_queue, DocumentJob, job_for_image, is_stale, stale_before, reserve_document_quota
+)
+from app.services.cache import cache_service, hash_document
+from app.utils.concurrency import run_async
+from app.config import settings
 from app.services.email import EmailService
 from app.services.mock_email import MockEmailService
 from app.api.admin import process_invoice_line_items
@@ -27,29 +32,13 @@ SUPPORTED_PDF_TYPE = "application/pdf"
 
 
 def convert_pdf_to_image(pdf_bytes: bytes) -> bytes:
-    """Convert first page of PDF to image bytes."""
+    """
+    Render the first page of a PDF as the stored document image.
+    Invoice data is extracted from all pages separately (see process_invoice_pdf).
+    """
     try:
-        import fitz  # PyMuPDF
-
-        # Open PDF from bytes
-        pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-
-        if len(pdf_document) == 0:
-            raise ValueError("PDF has no pages")
-
-        # Get first page
-        page = pdf_document[0]
-
-        # Render page to image with high resolution (300 DPI)
-        mat = fitz.Matrix(300/72, 300/72)  # 300 DPI
-        pix = page.get_pixmap(matrix=mat)
-
-        # Convert to PNG bytes
-        img_bytes = pix.tobytes("png")
-
-        pdf_document.close()
-
-        return img_bytes
+        from app.services.pdf_ingestion import render_pdf_preview
+        return render_pdf_preview(pdf_bytes)
     except ImportError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -63,12 +52,14 @@ def convert_pdf_to_image(pdf_bytes: bytes) -> bytes:
 
 
 @router.post("/upload", response_model=ProcessedImage)
-async def upload_image(
+def upload_image(
     file: UploadFile = File(...),
     document_type: str = "invoice",
     invoice_category: str = None,
     site_id: int = None,
     contract_id: int = None,
+    async_processing: bool = Query(False, description="Queue OCR/AI processing and return immediately with status 'queued'"),
+    use_cache: bool = Query(True, description="Reuse the processing result of an identical earlier upload"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -90,9 +81,19 @@ async def upload_image(
         )
 
     # Read file content
-    content = await file.read()
-
-    # Convert PDF to image if necessary
+    content = file.file.read()
+
+    # Identical uploads (app retries, forwarded invoices) reuse the earlier OCR/AI result
+    content_hash = None
+    cached_results = None
+    if use_cache and settings.document_cache_enabled and current_user.company_id:
+        content_hash = hash_document(content)
+        cached_results = run_async(cache_service.get_document_result, current_user.company_id, content_hash)
+        if cached_results:
+            logger.info(f"[DOCUMENT_CACHE] Upload - reusing processing result for {content_hash[:12]}")
+
+    # Convert PDF to image if necessary (the original PDF is kept for multi-page extraction)
+    pdf_bytes = content if is_pdf else None
     if is_pdf:
         content = convert_pdf_to_image(content)
         # Use PNG extension for converted PDFs
@@ -106,16 +107,68 @@ async def upload_image(
     with open(temp_file_path, "wb") as buffer:
         buffer.write(content)
 
+    if async_processing and not cached_results:
+        # Persist the record now and let the document queue run OCR/AI.
+        # Poll GET /images/{id}/status for progress.
+        # The document is taken from the quota now (refunded if processing fails)
+        if not reserve_document_quota(db, current_user.id):
+            os.remove(temp_file_path)
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You have reached your document processing limit. No documents remaining."
+            )
+
+        pdf_path = None
+        if pdf_bytes is not None:
+            pdf_path = f"uploads/{unique_filename.rsplit('.', 1)[0]}.pdf"
+            with open(pdf_path, "wb") as buffer:
+                buffer.write(pdf_bytes)
+
+        db_image = ProcessedImageModel(
+            user_id=current_user.id,
+            original_filename=file.filename,
+            s3_key=f"local/{unique_filename}",
+            s3_url=f"local/{unique_filename}",
+            processing_status="queued",
+            processing_attempts=0,
+            document_type=document_type,
+            invoice_category=invoice_category if document_type == "invoice" else None,
+            site_id=site_id,
+            contract_id=contract_id,
+            processing_method="queued"
+        )
+        db.add(db_image)
+        db.commit()
+        db.refresh(db_image)
+
+        document_queue.submit(DocumentJob(
+            image_id=db_image.id,
+            file_path=temp_file_path,
+            unique_filename=unique_filename,
+            user_id=current_user.id,
+            company_id=current_user.company_id,
+            document_type=document_type,
+            content_hash=content_hash,
+            pdf_path=pdf_path
+        ))
+        return db_image
+
     try:
         # Read file content for invoice processing
         with open(temp_file_path, 'rb') as f:
             file_bytes = f.read()
 
         # Process image (resize, compress, OCR, AI extraction) - pass db and company_id for vendor lookup/creation
-        processed_image_path, invoice_results = process_image(temp_file_path, file_bytes, db, current_user.company_id)
+        processed_image_path, invoice_results = process_image(
+            temp_file_path, file_bytes, db, current_user.company_id,
+            invoice_results=cached_results, pdf_bytes=pdf_bytes
+        )
+
+        if content_hash and not cached_results:
+            run_async(cache_service.set_document_result, current_user.company_id, content_hash, invoice_results)
 
         # Increment company's document usage counter IMMEDIATELY after OCR processing
-        # This counts the API usage regardless of whether the invoice is saved or rejected
+        # This counts every stored document, saved or rejected, processed or served from the result cache
         if current_user.company_id:
             company_for_counter = db.query(Company).filter(Company.id == current_user.company_id).first()
             if company_for_counter:
@@ -288,7 +341,7 @@ class ManualDocumentCreate(BaseModel):
 
 
 @router.post("/manual", response_model=ProcessedImage)
-async def create_manual_document(
+def create_manual_document(
     document: ManualDocumentCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -436,7 +489,7 @@ async def create_manual_document(
 
 
 @router.get("/", response_model=ProcessedImageList)
-async def get_user_images(
+def get_user_images(
     response: Response,
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
@@ -470,7 +523,7 @@ async def get_user_images(
 
 
 @router.get("/{image_id}", response_model=ProcessedImage)
-async def get_image(
+def get_image(
     image_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -492,7 +545,7 @@ async def get_image(
 
 
 @router.put("/{image_id}", response_model=ProcessedImage)
-async def update_image(
+def update_image(
     image_id: int,
     document_type: str = None,
     original_filename: str = None,
@@ -539,8 +592,88 @@ async def update_image(
         )
 
 
+@router.get("/{image_id}/status")
+def get_image_processing_status(
+    image_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Poll the processing status of an uploaded document (used with async_processing uploads)."""
+    image = db.query(ProcessedImageModel)\
+        .filter(
+            ProcessedImageModel.id == image_id,
+            ProcessedImageModel.user_id == current_user.id
+        )\
+        .first()
+
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    return {
+        "image_id": image.id,
+        "processing_status": image.processing_status,
+        "processing_attempts": image.processing_attempts or 0,
+        "processing_error": image.processing_error,
+        "is_finished": image.processing_status in ("completed", "completed_local", "failed"),
+        "has_structured_data": image.has_structured_data,
+        "updated_at": image.updated_at
+    }
+
+
+@router.post("/{image_id}/retry")
+def retry_image_processing(
+    image_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Re-queue a document whose background processing failed or was lost in a restart."""
+    image = db.query(ProcessedImageModel)\
+        .filter(
+            ProcessedImageModel.id == image_id,
+            ProcessedImageModel.user_id == current_user.id
+        )\
+        .first()
+
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    if image.processing_status != "failed" and not is_stale(image, stale_before(db)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only failed or stalled documents can be retried (current status: {image.processing_status})"
+        )
+
+    job = job_for_image(image, current_user.company_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Original upload is no longer available. Please upload the document again."
+        )
+
+    # A failed job gave its document back to the quota; a stalled one still holds it
+    if image.processing_status == "failed" and not reserve_document_quota(db, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You have reached your document processing limit. No documents remaining."
+        )
+
+    image.processing_status = "queued"
+    image.processing_error = None
+    db.commit()
+
+    document_queue.submit(job)
+
+    return {"image_id": image.id, "processing_status": image.processing_status}
+
+
 @router.get("/{image_id}/structured-data")
-async def get_image_structured_data(
+def get_image_structured_data(
     image_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -586,7 +719,7 @@ async def get_image_structured_data(
 
 
 @router.get("/{image_id}/vendor-lookup")
-async def get_vendor_lookup_for_image(
+def get_vendor_lookup_for_image(
     image_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -680,7 +813,7 @@ async def get_vendor_lookup_for_image(
 
 
 @router.post("/{image_id}/link-vendor")
-async def link_vendor_to_image(
+def link_vendor_to_image(
     image_id: int,
     address_book_id: int = Query(..., description="Address Book ID (search_type='V')"),
     current_user: User = Depends(get_current_user),
@@ -770,7 +903,7 @@ async def link_vendor_to_image(
 
 
 @router.delete("/{image_id}")
-async def delete_image(
+def delete_image(
     image_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -864,7 +997,7 @@ async def delete_image(
 
 
 @router.get("/{image_id}/url")
-async def get_image_url(
+def get_image_url(
     image_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -908,7 +1041,7 @@ async def get_image_url(
 
 
 @router.delete("/flush")
-async def flush_user_data(
+def flush_user_data(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -986,7 +1119,7 @@ async def flush_user_data(
 
 
 @router.post("/flush-processed")
-async def flush_processed_invoices(
+def flush_processed_invoices(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1067,7 +1200,7 @@ async def flush_processed_invoices(
 
 
 @router.post("/{image_id}/send-email")
-async def send_invoice_email(
+def send_invoice_email(
     image_id: int,
     recipient_email: str = Query(..., description="Email address to send the invoice data to"),
     format_type: str = Query("html", description="Email format: 'html' or 'excel'"),
@@ -8,19 +8,17 @@ for Vendors (Address Book) and Item Master.
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, Integer
+from sqlalchemy import func
 from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
 import io
 import logging
 
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
 from app.database import get_db
 from app.models import User, AddressBook, AddressBookContact, ItemMaster, ItemCategory, Warehouse
 from app.api.auth import get_current_user
+from app.api.address_book import generate_next_address_number
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -39,8 +37,12 @@ def require_admin(user: User):
         )
 
 
-def create_styled_workbook(columns: List[str], sheet_name: str = "Data") -> Workbook:
+def create_styled_workbook(columns: List[str], sheet_name: str = "Data"):
     """Create a styled Excel workbook with headers"""
+    # openpyxl is only needed by this router's handlers, not at worker boot
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
     wb = Workbook()
     ws = wb.active
     ws.title = sheet_name
@@ -73,21 +75,6 @@ def create_styled_workbook(columns: List[str], sheet_name: str = "Data") -> Work
     return wb
 
 
-def get_next_address_number(db: Session, company_id: int) -> int:
-    """Get the next address number as integer for company"""
-    # Get max address number currently in use
-    result = db.query(func.max(func.cast(AddressBook.address_number, Integer))).filter(
-        AddressBook.company_id == company_id
-    ).scalar()
-
-    return (result or 0) + 1
-
-
-def generate_address_number(number: int) -> str:
-    """Format address number as 8-digit padded string"""
-    return str(number).zfill(8)
-
-
 # =============================================================================
 # Template Downloads
 # =============================================================================
@@ -120,7 +107,7 @@ ITEM_COLUMNS = [
 
 
 @router.get("/import-export/template/{entity_type}")
-async def download_template(
+def download_template(
     entity_type: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -192,6 +179,7 @@ async def download_template(
             ws_instructions.cell(row=row_idx, column=col_idx, value=value)
 
     # Style instruction header
+    from openpyxl.styles import Font
     ws_instructions["A1"].font = Font(bold=True, size=14)
     ws_instructions.column_dimensions["A"].width = 20
     ws_instructions.column_dimensions["B"].width = 60
@@ -213,7 +201,7 @@ async def download_template(
 # =============================================================================
 
 @router.get("/import-export/export/{entity_type}")
-async def export_data(
+def export_data(
     entity_type: str,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -225,9 +213,9 @@ async def export_data(
     require_admin(current_user)
 
     if entity_type == "vendors":
-        return await export_vendors(db, current_user)
+        return export_vendors(db, current_user)
     elif entity_type == "items":
-        return await export_items(db, current_user)
+        return export_items(db, current_user)
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -235,7 +223,7 @@ async def export_data(
         )
 
 
-async def export_vendors(db: Session, current_user: User) -> StreamingResponse:
+def export_vendors(db: Session, current_user: User) -> StreamingResponse:
     """Export vendors to Excel"""
     vendors = db.query(AddressBook).filter(
         AddressBook.company_id == current_user.company_id,
@@ -276,7 +264,7 @@ async def export_vendors(db: Session, current_user: User) -> StreamingResponse:
     )
 
 
-async def export_items(db: Session, current_user: User) -> StreamingResponse:
+def export_items(db: Session, current_user: User) -> StreamingResponse:
     """Export items to Excel"""
     items = db.query(ItemMaster).filter(
         ItemMaster.company_id == current_user.company_id
@@ -327,7 +315,7 @@ async def export_items(db: Session, current_user: User) -> StreamingResponse:
 # =============================================================================
 
 @router.post("/import-export/import/{entity_type}")
-async def import_data(
+def import_data(
     entity_type: str,
     file: UploadFile = File(...),
     skip_duplicates: bool = Form(True),
@@ -350,7 +338,7 @@ async def import_data(
 
     try:
         # Read file content
-        content = await file.read()
+        content = file.file.read()
 
         if file.filename.endswith('.csv'):
             # Handle CSV
@@ -360,13 +348,14 @@ async def import_data(
             )
 
         # Load Excel workbook
+        from openpyxl import load_workbook
         wb = load_workbook(io.BytesIO(content))
         ws = wb.active
 
         if entity_type == "vendors":
-            return await import_vendors(db, current_user, ws, skip_duplicates, update_existing)
+            return import_vendors(db, current_user, ws, skip_duplicates, update_existing)
         elif entity_type == "items":
-            return await import_items(db, current_user, ws, skip_duplicates, update_existing)
+            return import_items(db, current_user, ws, skip_duplicates, update_existing)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -383,7 +372,7 @@ async def import_data(
         )
 
 
-async def import_vendors(
+def import_vendors(
     db: Session,
     current_user: User,
     ws,
@@ -419,9 +408,6 @@ async def import_vendors(
         if header:
             col_map[header.lower().replace(" ", "_")] = idx
 
-    # Get starting address number for new records
-    next_address_num = get_next_address_number(db, current_user.company_id)
-
     # Process rows
     for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), 2):
         try:
@@ -476,8 +462,7 @@ async def import_vendors(
                 continue
 
             # Create new vendor
-            address_number = generate_address_number(next_address_num)
-            next_address_num += 1  # Increment for next record
+            address_number = generate_next_address_number(db, current_user.company_id)
 
             vendor = AddressBook(
                 company_id=current_user.company_id,
@@ -532,7 +517,7 @@ async def import_vendors(
     }
 
 
-async def import_items(
+def import_items(
     db: Session,
     current_user: User,
     ws,
@@ -2,7 +2,7 @@
 Item Master API endpoints for inventory management
 Manages items, categories, stock levels, transfers, and ledger entries
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_, func, case
 from pydantic import BaseModel
@@ -14,14 +14,17 @@ import io
 import re
 
 from app.database import get_db
+from app.services.auth_context import get_auth_context
+from app.services.dependency import get_current_user
 from app.services.cache import cache_service, hash_filters
+from app.utils.concurrency import run_async
 from app.models import (
     User, ItemCategory, ItemMaster, ItemStock, ItemLedger,
     ItemTransfer, ItemTransferLine, InvoiceItem, ItemAlias,
     Warehouse, HandHeldDevice, AddressBook, WorkOrder
 )
-from app.api.auth import verify_token
 from app.services.journal_posting import JournalPostingService
+from app.services.sequences import next_number, max_suffix
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt
 from app.config import settings
@@ -54,6 +57,7 @@ def verify_token_payload(token: str) -> Optional[dict]:
 
 
 def get_current_user_or_hhd(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -62,7 +66,9 @@ def get_current_user_or_hhd(
     Returns User object for admin tokens, or HHDContext for mobile tokens.
     """
     token = credentials.credentials
-    payload = verify_token_payload(token)
+    # Decoded once per request and shared with the middlewares
+    auth = get_auth_context(request, token)
+    payload = auth.payload
 
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
@@ -96,7 +102,7 @@ def get_current_user_or_hhd(
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = auth.user
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
@@ -190,17 +196,6 @@ class ReceiveInvoiceItemRequest(BaseModel):
 
 # ============ Dependencies ============
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    token = credentials.credentials
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
-
 def require_admin_or_accounting(user: User = Depends(get_current_user)):
     if user.role not in ["admin", "accounting"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin or accounting access required")
@@ -219,47 +214,20 @@ def decimal_to_float(val):
 
 def generate_transaction_number(db: Session, company_id: int, prefix: str) -> str:
     """Generate unique transaction number"""
-    year = datetime.now().year
-    month = datetime.now().month
-    full_prefix = f"{prefix}-{year}{month:02d}-"
-
-    last_entry = db.query(ItemLedger).filter(
-        ItemLedger.company_id == company_id,
-        ItemLedger.transaction_number.like(f"{full_prefix}%")
-    ).order_by(ItemLedger.id.desc()).first()
-
-    if last_entry:
-        try:
-            last_num = int(last_entry.transaction_number.split("-")[-1])
-            new_num = last_num + 1
-        except:
-            new_num = 1
-    else:
-        new_num = 1
-
-    return f"{full_prefix}{new_num:05d}"
+    full_prefix = f"{prefix}-{datetime.now().strftime('%Y%m')}-"
+    return next_number(
+        db, company_id, full_prefix, width=5,
+        seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, company_id, full_prefix)
+    )
 
 
 def generate_transfer_number(db: Session, company_id: int) -> str:
     """Generate unique transfer number"""
-    year = datetime.now().year
-    prefix = f"TRF-{year}-"
-
-    last_transfer = db.query(ItemTransfer).filter(
-        ItemTransfer.company_id == company_id,
-        ItemTransfer.transfer_number.like(f"{prefix}%")
-    ).order_by(ItemTransfer.id.desc()).first()
-
-    if last_transfer:
-        try:
-            last_num = int(last_transfer.transfer_number.split("-")[-1])
-            new_num = last_num + 1
-        except:
-            new_num = 1
-    else:
-        new_num = 1
-
-    return f"{prefix}{new_num:05d}"
+    prefix = f"TRF-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, ItemTransfer.transfer_number, ItemTransfer.company_id, company_id, prefix)
+    )
 
 
 def get_or_create_stock(db: Session, company_id: int, item_id: int,
@@ -538,7 +506,7 @@ def category_to_response(cat: ItemCategory) -> dict:
 # ============ Category Endpoints ============
 
 @router.get("/item-categories/")
-async def get_item_categories(
+def get_item_categories(
     include_inactive: bool = False,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -557,7 +525,7 @@ async def get_item_categories(
 
 
 @router.post("/item-categories/")
-async def create_item_category(
+def create_item_category(
     data: ItemCategoryCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -593,7 +561,7 @@ async def create_item_category(
 
 
 @router.put("/item-categories/{category_id}")
-async def update_item_category(
+def update_item_category(
     category_id: int,
     data: ItemCategoryUpdate,
     user: User = Depends(get_current_user),
@@ -629,7 +597,7 @@ async def update_item_category(
 
 
 @router.post("/item-categories/seed-defaults")
-async def seed_default_categories(
+def seed_default_categories(
     user: User = Depends(require_admin_or_accounting),
     db: Session = Depends(get_db)
 ):
@@ -681,7 +649,7 @@ async def seed_default_categories(
 # ============ Item Master Endpoints ============
 
 @router.get("/items/")
-async def get_items(
+def get_items(
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     include_inactive: bool = False,
@@ -706,8 +674,8 @@ async def get_items(
         )
 
         # Check cache first
-        cached = await cache_service.get_items_page(
-            user.company_id, page, page_size, filters_hash
+        cached = run_async(
+            cache_service.get_items_page, user.company_id, page, page_size, filters_hash
         )
         if cached:
             logger.info(f"Cache HIT: items page {page} for company {user.company_id}, filters={filters_hash}")
@@ -799,15 +767,15 @@ async def get_items(
     }
 
     # Cache the result
-    await cache_service.set_items_page(
-        user.company_id, page, page_size, filters_hash, response_data
+    run_async(
+        cache_service.set_items_page, user.company_id, page, page_size, filters_hash, response_data
     )
 
     return response_data
 
 
 @router.get("/items/{item_id}")
-async def get_item(
+def get_item(
     item_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -833,7 +801,7 @@ async def get_item(
 
 
 @router.post("/items/")
-async def create_item(
+def create_item(
     data: ItemMasterCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -867,7 +835,7 @@ async def create_item(
         db.refresh(item)
 
         # Invalidate item list cache
-        await cache_service.invalidate_items(user.company_id)
+        run_async(cache_service.invalidate_items, user.company_id)
 
         logger.info(f"Item {item.item_number} created by {user.email}")
         return item_to_response(item)
@@ -877,7 +845,7 @@ async def create_item(
 
 
 @router.put("/items/{item_id}")
-async def update_item(
+def update_item(
     item_id: int,
     data: ItemMasterUpdate,
     user: User = Depends(get_current_user),
@@ -914,7 +882,7 @@ async def update_item(
         db.refresh(item)
 
         # Invalidate item caches
-        await cache_service.invalidate_item(user.company_id, item_id)
+        run_async(cache_service.invalidate_item, user.company_id, item_id)
 
         logger.info(f"Item {item.item_number} updated by {user.email}")
         return item_to_response(item)
@@ -924,7 +892,7 @@ async def update_item(
 
 
 @router.delete("/items/{item_id}")
-async def delete_item(
+def delete_item(
     item_id: int,
     user: User = Depends(require_admin_or_accounting),
     db: Session = Depends(get_db)
@@ -956,7 +924,7 @@ async def delete_item(
     db.commit()
 
     # Invalidate item caches
-    await cache_service.invalidate_item(user.company_id, item_id)
+    run_async(cache_service.invalidate_item, user.company_id, item_id)
 
     return {"success": True, "message": f"Item {item.item_number} deactivated"}
 
@@ -971,7 +939,7 @@ class ItemAliasCreate(BaseModel):
 
 
 @router.get("/items/{item_id}/aliases")
-async def get_item_aliases(
+def get_item_aliases(
     item_id: int,
     include_inactive: bool = False,
     user: User = Depends(get_current_user),
@@ -1013,7 +981,7 @@ async def get_item_aliases(
 
 
 @router.post("/items/{item_id}/aliases")
-async def add_item_alias(
+def add_item_alias(
     item_id: int,
     data: ItemAliasCreate,
     user: User = Depends(get_current_user),
@@ -1078,7 +1046,7 @@ async def add_item_alias(
 
 
 @router.delete("/items/{item_id}/aliases/{alias_id}")
-async def delete_item_alias(
+def delete_item_alias(
     item_id: int,
     alias_id: int,
     user: User = Depends(get_current_user),
@@ -1107,7 +1075,7 @@ async def delete_item_alias(
 # ============ Item Ledger Endpoints ============
 
 @router.get("/items/{item_id}/ledger")
-async def get_item_ledger(
+def get_item_ledger(
     item_id: int,
     transaction_type: Optional[str] = None,
     from_date: Optional[datetime] = None,
@@ -1133,7 +1101,7 @@ async def get_item_ledger(
     )
 
     # Check cache first
-    cached = await cache_service.get_item_ledger(user.company_id, item_id, filters_hash)
+    cached = run_async(cache_service.get_item_ledger, user.company_id, item_id, filters_hash)
     if cached is not None:
         logger.info(f"Cache HIT: item ledger for item {item_id}, company {user.company_id}")
         return cached
@@ -1198,7 +1166,7 @@ async def get_item_ledger(
     ]
 
     # Cache the result (15 min TTL - append-only data)
-    await cache_service.set_item_ledger(user.company_id, item_id, filters_hash, result)
+    run_async(cache_service.set_item_ledger, user.company_id, item_id, filters_hash, result)
 
     return result
 
@@ -1206,7 +1174,7 @@ async def get_item_ledger(
 # ============ All Ledger Entries Endpoint ============
 
 @router.get("/item-ledger/")
-async def get_all_ledger_entries(
+def get_all_ledger_entries(
     item_id: Optional[int] = None,
     transaction_type: Optional[str] = None,
     from_date: Optional[datetime] = None,
@@ -1237,7 +1205,7 @@ async def get_all_ledger_entries(
     )
 
     # Check cache first
-    cached = await cache_service.get_ledger_list(user.company_id, filters_hash)
+    cached = run_async(cache_service.get_ledger_list, user.company_id, filters_hash)
     if cached is not None:
         logger.info(f"Cache HIT: all ledger entries for company {user.company_id}, filters={filters_hash}")
         return cached
@@ -1340,7 +1308,7 @@ async def get_all_ledger_entries(
     }
 
     # Cache the result (10 min TTL)
-    await cache_service.set_ledger_list(user.company_id, filters_hash, result)
+    run_async(cache_service.set_ledger_list, user.company_id, filters_hash, result)
 
     return result
 
@@ -1348,7 +1316,7 @@ async def get_all_ledger_entries(
 # ============ Stock Adjustment Endpoints ============
 
 @router.post("/items/adjust-stock")
-async def adjust_stock(
+def adjust_stock(
     data: StockAdjustmentCreate,
     user: User = Depends(require_admin_or_accounting),
     db: Session = Depends(get_db)
@@ -1406,12 +1374,12 @@ async def adjust_stock(
 
         # Invalidate stock caches
         if data.warehouse_id:
-            await cache_service.invalidate_warehouse_stock(user.company_id, data.warehouse_id)
+            run_async(cache_service.invalidate_warehouse_stock, user.company_id, data.warehouse_id)
         if data.hhd_id:
-            await cache_service.invalidate_hhd_stock(user.company_id, data.hhd_id)
-        await cache_service.invalidate_items(user.company_id)
+            run_async(cache_service.invalidate_hhd_stock, user.company_id, data.hhd_id)
+        run_async(cache_service.invalidate_items, user.company_id)
         # Invalidate ledger cache for this item
-        await cache_service.invalidate_ledger(user.company_id, data.item_id)
+        run_async(cache_service.invalidate_ledger, user.company_id, data.item_id)
 
         return {
             "success": True,
@@ -1426,7 +1394,7 @@ async def adjust_stock(
 # ============ Transfer Endpoints ============
 
 @router.get("/transfers/")
-async def get_transfers(
+def get_transfers(
     status_filter: Optional[str] = None,
     from_warehouse_id: Optional[int] = None,
     to_hhd_id: Optional[int] = None,
@@ -1478,7 +1446,7 @@ async def get_transfers(
 
 
 @router.get("/transfers/{transfer_id}")
-async def get_transfer(
+def get_transfer(
     transfer_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -1537,7 +1505,7 @@ async def get_transfer(
 
 
 @router.post("/transfers/")
-async def create_transfer(
+def create_transfer(
     data: ItemTransferCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1631,7 +1599,7 @@ async def create_transfer(
 
 
 @router.post("/transfers/{transfer_id}/complete")
-async def complete_transfer(
+def complete_transfer(
     transfer_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -1726,16 +1694,15 @@ async def complete_transfer(
         db.commit()
 
         # Invalidate stock caches for affected locations
-        await cache_service.invalidate_warehouse_stock(auth_context.company_id, transfer.from_warehouse_id)
+        run_async(cache_service.invalidate_warehouse_stock, auth_context.company_id, transfer.from_warehouse_id)
         if transfer.to_warehouse_id:
-            await cache_service.invalidate_warehouse_stock(auth_context.company_id, transfer.to_warehouse_id)
+            run_async(cache_service.invalidate_warehouse_stock, auth_context.company_id, transfer.to_warehouse_id)
         if transfer.to_hhd_id:
-            await cache_service.invalidate_hhd_stock(auth_context.company_id, transfer.to_hhd_id)
+            run_async(cache_service.invalidate_hhd_stock, auth_context.company_id, transfer.to_hhd_id)
         # Also invalidate item caches (stock levels may be included)
-        await cache_service.invalidate_items(auth_context.company_id)
-        # Invalidate ledger caches for all items in the transfer
-        for line in transfer.lines:
-            await cache_service.invalidate_ledger(auth_context.company_id, line.item_id)
+        run_async(cache_service.invalidate_items, auth_context.company_id)
+        # Invalidate ledger caches (covers every item in the transfer)
+        run_async(cache_service.invalidate_ledger, auth_context.company_id)
 
         return {"success": True, "message": f"Transfer {transfer.transfer_number} completed"}
     except HTTPException:
@@ -1751,7 +1718,7 @@ class RejectTransferRequest(BaseModel):
 
 
 @router.post("/transfers/{transfer_id}/reject")
-async def reject_transfer(
+def reject_transfer(
     transfer_id: int,
     request_body: RejectTransferRequest = RejectTransferRequest(),
     auth_context = Depends(get_current_user_or_hhd),
@@ -1831,14 +1798,13 @@ async def reject_transfer(
         db.commit()
 
         # Invalidate caches
-        await cache_service.invalidate_warehouse_stock(auth_context.company_id, transfer.from_warehouse_id)
+        run_async(cache_service.invalidate_warehouse_stock, auth_context.company_id, transfer.from_warehouse_id)
         if transfer.to_warehouse_id:
-            await cache_service.invalidate_warehouse_stock(auth_context.company_id, transfer.to_warehouse_id)
+            run_async(cache_service.invalidate_warehouse_stock, auth_context.company_id, transfer.to_warehouse_id)
         if transfer.to_hhd_id:
-            await cache_service.invalidate_hhd_stock(auth_context.company_id, transfer.to_hhd_id)
-        await cache_service.invalidate_items(auth_context.company_id)
-        for line in transfer.lines:
-            await cache_service.invalidate_ledger(auth_context.company_id, line.item_id)
+            run_async(cache_service.invalidate_hhd_stock, auth_context.company_id, transfer.to_hhd_id)
+        run_async(cache_service.invalidate_items, auth_context.company_id)
+        run_async(cache_service.invalidate_ledger, auth_context.company_id)
 
         return {"success": True, "message": f"Transfer {transfer.transfer_number} rejected"}
     except Exception as e:
@@ -1850,7 +1816,7 @@ async def reject_transfer(
 # ============ Warehouse Stock View ============
 
 @router.get("/warehouses/{warehouse_id}/stock")
-async def get_warehouse_stock(
+def get_warehouse_stock(
     warehouse_id: int,
     search: Optional[str] = None,
     category_id: Optional[int] = None,
@@ -1863,7 +1829,7 @@ async def get_warehouse_stock(
 
     # Check cache first (only for unfiltered requests - most common case)
     if not search and not category_id:
-        cached = await cache_service.get_warehouse_stock(user.company_id, warehouse_id)
+        cached = run_async(cache_service.get_warehouse_stock, user.company_id, warehouse_id)
         if cached:
             return cached
 
@@ -1926,7 +1892,7 @@ async def get_warehouse_stock(
 
     # Cache only unfiltered results
     if not search and not category_id:
-        await cache_service.set_warehouse_stock(user.company_id, warehouse_id, response_data)
+        run_async(cache_service.set_warehouse_stock, user.company_id, warehouse_id, response_data)
 
     return response_data
 
@@ -1934,7 +1900,7 @@ async def get_warehouse_stock(
 # ============ HHD Stock View ============
 
 @router.get("/hhd/{hhd_id}/stock")
-async def get_hhd_stock(
+def get_hhd_stock(
     hhd_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -2008,7 +1974,7 @@ async def get_hhd_stock(
 
 
 @router.get("/hhd/{hhd_id}/ledger")
-async def get_hhd_ledger(
+def get_hhd_ledger(
     hhd_id: int,
     limit: int = 50,
     user: User = Depends(get_current_user),
@@ -2055,7 +2021,7 @@ async def get_hhd_ledger(
 # ============ Import Endpoint ============
 
 @router.post("/items/import")
-async def import_items_from_excel(
+def import_items_from_excel(
     file: UploadFile = File(...),
     user: User = Depends(require_admin_or_accounting),
     db: Session = Depends(get_db)
@@ -2064,7 +2030,7 @@ async def import_items_from_excel(
     if not user.company_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No company associated")
 
-    content = await file.read()
+    content = file.file.read()
     content_str = content.decode('utf-8', errors='ignore')
 
     # Parse XML Excel format
@@ -2168,7 +2134,7 @@ async def import_items_from_excel(
 # - Complete audit trail
 
 @router.post("/invoices/{invoice_id}/receive-item")
-async def receive_invoice_item(
+def receive_invoice_item(
     invoice_id: int,
     data: ReceiveInvoiceItemRequest,
     user: User = Depends(get_current_user),
@@ -2292,7 +2258,7 @@ async def receive_invoice_item(
 
 
 @router.post("/invoices/{invoice_id}/confirm")
-async def confirm_invoice_to_main_warehouse(
+def confirm_invoice_to_main_warehouse(
     invoice_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2437,7 +2403,7 @@ async def confirm_invoice_to_main_warehouse(
 
 
 @router.get("/invoices/{invoice_id}/items")
-async def get_invoice_items(
+def get_invoice_items(
     invoice_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2481,7 +2447,7 @@ class LinkInvoiceItemRequest(BaseModel):
 
 
 @router.post("/invoice-items/{invoice_item_id}/link")
-async def link_invoice_item_to_master(
+def link_invoice_item_to_master(
     invoice_item_id: int,
     data: LinkInvoiceItemRequest,
     user: User = Depends(get_current_user),
@@ -2636,7 +2602,7 @@ async def link_invoice_item_to_master(
 
 
 @router.get("/invoice-items/{invoice_item_id}/suggestions")
-async def get_item_suggestions_for_invoice_item(
+def get_item_suggestions_for_invoice_item(
     invoice_item_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2649,7 +2615,7 @@ async def get_item_suggestions_for_invoice_item(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No company associated")
 
     # Check cache first
-    cached = await cache_service.get_invoice_suggestions(user.company_id, invoice_item_id)
+    cached = run_async(cache_service.get_invoice_suggestions, user.company_id, invoice_item_id)
     if cached is not None:
         logger.info(f"Cache HIT: invoice suggestions for item {invoice_item_id}, company {user.company_id}")
         return cached
@@ -2693,7 +2659,7 @@ async def get_item_suggestions_for_invoice_item(
             "already_linked": False,
             "suggestions": []
         }
-        await cache_service.set_invoice_suggestions(user.company_id, invoice_item_id, result)
+        run_async(cache_service.set_invoice_suggestions, user.company_id, invoice_item_id, result)
         return result
 
     # Calculate similarity for each item (original algorithm)
@@ -2778,13 +2744,13 @@ async def get_item_suggestions_for_invoice_item(
     }
 
     # Cache the result (5 min TTL) - makes subsequent requests instant
-    await cache_service.set_invoice_suggestions(user.company_id, invoice_item_id, result)
+    run_async(cache_service.set_invoice_suggestions, user.company_id, invoice_item_id, result)
 
     return result
 
 
 @router.get("/invoices/{invoice_id}/unlinked-items")
-async def get_unlinked_invoice_items(
+def get_unlinked_invoice_items(
     invoice_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2825,7 +2791,7 @@ class CreateGenericItemRequest(BaseModel):
 
 
 @router.post("/invoice-items/{invoice_item_id}/create-generic")
-async def create_generic_item_from_invoice(
+def create_generic_item_from_invoice(
     invoice_item_id: int,
     data: CreateGenericItemRequest,
     user: User = Depends(get_current_user),
@@ -3035,7 +3001,7 @@ async def create_generic_item_from_invoice(
 # ============ Bulk Import ============
 
 @router.post("/items/bulk-import")
-async def bulk_import_items(
+def bulk_import_items(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -3199,7 +3165,7 @@ async def bulk_import_items(
 # ============ Slow Moving / Non-Moving Items ============
 
 @router.get("/item-stock/slow-moving/")
-async def get_slow_moving_items(
+def get_slow_moving_items(
     days_threshold: int = Query(90, description="Items not moved for this many days are slow-moving"),
     non_moving_days: int = Query(180, description="Items not moved for this many days are non-moving"),
     include_zero_stock: bool = Query(False, description="Include items with zero stock"),
@@ -3397,7 +3363,7 @@ async def get_slow_moving_items(
 
 
 @router.get("/item-stock/movement-analysis/")
-async def get_movement_analysis(
+def get_movement_analysis(
     warehouse_id: Optional[int] = Query(None, description="Filter by warehouse"),
     user_or_hhd=Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
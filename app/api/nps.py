@@ -186,7 +186,7 @@ def survey_to_response(survey: NPSSurvey) -> NPSSurveyResponse:
 # ============================================================================
 
 @router.get("/", response_model=List[NPSSurveyResponse])
-async def get_nps_surveys(
+def get_nps_surveys(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     client_id: Optional[int] = Query(None, description="Filter by client"),
@@ -233,7 +233,7 @@ async def get_nps_surveys(
 
 
 @router.get("/stats", response_model=NPSStatsResponse)
-async def get_nps_stats(
+def get_nps_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     client_id: Optional[int] = Query(None, description="Filter by client"),
@@ -383,7 +383,7 @@ async def get_nps_stats(
 
 
 @router.get("/clients", response_model=List[ClientNPSResponse])
-async def get_client_nps_scores(
+def get_client_nps_scores(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -440,7 +440,7 @@ async def get_client_nps_scores(
 
 
 @router.get("/{survey_id}", response_model=NPSSurveyResponse)
-async def get_nps_survey(
+def get_nps_survey(
     survey_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -465,7 +465,7 @@ async def get_nps_survey(
 
 
 @router.post("/", response_model=NPSSurveyResponse, status_code=status.HTTP_201_CREATED)
-async def create_nps_survey(
+def create_nps_survey(
     data: NPSSurveyCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -555,7 +555,7 @@ async def create_nps_survey(
 
 
 @router.put("/{survey_id}", response_model=NPSSurveyResponse)
-async def update_nps_survey(
+def update_nps_survey(
     survey_id: int,
     data: NPSSurveyUpdate,
     current_user: User = Depends(get_current_user),
@@ -614,7 +614,7 @@ async def update_nps_survey(
 
 
 @router.post("/{survey_id}/follow-up", response_model=NPSSurveyResponse)
-async def update_follow_up(
+def update_follow_up(
     survey_id: int,
     follow_up_status: str = Query(..., description="Follow-up status"),
     follow_up_notes: Optional[str] = Query(None, description="Follow-up notes"),
@@ -660,7 +660,7 @@ async def update_follow_up(
 
 
 @router.delete("/{survey_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_nps_survey(
+def delete_nps_survey(
     survey_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1,18 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.database import get_db
 from app.models import User, Company, Site, AddressBook, operator_sites, Role
-from app.utils.security import verify_token, get_password_hash
+from app.utils.security import get_password_hash
+from app.services.dependency import get_current_user
 from app.utils.limits import enforce_user_limit
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
 
 
 def get_or_create_operator_role(db: Session, company_id: int) -> Role:
@@ -39,28 +38,6 @@ def get_or_create_operator_role(db: Session, company_id: int) -> Role:
     return operator_role
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)  # verify_token returns the email directly
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
-
-
 def require_admin(user: User = Depends(get_current_user)):
     """Require admin role"""
     if user.role != "admin":
@@ -120,7 +97,7 @@ def operator_to_response(user: User, db: Session) -> dict:
 
 
 @router.get("/operators/")
-async def get_operators(
+def get_operators(
     include_inactive: bool = False,
     search: Optional[str] = None,
     user: User = Depends(require_admin),
@@ -154,7 +131,7 @@ async def get_operators(
 
 
 @router.get("/operators/{operator_id}")
-async def get_operator(
+def get_operator(
     operator_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -182,7 +159,7 @@ async def get_operator(
 
 
 @router.post("/operators/")
-async def create_operator(
+def create_operator(
     data: OperatorCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -269,7 +246,7 @@ async def create_operator(
 
 
 @router.put("/operators/{operator_id}")
-async def update_operator(
+def update_operator(
     operator_id: int,
     data: OperatorUpdate,
     user: User = Depends(require_admin),
@@ -317,7 +294,7 @@ async def update_operator(
 
 
 @router.delete("/operators/{operator_id}")
-async def delete_operator(
+def delete_operator(
     operator_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -362,7 +339,7 @@ async def delete_operator(
 
 
 @router.patch("/operators/{operator_id}/toggle-status")
-async def toggle_operator_status(
+def toggle_operator_status(
     operator_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -406,7 +383,7 @@ async def toggle_operator_status(
 
 
 @router.put("/operators/{operator_id}/branches")
-async def update_operator_sites(
+def update_operator_sites(
     operator_id: int,
     data: SiteAssignment,
     user: User = Depends(require_admin),
@@ -473,7 +450,7 @@ async def update_operator_sites(
 
 
 @router.post("/operators/{operator_id}/branches/{branch_id}")
-async def add_operator_to_site(
+def add_operator_to_site(
     operator_id: int,
     branch_id: int,  # This is now site_id but keeping param name for API compatibility
     user: User = Depends(require_admin),
@@ -544,7 +521,7 @@ async def add_operator_to_site(
 
 
 @router.delete("/operators/{operator_id}/branches/{branch_id}")
-async def remove_operator_from_site(
+def remove_operator_from_site(
     operator_id: int,
     branch_id: int,  # This is now site_id but keeping param name for API compatibility
     user: User = Depends(require_admin),
@@ -14,7 +14,7 @@ otp_service = OTPService()
 
 @router.post("/send", response_model=OTPResponse)
 @limiter.limit(RateLimits.OTP_SEND)
-async def send_otp(
+def send_otp(
     request: Request,
     otp_request: OTPRequest,
     response: Response,
@@ -62,7 +62,7 @@ async def send_otp(
 
 @router.post("/verify")
 @limiter.limit(RateLimits.OTP_VERIFY)
-async def verify_otp(
+def verify_otp(
     request: Request,
     otp_verification: OTPVerification,
     response: Response,
@@ -117,7 +117,7 @@ async def verify_otp(
 
 
 @router.get("/status/{email}")
-async def get_otp_status(
+def get_otp_status(
     email: str,
     purpose: str = "email_verification",
     response: Response = None,
@@ -165,7 +165,7 @@ async def get_otp_status(
 
 @router.post("/resend")
 @limiter.limit(RateLimits.OTP_RESEND)
-async def resend_otp(
+def resend_otp(
     request: Request,
     otp_request: OTPRequest,
     response: Response,
@@ -176,11 +176,11 @@ async def resend_otp(
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
 
     # This is the same as send_otp since create_otp invalidates existing OTPs
-    return await send_otp(request, otp_request, response, db)
+    return send_otp(request, otp_request, response, db)
 
 
 @router.get("/verify-page", response_class=HTMLResponse)
-async def otp_verification_page():
+def otp_verification_page():
     """Serve the OTP verification HTML page"""
     template_path = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "otp_verification.html")
     
@@ -196,7 +196,7 @@ async def otp_verification_page():
 
 
 @router.delete("/cleanup")
-async def cleanup_expired_otps(
+def cleanup_expired_otps(
     response: Response,
     db: Session = Depends(get_db)
 ):
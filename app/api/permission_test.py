@@ -6,42 +6,18 @@ Useful for frontend development and debugging permission issues.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from app.database import get_db
 from app.models import User, Permission, RolePermission
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 from app.utils.permission_seed import PERMISSIONS_DICTIONARY, seed_permissions
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 class PermissionCheckRequest(BaseModel):
@@ -58,7 +34,7 @@ class PermissionCheckResponse(BaseModel):
 
 
 @router.get("/test/my-permissions")
-async def get_my_permissions(
+def get_my_permissions(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -103,7 +79,7 @@ async def get_my_permissions(
 
 
 @router.post("/test/check-permission", response_model=PermissionCheckResponse)
-async def check_permission(
+def check_permission(
     request: PermissionCheckRequest,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -143,7 +119,7 @@ async def check_permission(
 
 
 @router.get("/test/all-permissions")
-async def get_all_permissions(
+def get_all_permissions(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -189,7 +165,7 @@ async def get_all_permissions(
 
 
 @router.post("/test/seed-permissions")
-async def trigger_seed_permissions(
+def trigger_seed_permissions(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -226,7 +202,7 @@ async def trigger_seed_permissions(
 
 
 @router.get("/test/permission-stats")
-async def get_permission_stats(
+def get_permission_stats(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
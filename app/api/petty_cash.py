@@ -11,7 +11,7 @@ from app.models import (
     PettyCashFund, PettyCashTransaction, PettyCashReceipt, PettyCashReplenishment,
     User, Technician, WorkOrder, Contract, Account, AddressBook, ProcessedImage
 )
-from app.services.journal_posting import JournalPostingService
+from app.services.journal_posting import JournalPostingService, generate_entry_number
 from app.api.auth import get_current_user
 from app.config import settings
 from jose import jwt
@@ -417,7 +417,7 @@ def receipt_to_response(receipt: PettyCashReceipt) -> dict:
 # ============================================================================
 
 @router.get("/funds/")
-async def get_petty_cash_funds(
+def get_petty_cash_funds(
     status: Optional[str] = Query(None),
     technician_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user),
@@ -448,7 +448,7 @@ async def get_petty_cash_funds(
 
 
 @router.get("/funds/{fund_id}")
-async def get_petty_cash_fund(
+def get_petty_cash_fund(
     fund_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -474,7 +474,7 @@ async def get_petty_cash_fund(
 
 
 @router.post("/funds/")
-async def create_petty_cash_fund(
+def create_petty_cash_fund(
     fund_data: PettyCashFundCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -531,7 +531,7 @@ async def create_petty_cash_fund(
 
 
 @router.put("/funds/{fund_id}")
-async def update_petty_cash_fund(
+def update_petty_cash_fund(
     fund_id: int,
     fund_data: PettyCashFundUpdate,
     current_user: User = Depends(get_current_user),
@@ -580,7 +580,7 @@ async def update_petty_cash_fund(
 
 
 @router.delete("/funds/{fund_id}")
-async def delete_petty_cash_fund(
+def delete_petty_cash_fund(
     fund_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -620,7 +620,7 @@ async def delete_petty_cash_fund(
 # ============================================================================
 
 @router.get("/transactions/")
-async def get_petty_cash_transactions(
+def get_petty_cash_transactions(
     status: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     technician_id: Optional[int] = Query(None),
@@ -676,7 +676,7 @@ async def get_petty_cash_transactions(
 
 
 @router.get("/transactions/{transaction_id}")
-async def get_petty_cash_transaction(
+def get_petty_cash_transaction(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -706,7 +706,7 @@ async def get_petty_cash_transaction(
 
 
 @router.post("/transactions/")
-async def create_petty_cash_transaction(
+def create_petty_cash_transaction(
     txn_data: PettyCashTransactionCreate,
     fund_id: Optional[int] = Query(None, description="Fund ID (required if user has multiple funds)"),
     current_user: User = Depends(get_current_user),
@@ -861,7 +861,7 @@ async def create_petty_cash_transaction(
 
 
 @router.put("/transactions/{transaction_id}")
-async def update_petty_cash_transaction(
+def update_petty_cash_transaction(
     transaction_id: int,
     txn_data: PettyCashTransactionUpdate,
     current_user: User = Depends(get_current_user),
@@ -920,7 +920,7 @@ async def update_petty_cash_transaction(
 
 
 @router.delete("/transactions/{transaction_id}")
-async def delete_petty_cash_transaction(
+def delete_petty_cash_transaction(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -958,7 +958,7 @@ async def delete_petty_cash_transaction(
 
 
 @router.post("/transactions/{transaction_id}/approve")
-async def approve_petty_cash_transaction(
+def approve_petty_cash_transaction(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1035,7 +1035,7 @@ async def approve_petty_cash_transaction(
 
 
 @router.post("/transactions/{transaction_id}/reject")
-async def reject_petty_cash_transaction(
+def reject_petty_cash_transaction(
     transaction_id: int,
     reject_data: RejectTransactionRequest,
     current_user: User = Depends(get_current_user),
@@ -1082,7 +1082,7 @@ async def reject_petty_cash_transaction(
 
 
 @router.post("/transactions/{transaction_id}/reverse")
-async def reverse_petty_cash_transaction(
+def reverse_petty_cash_transaction(
     transaction_id: int,
     reverse_data: ReverseTransactionRequest,
     current_user: User = Depends(get_current_user),
@@ -1137,19 +1137,7 @@ async def reverse_petty_cash_transaction(
     if original_je:
         try:
             # Generate new JE number
-            year = date.today().year
-            last_je = db.query(JournalEntry).filter(
-                JournalEntry.company_id == current_user.company_id,
-                JournalEntry.entry_number.like(f'JE-{year}-%')
-            ).order_by(JournalEntry.entry_number.desc()).first()
-
-            if last_je:
-                last_num = int(last_je.entry_number.split('-')[-1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-
-            entry_number = f"JE-{year}-{new_num:06d}"
+            entry_number = generate_entry_number(db, current_user.company_id)
 
             # Create reversing journal entry
             reversal_je = JournalEntry(
@@ -1225,7 +1213,7 @@ async def reverse_petty_cash_transaction(
 # ============================================================================
 
 @router.get("/transactions/{transaction_id}/receipts/")
-async def get_transaction_receipts(
+def get_transaction_receipts(
     transaction_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1252,7 +1240,7 @@ async def get_transaction_receipts(
 
 
 @router.post("/transactions/{transaction_id}/receipts/")
-async def upload_transaction_receipt(
+def upload_transaction_receipt(
     transaction_id: int,
     file: UploadFile = File(...),
     caption: Optional[str] = Form(None),
@@ -1286,7 +1274,7 @@ async def upload_transaction_receipt(
 
     try:
         # Save file
-        content = await file.read()
+        content = file.file.read()
         with open(file_path, "wb") as f:
             f.write(content)
 
@@ -1327,7 +1315,7 @@ async def upload_transaction_receipt(
 
 
 @router.get("/transactions/{transaction_id}/receipts/{receipt_id}/file")
-async def get_receipt_file(
+def get_receipt_file(
     transaction_id: int,
     receipt_id: int,
     token: str = Query(...),
@@ -1376,7 +1364,7 @@ async def get_receipt_file(
 
 
 @router.delete("/transactions/{transaction_id}/receipts/{receipt_id}")
-async def delete_transaction_receipt(
+def delete_transaction_receipt(
     transaction_id: int,
     receipt_id: int,
     current_user: User = Depends(get_current_user),
@@ -1413,7 +1401,7 @@ async def delete_transaction_receipt(
 # ============================================================================
 
 @router.get("/funds/{fund_id}/replenishments/")
-async def get_fund_replenishments(
+def get_fund_replenishments(
     fund_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1441,7 +1429,7 @@ async def get_fund_replenishments(
 
 
 @router.post("/funds/{fund_id}/replenish/")
-async def replenish_fund(
+def replenish_fund(
     fund_id: int,
     repl_data: ReplenishmentCreate,
     current_user: User = Depends(get_current_user),
@@ -1538,7 +1526,7 @@ async def replenish_fund(
 # ============================================================================
 
 @router.get("/stats/")
-async def get_petty_cash_stats(
+def get_petty_cash_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1617,7 +1605,7 @@ async def get_petty_cash_stats(
 
 
 @router.get("/my-fund/")
-async def get_my_petty_cash_fund(
+def get_my_petty_cash_fund(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -1650,7 +1638,7 @@ async def get_my_petty_cash_fund(
 
 
 @router.get("/my-transactions/")
-async def get_my_petty_cash_transactions(
+def get_my_petty_cash_transactions(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     status_filter: Optional[str] = Query(None, alias="status"),
@@ -1706,7 +1694,7 @@ async def get_my_petty_cash_transactions(
 
 
 @router.post("/my-transactions/")
-async def create_my_petty_cash_transaction(
+def create_my_petty_cash_transaction(
     txn_data: PettyCashTransactionCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
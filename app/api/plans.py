@@ -58,7 +58,7 @@ def plan_to_response(plan: Plan) -> dict:
 
 
 @router.get("/plans/")
-async def get_plans(db: Session = Depends(get_db)):
+def get_plans(db: Session = Depends(get_db)):
     """Get all active plans (public endpoint for pricing page)"""
     plans = db.query(Plan).filter(Plan.is_active == True).order_by(Plan.sort_order).all()
 
@@ -70,7 +70,7 @@ async def get_plans(db: Session = Depends(get_db)):
 
 
 @router.get("/plans/{slug}")
-async def get_plan_by_slug(slug: str, db: Session = Depends(get_db)):
+def get_plan_by_slug(slug: str, db: Session = Depends(get_db)):
     """Get a specific plan by slug"""
     plan = db.query(Plan).filter(Plan.slug == slug, Plan.is_active == True).first()
 
@@ -3,7 +3,7 @@ Platform Admin API
 Manages companies, subscriptions, and plans for the platform owner
 """
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy import func
@@ -13,7 +13,10 @@ import secrets
 
 from app.database import get_db
 from app.models import SuperAdmin, SuperAdminRefreshToken, Company, Plan, User, UpgradeRequest
-from app.utils.security import get_password_hash, verify_password, create_access_token, verify_token, generate_refresh_token, get_refresh_token_expiry
+from app.utils.security import get_password_hash, verify_password, create_access_token, generate_refresh_token, get_refresh_token_expiry
+from app.services.auth_context import get_auth_context
+from app.services.subscription_cache import subscription_cache
+from app.utils.concurrency import run_async
 
 router = APIRouter()
 security = HTTPBearer()
@@ -215,12 +218,13 @@ def build_company_response(company: Company, user_count: int) -> CompanyResponse
 # ============================================================================
 
 def get_current_super_admin(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> SuperAdmin:
     """Get current authenticated super admin from JWT token"""
-    token = credentials.credentials
-    email = verify_token(token)
+    # Decoded once per request (see app/services/auth_context.py)
+    email = get_auth_context(request, credentials.credentials).subject
 
     if not email:
         raise HTTPException(
@@ -258,7 +262,7 @@ def get_current_super_admin(
 # ============================================================================
 
 @router.post("/platform-admin/auth/login", response_model=TokenResponse)
-async def login(data: SuperAdminLogin, db: Session = Depends(get_db)):
+def login(data: SuperAdminLogin, db: Session = Depends(get_db)):
     """Login as platform super admin"""
     super_admin = db.query(SuperAdmin).filter(SuperAdmin.email == data.email).first()
 
@@ -299,7 +303,7 @@ async def login(data: SuperAdminLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/platform-admin/auth/refresh", response_model=TokenResponse)
-async def refresh_token(data: RefreshTokenRequest, db: Session = Depends(get_db)):
+def refresh_token(data: RefreshTokenRequest, db: Session = Depends(get_db)):
     """Refresh access token for super admin"""
     db_token = db.query(SuperAdminRefreshToken).filter(
         SuperAdminRefreshToken.token == data.refresh_token,
@@ -342,7 +346,7 @@ async def refresh_token(data: RefreshTokenRequest, db: Session = Depends(get_db)
 
 
 @router.post("/platform-admin/auth/logout")
-async def logout(
+def logout(
     data: RefreshTokenRequest,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -361,13 +365,13 @@ async def logout(
 
 
 @router.get("/platform-admin/auth/me", response_model=SuperAdminResponse)
-async def get_me(super_admin: SuperAdmin = Depends(get_current_super_admin)):
+def get_me(super_admin: SuperAdmin = Depends(get_current_super_admin)):
     """Get current super admin info"""
     return SuperAdminResponse.model_validate(super_admin)
 
 
 @router.post("/platform-admin/auth/change-password")
-async def change_password(
+def change_password(
     data: SuperAdminPasswordChange,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -406,7 +410,7 @@ async def change_password(
 # ============================================================================
 
 @router.get("/platform-admin/dashboard", response_model=DashboardStats)
-async def get_dashboard(
+def get_dashboard(
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
 ):
@@ -504,7 +508,7 @@ async def get_dashboard(
 # ============================================================================
 
 @router.get("/platform-admin/companies", response_model=List[CompanyResponse])
-async def list_companies(
+def list_companies(
     status: Optional[str] = None,
     plan_id: Optional[int] = None,
     search: Optional[str] = None,
@@ -545,7 +549,7 @@ async def list_companies(
 
 
 @router.get("/platform-admin/companies/{company_id}", response_model=CompanyResponse)
-async def get_company(
+def get_company(
     company_id: int,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -561,7 +565,7 @@ async def get_company(
 
 
 @router.put("/platform-admin/companies/{company_id}/subscription", response_model=CompanyResponse)
-async def update_company_subscription(
+def update_company_subscription(
     company_id: int,
     data: CompanySubscriptionUpdate,
     db: Session = Depends(get_db),
@@ -621,6 +625,7 @@ async def update_company_subscription(
             company.documents_limit_override = data.documents_limit_override
 
     db.commit()
+    run_async(subscription_cache.invalidate, company.id)
     db.refresh(company)
 
     user_count = db.query(User).filter(User.company_id == company.id, User.is_active == True).count()
@@ -629,7 +634,7 @@ async def update_company_subscription(
 
 
 @router.post("/platform-admin/companies/{company_id}/activate")
-async def activate_company(
+def activate_company(
     company_id: int,
     days: int = 30,
     db: Session = Depends(get_db),
@@ -645,12 +650,13 @@ async def activate_company(
     company.subscription_end = datetime.utcnow() + timedelta(days=days)
 
     db.commit()
+    run_async(subscription_cache.invalidate, company.id)
 
     return {"message": f"Company activated for {days} days", "subscription_end": company.subscription_end}
 
 
 @router.post("/platform-admin/companies/{company_id}/suspend")
-async def suspend_company(
+def suspend_company(
     company_id: int,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -662,12 +668,13 @@ async def suspend_company(
 
     company.subscription_status = "suspended"
     db.commit()
+    run_async(subscription_cache.invalidate, company.id)
 
     return {"message": "Company suspended"}
 
 
 @router.post("/platform-admin/companies/{company_id}/extend")
-async def extend_company_subscription(
+def extend_company_subscription(
     company_id: int,
     days: int = 30,
     db: Session = Depends(get_db),
@@ -684,6 +691,7 @@ async def extend_company_subscription(
         company.subscription_end = datetime.utcnow() + timedelta(days=days)
 
     db.commit()
+    run_async(subscription_cache.invalidate, company.id)
 
     return {"message": f"Subscription extended by {days} days", "subscription_end": company.subscription_end}
 
@@ -693,7 +701,7 @@ async def extend_company_subscription(
 # ============================================================================
 
 @router.get("/platform-admin/plans", response_model=List[PlanResponse])
-async def list_plans(
+def list_plans(
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
 ):
@@ -711,7 +719,7 @@ async def list_plans(
 
 
 @router.get("/platform-admin/plans/{plan_id}", response_model=PlanResponse)
-async def get_plan(
+def get_plan(
     plan_id: int,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -729,7 +737,7 @@ async def get_plan(
 
 
 @router.post("/platform-admin/plans", response_model=PlanResponse, status_code=status.HTTP_201_CREATED)
-async def create_plan(
+def create_plan(
     data: PlanCreate,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -768,7 +776,7 @@ async def create_plan(
 
 
 @router.put("/platform-admin/plans/{plan_id}", response_model=PlanResponse)
-async def update_plan(
+def update_plan(
     plan_id: int,
     data: PlanUpdate,
     db: Session = Depends(get_db),
@@ -795,7 +803,7 @@ async def update_plan(
 
 
 @router.delete("/platform-admin/plans/{plan_id}")
-async def delete_plan(
+def delete_plan(
     plan_id: int,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -860,7 +868,7 @@ def _get_setup_secret() -> str:
 
 
 @router.post("/platform-admin/setup", response_model=SuperAdminResponse, status_code=status.HTTP_201_CREATED)
-async def setup_super_admin(
+def setup_super_admin(
     data: SuperAdminCreate,
     db: Session = Depends(get_db)
 ):
@@ -960,7 +968,7 @@ class UpgradeRequestProcess(BaseModel):
 
 
 @router.get("/platform-admin/upgrade-requests", response_model=List[UpgradeRequestAdminResponse])
-async def get_all_upgrade_requests(
+def get_all_upgrade_requests(
     status_filter: Optional[str] = None,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -1004,7 +1012,7 @@ async def get_all_upgrade_requests(
 
 
 @router.get("/platform-admin/upgrade-requests/{request_id}", response_model=UpgradeRequestAdminResponse)
-async def get_upgrade_request(
+def get_upgrade_request(
     request_id: int,
     db: Session = Depends(get_db),
     super_admin: SuperAdmin = Depends(get_current_super_admin)
@@ -1041,7 +1049,7 @@ async def get_upgrade_request(
 
 
 @router.put("/platform-admin/upgrade-requests/{request_id}/process")
-async def process_upgrade_request(
+def process_upgrade_request(
     request_id: int,
     data: UpgradeRequestProcess,
     db: Session = Depends(get_db),
@@ -1095,6 +1103,7 @@ async def process_upgrade_request(
             logger.info(f"Company {company.name} subscription extended by {data.extend_days} days")
 
     db.commit()
+    run_async(subscription_cache.invalidate, company.id)
     logger.info(f"Upgrade request {request_id} processed: status={data.status}, by={super_admin.email}")
 
     return {
@@ -2,7 +2,7 @@
 API endpoints for Preventive Maintenance Checklists.
 Provides the PM hierarchy and checklist data for the frontend.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional, Union
@@ -11,6 +11,7 @@ from datetime import datetime
 import logging
 
 from app.database import get_db
+from app.services.auth_context import get_auth_context
 from app.models import (
     User, Company, PMEquipmentClass, PMSystemCode, PMAssetType,
     PMChecklist, PMActivity, HandHeldDevice
@@ -47,12 +48,15 @@ class HHDContext:
 
 
 def get_current_user_or_hhd(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
     """Authenticate either a regular user or an HHD device"""
     token = credentials.credentials
-    payload = verify_token_payload(token)
+    # Decoded once per request and shared with the middlewares
+    auth = get_auth_context(request, token)
+    payload = auth.payload
 
     if not payload:
         raise HTTPException(
@@ -87,7 +91,7 @@ def get_current_user_or_hhd(
         return HHDContext(device, technician_id)
 
     # Regular user token
-    user = db.query(User).filter(User.email == sub).first()
+    user = auth.user
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -187,7 +191,7 @@ class PMHierarchyResponse(BaseModel):
 # ============================================================================
 
 @router.get("/pm/equipment-classes", response_model=List[PMEquipmentClassResponse])
-async def get_equipment_classes(
+def get_equipment_classes(
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
 ):
@@ -210,7 +214,7 @@ async def get_equipment_classes(
 
 
 @router.get("/pm/equipment-classes/{class_id}", response_model=PMEquipmentClassWithSystemCodesResponse)
-async def get_equipment_class(
+def get_equipment_class(
     class_id: int,
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -249,7 +253,7 @@ async def get_equipment_class(
 # ============================================================================
 
 @router.get("/pm/system-codes", response_model=List[PMSystemCodeResponse])
-async def get_system_codes(
+def get_system_codes(
     equipment_class_id: Optional[int] = None,
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -278,7 +282,7 @@ async def get_system_codes(
 
 
 @router.get("/pm/system-codes/{system_code_id}", response_model=PMSystemCodeWithAssetTypesResponse)
-async def get_system_code(
+def get_system_code(
     system_code_id: int,
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -318,7 +322,7 @@ async def get_system_code(
 # ============================================================================
 
 @router.get("/pm/asset-types", response_model=List[PMAssetTypeResponse])
-async def get_asset_types(
+def get_asset_types(
     system_code_id: Optional[int] = None,
     search: Optional[str] = None,
     has_checklists: bool = False,
@@ -362,7 +366,7 @@ async def get_asset_types(
 
 
 @router.get("/pm/asset-types/{asset_type_id}", response_model=PMAssetTypeDetailResponse)
-async def get_asset_type(
+def get_asset_type(
     asset_type_id: int,
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -418,7 +422,7 @@ async def get_asset_type(
 # ============================================================================
 
 @router.get("/pm/checklists/{checklist_id}", response_model=PMChecklistWithActivitiesResponse)
-async def get_checklist(
+def get_checklist(
     checklist_id: int,
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -460,7 +464,7 @@ async def get_checklist(
 # ============================================================================
 
 @router.get("/pm/hierarchy", response_model=PMHierarchyResponse)
-async def get_pm_hierarchy(
+def get_pm_hierarchy(
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
 ):
@@ -500,7 +504,7 @@ async def get_pm_hierarchy(
 # ============================================================================
 
 @router.get("/pm/search")
-async def search_pm(
+def search_pm(
     q: str = Query(..., min_length=2),
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -544,7 +548,7 @@ async def search_pm(
 # ============================================================================
 
 @router.get("/pm/stats")
-async def get_pm_stats(
+def get_pm_stats(
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
 ):
@@ -606,7 +610,7 @@ def check_company_has_pm_data(db: Session, company_id: int) -> bool:
 
 
 @router.post("/pm/seed")
-async def seed_pm_data_for_company(
+def seed_pm_data_for_company(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -664,7 +668,7 @@ class PMEquipmentClassUpdate(BaseModel):
 
 
 @router.post("/pm/equipment-classes", response_model=PMEquipmentClassResponse)
-async def create_equipment_class(
+def create_equipment_class(
     data: PMEquipmentClassCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -703,7 +707,7 @@ async def create_equipment_class(
 
 
 @router.put("/pm/equipment-classes/{class_id}", response_model=PMEquipmentClassResponse)
-async def update_equipment_class(
+def update_equipment_class(
     class_id: int,
     data: PMEquipmentClassUpdate,
     user: User = Depends(get_current_user),
@@ -745,7 +749,7 @@ async def update_equipment_class(
 
 
 @router.delete("/pm/equipment-classes/{class_id}")
-async def delete_equipment_class(
+def delete_equipment_class(
     class_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -789,7 +793,7 @@ class PMSystemCodeUpdate(BaseModel):
 
 
 @router.post("/pm/system-codes", response_model=PMSystemCodeResponse)
-async def create_system_code(
+def create_system_code(
     data: PMSystemCodeCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -828,7 +832,7 @@ async def create_system_code(
 
 
 @router.put("/pm/system-codes/{system_code_id}", response_model=PMSystemCodeResponse)
-async def update_system_code(
+def update_system_code(
     system_code_id: int,
     data: PMSystemCodeUpdate,
     user: User = Depends(get_current_user),
@@ -870,7 +874,7 @@ async def update_system_code(
 
 
 @router.delete("/pm/system-codes/{system_code_id}")
-async def delete_system_code(
+def delete_system_code(
     system_code_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -916,7 +920,7 @@ class PMAssetTypeUpdate(BaseModel):
 
 
 @router.post("/pm/asset-types", response_model=PMAssetTypeResponse)
-async def create_asset_type(
+def create_asset_type(
     data: PMAssetTypeCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -957,7 +961,7 @@ async def create_asset_type(
 
 
 @router.put("/pm/asset-types/{asset_type_id}", response_model=PMAssetTypeResponse)
-async def update_asset_type(
+def update_asset_type(
     asset_type_id: int,
     data: PMAssetTypeUpdate,
     user: User = Depends(get_current_user),
@@ -1002,7 +1006,7 @@ async def update_asset_type(
 
 
 @router.delete("/pm/asset-types/{asset_type_id}")
-async def delete_asset_type(
+def delete_asset_type(
     asset_type_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1044,7 +1048,7 @@ class PMChecklistUpdate(BaseModel):
 
 
 @router.post("/pm/checklists", response_model=PMChecklistResponse)
-async def create_checklist(
+def create_checklist(
     data: PMChecklistCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1082,7 +1086,7 @@ async def create_checklist(
 
 
 @router.put("/pm/checklists/{checklist_id}", response_model=PMChecklistResponse)
-async def update_checklist(
+def update_checklist(
     checklist_id: int,
     data: PMChecklistUpdate,
     user: User = Depends(get_current_user),
@@ -1122,7 +1126,7 @@ async def update_checklist(
 
 
 @router.delete("/pm/checklists/{checklist_id}")
-async def delete_checklist(
+def delete_checklist(
     checklist_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1172,7 +1176,7 @@ class PMActivityUpdate(BaseModel):
 
 
 @router.post("/pm/activities", response_model=PMActivityResponse)
-async def create_activity(
+def create_activity(
     data: PMActivityCreate,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1217,7 +1221,7 @@ async def create_activity(
 
 
 @router.put("/pm/activities/{activity_id}", response_model=PMActivityResponse)
-async def update_activity(
+def update_activity(
     activity_id: int,
     data: PMActivityUpdate,
     user: User = Depends(get_current_user),
@@ -1268,7 +1272,7 @@ async def update_activity(
 
 
 @router.delete("/pm/activities/{activity_id}")
-async def delete_activity(
+def delete_activity(
     activity_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1296,7 +1300,7 @@ async def delete_activity(
 # ============================================================================
 
 @router.post("/pm/seed-all")
-async def seed_pm_data_for_all_companies(
+def seed_pm_data_for_all_companies(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
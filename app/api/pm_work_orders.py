@@ -3,7 +3,6 @@ PM Work Order Generation API
 Generates preventive maintenance work orders based on equipment PM schedules
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_
 from pydantic import BaseModel
@@ -13,16 +12,16 @@ from decimal import Decimal
 import logging
 
 from app.database import get_db
+from app.services.dependency import get_current_user
 from app.models import (
     User, WorkOrder, Equipment, Floor, Room, Project, Site, Building, Client,
     PMEquipmentClass, PMSystemCode, PMAssetType, PMChecklist, PMActivity,
     PMSchedule, Technician, work_order_technicians, HandHeldDevice,
     WorkOrderChecklistItem, Unit, Block, Contract, contract_sites, AddressBook
 )
-from app.api.auth import verify_token
+from app.api.work_orders import reserve_wo_numbers
 
 router = APIRouter()
-security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
 
@@ -123,43 +122,8 @@ class PMWorkOrderGenerateResponse(BaseModel):
     work_order_numbers: List[str]
 
 
-# ============ Dependencies ============
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    token = credentials.credentials
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
-
 # ============ Helper Functions ============
 
-def generate_wo_number(db: Session, company_id: int) -> str:
-    """Generate unique work order number"""
-    year = datetime.now().year
-    prefix = f"WO-{year}-"
-
-    last_wo = db.query(WorkOrder).filter(
-        WorkOrder.company_id == company_id,
-        WorkOrder.wo_number.like(f"{prefix}%")
-    ).order_by(WorkOrder.id.desc()).first()
-
-    if last_wo:
-        try:
-            last_num = int(last_wo.wo_number.split("-")[-1])
-            new_num = last_num + 1
-        except:
-            new_num = 1
-    else:
-        new_num = 1
-
-    return f"{prefix}{new_num:05d}"
-
-
 def get_or_create_pm_schedule(db: Session, company_id: int, equipment_id: int, checklist_id: int) -> PMSchedule:
     """Get existing PM schedule or create a new one"""
     schedule = db.query(PMSchedule).filter(
@@ -184,7 +148,7 @@ def get_or_create_pm_schedule(db: Session, company_id: int, equipment_id: int, c
 # ============ API Endpoints ============
 
 @router.get("/pm-work-orders/frequencies")
-async def get_pm_frequencies(
+def get_pm_frequencies(
     site_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -263,7 +227,7 @@ async def get_pm_frequencies(
 
 
 @router.get("/pm-work-orders/preview")
-async def preview_pm_work_orders(
+def preview_pm_work_orders(
     site_id: int,
     frequency_code: str,
     user: User = Depends(get_current_user),
@@ -367,7 +331,7 @@ async def preview_pm_work_orders(
 
 
 @router.post("/pm-work-orders/generate")
-async def generate_pm_work_orders(
+def generate_pm_work_orders(
     data: PMWorkOrderGenerateRequest,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -443,8 +407,10 @@ async def generate_pm_work_orders(
     work_orders_created = []
 
     try:
+        # Find the checklist for this frequency of each equipment first, so the
+        # work order numbers can be reserved as one block
+        pm_targets = []
         for equip in equipment_list:
-            # Find checklist for this frequency
             checklist = db.query(PMChecklist).options(
                 joinedload(PMChecklist.activities),
                 joinedload(PMChecklist.asset_type)
@@ -454,9 +420,12 @@ async def generate_pm_work_orders(
                 PMChecklist.is_active == True
             ).first()
 
-            if not checklist:
-                continue
+            if checklist:
+                pm_targets.append((equip, checklist))
+
+        wo_numbers = reserve_wo_numbers(db, user.company_id, len(pm_targets)) if pm_targets else []
 
+        for (equip, checklist), wo_number in zip(pm_targets, wo_numbers):
             # Build work order title and description
             asset_type_name = checklist.asset_type.name if checklist.asset_type else "Equipment"
             wo_title = f"PM - {checklist.frequency_name} - {equip.name}"
@@ -492,7 +461,7 @@ TASKS TO COMPLETE:
             # Create work order
             wo = WorkOrder(
                 company_id=user.company_id,
-                wo_number=generate_wo_number(db, user.company_id),
+                wo_number=wo_number,
                 title=wo_title,
                 description=wo_description,
                 work_order_type="preventive",
@@ -573,7 +542,7 @@ TASKS TO COMPLETE:
 
 
 @router.post("/pm-work-orders/{wo_id}/complete")
-async def complete_pm_work_order(
+def complete_pm_work_order(
     wo_id: int,
     completion_notes: Optional[str] = None,
     user: User = Depends(get_current_user),
@@ -645,7 +614,7 @@ async def complete_pm_work_order(
 
 
 @router.get("/pm-work-orders/dashboard")
-async def get_pm_dashboard(
+def get_pm_dashboard(
     site_id: Optional[int] = None,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
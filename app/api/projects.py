@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case, or_
@@ -11,35 +10,12 @@ from app.models import (
     Project, Site, Client, User, Company, ProcessedImage,
     WorkOrder, WorkOrderTimeEntry, WorkOrderSparePart, Technician, AddressBook
 )
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)  # verify_token returns the email directly
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 def require_admin(user: User = Depends(get_current_user)):
@@ -124,7 +100,7 @@ def project_to_response(project: Project, db: Session) -> dict:
 
 
 @router.get("/projects/")
-async def get_projects(
+def get_projects(
     site_id: Optional[int] = None,
     client_id: Optional[int] = None,
     status_filter: Optional[str] = None,
@@ -179,7 +155,7 @@ async def get_projects(
 
 
 @router.get("/projects/{project_id}")
-async def get_project(
+def get_project(
     project_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -214,7 +190,7 @@ async def get_project(
 
 
 @router.post("/projects/")
-async def create_project(
+def create_project(
     data: ProjectCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -313,7 +289,7 @@ async def create_project(
 
 
 @router.put("/projects/{project_id}")
-async def update_project(
+def update_project(
     project_id: int,
     data: ProjectUpdate,
     user: User = Depends(require_admin),
@@ -375,7 +351,7 @@ async def update_project(
 
 
 @router.delete("/projects/{project_id}")
-async def delete_project(
+def delete_project(
     project_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -419,7 +395,7 @@ async def delete_project(
 
 
 @router.get("/projects/{project_id}/invoices")
-async def get_project_invoices(
+def get_project_invoices(
     project_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -477,7 +453,7 @@ async def get_project_invoices(
 
 
 @router.post("/projects/{project_id}/invoices/{invoice_id}")
-async def link_invoice_to_project(
+def link_invoice_to_project(
     project_id: int,
     invoice_id: int,
     user: User = Depends(get_current_user),
@@ -535,7 +511,7 @@ async def link_invoice_to_project(
 
 
 @router.delete("/projects/{project_id}/invoices/{invoice_id}")
-async def unlink_invoice_from_project(
+def unlink_invoice_from_project(
     project_id: int,
     invoice_id: int,
     user: User = Depends(get_current_user),
@@ -590,7 +566,7 @@ def decimal_to_float(val):
 
 
 @router.get("/projects/{project_id}/cost-center")
-async def get_project_cost_center(
+def get_project_cost_center(
     project_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
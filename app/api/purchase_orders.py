@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import and_, func
 from typing import Optional, List
@@ -11,8 +10,9 @@ from app.models import (
     User, AddressBook, WorkOrder, Contract, ItemMaster, ProcessedImage,
     ItemStock, ItemLedger, GoodsReceipt
 )
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 from app.services.journal_posting import JournalPostingService
+from app.services.sequences import next_number, max_suffix
 from app.schemas import (
     PurchaseOrderCreate, PurchaseOrderUpdate, PurchaseOrder as POSchema,
     PurchaseOrderList, PurchaseOrderLineCreate, PurchaseOrderLineUpdate,
@@ -24,7 +24,6 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
 
 
 def resolve_item_id(db: Session, company_id: int, item_id: Optional[int], item_number: Optional[str]) -> Optional[int]:
@@ -51,28 +50,6 @@ def resolve_item_id(db: Session, company_id: int, item_id: Optional[int], item_n
     return None
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
-
-
 def require_admin(user: User = Depends(get_current_user)):
     """Require admin role"""
     if user.role != "admin":
@@ -143,7 +120,7 @@ def update_po_status(po: PurchaseOrder):
 # ============================================================================
 
 @router.get("/", response_model=List[PurchaseOrderList])
-async def list_purchase_orders(
+def list_purchase_orders(
     status_filter: Optional[str] = Query(None, alias="status"),
     address_book_id: Optional[int] = Query(None, description="Filter by Address Book vendor ID"),
     work_order_id: Optional[int] = None,
@@ -209,7 +186,7 @@ async def list_purchase_orders(
 
 
 @router.post("/", response_model=POSchema, status_code=status.HTTP_201_CREATED)
-async def create_purchase_order(
+def create_purchase_order(
     po_data: PurchaseOrderCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -310,7 +287,7 @@ async def create_purchase_order(
 
 
 @router.get("/{po_id}", response_model=POSchema)
-async def get_purchase_order(
+def get_purchase_order(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -343,7 +320,7 @@ async def get_purchase_order(
 
 
 @router.put("/{po_id}", response_model=POSchema)
-async def update_purchase_order(
+def update_purchase_order(
     po_id: int,
     po_data: PurchaseOrderUpdate,
     db: Session = Depends(get_db),
@@ -379,7 +356,7 @@ async def update_purchase_order(
 
 
 @router.delete("/{po_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_purchase_order(
+def delete_purchase_order(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -407,7 +384,7 @@ async def delete_purchase_order(
 # ============================================================================
 
 @router.post("/{po_id}/lines", response_model=POLineSchema, status_code=status.HTTP_201_CREATED)
-async def add_po_line(
+def add_po_line(
     po_id: int,
     line_data: PurchaseOrderLineCreate,
     db: Session = Depends(get_db),
@@ -461,7 +438,7 @@ async def add_po_line(
 
 
 @router.put("/{po_id}/lines/{line_id}", response_model=POLineSchema)
-async def update_po_line(
+def update_po_line(
     po_id: int,
     line_id: int,
     line_data: PurchaseOrderLineUpdate,
@@ -528,7 +505,7 @@ async def update_po_line(
 
 
 @router.delete("/{po_id}/lines/{line_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_po_line(
+def delete_po_line(
     po_id: int,
     line_id: int,
     db: Session = Depends(get_db),
@@ -570,7 +547,7 @@ async def delete_po_line(
 # ============================================================================
 
 @router.post("/{po_id}/send", response_model=POSchema)
-async def send_purchase_order(
+def send_purchase_order(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -602,7 +579,7 @@ async def send_purchase_order(
 
 
 @router.post("/{po_id}/acknowledge", response_model=POSchema)
-async def acknowledge_purchase_order(
+def acknowledge_purchase_order(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -629,7 +606,7 @@ async def acknowledge_purchase_order(
 
 
 @router.post("/{po_id}/lines/{line_id}/receive", response_model=POLineSchema)
-async def receive_po_line(
+def receive_po_line(
     po_id: int,
     line_id: int,
     receive_data: PurchaseOrderLineReceive,
@@ -693,20 +670,10 @@ async def receive_po_line(
             # Generate transaction number for ledger entry
             today = datetime.now().strftime("%Y%m%d")
             tx_prefix = f"POR-{today}-"
-            last_tx = db.query(ItemLedger).filter(
-                ItemLedger.company_id == current_user.company_id,
-                ItemLedger.transaction_number.like(f"{tx_prefix}%")
-            ).order_by(ItemLedger.id.desc()).first()
-
-            if last_tx:
-                try:
-                    last_num = int(last_tx.transaction_number.split("-")[-1])
-                    next_num = last_num + 1
-                except (ValueError, IndexError):
-                    next_num = 1
-            else:
-                next_num = 1
-            tx_number = f"{tx_prefix}{next_num:05d}"
+            tx_number = next_number(
+                db, current_user.company_id, tx_prefix, width=5,
+                seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, current_user.company_id, tx_prefix)
+            )
 
             # Create ledger entry (receiving goes TO warehouse, so use to_warehouse_id)
             ledger_entry = ItemLedger(
@@ -749,7 +716,7 @@ async def receive_po_line(
 
 
 @router.put("/{po_id}/lines/{line_id}/received", response_model=POLineSchema)
-async def update_received_quantity(
+def update_received_quantity(
     po_id: int,
     line_id: int,
     receive_data: PurchaseOrderLineReceive,
@@ -820,20 +787,10 @@ async def update_received_quantity(
             # Generate transaction number for adjustment ledger entry
             today = datetime.now().strftime("%Y%m%d")
             tx_prefix = f"POR-ADJ-{today}-"
-            last_tx = db.query(ItemLedger).filter(
-                ItemLedger.company_id == current_user.company_id,
-                ItemLedger.transaction_number.like(f"{tx_prefix}%")
-            ).order_by(ItemLedger.id.desc()).first()
-
-            if last_tx:
-                try:
-                    last_num = int(last_tx.transaction_number.split("-")[-1])
-                    next_num = last_num + 1
-                except (ValueError, IndexError):
-                    next_num = 1
-            else:
-                next_num = 1
-            tx_number = f"{tx_prefix}{next_num:05d}"
+            tx_number = next_number(
+                db, current_user.company_id, tx_prefix, width=5,
+                seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, current_user.company_id, tx_prefix)
+            )
 
             # Create adjustment ledger entry
             ledger_entry = ItemLedger(
@@ -865,7 +822,7 @@ async def update_received_quantity(
 
 
 @router.post("/{po_id}/cancel", response_model=POSchema)
-async def cancel_purchase_order(
+def cancel_purchase_order(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -935,7 +892,7 @@ async def cancel_purchase_order(
 
 
 @router.get("/{po_id}/reversal-preview")
-async def get_reversal_preview(
+def get_reversal_preview(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -1076,7 +1033,7 @@ async def get_reversal_preview(
 
 
 @router.post("/{po_id}/reverse", response_model=POSchema)
-async def reverse_purchase_order(
+def reverse_purchase_order(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -1147,20 +1104,10 @@ async def reverse_purchase_order(
                     # Generate transaction number for reversal ledger entry
                     today = datetime.now().strftime("%Y%m%d")
                     tx_prefix = f"POR-REV-{today}-"
-                    last_tx = db.query(ItemLedger).filter(
-                        ItemLedger.company_id == current_user.company_id,
-                        ItemLedger.transaction_number.like(f"{tx_prefix}%")
-                    ).order_by(ItemLedger.id.desc()).first()
-
-                    if last_tx:
-                        try:
-                            last_num = int(last_tx.transaction_number.split("-")[-1])
-                            next_num = last_num + 1
-                        except (ValueError, IndexError):
-                            next_num = 1
-                    else:
-                        next_num = 1
-                    tx_number = f"{tx_prefix}{next_num:05d}"
+                    tx_number = next_number(
+                        db, current_user.company_id, tx_prefix, width=5,
+                        seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, current_user.company_id, tx_prefix)
+                    )
 
                     # Create reversal ledger entry (negative quantity out of warehouse)
                     ledger_entry = ItemLedger(
@@ -1240,7 +1187,7 @@ async def reverse_purchase_order(
 # ============================================================================
 
 @router.post("/{po_id}/link-invoice", response_model=POInvoiceSchema)
-async def link_invoice_to_po(
+def link_invoice_to_po(
     po_id: int,
     link_data: POInvoiceLink,
     db: Session = Depends(get_db),
@@ -1326,7 +1273,7 @@ async def link_invoice_to_po(
 
 
 @router.get("/{po_id}/invoices", response_model=List[POInvoiceSchema])
-async def get_po_invoices(
+def get_po_invoices(
     po_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1378,7 +1325,7 @@ async def get_po_invoices(
 
 
 @router.delete("/{po_id}/invoices/{link_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def unlink_invoice_from_po(
+def unlink_invoice_from_po(
     po_id: int,
     link_id: int,
     db: Session = Depends(get_db),
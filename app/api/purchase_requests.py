@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, func
 from typing import Optional, List
@@ -10,7 +9,8 @@ from app.models import (
     PurchaseRequest, PurchaseRequestLine, PurchaseOrder, PurchaseOrderLine,
     User, AddressBook, WorkOrder, Contract, ItemMaster, Company
 )
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
+from app.services.sequences import next_number, max_suffix
 from app.schemas import (
     PurchaseRequestCreate, PurchaseRequestUpdate, PurchaseRequest as PRSchema,
     PurchaseRequestList, PurchaseRequestLineCreate, PurchaseRequestLineUpdate,
@@ -22,7 +22,6 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
 
 
 def find_matching_item(db: Session, company_id: int, item_id: Optional[int], item_number: Optional[str], description: Optional[str]) -> tuple[Optional[int], Optional[str]]:
@@ -84,28 +83,6 @@ def find_matching_item(db: Session, company_id: int, item_id: Optional[int], ite
     return None, None
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
-
-
 def require_admin(user: User = Depends(get_current_user)):
     """Require admin role"""
     if user.role != "admin":
@@ -169,26 +146,11 @@ def require_po_converter(user: User = Depends(get_current_user)):
 
 def generate_pr_number(db: Session, company_id: int) -> str:
     """Generate next PR number: PR-YYYY-NNNNN"""
-    year = datetime.now().year
-    prefix = f"PR-{year}-"
-
-    # Find the highest PR number for this company and year
-    last_pr = db.query(PurchaseRequest).filter(
-        PurchaseRequest.company_id == company_id,
-        PurchaseRequest.pr_number.like(f"{prefix}%")
-    ).order_by(PurchaseRequest.pr_number.desc()).first()
-
-    if last_pr:
-        # Extract the number part and increment
-        try:
-            last_num = int(last_pr.pr_number.replace(prefix, ""))
-            next_num = last_num + 1
-        except ValueError:
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:05d}"
+    prefix = f"PR-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, PurchaseRequest.pr_number, PurchaseRequest.company_id, company_id, prefix)
+    )
 
 
 def calculate_pr_total(lines: list) -> Decimal:
@@ -206,7 +168,7 @@ def calculate_pr_total(lines: list) -> Decimal:
 # Purchase Request CRUD
 # ============================================================================
 @router.get("/", response_model=List[PurchaseRequestList])
-async def list_purchase_requests(
+def list_purchase_requests(
     status_filter: Optional[str] = Query(None, alias="status"),
     priority: Optional[str] = None,
     vendor_id: Optional[int] = None,
@@ -302,7 +264,7 @@ async def list_purchase_requests(
 
 
 @router.post("/", response_model=PRSchema, status_code=status.HTTP_201_CREATED)
-async def create_purchase_request(
+def create_purchase_request(
     pr_data: PurchaseRequestCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles("warehouse_manager"))
@@ -391,7 +353,7 @@ async def create_purchase_request(
 
 
 @router.get("/{pr_id}", response_model=PRSchema)
-async def get_purchase_request(
+def get_purchase_request(
     pr_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -414,7 +376,7 @@ async def get_purchase_request(
 
 
 @router.put("/{pr_id}", response_model=PRSchema)
-async def update_purchase_request(
+def update_purchase_request(
     pr_id: int,
     pr_data: PurchaseRequestUpdate,
     db: Session = Depends(get_db),
@@ -450,7 +412,7 @@ async def update_purchase_request(
 
 
 @router.delete("/{pr_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_purchase_request(
+def delete_purchase_request(
     pr_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles("warehouse_manager"))
@@ -478,7 +440,7 @@ async def delete_purchase_request(
 # ============================================================================
 
 @router.post("/{pr_id}/lines", response_model=PRLineSchema, status_code=status.HTTP_201_CREATED)
-async def add_pr_line(
+def add_pr_line(
     pr_id: int,
     line_data: PurchaseRequestLineCreate,
     db: Session = Depends(get_db),
@@ -526,7 +488,7 @@ async def add_pr_line(
 
 
 @router.put("/{pr_id}/lines/{line_id}", response_model=PRLineSchema)
-async def update_pr_line(
+def update_pr_line(
     pr_id: int,
     line_id: int,
     line_data: PurchaseRequestLineUpdate,
@@ -574,7 +536,7 @@ async def update_pr_line(
 
 
 @router.delete("/{pr_id}/lines/{line_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_pr_line(
+def delete_pr_line(
     pr_id: int,
     line_id: int,
     db: Session = Depends(get_db),
@@ -614,7 +576,7 @@ async def delete_pr_line(
 # ============================================================================
 
 @router.post("/{pr_id}/submit", response_model=PRSchema)
-async def submit_purchase_request(
+def submit_purchase_request(
     pr_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles("warehouse_manager"))
@@ -646,7 +608,7 @@ async def submit_purchase_request(
 
 
 @router.post("/{pr_id}/approve", response_model=PRSchema)
-async def approve_purchase_request(
+def approve_purchase_request(
     pr_id: int,
     approval_data: PurchaseRequestApproval,
     db: Session = Depends(get_db),
@@ -699,7 +661,7 @@ async def approve_purchase_request(
 
 
 @router.post("/{pr_id}/reject", response_model=PRSchema)
-async def reject_purchase_request(
+def reject_purchase_request(
     pr_id: int,
     rejection_data: PurchaseRequestRejection,
     db: Session = Depends(get_db),
@@ -730,7 +692,7 @@ async def reject_purchase_request(
 
 
 @router.post("/{pr_id}/convert-to-po")
-async def convert_pr_to_po(
+def convert_pr_to_po(
     pr_id: int,
     convert_data: ConvertToPORequest,
     db: Session = Depends(get_db),
@@ -856,7 +818,7 @@ async def convert_pr_to_po(
 
 
 @router.post("/{pr_id}/cancel", response_model=PRSchema)
-async def cancel_purchase_request(
+def cancel_purchase_request(
     pr_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -294,7 +294,7 @@ def serialize_document(doc: RFQDocument) -> dict:
 # =============================================================================
 
 @router.get("", response_model=RFQListResponse)
-async def list_rfqs(
+def list_rfqs(
     status: Optional[str] = None,
     rfq_type: Optional[str] = None,
     project_id: Optional[int] = None,
@@ -381,7 +381,7 @@ async def list_rfqs(
 
 
 @router.get("/stats", response_model=RFQStats)
-async def get_rfq_stats(
+def get_rfq_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
 ):
@@ -425,7 +425,7 @@ async def get_rfq_stats(
 
 
 @router.get("/{rfq_id}")
-async def get_rfq(
+def get_rfq(
     rfq_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -436,7 +436,7 @@ async def get_rfq(
 
 
 @router.post("")
-async def create_rfq(
+def create_rfq(
     rfq_data: RFQCreate,
     request: Request,
     db: Session = Depends(get_db),
@@ -532,7 +532,7 @@ async def create_rfq(
 
 
 @router.put("/{rfq_id}")
-async def update_rfq(
+def update_rfq(
     rfq_id: int,
     rfq_data: RFQUpdate,
     request: Request,
@@ -600,7 +600,7 @@ async def update_rfq(
 
 
 @router.delete("/{rfq_id}")
-async def delete_rfq(
+def delete_rfq(
     rfq_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -618,7 +618,7 @@ async def delete_rfq(
 
 
 @router.post("/{rfq_id}/submit")
-async def submit_rfq(
+def submit_rfq(
     rfq_id: int,
     submit_data: RFQSubmit,
     request: Request,
@@ -650,7 +650,7 @@ async def submit_rfq(
 
 
 @router.post("/{rfq_id}/cancel")
-async def cancel_rfq(
+def cancel_rfq(
     rfq_id: int,
     cancel_data: RFQCancel,
     request: Request,
@@ -690,7 +690,7 @@ async def cancel_rfq(
 # =============================================================================
 
 @router.post("/{rfq_id}/items")
-async def add_item(
+def add_item(
     rfq_id: int,
     item_data: RFQItemCreate,
     request: Request,
@@ -728,7 +728,7 @@ async def add_item(
 
 
 @router.put("/{rfq_id}/items/{item_id}")
-async def update_item(
+def update_item(
     rfq_id: int,
     item_id: int,
     item_data: RFQItemUpdate,
@@ -775,7 +775,7 @@ async def update_item(
 
 
 @router.delete("/{rfq_id}/items/{item_id}")
-async def delete_item(
+def delete_item(
     rfq_id: int,
     item_id: int,
     request: Request,
@@ -805,7 +805,7 @@ async def delete_item(
 # =============================================================================
 
 @router.post("/{rfq_id}/vendors")
-async def add_vendor(
+def add_vendor(
     rfq_id: int,
     vendor_data: RFQVendorCreate,
     request: Request,
@@ -851,7 +851,7 @@ async def add_vendor(
 
 
 @router.delete("/{rfq_id}/vendors/{vendor_id}")
-async def remove_vendor(
+def remove_vendor(
     rfq_id: int,
     vendor_id: int,
     request: Request,
@@ -882,7 +882,7 @@ async def remove_vendor(
 
 
 @router.post("/{rfq_id}/vendors/{vendor_id}/contact")
-async def mark_vendor_contacted(
+def mark_vendor_contacted(
     rfq_id: int,
     vendor_id: int,
     contact_data: RFQVendorContact,
@@ -922,7 +922,7 @@ async def mark_vendor_contacted(
 # =============================================================================
 
 @router.post("/{rfq_id}/quotes")
-async def receive_quote(
+def receive_quote(
     rfq_id: int,
     quote_data: RFQQuoteCreate,
     request: Request,
@@ -989,7 +989,7 @@ async def receive_quote(
 
 
 @router.put("/{rfq_id}/quotes/{quote_id}")
-async def update_quote(
+def update_quote(
     rfq_id: int,
     quote_id: int,
     quote_data: RFQQuoteUpdate,
@@ -1040,7 +1040,7 @@ async def update_quote(
 
 
 @router.post("/{rfq_id}/quotes/{quote_id}/evaluate")
-async def evaluate_quote(
+def evaluate_quote(
     rfq_id: int,
     quote_id: int,
     evaluation: RFQQuoteUpdate,
@@ -1075,7 +1075,7 @@ async def evaluate_quote(
 # =============================================================================
 
 @router.get("/{rfq_id}/comparison/matrix")
-async def get_comparison_matrix(
+def get_comparison_matrix(
     rfq_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -1122,7 +1122,7 @@ async def get_comparison_matrix(
 
 
 @router.post("/{rfq_id}/comparison/recommend")
-async def recommend_vendor(
+def recommend_vendor(
     rfq_id: int,
     recommendation: RFQComparisonRecommend,
     request: Request,
@@ -1178,7 +1178,7 @@ async def recommend_vendor(
 # =============================================================================
 
 @router.post("/{rfq_id}/convert-to-pr", response_model=RFQConvertToPRResponse)
-async def convert_to_pr(
+def convert_to_pr(
     rfq_id: int,
     conversion_data: RFQConvertToPR,
     request: Request,
@@ -1229,7 +1229,7 @@ async def convert_to_pr(
 # =============================================================================
 
 @router.get("/{rfq_id}/timeline")
-async def get_timeline(
+def get_timeline(
     rfq_id: int,
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=200),
@@ -1254,7 +1254,7 @@ async def get_timeline(
 
 
 @router.post("/{rfq_id}/notes")
-async def add_note(
+def add_note(
     rfq_id: int,
     note_data: RFQAddNote,
     request: Request,
@@ -1,39 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from app.database import get_db
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
+from app.services.permission_cache import notify_permissions_changed
 import logging
 from app.models import Role, RolePermission, User, Permission
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)  # verify_token returns the email directly
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 def require_admin(user: User = Depends(get_current_user)):
@@ -106,6 +83,7 @@ def create_role(
     )
     db.add(role)
     db.commit()
+    notify_permissions_changed(db, user.company_id)
     db.refresh(role)
 
     return {"success": True, "role": role}
@@ -141,6 +119,7 @@ def update_role(
         role.description = data.description
 
     db.commit()
+    notify_permissions_changed(db, user.company_id)
     return {"success": True}
 
 
@@ -168,6 +147,7 @@ def delete_role(
 
     db.delete(role)
     db.commit()
+    notify_permissions_changed(db, user.company_id)
 
     return {"success": True}
 
@@ -233,6 +213,7 @@ def update_role_permissions(
         ))
 
     db.commit()
+    notify_permissions_changed(db, user.company_id)
     return {"success": True}
 
 @router.post("/permissions", status_code=201)
@@ -252,6 +233,8 @@ def create_permission(
     perm = Permission(module=data.module, action=data.action)
     db.add(perm)
     db.commit()
+    # Permissions are shared by every company's roles
+    notify_permissions_changed(db)
     db.refresh(perm)
     return {"success": True, "permission": perm}
 
@@ -282,6 +265,8 @@ def update_permission(
         raise HTTPException(status_code=400, detail="Duplicate permission exists")
 
     db.commit()
+    # Permissions are shared by every company's roles
+    notify_permissions_changed(db)
     return {"success": True, "permission": perm}
 
 
@@ -302,4 +287,6 @@ def delete_permission(
 
     db.delete(perm)
     db.commit()
+    # Permissions are shared by every company's roles
+    notify_permissions_changed(db)
     return {"success": True} 
\ No newline at end of file
@@ -1,12 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session, joinedload
 from typing import Optional, List
 from app.database import get_db
 from app.models import Site, Block, Building, Space, Floor, Unit, Room, Desk, Equipment, SubEquipment, User, Client, PMAssetType, PMEquipmentClass, AddressBook
 from sqlalchemy import or_
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 from app.schemas import (
     SiteCreate, SiteUpdate, Site as SiteSchema,
     BlockCreate, BlockUpdate, Block as BlockSchema,
@@ -24,29 +23,6 @@ import logging
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 def require_admin(user: User = Depends(get_current_user)):
@@ -78,7 +54,7 @@ def get_site_from_building(building: Building, db: Session) -> Site:
 # ============================================================================
 
 @router.get("/", response_model=List[SiteSchema])
-async def get_sites(
+def get_sites(
     client_id: Optional[int] = Query(None, description="Filter by client ID (legacy) or Address Book ID"),
     address_book_id: Optional[int] = Query(None, description="Filter by Address Book ID (Customer)"),
     is_active: Optional[bool] = Query(None, description="Filter by active status"),
@@ -118,7 +94,7 @@ async def get_sites(
 
 
 @router.get("/{site_id}", response_model=SiteSchema)
-async def get_site(
+def get_site(
     site_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -151,7 +127,7 @@ async def get_site(
 
 
 @router.post("/", response_model=SiteSchema, status_code=status.HTTP_201_CREATED)
-async def create_site(
+def create_site(
     site_data: SiteCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -186,7 +162,7 @@ async def create_site(
 
 
 @router.put("/{site_id}", response_model=SiteSchema)
-async def update_site(
+def update_site(
     site_id: int,
     site_data: SiteUpdate,
     db: Session = Depends(get_db),
@@ -224,7 +200,7 @@ async def update_site(
 
 
 @router.delete("/{site_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_site(
+def delete_site(
     site_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -252,7 +228,7 @@ async def delete_site(
 
 
 @router.get("/{site_id}/buildings", response_model=List[BuildingSchema])
-async def get_site_buildings(
+def get_site_buildings(
     site_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -277,7 +253,7 @@ async def get_site_buildings(
 
 
 @router.post("/{site_id}/buildings", response_model=BuildingSchema, status_code=status.HTTP_201_CREATED)
-async def create_site_building(
+def create_site_building(
     site_id: int,
     building_data: BuildingCreate,
     db: Session = Depends(get_db),
@@ -307,7 +283,7 @@ async def create_site_building(
 
 
 @router.get("/{site_id}/spaces", response_model=List[SpaceSchema])
-async def get_site_spaces(
+def get_site_spaces(
     site_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -332,7 +308,7 @@ async def get_site_spaces(
 
 
 @router.post("/{site_id}/spaces", response_model=SpaceSchema, status_code=status.HTTP_201_CREATED)
-async def create_site_space(
+def create_site_space(
     site_id: int,
     space_data: SpaceCreate,
     db: Session = Depends(get_db),
@@ -363,7 +339,7 @@ async def create_site_space(
 
 
 @router.get("/{site_id}/blocks", response_model=List[BlockSchema])
-async def get_site_blocks(
+def get_site_blocks(
     site_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -388,7 +364,7 @@ async def get_site_blocks(
 
 
 @router.post("/{site_id}/blocks", response_model=BlockSchema, status_code=status.HTTP_201_CREATED)
-async def create_site_block(
+def create_site_block(
     site_id: int,
     block_data: BlockCreate,
     db: Session = Depends(get_db),
@@ -422,7 +398,7 @@ async def create_site_block(
 # ============================================================================
 
 @router.get("/blocks/", response_model=List[BlockSchema])
-async def get_blocks(
+def get_blocks(
     site_id: Optional[int] = Query(None, description="Filter by site ID"),
     is_active: Optional[bool] = Query(None),
     skip: int = Query(0, ge=0),
@@ -447,7 +423,7 @@ async def get_blocks(
 
 
 @router.get("/blocks/{block_id}", response_model=BlockSchema)
-async def get_block(
+def get_block(
     block_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -467,7 +443,7 @@ async def get_block(
 
 
 @router.put("/blocks/{block_id}", response_model=BlockSchema)
-async def update_block(
+def update_block(
     block_id: int,
     block_data: BlockUpdate,
     db: Session = Depends(get_db),
@@ -497,7 +473,7 @@ async def update_block(
 
 
 @router.delete("/blocks/{block_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_block(
+def delete_block(
     block_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -521,7 +497,7 @@ async def delete_block(
 
 
 @router.get("/blocks/{block_id}/buildings", response_model=List[BuildingSchema])
-async def get_block_buildings(
+def get_block_buildings(
     block_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -547,7 +523,7 @@ async def get_block_buildings(
 
 
 @router.post("/blocks/{block_id}/buildings", response_model=BuildingSchema, status_code=status.HTTP_201_CREATED)
-async def create_block_building(
+def create_block_building(
     block_id: int,
     building_data: BuildingCreate,
     db: Session = Depends(get_db),
@@ -583,7 +559,7 @@ async def create_block_building(
 # ============================================================================
 
 @router.get("/buildings/", response_model=List[BuildingSchema])
-async def get_buildings(
+def get_buildings(
     site_id: Optional[int] = Query(None, description="Filter by site ID"),
     is_active: Optional[bool] = Query(None),
     skip: int = Query(0, ge=0),
@@ -609,7 +585,7 @@ async def get_buildings(
 
 
 @router.get("/buildings/{building_id}", response_model=BuildingSchema)
-async def get_building(
+def get_building(
     building_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -632,7 +608,7 @@ async def get_building(
 
 
 @router.post("/buildings/", response_model=BuildingSchema, status_code=status.HTTP_201_CREATED)
-async def create_building(
+def create_building(
     building_data: BuildingCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -657,7 +633,7 @@ async def create_building(
 
 
 @router.put("/buildings/{building_id}", response_model=BuildingSchema)
-async def update_building(
+def update_building(
     building_id: int,
     building_data: BuildingUpdate,
     db: Session = Depends(get_db),
@@ -689,7 +665,7 @@ async def update_building(
 
 
 @router.delete("/buildings/{building_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_building(
+def delete_building(
     building_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -722,7 +698,7 @@ async def delete_building(
 
 
 @router.get("/buildings/{building_id}/floors")
-async def get_building_floors(
+def get_building_floors(
     building_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -750,7 +726,7 @@ async def get_building_floors(
 
 
 @router.get("/buildings/{building_id}/spaces", response_model=List[SpaceSchema])
-async def get_building_spaces(
+def get_building_spaces(
     building_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -778,7 +754,7 @@ async def get_building_spaces(
 
 
 @router.post("/buildings/{building_id}/spaces", response_model=SpaceSchema, status_code=status.HTTP_201_CREATED)
-async def create_building_space(
+def create_building_space(
     building_id: int,
     space_data: SpaceCreate,
     db: Session = Depends(get_db),
@@ -815,7 +791,7 @@ async def create_building_space(
 # ============================================================================
 
 @router.get("/spaces/", response_model=List[SpaceSchema])
-async def get_spaces(
+def get_spaces(
     building_id: Optional[int] = Query(None, description="Filter by building ID"),
     is_active: Optional[bool] = Query(None),
     skip: int = Query(0, ge=0),
@@ -841,7 +817,7 @@ async def get_spaces(
 
 
 @router.get("/spaces/{space_id}", response_model=SpaceSchema)
-async def get_space(
+def get_space(
     space_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -871,7 +847,7 @@ async def get_space(
 
 
 @router.post("/spaces/", response_model=SpaceSchema, status_code=status.HTTP_201_CREATED)
-async def create_space(
+def create_space(
     space_data: SpaceCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -899,7 +875,7 @@ async def create_space(
 
 
 @router.put("/spaces/{space_id}", response_model=SpaceSchema)
-async def update_space(
+def update_space(
     space_id: int,
     space_data: SpaceUpdate,
     db: Session = Depends(get_db),
@@ -938,7 +914,7 @@ async def update_space(
 
 
 @router.delete("/spaces/{space_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_space(
+def delete_space(
     space_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -975,7 +951,7 @@ async def delete_space(
 # ============================================================================
 
 @router.get("/{site_id}/asset-tree")
-async def get_site_asset_tree(
+def get_site_asset_tree(
     site_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1098,7 +1074,7 @@ async def get_site_asset_tree(
 # ============================================================================
 
 @router.post("/buildings/{building_id}/floors", response_model=FloorSchema, status_code=status.HTTP_201_CREATED)
-async def create_building_floor(
+def create_building_floor(
     building_id: int,
     floor_data: FloorCreate,
     db: Session = Depends(get_db),
@@ -1130,7 +1106,7 @@ async def create_building_floor(
 
 
 @router.get("/floors/{floor_id}", response_model=FloorSchema)
-async def get_floor(
+def get_floor(
     floor_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1152,7 +1128,7 @@ async def get_floor(
 
 
 @router.put("/floors/{floor_id}", response_model=FloorSchema)
-async def update_floor(
+def update_floor(
     floor_id: int,
     floor_data: FloorUpdate,
     db: Session = Depends(get_db),
@@ -1183,7 +1159,7 @@ async def update_floor(
 
 
 @router.delete("/floors/{floor_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_floor(
+def delete_floor(
     floor_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -1216,7 +1192,7 @@ async def delete_floor(
 # ============================================================================
 
 @router.get("/floors/{floor_id}/units", response_model=List[UnitSchema])
-async def get_floor_units(
+def get_floor_units(
     floor_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -1243,7 +1219,7 @@ async def get_floor_units(
 
 
 @router.post("/floors/{floor_id}/units", response_model=UnitSchema, status_code=status.HTTP_201_CREATED)
-async def create_floor_unit(
+def create_floor_unit(
     floor_id: int,
     unit_data: UnitCreate,
     db: Session = Depends(get_db),
@@ -1275,7 +1251,7 @@ async def create_floor_unit(
 
 
 @router.get("/units/{unit_id}", response_model=UnitSchema)
-async def get_unit(
+def get_unit(
     unit_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1298,7 +1274,7 @@ async def get_unit(
 
 
 @router.put("/units/{unit_id}", response_model=UnitSchema)
-async def update_unit(
+def update_unit(
     unit_id: int,
     unit_data: UnitUpdate,
     db: Session = Depends(get_db),
@@ -1330,7 +1306,7 @@ async def update_unit(
 
 
 @router.delete("/units/{unit_id}")
-async def delete_unit(
+def delete_unit(
     unit_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1358,7 +1334,7 @@ async def delete_unit(
 
 # Unit Rooms endpoints
 @router.get("/units/{unit_id}/rooms", response_model=List[RoomSchema])
-async def get_unit_rooms(
+def get_unit_rooms(
     unit_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -1386,7 +1362,7 @@ async def get_unit_rooms(
 
 
 @router.post("/units/{unit_id}/rooms", response_model=RoomSchema, status_code=status.HTTP_201_CREATED)
-async def create_unit_room(
+def create_unit_room(
     unit_id: int,
     room_data: RoomCreate,
     db: Session = Depends(get_db),
@@ -1421,7 +1397,7 @@ async def create_unit_room(
 
 # Unit Equipment endpoints
 @router.get("/units/{unit_id}/equipment", response_model=List[EquipmentSchema])
-async def get_unit_equipment(
+def get_unit_equipment(
     unit_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -1449,7 +1425,7 @@ async def get_unit_equipment(
 
 
 @router.post("/units/{unit_id}/equipment", response_model=EquipmentSchema, status_code=status.HTTP_201_CREATED)
-async def create_unit_equipment(
+def create_unit_equipment(
     unit_id: int,
     equipment_data: EquipmentCreate,
     db: Session = Depends(get_db),
@@ -1487,7 +1463,7 @@ async def create_unit_equipment(
 # ============================================================================
 
 @router.get("/floors/{floor_id}/rooms", response_model=List[RoomSchema])
-async def get_floor_rooms(
+def get_floor_rooms(
     floor_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -1514,7 +1490,7 @@ async def get_floor_rooms(
 
 
 @router.post("/floors/{floor_id}/rooms", response_model=RoomSchema, status_code=status.HTTP_201_CREATED)
-async def create_floor_room(
+def create_floor_room(
     floor_id: int,
     room_data: RoomCreate,
     db: Session = Depends(get_db),
@@ -1546,7 +1522,7 @@ async def create_floor_room(
 
 
 @router.get("/rooms/{room_id}", response_model=RoomSchema)
-async def get_room(
+def get_room(
     room_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1569,7 +1545,7 @@ async def get_room(
 
 
 @router.put("/rooms/{room_id}", response_model=RoomSchema)
-async def update_room(
+def update_room(
     room_id: int,
     room_data: RoomUpdate,
     db: Session = Depends(get_db),
@@ -1601,7 +1577,7 @@ async def update_room(
 
 
 @router.delete("/rooms/{room_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_room(
+def delete_room(
     room_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -1635,7 +1611,7 @@ async def delete_room(
 # ============================================================================
 
 @router.get("/rooms/{room_id}/desks", response_model=List[DeskSchema])
-async def get_room_desks(
+def get_room_desks(
     room_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -1669,7 +1645,7 @@ async def get_room_desks(
 
 
 @router.post("/rooms/{room_id}/desks", response_model=DeskSchema, status_code=status.HTTP_201_CREATED)
-async def create_room_desk(
+def create_room_desk(
     room_id: int,
     desk_data: DeskCreate,
     db: Session = Depends(get_db),
@@ -1708,7 +1684,7 @@ async def create_room_desk(
 
 
 @router.get("/desks/{desk_id}", response_model=DeskSchema)
-async def get_desk(
+def get_desk(
     desk_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1739,7 +1715,7 @@ async def get_desk(
 
 
 @router.put("/desks/{desk_id}", response_model=DeskSchema)
-async def update_desk(
+def update_desk(
     desk_id: int,
     desk_data: DeskUpdate,
     db: Session = Depends(get_db),
@@ -1779,7 +1755,7 @@ async def update_desk(
 
 
 @router.delete("/desks/{desk_id}")
-async def delete_desk(
+def delete_desk(
     desk_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -1818,7 +1794,7 @@ async def delete_desk(
 
 # Desk Equipment endpoints
 @router.get("/desks/{desk_id}/equipment", response_model=List[EquipmentSchema])
-async def get_desk_equipment(
+def get_desk_equipment(
     desk_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -1854,7 +1830,7 @@ async def get_desk_equipment(
 
 
 @router.post("/desks/{desk_id}/equipment", response_model=EquipmentSchema, status_code=status.HTTP_201_CREATED)
-async def create_desk_equipment(
+def create_desk_equipment(
     desk_id: int,
     equipment_data: EquipmentCreate,
     db: Session = Depends(get_db),
@@ -1907,7 +1883,7 @@ async def create_desk_equipment(
 # ============================================================================
 
 @router.get("/equipment/", response_model=List[EquipmentSchema])
-async def get_equipment_list(
+def get_equipment_list(
     room_id: Optional[int] = Query(None),
     floor_id: Optional[int] = Query(None),
     space_id: Optional[int] = Query(None),
@@ -1947,7 +1923,7 @@ async def get_equipment_list(
 
 
 @router.get("/rooms/{room_id}/equipment", response_model=List[EquipmentSchema])
-async def get_room_equipment(
+def get_room_equipment(
     room_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -1975,7 +1951,7 @@ async def get_room_equipment(
 
 
 @router.post("/rooms/{room_id}/equipment", response_model=EquipmentSchema, status_code=status.HTTP_201_CREATED)
-async def create_room_equipment(
+def create_room_equipment(
     room_id: int,
     equipment_data: EquipmentCreate,
     db: Session = Depends(get_db),
@@ -2014,7 +1990,7 @@ async def create_room_equipment(
 
 
 @router.get("/spaces/{space_id}/equipment", response_model=List[EquipmentSchema])
-async def get_space_equipment(
+def get_space_equipment(
     space_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -2044,7 +2020,7 @@ async def get_space_equipment(
 
 
 @router.post("/spaces/{space_id}/equipment", response_model=EquipmentSchema, status_code=status.HTTP_201_CREATED)
-async def create_space_equipment(
+def create_space_equipment(
     space_id: int,
     equipment_data: EquipmentCreate,
     db: Session = Depends(get_db),
@@ -2085,7 +2061,7 @@ async def create_space_equipment(
 
 
 @router.get("/equipment/{equipment_id}", response_model=EquipmentSchema)
-async def get_equipment(
+def get_equipment(
     equipment_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -2106,7 +2082,7 @@ async def get_equipment(
 
 
 @router.put("/equipment/{equipment_id}", response_model=EquipmentSchema)
-async def update_equipment(
+def update_equipment(
     equipment_id: int,
     equipment_data: EquipmentUpdate,
     db: Session = Depends(get_db),
@@ -2136,7 +2112,7 @@ async def update_equipment(
 
 
 @router.delete("/equipment/{equipment_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_equipment(
+def delete_equipment(
     equipment_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -2167,7 +2143,7 @@ async def delete_equipment(
 # ============================================================================
 
 @router.get("/equipment/{equipment_id}/sub-equipment", response_model=List[SubEquipmentSchema])
-async def get_equipment_sub_equipment(
+def get_equipment_sub_equipment(
     equipment_id: int,
     is_active: Optional[bool] = Query(None),
     db: Session = Depends(get_db),
@@ -2193,7 +2169,7 @@ async def get_equipment_sub_equipment(
 
 
 @router.post("/equipment/{equipment_id}/sub-equipment", response_model=SubEquipmentSchema, status_code=status.HTTP_201_CREATED)
-async def create_equipment_sub_equipment(
+def create_equipment_sub_equipment(
     equipment_id: int,
     sub_equipment_data: SubEquipmentCreate,
     db: Session = Depends(get_db),
@@ -2231,7 +2207,7 @@ async def create_equipment_sub_equipment(
 
 
 @router.get("/sub-equipment/{sub_equipment_id}", response_model=SubEquipmentSchema)
-async def get_sub_equipment(
+def get_sub_equipment(
     sub_equipment_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -2252,7 +2228,7 @@ async def get_sub_equipment(
 
 
 @router.put("/sub-equipment/{sub_equipment_id}", response_model=SubEquipmentSchema)
-async def update_sub_equipment(
+def update_sub_equipment(
     sub_equipment_id: int,
     sub_equipment_data: SubEquipmentUpdate,
     db: Session = Depends(get_db),
@@ -2282,7 +2258,7 @@ async def update_sub_equipment(
 
 
 @router.delete("/sub-equipment/{sub_equipment_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_sub_equipment(
+def delete_sub_equipment(
     sub_equipment_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -2310,7 +2286,7 @@ async def delete_sub_equipment(
 # ============================================================================
 
 @router.get("/equipment-classes/")
-async def get_equipment_classes(
+def get_equipment_classes(
     is_active: Optional[bool] = Query(True),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -26,7 +26,8 @@ from app.models import (
     JournalEntry, JournalEntryLine, DefaultAccountMapping, FiscalPeriod, Account
 )
 from app.api.auth import get_current_user
-from app.services.journal_posting import JournalPostingService
+from app.services.journal_posting import JournalPostingService, generate_entry_number
+from app.services.sequences import next_number, max_suffix
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -112,21 +113,11 @@ class ThreeWayMatchResult(BaseModel):
 
 def generate_invoice_number(db: Session, company_id: int) -> str:
     """Generate unique supplier invoice number: SI-YYYY-NNNNN"""
-    year = datetime.now().year
-    prefix = f"SI-{year}-"
-
-    last_invoice = db.query(SupplierInvoice).filter(
-        SupplierInvoice.company_id == company_id,
-        SupplierInvoice.invoice_number.like(f"{prefix}%")
-    ).order_by(SupplierInvoice.invoice_number.desc()).first()
-
-    if last_invoice:
-        last_num = int(last_invoice.invoice_number.split('-')[-1])
-        new_num = last_num + 1
-    else:
-        new_num = 1
-
-    return f"{prefix}{new_num:05d}"
+    prefix = f"SI-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, SupplierInvoice.invoice_number, SupplierInvoice.company_id, company_id, prefix)
+    )
 
 
 def calculate_due_date(invoice_date: date, payment_terms_days: int) -> date:
@@ -271,21 +262,7 @@ class GRNIClearingService:
 
     def _generate_entry_number(self) -> str:
         """Generate unique journal entry number"""
-        year = datetime.now().year
-        prefix = f"JE-{year}-"
-
-        last_entry = self.db.query(JournalEntry).filter(
-            JournalEntry.company_id == self.company_id,
-            JournalEntry.entry_number.like(f"{prefix}%")
-        ).order_by(JournalEntry.entry_number.desc()).first()
-
-        if last_entry:
-            last_num = int(last_entry.entry_number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-
-        return f"{prefix}{new_num:06d}"
+        return generate_entry_number(self.db, self.company_id)
 
     def clear_grni(self, invoice: SupplierInvoice, grn: GoodsReceipt) -> Optional[JournalEntry]:
         """
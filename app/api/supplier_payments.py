@@ -25,6 +25,8 @@ from app.models import (
     AddressBook, JournalEntry, JournalEntryLine, DefaultAccountMapping, FiscalPeriod
 )
 from app.api.auth import get_current_user
+from app.services.journal_posting import generate_entry_number
+from app.services.sequences import next_number, max_suffix
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -68,21 +70,11 @@ class VoidPaymentRequest(BaseModel):
 
 def generate_payment_number(db: Session, company_id: int) -> str:
     """Generate unique payment number: PAY-YYYY-NNNNN"""
-    year = datetime.now().year
-    prefix = f"PAY-{year}-"
-
-    last_payment = db.query(SupplierPayment).filter(
-        SupplierPayment.company_id == company_id,
-        SupplierPayment.payment_number.like(f"{prefix}%")
-    ).order_by(SupplierPayment.payment_number.desc()).first()
-
-    if last_payment:
-        last_num = int(last_payment.payment_number.split('-')[-1])
-        new_num = last_num + 1
-    else:
-        new_num = 1
-
-    return f"{prefix}{new_num:05d}"
+    prefix = f"PAY-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, SupplierPayment.payment_number, SupplierPayment.company_id, company_id, prefix)
+    )
 
 
 def update_invoice_payment_status(db: Session, invoice: SupplierInvoice):
@@ -148,21 +140,7 @@ class PaymentPostingService:
 
     def _generate_entry_number(self) -> str:
         """Generate unique journal entry number"""
-        year = datetime.now().year
-        prefix = f"JE-{year}-"
-
-        last_entry = self.db.query(JournalEntry).filter(
-            JournalEntry.company_id == self.company_id,
-            JournalEntry.entry_number.like(f"{prefix}%")
-        ).order_by(JournalEntry.entry_number.desc()).first()
-
-        if last_entry:
-            last_num = int(last_entry.entry_number.split('-')[-1])
-            new_num = last_num + 1
-        else:
-            new_num = 1
-
-        return f"{prefix}{new_num:06d}"
+        return generate_entry_number(self.db, self.company_id)
 
     def post_payment(self, payment: SupplierPayment) -> Optional[JournalEntry]:
         """
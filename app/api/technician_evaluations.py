@@ -195,7 +195,7 @@ def evaluation_to_response(evaluation: TechnicianEvaluation) -> TechnicianEvalua
 # ============================================================================
 
 @router.get("/", response_model=List[TechnicianEvaluationResponse])
-async def get_technician_evaluations(
+def get_technician_evaluations(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     technician_id: Optional[int] = Query(None, description="Filter by technician"),
@@ -232,7 +232,7 @@ async def get_technician_evaluations(
 
 
 @router.get("/stats", response_model=EvaluationStatsResponse)
-async def get_evaluation_stats(
+def get_evaluation_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -284,7 +284,7 @@ async def get_evaluation_stats(
 
 
 @router.get("/{evaluation_id}", response_model=TechnicianEvaluationResponse)
-async def get_technician_evaluation(
+def get_technician_evaluation(
     evaluation_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -305,7 +305,7 @@ async def get_technician_evaluation(
 
 
 @router.post("/", response_model=TechnicianEvaluationResponse, status_code=status.HTTP_201_CREATED)
-async def create_technician_evaluation(
+def create_technician_evaluation(
     data: TechnicianEvaluationCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -387,7 +387,7 @@ async def create_technician_evaluation(
 
 
 @router.put("/{evaluation_id}", response_model=TechnicianEvaluationResponse)
-async def update_technician_evaluation(
+def update_technician_evaluation(
     evaluation_id: int,
     data: TechnicianEvaluationUpdate,
     current_user: User = Depends(get_current_user),
@@ -464,7 +464,7 @@ async def update_technician_evaluation(
 
 
 @router.post("/{evaluation_id}/submit", response_model=TechnicianEvaluationResponse)
-async def submit_evaluation(
+def submit_evaluation(
     evaluation_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -497,7 +497,7 @@ async def submit_evaluation(
 
 
 @router.post("/{evaluation_id}/acknowledge", response_model=TechnicianEvaluationResponse)
-async def acknowledge_evaluation(
+def acknowledge_evaluation(
     evaluation_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -531,7 +531,7 @@ async def acknowledge_evaluation(
 
 
 @router.post("/{evaluation_id}/finalize", response_model=TechnicianEvaluationResponse)
-async def finalize_evaluation(
+def finalize_evaluation(
     evaluation_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -563,7 +563,7 @@ async def finalize_evaluation(
 
 
 @router.delete("/{evaluation_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_technician_evaluation(
+def delete_technician_evaluation(
     evaluation_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -588,7 +588,7 @@ async def delete_technician_evaluation(
 
 
 @router.get("/technician/{technician_id}/history", response_model=List[TechnicianEvaluationResponse])
-async def get_technician_evaluation_history(
+def get_technician_evaluation_history(
     technician_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1,39 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, constr
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import time
 from app.database import get_db
 from app.models import Technician, Site, TechnicianSiteShift, User, AddressBook
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 def require_admin(user: User = Depends(get_current_user)):
@@ -113,7 +90,7 @@ def shift_to_response(shift: TechnicianSiteShift) -> dict:
 # ==========================
 
 @router.get("/shifts/")
-async def get_shifts(
+def get_shifts(
     site_id: Optional[int] = None,
     technician_id: Optional[int] = None,
     user: User = Depends(get_current_user),
@@ -147,7 +124,7 @@ async def get_shifts(
 
 
 @router.post("/shifts/")
-async def create_shift(
+def create_shift(
     data: ShiftCreate,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -219,7 +196,7 @@ async def create_shift(
         )
 
 @router.put("/shifts/{shift_id}")
-async def update_shift(
+def update_shift(
     shift_id: int,
     data: ShiftUpdate,
     user: User = Depends(require_admin),
@@ -252,7 +229,7 @@ async def update_shift(
 
 
 @router.delete("/shifts/{shift_id}")
-async def delete_shift(
+def delete_shift(
     shift_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
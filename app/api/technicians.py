@@ -5,7 +5,6 @@ Technicians have been migrated to AddressBook with search_type='E' (Employee).
 This module provides backward-compatible endpoints that the Work Orders UI uses.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_, func
 from typing import Optional, List
@@ -13,14 +12,13 @@ from decimal import Decimal
 from datetime import datetime
 from app.database import get_db
 from app.models import Technician, User, AddressBook
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 from pydantic import BaseModel
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
 
 
 # ============================================================================
@@ -73,28 +71,6 @@ class TechnicianHourlyCost(BaseModel):
 # Auth Helpers
 # ============================================================================
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
-
-
 def require_admin(user: User = Depends(get_current_user)):
     """Require admin role"""
     if user.role != "admin":
@@ -129,7 +105,7 @@ def employee_to_technician(ab: AddressBook) -> dict:
 # ============================================================================
 
 @router.get("/technicians/", response_model=List[TechnicianResponse])
-async def get_technicians(
+def get_technicians(
     include_inactive: bool = Query(False, description="Include inactive technicians"),
     search: Optional[str] = Query(None, description="Search by name, email, or employee ID"),
     specialization: Optional[str] = Query(None, description="Filter by specialization"),
@@ -173,7 +149,7 @@ async def get_technicians(
 
 
 @router.get("/technicians/specializations", response_model=List[str])
-async def get_technician_specializations(
+def get_technician_specializations(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -192,7 +168,7 @@ async def get_technician_specializations(
 
 
 @router.get("/technicians/{technician_id}", response_model=TechnicianResponse)
-async def get_technician(
+def get_technician(
     technician_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -215,7 +191,7 @@ async def get_technician(
 
 
 @router.post("/technicians/", response_model=TechnicianResponse)
-async def create_technician(
+def create_technician(
     data: TechnicianCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -253,7 +229,7 @@ async def create_technician(
 
 
 @router.put("/technicians/{technician_id}", response_model=TechnicianResponse)
-async def update_technician(
+def update_technician(
     technician_id: int,
     data: TechnicianUpdate,
     db: Session = Depends(get_db),
@@ -296,7 +272,7 @@ async def update_technician(
 
 
 @router.delete("/technicians/{technician_id}")
-async def delete_technician(
+def delete_technician(
     technician_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -322,7 +298,7 @@ async def delete_technician(
 
 
 @router.patch("/technicians/{technician_id}/toggle-status", response_model=TechnicianResponse)
-async def toggle_technician_status(
+def toggle_technician_status(
     technician_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_admin)
@@ -354,7 +330,7 @@ async def toggle_technician_status(
 # ============================================================================
 
 @router.get("/technicians/{technician_id}/salary", response_model=TechnicianResponse)
-async def get_technician_salary(
+def get_technician_salary(
     technician_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -376,7 +352,7 @@ async def get_technician_salary(
 
 
 @router.get("/technicians/salary/all", response_model=List[TechnicianResponse])
-async def get_all_technicians_with_salary(
+def get_all_technicians_with_salary(
     include_inactive: bool = Query(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -398,7 +374,7 @@ async def get_all_technicians_with_salary(
 
 
 @router.get("/technicians/{technician_id}/hourly-cost", response_model=TechnicianHourlyCost)
-async def get_technician_hourly_cost(
+def get_technician_hourly_cost(
     technician_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
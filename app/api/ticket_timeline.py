@@ -221,7 +221,7 @@ def get_work_order_activities(db: Session, work_order: WorkOrder) -> List[dict]:
 
 
 @router.get("/{ticket_id}/timeline", response_model=TicketTimeline)
-async def get_ticket_timeline(
+def get_ticket_timeline(
     ticket_id: int,
     include_wo_activities: bool = True,
     db: Session = Depends(get_db),
@@ -299,7 +299,7 @@ async def get_ticket_timeline(
 
 
 @router.post("/{ticket_id}/notes", status_code=status.HTTP_201_CREATED)
-async def add_ticket_note(
+def add_ticket_note(
     ticket_id: int,
     note_data: TicketNoteCreate,
     db: Session = Depends(get_db),
@@ -336,7 +336,7 @@ async def add_ticket_note(
 
 
 @router.put("/{ticket_id}/notes/{note_id}")
-async def update_ticket_note(
+def update_ticket_note(
     ticket_id: int,
     note_id: int,
     note_data: TicketNoteUpdate,
@@ -372,7 +372,7 @@ async def update_ticket_note(
 
 
 @router.delete("/{ticket_id}/notes/{note_id}")
-async def delete_ticket_note(
+def delete_ticket_note(
     ticket_id: int,
     note_id: int,
     db: Session = Depends(get_db),
@@ -20,34 +20,21 @@ from app.schemas import (
 from app.schemas import CancelTicketRequest
 from app.api.auth import get_current_user
 from app.services.dependency import require_permission
+from app.services.sequences import next_number, max_suffix
 
 router = APIRouter(prefix="/tickets", tags=["Tickets"])
 
 def generate_ticket_number(db: Session, company_id: int) -> str:
     """Generate a unique ticket number in format TKT-YYYYMMDD-XXXX"""
-    today = datetime.now().strftime("%Y%m%d")
-    prefix = f"TKT-{today}-"
-
-    # Find the latest ticket number for today
-    latest = db.query(Ticket).filter(
-        Ticket.company_id == company_id,
-        Ticket.ticket_number.like(f"{prefix}%")
-    ).order_by(desc(Ticket.ticket_number)).first()
-
-    if latest:
-        try:
-            last_num = int(latest.ticket_number.split("-")[-1])
-            new_num = last_num + 1
-        except ValueError:
-            new_num = 1
-    else:
-        new_num = 1
-
-    return f"{prefix}{new_num:04d}"
+    prefix = f"TKT-{datetime.now().strftime('%Y%m%d')}-"
+    return next_number(
+        db, company_id, prefix, width=4,
+        seed=lambda: max_suffix(db, Ticket.ticket_number, Ticket.company_id, company_id, prefix)
+    )
 
 
 @router.get("/", response_model=TicketList)
-async def list_tickets(
+def list_tickets(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     status: Optional[str] = None,
@@ -101,7 +88,7 @@ async def list_tickets(
 
 
 @router.get("/my-tickets", response_model=TicketList)
-async def list_my_tickets(
+def list_my_tickets(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
     status: Optional[str] = None,
@@ -137,7 +124,7 @@ async def list_my_tickets(
 
 
 @router.get("/stats")
-async def get_ticket_stats(
+def get_ticket_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -170,7 +157,7 @@ async def get_ticket_stats(
 
 
 @router.get("/{ticket_id}", response_model=TicketSchema)
-async def get_ticket(
+def get_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -193,7 +180,7 @@ async def get_ticket(
 
 
 @router.post("/", response_model=TicketSchema)
-async def create_ticket(
+def create_ticket(
     ticket_data: TicketCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -279,7 +266,7 @@ async def create_ticket(
 
 
 @router.put("/{ticket_id}", response_model=TicketSchema)
-async def update_ticket(
+def update_ticket(
     ticket_id: int,
     ticket_data: TicketUpdate,
     db: Session = Depends(get_db),
@@ -331,7 +318,7 @@ async def update_ticket(
 
 
 @router.put("/{ticket_id}/status", response_model=TicketSchema)
-async def update_ticket_status(
+def update_ticket_status(
     ticket_id: int,
     status_data: TicketStatusUpdate,
     db: Session = Depends(get_db),
@@ -390,7 +377,7 @@ async def update_ticket_status(
 
 
 @router.post("/{ticket_id}/convert", response_model=TicketSchema)
-async def convert_ticket_to_work_order(
+def convert_ticket_to_work_order(
     ticket_id: int,
     convert_data: TicketConvertToWorkOrder,
     db: Session = Depends(get_db),
@@ -420,21 +407,10 @@ async def convert_ticket_to_work_order(
     # Generate work order number
     today = datetime.now().strftime("%Y%m%d")
     wo_prefix = f"WO-{today}-"
-    latest_wo = db.query(WorkOrder).filter(
-        WorkOrder.company_id == current_user.company_id,
-        WorkOrder.wo_number.like(f"{wo_prefix}%")
-    ).order_by(desc(WorkOrder.wo_number)).first()
-
-    if latest_wo:
-        try:
-            last_num = int(latest_wo.wo_number.split("-")[-1])
-            wo_num = last_num + 1
-        except ValueError:
-            wo_num = 1
-    else:
-        wo_num = 1
-
-    wo_number = f"{wo_prefix}{wo_num:04d}"
+    wo_number = next_number(
+        db, current_user.company_id, wo_prefix, width=4,
+        seed=lambda: max_suffix(db, WorkOrder.wo_number, WorkOrder.company_id, current_user.company_id, wo_prefix)
+    )
 
     # Create work order
     work_order = WorkOrder(
@@ -497,7 +473,7 @@ async def convert_ticket_to_work_order(
 
 
 @router.delete("/{ticket_id}")
-async def delete_ticket(
+def delete_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -524,7 +500,7 @@ async def delete_ticket(
     return {"message": "Ticket deleted successfully"}
 
 @router.post("/{ticket_id}/cancel")
-async def cancel_ticket(
+def cancel_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
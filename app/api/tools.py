@@ -10,7 +10,7 @@ Features:
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, desc
+from sqlalchemy import func, and_
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime, date
@@ -24,6 +24,8 @@ from app.models import (
     JournalEntry, JournalEntryLine, FiscalPeriod
 )
 from app.api.auth import get_current_user
+from app.services.sequences import next_number, max_suffix
+from app.services.journal_posting import generate_entry_number
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -129,46 +131,20 @@ class ToolPurchaseUpdateInput(BaseModel):
 
 def generate_tool_number(db: Session, company_id: int) -> str:
     """Generate unique tool number: TL-YYYY-NNNNN"""
-    year = datetime.now().year
-    prefix = f"TL-{year}-"
-
-    last_tool = db.query(Tool).filter(
-        Tool.company_id == company_id,
-        Tool.tool_number.like(f"{prefix}%")
-    ).order_by(Tool.id.desc()).first()
-
-    if last_tool:
-        try:
-            last_num = int(last_tool.tool_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:05d}"
+    prefix = f"TL-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, Tool.tool_number, Tool.company_id, company_id, prefix)
+    )
 
 
 def generate_purchase_number(db: Session, company_id: int) -> str:
     """Generate unique tool purchase number: TP-YYYY-NNNNN"""
-    year = datetime.now().year
-    prefix = f"TP-{year}-"
-
-    last_purchase = db.query(ToolPurchase).filter(
-        ToolPurchase.company_id == company_id,
-        ToolPurchase.purchase_number.like(f"{prefix}%")
-    ).order_by(ToolPurchase.id.desc()).first()
-
-    if last_purchase:
-        try:
-            last_num = int(last_purchase.purchase_number.split("-")[-1])
-            next_num = last_num + 1
-        except (ValueError, IndexError):
-            next_num = 1
-    else:
-        next_num = 1
-
-    return f"{prefix}{next_num:05d}"
+    prefix = f"TP-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, ToolPurchase.purchase_number, ToolPurchase.company_id, company_id, prefix)
+    )
 
 
 def validate_single_assignment(
@@ -296,7 +272,7 @@ def purchase_to_response(purchase: ToolPurchase, include_lines: bool = True) ->
 # =============================================================================
 
 @router.get("/tool-categories", response_model=List[dict])
-async def list_tool_categories(
+def list_tool_categories(
     asset_type: Optional[str] = None,
     is_active: bool = True,
     current_user: User = Depends(get_current_user),
@@ -338,7 +314,7 @@ async def list_tool_categories(
 
 
 @router.post("/tool-categories", response_model=dict)
-async def create_tool_category(
+def create_tool_category(
     data: ToolCategoryCreateInput,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -391,7 +367,7 @@ async def create_tool_category(
 
 
 @router.get("/tool-categories/{category_id}", response_model=dict)
-async def get_tool_category(
+def get_tool_category(
     category_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -424,7 +400,7 @@ async def get_tool_category(
 
 
 @router.put("/tool-categories/{category_id}", response_model=dict)
-async def update_tool_category(
+def update_tool_category(
     category_id: int,
     data: ToolCategoryUpdateInput,
     current_user: User = Depends(get_current_user),
@@ -483,7 +459,7 @@ async def update_tool_category(
 
 
 @router.delete("/tool-categories/{category_id}")
-async def delete_tool_category(
+def delete_tool_category(
     category_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -522,7 +498,7 @@ async def delete_tool_category(
 # =============================================================================
 
 @router.get("/tools", response_model=List[dict])
-async def list_tools(
+def list_tools(
     category_id: Optional[int] = None,
     status: Optional[str] = None,
     condition: Optional[str] = None,
@@ -577,7 +553,7 @@ async def list_tools(
 
 
 @router.post("/tools", response_model=dict)
-async def create_tool(
+def create_tool(
     data: ToolCreateInput,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -681,7 +657,7 @@ async def create_tool(
 
 
 @router.get("/tools/{tool_id}", response_model=dict)
-async def get_tool(
+def get_tool(
     tool_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -706,7 +682,7 @@ async def get_tool(
 
 
 @router.put("/tools/{tool_id}", response_model=dict)
-async def update_tool(
+def update_tool(
     tool_id: int,
     data: ToolUpdateInput,
     current_user: User = Depends(get_current_user),
@@ -770,7 +746,7 @@ async def update_tool(
 
 
 @router.post("/tools/{tool_id}/allocate", response_model=dict)
-async def allocate_tool(
+def allocate_tool(
     tool_id: int,
     data: ToolAllocationInput,
     current_user: User = Depends(get_current_user),
@@ -881,7 +857,7 @@ async def allocate_tool(
 
 
 @router.get("/tools/{tool_id}/history", response_model=List[dict])
-async def get_tool_allocation_history(
+def get_tool_allocation_history(
     tool_id: int,
     limit: int = Query(50, le=200),
     current_user: User = Depends(get_current_user),
@@ -935,7 +911,7 @@ async def get_tool_allocation_history(
 
 
 @router.delete("/tools/{tool_id}")
-async def delete_tool(
+def delete_tool(
     tool_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -985,7 +961,7 @@ class ToolPurchaseInput(BaseModel):
 
 
 @router.get("/tool-purchases", response_model=List[dict])
-async def list_tool_purchases(
+def list_tool_purchases(
     status: Optional[str] = None,
     vendor_id: Optional[int] = None,
     start_date: Optional[date] = None,
@@ -1019,7 +995,7 @@ async def list_tool_purchases(
 
 
 @router.post("/tool-purchases", response_model=dict)
-async def create_tool_purchase(
+def create_tool_purchase(
     data: ToolPurchaseInput,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1117,7 +1093,7 @@ async def create_tool_purchase(
 
 
 @router.get("/tool-purchases/{purchase_id}", response_model=dict)
-async def get_tool_purchase(
+def get_tool_purchase(
     purchase_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1141,7 +1117,7 @@ async def get_tool_purchase(
 
 
 @router.put("/tool-purchases/{purchase_id}", response_model=dict)
-async def update_tool_purchase(
+def update_tool_purchase(
     purchase_id: int,
     data: ToolPurchaseUpdateInput,
     current_user: User = Depends(get_current_user),
@@ -1191,7 +1167,7 @@ async def update_tool_purchase(
 
 
 @router.delete("/tool-purchases/{purchase_id}")
-async def delete_tool_purchase(
+def delete_tool_purchase(
     purchase_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1217,7 +1193,7 @@ async def delete_tool_purchase(
 
 
 @router.post("/tool-purchases/{purchase_id}/lines", response_model=dict)
-async def add_purchase_line(
+def add_purchase_line(
     purchase_id: int,
     line: ToolPurchaseLineInput,
     current_user: User = Depends(get_current_user),
@@ -1286,7 +1262,7 @@ async def add_purchase_line(
 
 
 @router.delete("/tool-purchases/{purchase_id}/lines/{line_id}")
-async def delete_purchase_line(
+def delete_purchase_line(
     purchase_id: int,
     line_id: int,
     current_user: User = Depends(get_current_user),
@@ -1324,7 +1300,7 @@ async def delete_purchase_line(
 
 
 @router.post("/tool-purchases/{purchase_id}/approve", response_model=dict)
-async def approve_tool_purchase(
+def approve_tool_purchase(
     purchase_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1360,7 +1336,7 @@ async def approve_tool_purchase(
 
 
 @router.post("/tool-purchases/{purchase_id}/receive", response_model=dict)
-async def receive_tool_purchase(
+def receive_tool_purchase(
     purchase_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1481,7 +1457,7 @@ async def receive_tool_purchase(
 
 
 @router.post("/tool-purchases/{purchase_id}/cancel", response_model=dict)
-async def cancel_tool_purchase(
+def cancel_tool_purchase(
     purchase_id: int,
     reason: Optional[str] = None,
     current_user: User = Depends(get_current_user),
@@ -1556,23 +1532,7 @@ def create_tool_purchase_journal_entry(
             return None
 
         # Generate entry number
-        year = datetime.now().year
-        prefix = f"JE-{year}-"
-        last_entry = db.query(JournalEntry).filter(
-            JournalEntry.company_id == company_id,
-            JournalEntry.entry_number.like(f"{prefix}%")
-        ).order_by(desc(JournalEntry.entry_number)).first()
-
-        if last_entry:
-            try:
-                last_num = int(last_entry.entry_number.split("-")[-1])
-                next_num = last_num + 1
-            except (ValueError, IndexError):
-                next_num = 1
-        else:
-            next_num = 1
-
-        entry_number = f"{prefix}{next_num:06d}"
+        entry_number = generate_entry_number(db, company_id)
 
         # Get fiscal period
         fiscal_period = db.query(FiscalPeriod).filter(
@@ -1708,7 +1668,7 @@ def create_tool_purchase_journal_entry(
 # =============================================================================
 
 @router.post("/tools/depreciation/calculate", response_model=dict)
-async def calculate_depreciation(
+def calculate_depreciation(
     as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1801,7 +1761,7 @@ async def calculate_depreciation(
 
 
 @router.post("/tools/depreciation/run", response_model=dict)
-async def run_depreciation(
+def run_depreciation(
     as_of_date: Optional[date] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1817,7 +1777,7 @@ async def run_depreciation(
         as_of_date = date.today()
 
     # First calculate depreciation
-    calc_result = await calculate_depreciation(as_of_date, current_user, db)
+    calc_result = calculate_depreciation(as_of_date, current_user, db)
 
     if calc_result["tools_count"] == 0:
         return {
@@ -1882,23 +1842,7 @@ def create_depreciation_journal_entry(
     """
     try:
         # Generate entry number
-        year = datetime.now().year
-        prefix = f"JE-{year}-"
-        last_entry = db.query(JournalEntry).filter(
-            JournalEntry.company_id == company_id,
-            JournalEntry.entry_number.like(f"{prefix}%")
-        ).order_by(desc(JournalEntry.entry_number)).first()
-
-        if last_entry:
-            try:
-                last_num = int(last_entry.entry_number.split("-")[-1])
-                next_num = last_num + 1
-            except (ValueError, IndexError):
-                next_num = 1
-        else:
-            next_num = 1
-
-        entry_number = f"{prefix}{next_num:06d}"
+        entry_number = generate_entry_number(db, company_id)
 
         # Get fiscal period
         fiscal_period = db.query(FiscalPeriod).filter(
@@ -1,40 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import datetime
 from app.database import get_db
 from app.models import UpgradeRequest, User, Company, Plan
-from app.utils.security import verify_token
+from app.services.dependency import get_current_user
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-security = HTTPBearer()
-
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 
 # Request/Response models
@@ -94,7 +70,7 @@ class SubscriptionInfoResponse(BaseModel):
 
 
 @router.get("/upgrade/info", response_model=SubscriptionInfoResponse)
-async def get_upgrade_info(
+def get_upgrade_info(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -188,7 +164,7 @@ async def get_upgrade_info(
 
 
 @router.post("/upgrade/request", response_model=UpgradeRequestResponse)
-async def create_upgrade_request(
+def create_upgrade_request(
     data: UpgradeRequestCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -262,7 +238,7 @@ async def create_upgrade_request(
 
 
 @router.get("/upgrade/requests", response_model=List[UpgradeRequestResponse])
-async def get_my_upgrade_requests(
+def get_my_upgrade_requests(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -300,7 +276,7 @@ async def get_my_upgrade_requests(
 
 
 @router.delete("/upgrade/request/{request_id}")
-async def cancel_upgrade_request(
+def cancel_upgrade_request(
     request_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
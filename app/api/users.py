@@ -2,7 +2,6 @@
 User Management API - for managing company users
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional, List
@@ -11,33 +10,12 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.database import get_db
 from app.models import User, Client, Site, ExternalUserClient, Warehouse, Role
-from app.utils.security import get_password_hash, verify_token
+from app.utils.security import get_password_hash
+from app.services.dependency import get_current_user
 from app.utils.limits import check_user_limit, enforce_user_limit
 from app.services.dependency import require_permission
 
 router = APIRouter()
-security = HTTPBearer()
-
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user
 
 def validate_role_for_company(role_id: int, company_id: int, db: Session) -> Role:
     """
@@ -123,7 +101,7 @@ def require_admin(user: User = Depends(get_current_user)) -> User:
 
 
 @router.get("/users/", response_model=List[UserResponse])
-async def get_users(
+def get_users(
     include_inactive: bool = False,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -139,7 +117,7 @@ async def get_users(
 
 
 @router.get("/users/limit-info")
-async def get_user_limit_info(
+def get_user_limit_info(
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
@@ -149,7 +127,7 @@ async def get_user_limit_info(
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user(
+def get_user(
     user_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -167,7 +145,7 @@ async def get_user(
 
 
 @router.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(
+def create_user(
     data: UserCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -268,7 +246,7 @@ async def create_user(
         raise HTTPException(status_code=500, detail="Failed to create user")
 
 @router.put("/users/{user_id}", response_model=UserResponse)
-async def update_user(
+def update_user(
     user_id: int,
     data: UserUpdate,
     user: User = Depends(get_current_user),
@@ -339,7 +317,7 @@ async def update_user(
 
 
 @router.post("/users/{user_id}/reset-password")
-async def reset_user_password(
+def reset_user_password(
     user_id: int,
     new_password: str,
     user: User = Depends(require_admin),
@@ -367,7 +345,7 @@ async def reset_user_password(
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     user: User = Depends(require_admin),
     db: Session = Depends(get_db)
@@ -91,7 +91,7 @@ def warehouse_to_response(warehouse: Warehouse) -> WarehouseResponse:
 
 
 @router.get("/warehouses", response_model=List[WarehouseResponse])
-async def get_warehouses(
+def get_warehouses(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     include_inactive: bool = Query(False, description="Include inactive warehouses"),
@@ -127,7 +127,7 @@ async def get_warehouses(
 
 
 @router.get("/warehouses/{warehouse_id}", response_model=WarehouseResponse)
-async def get_warehouse(
+def get_warehouse(
     warehouse_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -148,7 +148,7 @@ async def get_warehouse(
 
 
 @router.post("/warehouses", response_model=WarehouseResponse, status_code=status.HTTP_201_CREATED)
-async def create_warehouse(
+def create_warehouse(
     warehouse_data: WarehouseCreate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -209,7 +209,7 @@ async def create_warehouse(
 
 
 @router.put("/warehouses/{warehouse_id}", response_model=WarehouseResponse)
-async def update_warehouse(
+def update_warehouse(
     warehouse_id: int,
     warehouse_data: WarehouseUpdate,
     current_user: User = Depends(get_current_user),
@@ -273,7 +273,7 @@ async def update_warehouse(
 
 
 @router.patch("/warehouses/{warehouse_id}/toggle-status", response_model=WarehouseResponse)
-async def toggle_warehouse_status(
+def toggle_warehouse_status(
     warehouse_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -298,7 +298,7 @@ async def toggle_warehouse_status(
 
 
 @router.patch("/warehouses/{warehouse_id}/set-main", response_model=WarehouseResponse)
-async def set_main_warehouse(
+def set_main_warehouse(
     warehouse_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -336,7 +336,7 @@ async def set_main_warehouse(
 
 
 @router.get("/warehouses/main", response_model=Optional[WarehouseResponse])
-async def get_main_warehouse(
+def get_main_warehouse(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -354,7 +354,7 @@ async def get_main_warehouse(
 
 
 @router.delete("/warehouses/{warehouse_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_warehouse(
+def delete_warehouse(
     warehouse_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1,10 +1,10 @@
 """
 Work Orders API endpoints for maintenance management
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Request
 from fastapi.responses import Response, FileResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import and_, or_, func
 from pydantic import BaseModel
 from typing import Optional, List, Union
@@ -24,8 +24,11 @@ from app.models import (
     CalendarSlot, WorkOrderSlotAssignment
 )
 from app.services.journal_posting import JournalPostingService
-from app.api.auth import verify_token
+from app.services.sequences import next_number, reserve_numbers, max_suffix
+from app.utils.pagination import keyset_paginate, NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
 from app.utils.security import verify_token as verify_token_raw
+from app.services.auth_context import get_auth_context
+from app.services.dependency import get_current_user
 from jose import jwt
 from app.config import settings
 
@@ -57,6 +60,7 @@ def verify_token_payload(token: str) -> Optional[dict]:
 
 
 def get_current_user_or_hhd(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -65,7 +69,9 @@ def get_current_user_or_hhd(
     Returns User object for admin tokens, or HHDContext for mobile tokens.
     """
     token = credentials.credentials
-    payload = verify_token_payload(token)
+    # Decoded once per request and shared with the middlewares
+    auth = get_auth_context(request, token)
+    payload = auth.payload
 
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
@@ -99,7 +105,7 @@ def get_current_user_or_hhd(
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = auth.user
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
@@ -188,17 +194,6 @@ class TimeEntryUpdate(BaseModel):
 
 # ============ Dependencies ============
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    token = credentials.credentials
-    email = verify_token(token)
-    if not email:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
-
 def require_admin_or_accounting(user: User = Depends(get_current_user)):
     if user.role not in ["admin", "accounting"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin or accounting access required")
@@ -217,25 +212,16 @@ def decimal_to_float(val):
 
 def generate_wo_number(db: Session, company_id: int) -> str:
     """Generate unique work order number"""
-    year = datetime.now().year
-    prefix = f"WO-{year}-"
-
-    # Get the last WO number for this company this year
-    last_wo = db.query(WorkOrder).filter(
-        WorkOrder.company_id == company_id,
-        WorkOrder.wo_number.like(f"{prefix}%")
-    ).order_by(WorkOrder.id.desc()).first()
+    return reserve_wo_numbers(db, company_id, 1)[0]
 
-    if last_wo:
-        try:
-            last_num = int(last_wo.wo_number.split("-")[-1])
-            new_num = last_num + 1
-        except:
-            new_num = 1
-    else:
-        new_num = 1
 
-    return f"{prefix}{new_num:05d}"
+def reserve_wo_numbers(db: Session, company_id: int, count: int) -> List[str]:
+    """Reserve count consecutive work order numbers (WO-YYYY-NNNNN) in one round-trip"""
+    prefix = f"WO-{datetime.now().year}-"
+    return reserve_numbers(
+        db, company_id, prefix, count, width=5,
+        seed=lambda: max_suffix(db, WorkOrder.wo_number, WorkOrder.company_id, company_id, prefix)
+    )
 
 
 def calculate_labor_cost(db: Session, work_order: WorkOrder) -> dict:
@@ -533,8 +519,39 @@ def work_order_to_response(wo: WorkOrder, include_details: bool = False, db: Ses
 
 # ============ Work Order Endpoints ============
 
+# Columns of the lightweight list projection (view=summary)
+WORK_ORDER_SUMMARY_COLUMNS = (
+    WorkOrder.id, WorkOrder.wo_number, WorkOrder.title, WorkOrder.work_order_type,
+    WorkOrder.priority, WorkOrder.status, WorkOrder.equipment_id, WorkOrder.site_id,
+    WorkOrder.project_id, WorkOrder.assigned_hhd_id, WorkOrder.scheduled_start,
+    WorkOrder.scheduled_end, WorkOrder.is_billable, WorkOrder.created_at, WorkOrder.updated_at,
+)
+
+
+def work_order_to_summary(row) -> dict:
+    """Convert a WORK_ORDER_SUMMARY_COLUMNS row to the list-view response dict"""
+    return {
+        "id": row.id,
+        "wo_number": row.wo_number,
+        "title": row.title,
+        "work_order_type": row.work_order_type,
+        "priority": row.priority,
+        "status": row.status,
+        "equipment_id": row.equipment_id,
+        "site_id": row.site_id,
+        "project_id": row.project_id,
+        "assigned_hhd_id": row.assigned_hhd_id,
+        "scheduled_start": row.scheduled_start.isoformat() if row.scheduled_start else None,
+        "scheduled_end": row.scheduled_end.isoformat() if row.scheduled_end else None,
+        "is_billable": row.is_billable,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
 @router.get("/work-orders/")
-async def get_work_orders(
+def get_work_orders(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
     work_order_type: Optional[str] = Query(None, description="Filter by type"),
     priority: Optional[str] = Query(None, description="Filter by priority"),
@@ -545,12 +562,21 @@ async def get_work_orders(
     is_billable: Optional[bool] = Query(None, description="Filter by billable status"),
     search: Optional[str] = Query(None, description="Search in WO number and title"),
     include_details: bool = Query(False, description="Include full details (technicians, time entries, etc.)"),
+    view: str = Query("full", pattern="^(full|summary)$", description="'summary' returns the lightweight list projection"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    limit: int = Query(settings.work_orders_page_size, ge=1, le=settings.work_orders_max_page_size, description="Page size"),
+    include_total: bool = Query(False, description="Return the total match count in X-Total-Count (extra COUNT query)"),
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
 ):
-    """Get all work orders for the company (supports both admin and HHD authentication)"""
+    """
+    Get the company's work orders, newest first (supports both admin and HHD authentication).
+
+    Keyset paginated: the next page is requested with the X-Next-Cursor response
+    header, which is absent on the last page (see app/utils/pagination.py).
+    """
     if not auth_context.company_id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No company associated")
+        raise HTTPException(status_code=404, detail="No company associated")
 
     # For HHD authentication, force filter by assigned HHD
     if isinstance(auth_context, HHDContext):
@@ -558,24 +584,6 @@ async def get_work_orders(
 
     query = db.query(WorkOrder).filter(WorkOrder.company_id == auth_context.company_id)
 
-    # If include_details, eagerly load relationships
-    if include_details:
-        query = query.options(
-            joinedload(WorkOrder.equipment),
-            joinedload(WorkOrder.sub_equipment),
-            joinedload(WorkOrder.site),
-            joinedload(WorkOrder.branch),
-            joinedload(WorkOrder.floor),
-            joinedload(WorkOrder.room),
-            joinedload(WorkOrder.project),
-            joinedload(WorkOrder.assigned_hhd).joinedload(HandHeldDevice.assigned_technician),
-            joinedload(WorkOrder.assigned_technicians),
-            joinedload(WorkOrder.assigned_employees),
-            joinedload(WorkOrder.time_entries).joinedload(WorkOrderTimeEntry.technician),
-            joinedload(WorkOrder.time_entries).joinedload(WorkOrderTimeEntry.address_book),
-            joinedload(WorkOrder.checklist_items)
-        )
-
     if status:
         query = query.filter(WorkOrder.status == status)
     if work_order_type:
@@ -603,12 +611,50 @@ async def get_work_orders(
             )
         )
 
-    work_orders = query.order_by(WorkOrder.created_at.desc()).all()
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(query.order_by(None).count())
+
+    if view == "summary":
+        rows, next_cursor = keyset_paginate(
+            query.with_entities(*WORK_ORDER_SUMMARY_COLUMNS),
+            WorkOrder.created_at, WorkOrder.id, cursor, limit
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [work_order_to_summary(row) for row in rows]
+
+    # work_order_to_response reads these on every row; load them per page, not per row.
+    # Collections use selectinload so the LIMIT applies to work orders, not joined rows
+    query = query.options(
+        joinedload(WorkOrder.equipment),
+        joinedload(WorkOrder.sub_equipment),
+        joinedload(WorkOrder.site),
+        joinedload(WorkOrder.branch),
+        joinedload(WorkOrder.floor),
+        joinedload(WorkOrder.room),
+        joinedload(WorkOrder.project),
+        joinedload(WorkOrder.assigned_hhd).joinedload(HandHeldDevice.assigned_technician),
+        selectinload(WorkOrder.assigned_technicians),
+        selectinload(WorkOrder.assigned_employees),
+        selectinload(WorkOrder.checklist_items),
+    )
+    if include_details:
+        query = query.options(
+            selectinload(WorkOrder.time_entries).joinedload(WorkOrderTimeEntry.technician),
+            selectinload(WorkOrder.time_entries).joinedload(WorkOrderTimeEntry.address_book),
+            selectinload(WorkOrder.checklist_items).joinedload(WorkOrderChecklistItem.completer)
+        )
+    else:
+        query = query.options(selectinload(WorkOrder.time_entries))
+
+    work_orders, next_cursor = keyset_paginate(query, WorkOrder.created_at, WorkOrder.id, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [work_order_to_response(wo, include_details=include_details) for wo in work_orders]
 
 
 @router.get("/work-orders/{wo_id}")
-async def get_work_order(
+def get_work_order(
     wo_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -647,7 +693,7 @@ async def get_work_order(
 
 
 @router.post("/work-orders/")
-async def create_work_order(
+def create_work_order(
     data: WorkOrderCreate,
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -879,7 +925,7 @@ async def create_work_order(
 
 
 @router.put("/work-orders/{wo_id}")
-async def update_work_order(
+def update_work_order(
     wo_id: int,
     data: WorkOrderUpdate,
     auth_context = Depends(get_current_user_or_hhd),
@@ -1074,7 +1120,7 @@ async def update_work_order(
 
 
 @router.delete("/work-orders/{wo_id}")
-async def delete_work_order(
+def delete_work_order(
     wo_id: int,
     user: User = Depends(require_admin_or_accounting),
     db: Session = Depends(get_db)
@@ -1111,7 +1157,7 @@ async def delete_work_order(
 
 
 @router.post("/work-orders/{wo_id}/approve")
-async def approve_work_order(
+def approve_work_order(
     wo_id: int,
     user: User = Depends(require_admin_or_accounting),
     db: Session = Depends(get_db)
@@ -1290,7 +1336,7 @@ class CancelWorkOrderRequest(BaseModel):
 
 
 @router.post("/work-orders/{wo_id}/cancel")
-async def cancel_work_order(
+def cancel_work_order(
     wo_id: int,
     request: CancelWorkOrderRequest = None,
     user: User = Depends(get_current_user),
@@ -1469,7 +1515,7 @@ async def cancel_work_order(
 # ============ Technician Assignment Endpoints ============
 
 @router.post("/work-orders/{wo_id}/technicians/{technician_id}")
-async def assign_technician(
+def assign_technician(
     wo_id: int,
     technician_id: int,
     user: User = Depends(get_current_user),
@@ -1532,7 +1578,7 @@ async def assign_technician(
 
 
 @router.delete("/work-orders/{wo_id}/technicians/{technician_id}")
-async def unassign_technician(
+def unassign_technician(
     wo_id: int,
     technician_id: int,
     user: User = Depends(get_current_user),
@@ -1566,7 +1612,7 @@ async def unassign_technician(
 # ============ Employee Assignment Endpoints (AddressBook-based) ============
 
 @router.post("/work-orders/{wo_id}/employees/{address_book_id}")
-async def assign_employee(
+def assign_employee(
     wo_id: int,
     address_book_id: int,
     user: User = Depends(get_current_user),
@@ -1628,7 +1674,7 @@ async def assign_employee(
 
 
 @router.delete("/work-orders/{wo_id}/employees/{address_book_id}")
-async def unassign_employee(
+def unassign_employee(
     wo_id: int,
     address_book_id: int,
     user: User = Depends(get_current_user),
@@ -1659,7 +1705,7 @@ async def unassign_employee(
 
 
 @router.get("/work-orders/{wo_id}/employees")
-async def get_work_order_employees(
+def get_work_order_employees(
     wo_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -1708,7 +1754,7 @@ async def get_work_order_employees(
 
 
 @router.patch("/work-orders/{wo_id}/employees/{address_book_id}")
-async def update_employee_assignment(
+def update_employee_assignment(
     wo_id: int,
     address_book_id: int,
     hours_worked: Optional[float] = None,
@@ -1755,29 +1801,15 @@ async def update_employee_assignment(
 
 def generate_ledger_transaction_number(db: Session, company_id: int, prefix: str) -> str:
     """Generate unique transaction number for item ledger"""
-    year = datetime.now().year
-    month = datetime.now().month
-    full_prefix = f"{prefix}-{year}{month:02d}-"
-
-    last_entry = db.query(ItemLedger).filter(
-        ItemLedger.company_id == company_id,
-        ItemLedger.transaction_number.like(f"{full_prefix}%")
-    ).order_by(ItemLedger.id.desc()).first()
-
-    if last_entry:
-        try:
-            last_num = int(last_entry.transaction_number.split("-")[-1])
-            new_num = last_num + 1
-        except:
-            new_num = 1
-    else:
-        new_num = 1
-
-    return f"{full_prefix}{new_num:05d}"
+    full_prefix = f"{prefix}-{datetime.now().strftime('%Y%m')}-"
+    return next_number(
+        db, company_id, full_prefix, width=5,
+        seed=lambda: max_suffix(db, ItemLedger.transaction_number, ItemLedger.company_id, company_id, full_prefix)
+    )
 
 
 @router.post("/work-orders/{wo_id}/issue-item")
-async def issue_item_to_work_order(
+def issue_item_to_work_order(
     wo_id: int,
     data: WorkOrderItemIssue,
     auth_context = Depends(get_current_user_or_hhd),
@@ -1897,7 +1929,7 @@ async def issue_item_to_work_order(
 
 
 @router.post("/work-orders/{wo_id}/return-item")
-async def return_item_from_work_order(
+def return_item_from_work_order(
     wo_id: int,
     data: WorkOrderItemIssue,  # Reuse same schema
     user: User = Depends(get_current_user),
@@ -2016,7 +2048,7 @@ async def return_item_from_work_order(
 
 
 @router.get("/work-orders/{wo_id}/issued-items")
-async def get_work_order_issued_items(
+def get_work_order_issued_items(
     wo_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2065,7 +2097,7 @@ async def get_work_order_issued_items(
 # ============ Time Entry Endpoints ============
 
 @router.post("/work-orders/{wo_id}/time-entries")
-async def add_time_entry(
+def add_time_entry(
     wo_id: int,
     data: TimeEntryCreate,
     user: Union[User, HHDContext] = Depends(get_current_user_or_hhd),
@@ -2164,7 +2196,7 @@ async def add_time_entry(
 
 
 @router.put("/work-orders/{wo_id}/time-entries/{entry_id}")
-async def update_time_entry(
+def update_time_entry(
     wo_id: int,
     entry_id: int,
     data: TimeEntryUpdate,
@@ -2220,7 +2252,7 @@ async def update_time_entry(
 
 
 @router.delete("/work-orders/{wo_id}/time-entries/{entry_id}")
-async def delete_time_entry(
+def delete_time_entry(
     wo_id: int,
     entry_id: int,
     user: User = Depends(get_current_user),
@@ -2259,7 +2291,7 @@ async def delete_time_entry(
 # ============ Cost Calculation Endpoint ============
 
 @router.get("/work-orders/{wo_id}/calculate-costs")
-async def calculate_work_order_costs(
+def calculate_work_order_costs(
     wo_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2333,7 +2365,7 @@ class ChecklistItemUpdate(BaseModel):
 
 
 @router.get("/work-orders/{wo_id}/checklist")
-async def get_checklist_items(
+def get_checklist_items(
     wo_id: int,
     auth_context = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -2374,7 +2406,7 @@ async def get_checklist_items(
 
 
 @router.post("/work-orders/{wo_id}/checklist")
-async def add_checklist_item(
+def add_checklist_item(
     wo_id: int,
     data: ChecklistItemCreate,
     user: User = Depends(get_current_user),
@@ -2429,7 +2461,7 @@ async def add_checklist_item(
 
 
 @router.patch("/work-orders/{wo_id}/checklist/{item_id}")
-async def update_checklist_item(
+def update_checklist_item(
     wo_id: int,
     item_id: int,
     data: ChecklistItemUpdate,
@@ -2494,7 +2526,7 @@ async def update_checklist_item(
 
 
 @router.delete("/work-orders/{wo_id}/checklist/{item_id}")
-async def delete_checklist_item(
+def delete_checklist_item(
     wo_id: int,
     item_id: int,
     user: User = Depends(get_current_user),
@@ -2581,7 +2613,7 @@ class EmailWorkOrderRequest(BaseModel):
 
 
 @router.get("/work-orders/{wo_id}/export/pdf")
-async def export_work_order_pdf(
+def export_work_order_pdf(
     wo_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2686,7 +2718,7 @@ async def export_work_order_pdf(
 
 
 @router.post("/work-orders/{wo_id}/email")
-async def email_work_order(
+def email_work_order(
     wo_id: int,
     request: EmailWorkOrderRequest,
     user: User = Depends(get_current_user),
@@ -2827,7 +2859,7 @@ def snapshot_to_response(snapshot: WorkOrderSnapshot) -> dict:
 
 
 @router.get("/work-orders/{wo_id}/snapshots")
-async def get_work_order_snapshots(
+def get_work_order_snapshots(
     wo_id: int,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -2854,7 +2886,7 @@ async def get_work_order_snapshots(
 
 
 @router.post("/work-orders/{wo_id}/snapshots")
-async def upload_work_order_snapshot(
+def upload_work_order_snapshot(
     wo_id: int,
     file: UploadFile = File(...),
     caption: Optional[str] = Form(None),
@@ -2929,7 +2961,7 @@ async def upload_work_order_snapshot(
 
 
 @router.get("/work-orders/{wo_id}/snapshots/{snapshot_id}/image")
-async def get_snapshot_image(
+def get_snapshot_image(
     wo_id: int,
     snapshot_id: int,
     token: str = Query(...),
@@ -2975,7 +3007,7 @@ async def get_snapshot_image(
 
 
 @router.patch("/work-orders/{wo_id}/snapshots/{snapshot_id}")
-async def update_snapshot_caption(
+def update_snapshot_caption(
     wo_id: int,
     snapshot_id: int,
     caption: str = None,
@@ -3003,7 +3035,7 @@ async def update_snapshot_caption(
 
 
 @router.delete("/work-orders/{wo_id}/snapshots/{snapshot_id}")
-async def delete_work_order_snapshot(
+def delete_work_order_snapshot(
     wo_id: int,
     snapshot_id: int,
     user: User = Depends(get_current_user),
@@ -3081,7 +3113,7 @@ def completion_to_response(completion: WorkOrderCompletion) -> dict:
 
 
 @router.get("/work-orders/{wo_id}/completion")
-async def get_work_order_completion(
+def get_work_order_completion(
     wo_id: int,
     user = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -3108,7 +3140,7 @@ async def get_work_order_completion(
 
 
 @router.post("/work-orders/{wo_id}/completion")
-async def create_or_update_work_order_completion(
+def create_or_update_work_order_completion(
     wo_id: int,
     data: WorkOrderCompletionCreate,
     user = Depends(get_current_user_or_hhd),
@@ -3164,7 +3196,7 @@ async def create_or_update_work_order_completion(
 
 
 @router.post("/work-orders/{wo_id}/completion/signature")
-async def upload_work_order_signature(
+def upload_work_order_signature(
     wo_id: int,
     file: UploadFile = File(...),
     signed_by_name: Optional[str] = Form(None),
@@ -3254,7 +3286,7 @@ async def upload_work_order_signature(
 
 
 @router.get("/work-orders/{wo_id}/completion/signature/image")
-async def get_signature_image(
+def get_signature_image(
     wo_id: int,
     token: str = Query(...),
     db: Session = Depends(get_db)
@@ -3298,7 +3330,7 @@ async def get_signature_image(
 
 
 @router.delete("/work-orders/{wo_id}/completion")
-async def delete_work_order_completion(
+def delete_work_order_completion(
     wo_id: int,
     user = Depends(get_current_user_or_hhd),
     db: Session = Depends(get_db)
@@ -0,0 +1,282 @@
+"""
+One-shot Setup Tasks
+
+Schema creation, column migrations and their data backfills, permission
+seeding and the Gemini API key check. These used to run at import time of app/main.py, i.e. in every worker
+on every restart; they now run once per deploy:
+
+    python manage.py setup
+
+Concurrent runs (several containers starting a release at once) are
+serialized with a PostgreSQL advisory lock, and every step is idempotent.
+
+Usage:
+    from app.bootstrap import run_setup
+
+    run_setup()                 # create tables, migrate, seed permissions, check Gemini
+    run_setup(check_ai=False)
+"""
+import logging
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_xact_lock key shared by every process running the setup tasks
+SETUP_LOCK_ID = 73012024
+
+# Guards of the one-time data fixes below: the fix is skipped when the query returns a row
+ACCOUNT_BALANCE_KEY_EXISTS = "SELECT 1 FROM pg_indexes WHERE indexname = 'uq_account_balance_key'"
+ACCOUNT_CLOSURES_EXIST = "SELECT 1 FROM account_closures LIMIT 1"
+
+# Simple migrations for new columns: (table, column, sql). Every statement is idempotent.
+MIGRATIONS = [
+    # Add code column to clients table
+    ("clients", "code", "ALTER TABLE clients ADD COLUMN IF NOT EXISTS code VARCHAR"),
+    # Add mobile_pin column to handheld_devices table
+    ("handheld_devices", "mobile_pin", "ALTER TABLE handheld_devices ADD COLUMN IF NOT EXISTS mobile_pin VARCHAR"),
+    # Add primary_currency column to companies table
+    ("companies", "primary_currency", "ALTER TABLE companies ADD COLUMN IF NOT EXISTS primary_currency VARCHAR(3) DEFAULT 'USD'"),
+    # Business Unit implementation (JD Edwards concept)
+    ("warehouses", "business_unit_id", "ALTER TABLE warehouses ADD COLUMN IF NOT EXISTS business_unit_id INTEGER REFERENCES business_units(id)"),
+    ("journal_entry_lines", "business_unit_id", "ALTER TABLE journal_entry_lines ADD COLUMN IF NOT EXISTS business_unit_id INTEGER REFERENCES business_units(id)"),
+    ("account_balances", "business_unit_id", "ALTER TABLE account_balances ADD COLUMN IF NOT EXISTS business_unit_id INTEGER REFERENCES business_units(id)"),
+    ("item_ledger", "business_unit_id", "ALTER TABLE item_ledger ADD COLUMN IF NOT EXISTS business_unit_id INTEGER REFERENCES business_units(id)"),
+    # Address Book link for clients (master data management)
+    ("clients", "address_book_id", "ALTER TABLE clients ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    # Address Book vendor references (replacing legacy vendor_id)
+    ("processed_images", "address_book_id", "ALTER TABLE processed_images ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    ("purchase_requests", "address_book_id", "ALTER TABLE purchase_requests ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    ("purchase_orders", "address_book_id", "ALTER TABLE purchase_orders ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    ("item_master", "primary_address_book_id", "ALTER TABLE item_master ADD COLUMN IF NOT EXISTS primary_address_book_id INTEGER REFERENCES address_book(id)"),
+    ("item_aliases", "address_book_id", "ALTER TABLE item_aliases ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    ("tool_purchases", "address_book_id", "ALTER TABLE tool_purchases ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    ("tools", "vendor_address_book_id", "ALTER TABLE tools ADD COLUMN IF NOT EXISTS vendor_address_book_id INTEGER REFERENCES address_book(id)"),
+    ("goods_receipt_extra_costs", "address_book_id", "ALTER TABLE goods_receipt_extra_costs ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    ("journal_entry_lines", "address_book_id", "ALTER TABLE journal_entry_lines ADD COLUMN IF NOT EXISTS address_book_id INTEGER REFERENCES address_book(id)"),
+    # Petty cash vendor linking
+    ("petty_cash_transactions", "vendor_address_book_id", "ALTER TABLE petty_cash_transactions ADD COLUMN IF NOT EXISTS vendor_address_book_id INTEGER REFERENCES address_book(id)"),
+    # Make sites.client_id nullable (sites can now use address_book_id instead)
+    ("sites", "client_id_nullable", "ALTER TABLE sites ALTER COLUMN client_id DROP NOT NULL"),
+    # Migrate floors from branch_id to site_id (replacing Branch with Site for asset hierarchy)
+    ("floors", "site_id", "ALTER TABLE floors ADD COLUMN IF NOT EXISTS site_id INTEGER REFERENCES sites(id)"),
+    # Make condition_reports.client_id nullable (can now use address_book_id instead)
+    ("condition_reports", "client_id_nullable", "ALTER TABLE condition_reports ALTER COLUMN client_id DROP NOT NULL"),
+    # Client Portal: Add source and client_user_id to tickets table
+    ("tickets", "source", "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS source VARCHAR(50) DEFAULT 'admin_portal'"),
+    ("tickets", "client_user_id", "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS client_user_id INTEGER REFERENCES client_users(id)"),
+    ("tickets", "service_id", "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS service_id INTEGER REFERENCES services(id)"),
+    # Client Portal: Make tickets.requested_by nullable (for client portal submissions)
+    ("tickets", "requested_by_nullable", "ALTER TABLE tickets ALTER COLUMN requested_by DROP NOT NULL"),
+    # FCM Push Notifications
+    ("handheld_devices", "fcm_token", "ALTER TABLE handheld_devices ADD COLUMN IF NOT EXISTS fcm_token VARCHAR"),
+    ("handheld_devices", "fcm_token_updated_at", "ALTER TABLE handheld_devices ADD COLUMN IF NOT EXISTS fcm_token_updated_at TIMESTAMP"),
+    # Company code for mobile app login
+    ("companies", "company_code", "ALTER TABLE companies ADD COLUMN IF NOT EXISTS company_code VARCHAR UNIQUE"),
+    # Role-based access control: Add role_id to users table
+    ("users", "role_id", "ALTER TABLE users ADD COLUMN IF NOT EXISTS role_id INTEGER"),
+    # Background document processing queue
+    ("processed_images", "processing_attempts", "ALTER TABLE processed_images ADD COLUMN IF NOT EXISTS processing_attempts INTEGER DEFAULT 0"),
+    ("processed_images", "processing_error", "ALTER TABLE processed_images ADD COLUMN IF NOT EXISTS processing_error TEXT"),
+    # Indexed duplicate-invoice detection (backfilled by backfill_invoice_duplicate_keys)
+    ("processed_images", "invoice_number_normalized", "ALTER TABLE processed_images ADD COLUMN IF NOT EXISTS invoice_number_normalized VARCHAR"),
+    ("processed_images", "supplier_name_normalized", "ALTER TABLE processed_images ADD COLUMN IF NOT EXISTS supplier_name_normalized VARCHAR"),
+    ("processed_images", "ix_processed_images_duplicate_keys", "CREATE INDEX IF NOT EXISTS ix_processed_images_duplicate_keys ON processed_images (invoice_number_normalized, supplier_name_normalized)"),
+    # Keyset pagination of GET /work-orders/
+    ("work_orders", "ix_work_orders_company_created", "CREATE INDEX IF NOT EXISTS ix_work_orders_company_created ON work_orders (company_id, created_at, id)"),
+    # AccountBalance upsert key (NULL business unit / site compare equal). Rows that were
+    # duplicated by concurrent postings are merged into the oldest one first (once: until the key exists)
+    ("account_balances", "merge_duplicates", """
+        UPDATE account_balances ab SET
+            period_debit = d.period_debit,
+            period_credit = d.period_credit,
+            closing_balance = ab.opening_balance + d.activity
+        FROM (
+            SELECT MIN(id) AS keep_id, SUM(period_debit) AS period_debit, SUM(period_credit) AS period_credit,
+                   SUM(COALESCE(closing_balance, 0) - COALESCE(opening_balance, 0)) AS activity
+            FROM account_balances
+            GROUP BY company_id, account_id, fiscal_period_id, COALESCE(business_unit_id, 0), COALESCE(site_id, 0)
+            HAVING COUNT(*) > 1
+        ) d
+        WHERE ab.id = d.keep_id
+    """, ACCOUNT_BALANCE_KEY_EXISTS),
+    ("account_balances", "delete_duplicates", """
+        DELETE FROM account_balances a USING account_balances b
+        WHERE a.company_id = b.company_id AND a.account_id = b.account_id
+          AND a.fiscal_period_id = b.fiscal_period_id
+          AND COALESCE(a.business_unit_id, 0) = COALESCE(b.business_unit_id, 0)
+          AND COALESCE(a.site_id, 0) = COALESCE(b.site_id, 0)
+          AND a.id > b.id
+    """, ACCOUNT_BALANCE_KEY_EXISTS),
+    ("account_balances", "uq_account_balance_key", "CREATE UNIQUE INDEX IF NOT EXISTS uq_account_balance_key ON account_balances (company_id, account_id, fiscal_period_id, COALESCE(business_unit_id, 0), COALESCE(site_id, 0))"),
+    # Materialized period balances for financial reports (app/services/ledger_balances.py)
+    ("fiscal_periods", "balances_refreshed_at", "ALTER TABLE fiscal_periods ADD COLUMN IF NOT EXISTS balances_refreshed_at TIMESTAMP"),
+    ("journal_entries", "ix_journal_entries_company_updated", "CREATE INDEX IF NOT EXISTS ix_journal_entries_company_updated ON journal_entries (company_id, updated_at)"),
+    # Shared (company_id NULL) document sequences, e.g. recognition numbers
+    ("document_sequences", "company_id_nullable", "ALTER TABLE document_sequences ALTER COLUMN company_id DROP NOT NULL"),
+    ("document_sequences", "uq_document_sequence_global_prefix", "CREATE UNIQUE INDEX IF NOT EXISTS uq_document_sequence_global_prefix ON document_sequences (prefix) WHERE company_id IS NULL"),
+    # Account hierarchy closure table for charts created before it existed (once: while it is empty)
+    ("account_closures", "backfill", """
+        INSERT INTO account_closures (company_id, ancestor_id, descendant_id, depth)
+        WITH RECURSIVE account_tree AS (
+            SELECT company_id, id AS ancestor_id, id AS descendant_id, 0 AS depth FROM accounts
+            UNION ALL
+            SELECT t.company_id, t.ancestor_id, a.id, t.depth + 1
+            FROM account_tree t JOIN accounts a ON a.parent_id = t.descendant_id
+            WHERE t.depth < 50
+        )
+        SELECT company_id, ancestor_id, descendant_id, depth FROM account_tree
+        ON CONFLICT DO NOTHING
+    """, ACCOUNT_CLOSURES_EXIST),
+]
+
+
+@contextmanager
+def setup_lock():
+    """
+    Hold the setup advisory lock (PostgreSQL only) for the duration of the block.
+
+    A transaction-level lock held by a transaction left open on its own
+    connection: it works through PgBouncer in transaction pooling mode
+    (DATABASE_PGBOUNCER=true), which pins one server connection to an open
+    transaction, where a session-level lock could be taken and released on
+    different server connections. The block's tasks use their own connections.
+    """
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+
+    with engine.connect() as conn:
+        logger.info("Waiting for the setup lock")
+        with conn.begin():
+            conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SETUP_LOCK_ID})
+            yield
+
+
+def create_tables():
+    """Create missing tables for every model."""
+    from app.models import Base
+
+    Base.metadata.create_all(bind=engine)
+    logger.info("Tables created")
+
+
+def run_migrations():
+    """
+    Add new columns to existing tables if they don't exist. Entries with a
+    guard query (one-time data fixes) are skipped once it returns a row.
+    """
+    applied = skipped = 0
+    with engine.connect() as conn:
+        for table, column, sql, *guard in MIGRATIONS:
+            try:
+                if guard and conn.execute(text(guard[0])).first():
+                    skipped += 1
+                    continue
+                conn.execute(text(sql))
+                conn.commit()
+                applied += 1
+                logger.debug(f"Migration: Added {column} to {table}")
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Migration failed for {table}.{column}: {e}")
+    logger.info(f"Migrations applied: {applied}/{len(MIGRATIONS)} ({skipped} already done)")
+
+
+def backfill_invoice_duplicate_keys(batch_size: int = 1000) -> int:
+    """
+    Fill invoice_number_normalized / supplier_name_normalized from the
+    structured_data of documents processed before the columns existed, in
+    keyset batches of batch_size (one commit each). Only rows with neither key
+    are read, so re-runs skip everything already backfilled. Returns the
+    number of documents updated.
+    """
+    from app.models import extract_duplicate_keys
+
+    last_id = scanned = updated = 0
+    with engine.connect() as conn:
+        while True:
+            rows = conn.execute(text("""
+                SELECT id, structured_data
+                FROM processed_images
+                WHERE id > :last_id
+                AND structured_data IS NOT NULL
+                AND invoice_number_normalized IS NULL
+                AND supplier_name_normalized IS NULL
+                ORDER BY id
+                LIMIT :batch_size
+            """), {"last_id": last_id, "batch_size": batch_size}).fetchall()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                invoice_number, supplier_name = extract_duplicate_keys(row.structured_data)
+                if invoice_number or supplier_name:
+                    updates.append({"id": row.id, "invoice_number": invoice_number, "supplier_name": supplier_name})
+            if updates:
+                conn.execute(text("""
+                    UPDATE processed_images
+                    SET invoice_number_normalized = :invoice_number,
+                        supplier_name_normalized = :supplier_name
+                    WHERE id = :id
+                """), updates)
+            conn.commit()
+
+            scanned += len(rows)
+            updated += len(updates)
+            last_id = rows[-1].id
+            logger.debug(f"Duplicate keys backfilled for {updated} of {scanned} documents scanned (last id {last_id})")
+
+    if updated:
+        logger.info(f"Duplicate invoice keys backfilled for {updated} documents")
+    return updated
+
+
+def run_permission_seed():
+    """Seed system permissions if they don't exist (idempotent - only adds missing permissions)"""
+    from app.utils.permission_seed import seed_permissions
+
+    db = SessionLocal()
+    try:
+        seed_permissions(db)
+    finally:
+        db.close()
+
+
+def validate_google_api_key() -> bool:
+    """Validate Google API key by making a test request"""
+    if not settings.google_api_key:
+        logger.warning("GOOGLE_API_KEY is not configured. AI processing will be disabled.")
+        return False
+
+    try:
+        import google.generativeai as genai
+
+        genai.configure(api_key=settings.google_api_key)
+        # Test the API key by listing models
+        models = list(genai.list_models())
+        if models:
+            logger.info(f"Google API key validated successfully. {len(models)} models available.")
+            return True
+        else:
+            logger.warning("Google API key configured but no models available.")
+            return False
+    except Exception as e:
+        logger.error(f"Google API key validation failed: {e}")
+        return False
+
+
+def run_setup(check_ai: bool = True):
+    """Run every setup task once, serialized across processes."""
+    with setup_lock():
+        create_tables()
+        run_migrations()
+        backfill_invoice_duplicate_keys()
+        run_permission_seed()
+    if check_ai:
+        validate_google_api_key()
@@ -12,6 +12,32 @@ class Settings(BaseSettings):
     db_port: str = "5432"
     db_name: Optional[str] = None
 
+    # Connection pool (per API process)
+    db_pool_size: int = 10  # Connections kept open
+    db_max_overflow: int = 20  # Extra connections opened under load, closed when returned
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection before failing
+    db_pool_recycle: int = 1800  # Seconds before a connection is replaced (survives failovers/idle kills)
+    db_pool_pre_ping: bool = True  # Test connections on checkout and reconnect if stale
+    db_statement_timeout_ms: int = 0  # PostgreSQL statement_timeout; 0 disables
+    db_application_name: str = "doxsnap_be"  # Shown in pg_stat_activity
+    db_pgbouncer: bool = False  # Connect through PgBouncer in transaction pooling mode (no app-side pool)
+
+    # Worker threads for sync route handlers and run_sync (per process); keep it
+    # near db_pool_size + db_max_overflow so threads don't queue on the pool
+    threadpool_workers: int = 30
+
+    # Run the manage.py setup tasks (tables, migrations, permission seed) on app startup.
+    # Off by default: deploys run `python manage.py setup` once instead of in every worker
+    auto_setup: bool = False
+
+    # Deployment profile: which routers this process mounts (all, api, mobile, documents,
+    # portal, platform or a comma-separated combination - see app/routers.py)
+    app_profile: str = "all"
+
+    # GET /work-orders/ keyset pagination (limit query param default and cap)
+    work_orders_page_size: int = 100
+    work_orders_max_page_size: int = 500
+
     # Authentication
     secret_key: str = "your-secret-key-here"
     algorithm: str = "HS256"
@@ -59,6 +85,17 @@ class Settings(BaseSettings):
     upstash_redis_rest_token: Optional[str] = None  # For Upstash
     cache_enabled: bool = True
     cache_default_ttl: int = 300  # 5 minutes default TTL
+    upstash_max_connections: int = 20  # Pooled keep-alive connections to the Upstash REST API
+    upstash_request_timeout: float = 5.0  # Seconds per Upstash request before the cache is skipped
+
+    # Role permission cache (permission middleware / require_permission)
+    permission_cache_check_interval: float = 5.0  # Seconds a worker trusts cached role permissions before re-checking the version stamp
+    permission_cache_ttl: int = 60  # Max age of cached role permissions when Redis is unavailable
+
+    # Company subscription status cache (subscription enforcement middleware)
+    subscription_cache_local_ttl: int = 30  # Seconds a worker keeps a company's status in memory
+    subscription_cache_ttl: int = 600  # Seconds the status stays in Redis (cleared on platform admin changes)
+    subscription_cache_max_entries: int = 10000  # In-process LRU size (companies)
 
     @field_validator('cache_enabled', mode='before')
     @classmethod
@@ -76,6 +113,38 @@ class Settings(BaseSettings):
             return 300
         return int(v)
 
+    # OCR tuning
+    ocr_max_workers: int = 4  # Concurrent Tesseract runs per process, shared by all documents
+    ocr_variants_per_document: int = 2  # Variants of one document in flight when OCR_TARGET_CONFIDENCE is set
+    ocr_target_confidence: float = 0.0  # Skip remaining variants once one reaches this avg confidence (0 = run all)
+
+    # Vision AI (Gemini) extraction - runs concurrently with OCR
+    vision_ai_timeout: int = 60  # Seconds to wait for Gemini before falling back to OCR-based extraction
+    vision_ai_max_concurrency: int = 8  # Concurrent Gemini vision requests per process
+
+    # PDF ingestion (multi-page, text layer first)
+    pdf_max_pages: int = 20  # Pages of a PDF fed into OCR/AI
+    pdf_vision_max_pages: int = 5  # Pages of a scanned PDF sent to Vision AI in one request
+    pdf_text_layer_min_chars: int = 50  # Non-whitespace chars per page to treat the PDF as digital (skip OCR)
+    pdf_render_target_px: int = 3300  # Long edge for OCR renders (~300 DPI on A4)
+    pdf_preview_target_px: int = 2000  # Long edge for the stored first-page image
+    pdf_min_dpi: int = 150
+    pdf_max_dpi: int = 300
+
+    # Content-hash cache of document processing results (duplicate uploads skip OCR/AI)
+    document_cache_enabled: bool = True
+    document_cache_ttl: int = 604800  # 7 days
+
+    # Background document processing queue (async uploads)
+    document_queue_workers: int = 2  # Concurrent OCR/AI jobs per API process
+    document_queue_max_attempts: int = 3  # Attempts per job before marking it failed
+    document_queue_retry_delay: int = 5  # Seconds, multiplied by the attempt number
+    document_queue_stale_after: int = 1800  # Seconds a queued/processing record may go untouched before it counts as lost
+
+    # Bulk uploads (admin/images/upload-bulk)
+    bulk_upload_workers: int = 4  # Files of one batch processed concurrently
+    bulk_upload_status_ttl: int = 86400  # Seconds batch progress stays queryable
+
     @property
     def use_upstash(self) -> bool:
         """Check if Upstash credentials are configured"""
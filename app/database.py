@@ -1,23 +1,131 @@
-from sqlalchemy import create_engine, event
+import time
+import threading
+from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+from starlette.requests import HTTPConnection
 from app.config import settings
 
-engine = create_engine(settings.database_connection_url)
 
-# Ensure search_path is set to public schema for PostgreSQL
-@event.listens_for(engine, "connect")
-def set_search_path(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("SET search_path TO public")
-    cursor.close()
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long checkouts wait for a connection (for /api/health).
+
+    The wait includes opening a new connection when the pool grows.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_time_total += waited
+                self.wait_time_max = max(self.wait_time_max, waited)
+
+
+def _engine_options(url: str) -> dict:
+    """create_engine arguments for the configured pool and PostgreSQL session settings."""
+    if not url.startswith("postgresql"):
+        return {"pool_pre_ping": settings.db_pool_pre_ping}
+
+    if settings.db_pgbouncer:
+        # Transaction pooling: PgBouncer owns the pooling and a server connection only
+        # belongs to us for one transaction, so no app-side pool and no session-level
+        # SETs (search_path/statement_timeout belong on the database role instead:
+        # ALTER ROLE ... SET statement_timeout = ...)
+        return {
+            "poolclass": NullPool,
+            "connect_args": {"application_name": settings.db_application_name},
+        }
+
+    # Session settings go in the startup packet instead of a SET round-trip per connection
+    options = "-c search_path=public"
+    if settings.db_statement_timeout_ms > 0:
+        options += f" -c statement_timeout={settings.db_statement_timeout_ms}"
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": {
+            "application_name": settings.db_application_name,
+            "options": options,
+        },
+    }
+
+
+engine = create_engine(settings.database_connection_url, **_engine_options(settings.database_connection_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
-def get_db():
+
+def get_pool_status() -> dict:
+    """Connection pool usage of this process, for the health endpoint."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"mode": "pgbouncer" if settings.db_pgbouncer else type(pool).__name__}
+
+    status = {
+        "mode": "pool",
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update({
+            "max_overflow": settings.db_max_overflow,
+            "checkouts": pool.checkouts,
+            "timeouts": pool.timeouts,
+            "wait_ms_avg": round(pool.wait_time_total * 1000 / pool.checkouts, 2) if pool.checkouts else 0.0,
+            "wait_ms_max": round(pool.wait_time_max * 1000, 2),
+        })
+    return status
+
+
+def dialect_insert(db, model):
+    """INSERT for the session's dialect, with on_conflict_do_update() (PostgreSQL, SQLite)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(model)
+
+
+def get_db(connection: HTTPConnection = None):
+    # Share the request's session with the auth lookups (see app/services/auth_context.py);
+    # RequestDBMiddleware closes it after the response. Anything else owns its session here
+    if connection is not None:
+        from app.services.auth_context import get_request_db, is_request_db_managed
+        if is_request_db_managed(connection):
+            yield get_request_db(connection)
+            return
+
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
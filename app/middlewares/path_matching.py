@@ -0,0 +1,23 @@
+"""
+Precompiled path matching for the ASGI middlewares.
+
+The middlewares run on every request, so their exempt/public path lists are
+compiled once into a single anchored regex instead of being scanned with
+str.startswith in a loop.
+"""
+import re
+from typing import Callable, Iterable
+
+
+def compile_path_matcher(prefixes: Iterable[str] = (), exact: Iterable[str] = ()) -> Callable[[str], bool]:
+    """
+    Build a matcher that is True for paths starting with any of prefixes or
+    equal to any of exact.
+    """
+    alternatives = [re.escape(prefix) for prefix in prefixes]
+    alternatives += [re.escape(path) + r"\Z" for path in exact]
+    if not alternatives:
+        return lambda path: False
+
+    pattern = re.compile("(?:" + "|".join(alternatives) + ")")
+    return lambda path: pattern.match(path) is not None
@@ -1,10 +1,14 @@
-from fastapi import Request
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, RolePermission, Permission
-from app.utils.security import verify_token
+import logging
+
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middlewares.path_matching import compile_path_matcher
+from app.services.auth_context import get_auth_context
+from app.services.permission_cache import permission_cache
+
+logger = logging.getLogger(__name__)
 
 METHOD_ACTION_MAP = {
     "POST": "create",
@@ -114,103 +118,102 @@ PUBLIC_PATHS = (
 )
 
 
-class PermissionMiddleware(BaseHTTPMiddleware):
+_is_public_path = compile_path_matcher(PUBLIC_PATHS)
+
+
+class PermissionMiddleware:
+    """
+    Check the caller's role permissions for mutating API requests.
+
+    Pure ASGI middleware: requests that pass are handed straight to the app,
+    so response bodies (StreamingResponse exports, PDF downloads) are not
+    buffered through an extra task and queue as with BaseHTTPMiddleware.
+    """
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        print(f"[PERMISSION] {request.method} {request.url.path}")
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Skip non-API routes
-        if not path.startswith("/api/"):
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        # Skip public routes
-        for p in PUBLIC_PATHS:
-            if path.startswith(p):
-                return await call_next(request)
+        path = scope["path"]
+        method = scope["method"]
 
-        # Skip OPTIONS
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        # Skip non-API routes, public routes and CORS preflight
+        if not path.startswith("/api/") or _is_public_path(path) or method == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        logger.debug(f"[PERMISSION] {method} {path}")
+        request = HTTPConnection(scope)
 
         # Read token
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=401,
                 content={"detail": "Not authenticated"},
             )
-
-        token = auth_header.split(" ")[1]
-        email = verify_token(token)
-        if not email:
+            return await response(scope, receive, send)
+
+        # Token, user and (later) the route share one auth context and DB session
+        response = await self._check(request, path, method)
+        if response is not None:
+            return await response(scope, receive, send)
+        return await self.app(scope, receive, send)
+
+    async def _check(self, request: HTTPConnection, path: str, method: str):
+        """The error response for a rejected request, or None to let it through."""
+        auth = get_auth_context(request)
+        if not auth.subject:
             return JSONResponse(
                 status_code=401,
                 content={"detail": "Invalid or expired token"},
             )
 
-        db: Session = next(get_db())
-
-        try:
-            user = db.query(User).filter(User.email == email).first()
-            if not user:
-                return JSONResponse(
-                    status_code=401,
-                    content={"detail": "User not found"},
-                )
+        user = await auth.get_user()
+        if not user:
+            return JSONResponse(
+                status_code=401,
+                content={"detail": "User not found"},
+            )
 
-            # Infer module and action from path
-            # /api/branches/123 → module: branches
-            # /api/purchase-orders/5/approve → module: purchase_orders, action: approve
-            parts = path.replace("/api/", "").strip("/").split("/")
-            print(f"Parts: {parts}")
-            if not parts:
-                return await call_next(request)
-
-            module = parts[0]  # Convert kebab-case to snake_case
-
-            # Determine action - check for specific action in path first
-            action = None
-
-            # Check if any part of the path matches a specific action pattern
-            for part in parts[1:]:  # Skip module name
-                part_lower = part.lower()
-                if part_lower in ACTION_PATH_PATTERNS:
-                    action = ACTION_PATH_PATTERNS[part_lower]
-                    break
-
-            # If no specific action found in path, use HTTP method mapping
-            if not action:
-                action = METHOD_ACTION_MAP.get(request.method)
-
-            # Only check permissions if we have an action and user has a role_id
-            # Skip permission check if role_id is not set (role system not configured)
-            if action and hasattr(user, 'role_id') and user.role_id is not None:
-                role_permissions = (
-                    db.query(RolePermission)
-                    .join(Permission)
-                    .filter(RolePermission.role_id == user.role_id)
-                    .all()
-                )
+        # Infer module and action from path
+        # /api/branches/123 → module: branches
+        # /api/purchase-orders/5/approve → module: purchase_orders, action: approve
+        parts = path.replace("/api/", "").strip("/").split("/")
+        module = parts[0]
+
+        # Determine action - check for specific action in path first
+        action = None
+
+        # Check if any part of the path matches a specific action pattern
+        for part in parts[1:]:  # Skip module name
+            action = ACTION_PATH_PATTERNS.get(part.lower())
+            if action:
+                break
+
+        # If no specific action found in path, use HTTP method mapping
+        if not action:
+            action = METHOD_ACTION_MAP.get(method)
+
+        # Only check permissions if we have an action and user has a role_id
+        # Skip permission check if role_id is not set (role system not configured)
+        if action and getattr(user, "role_id", None) is not None:
+            # Compiled per-role permission set, cached in-process
+            allowed = await permission_cache.has_permission(
+                auth.db, user, module, action, case_sensitive=False
+            )
 
-                allowed = any(
-                    rp.permission.module.lower() == module.lower()
-                    and rp.permission.action.lower() == action.lower()
-                    for rp in role_permissions
+            if not allowed:
+                logger.debug(f"[PERMISSION] Denied {module}:{action} for user {user.id}")
+                return JSONResponse(
+                    status_code=403,
+                    content={
+                        "detail": f"Permission '{module}:{action}' not authorized"
+                    },
                 )
 
-                if not allowed:
-                    return JSONResponse(
-                        status_code=403,
-                        content={
-                            "detail": f"Permission '{module}:{action}' not authorized"
-                        },
-                    )
-
-            # Attach user for later use (optional)
-            request.state.user = user
-
-            return await call_next(request)
-
-        finally:
-            db.close()
+        # Attach user for later use (optional)
+        request.state.user = user
+        return None
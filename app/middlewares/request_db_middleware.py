@@ -0,0 +1,29 @@
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services.auth_context import close_request_db, mark_request_db_managed
+
+
+class RequestDBMiddleware:
+    """
+    Owns the request's shared DB session (see app/services/auth_context.py).
+
+    The session is opened lazily by whoever needs it first (auth lookups in the
+    other middlewares, get_current_user, get_db) and always closed here once the
+    response has been sent, public and exempt paths included. Must be the
+    outermost of the middlewares that touch the database.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        connection = HTTPConnection(scope)
+        mark_request_db_managed(connection)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            close_request_db(connection)
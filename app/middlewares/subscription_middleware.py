@@ -0,0 +1,117 @@
+import logging
+
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middlewares.path_matching import compile_path_matcher
+from app.services.auth_context import get_auth_context
+from app.services.subscription_cache import subscription_cache
+
+logger = logging.getLogger(__name__)
+
+# Routes that don't require subscription check (must be exact prefixes)
+EXEMPT_PATHS = (
+    "/api/auth/",
+    "/api/auth",
+    "/api/plans",
+    "/api/companies/register",
+    "/api/health",
+    "/api/otp",
+    "/api/docs",
+    "/api/platform-admin",  # Platform admin has its own auth
+    "/uploads/",
+    "/uploads",
+    "/openapi.json",
+    "/docs",
+    "/redoc",
+)
+
+# Exact match only paths (not prefix match)
+EXEMPT_EXACT = ("/", "/health")
+
+_is_exempt_path = compile_path_matcher(EXEMPT_PATHS, EXEMPT_EXACT)
+
+
+class SubscriptionEnforcementMiddleware:
+    """
+    Enforce the subscription/trial period for protected API routes.
+
+    Pure ASGI middleware: requests that pass are handed straight to the app,
+    without BaseHTTPMiddleware's per-response task and body queue.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+
+        # Skip exempt paths, non-API routes and CORS preflight
+        if _is_exempt_path(path) or not path.startswith("/api/") or scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        request = HTTPConnection(scope)
+
+        # Let the route handler deal with missing auth
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return await self.app(scope, receive, send)
+
+        # Token, user and company are resolved once and shared with the
+        # permission middleware and the route (see app/services/auth_context.py)
+        response = await self._check(request)
+        if response is not None:
+            return await response(scope, receive, send)
+        return await self.app(scope, receive, send)
+
+    async def _check(self, request: HTTPConnection):
+        """The 403 response for a blocked or expired subscription, or None to let the request through."""
+        auth = get_auth_context(request)
+        if not auth.subject:
+            # Invalid token - let route handler deal with it
+            return None
+
+        # The user is shared with the permission middleware and the route;
+        # the company's subscription fields come from the subscription cache
+        user = await auth.get_user()
+        if not user or not user.company_id:
+            return None
+
+        subscription = await subscription_cache.get(auth.db, user.company_id)
+        if not subscription:
+            return None
+
+        # Check subscription status
+        if subscription.is_blocked:
+            return JSONResponse(
+                status_code=403,
+                content={
+                    "detail": f"Subscription has been {subscription.subscription_status}. Please contact support.",
+                    "subscription_status": subscription.subscription_status
+                }
+            )
+
+        # Check if trial/subscription has expired
+        if subscription.is_expired:
+            logger.debug(f"[SUBSCRIPTION] Blocking expired user: {auth.subject}, status: {subscription.subscription_status}")
+            if subscription.subscription_status == "trial":
+                return JSONResponse(
+                    status_code=403,
+                    content={
+                        "detail": "Your 5-day trial period has expired. Please upgrade to continue using the application.",
+                        "subscription_status": "trial_expired"
+                    }
+                )
+            return JSONResponse(
+                status_code=403,
+                content={
+                    "detail": "Your subscription has expired. Please renew to continue.",
+                    "subscription_status": "expired"
+                }
+            )
+
+        return None
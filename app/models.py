@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, Date, Numeric, Table, UniqueConstraint, Time
-from sqlalchemy.orm import relationship, backref
+import json
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, Date, Numeric, Table, UniqueConstraint, Time, Index, event, inspect
+from sqlalchemy.orm import relationship, backref, Session
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -415,7 +416,9 @@ class ProcessedImage(Base):
     original_filename = Column(String)
     s3_key = Column(String)
     s3_url = Column(String)
-    processing_status = Column(String, default="pending")  # pending, completed, failed
+    processing_status = Column(String, default="pending")  # pending, queued, processing, completed, completed_local, failed
+    processing_attempts = Column(Integer, default=0)  # Background queue attempts (async uploads)
+    processing_error = Column(Text, nullable=True)  # Last background processing error
     document_type = Column(String, default="invoice")  # invoice, receipt, purchase_order, bill_of_lading, etc.
     invoice_category = Column(String, nullable=True)  # service (subcontractor invoice) or spare_parts
     posting_status = Column(String, nullable=True)  # pending, posted - tracks if invoice items were posted to inventory
@@ -442,6 +445,11 @@ class ProcessedImage(Base):
     extraction_confidence = Column(Float, default=0.0)  # AI extraction confidence score
     processing_method = Column(String, default="basic")  # Processing method used
 
+    # Duplicate detection keys - trimmed/upper-cased copies of structured_data
+    # document_info.invoice_number and supplier.company_name, kept in sync on set
+    invoice_number_normalized = Column(String, nullable=True)
+    supplier_name_normalized = Column(String, nullable=True)
+
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -452,6 +460,42 @@ class ProcessedImage(Base):
     contract = relationship("Contract", backref="invoices")
     address_book = relationship("AddressBook", backref="invoices")
 
+    __table_args__ = (
+        Index("ix_processed_images_duplicate_keys", "invoice_number_normalized", "supplier_name_normalized"),
+    )
+
+
+def normalize_duplicate_key(value) -> str:
+    """Normalize an invoice number / supplier name for duplicate detection (None if blank)."""
+    if value is None:
+        return None
+    value = str(value).strip().upper()
+    return value or None
+
+
+def extract_duplicate_keys(structured_data) -> tuple:
+    """Return normalized (invoice_number, supplier_name) from a structured_data JSON string."""
+    if not structured_data:
+        return None, None
+    try:
+        data = json.loads(structured_data) if isinstance(structured_data, str) else structured_data
+    except (TypeError, ValueError):
+        return None, None
+    if not isinstance(data, dict):
+        return None, None
+    document_info = data.get("document_info") or {}
+    supplier = data.get("supplier") or {}
+    return (
+        normalize_duplicate_key(document_info.get("invoice_number") if isinstance(document_info, dict) else None),
+        normalize_duplicate_key(supplier.get("company_name") if isinstance(supplier, dict) else None),
+    )
+
+
+@event.listens_for(ProcessedImage.structured_data, "set")
+def _sync_processed_image_duplicate_keys(target, value, oldvalue, initiator):
+    """Keep the indexed duplicate-detection columns in step with structured_data."""
+    target.invoice_number_normalized, target.supplier_name_normalized = extract_duplicate_keys(value)
+
 
 class DocumentType(Base):
     __tablename__ = "document_types"
@@ -1067,6 +1111,11 @@ class WorkOrder(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination of GET /work-orders/ (newest first per company)
+        Index("ix_work_orders_company_created", company_id, created_at, id),
+    )
+
     # Relationships
     company = relationship("Company")
     equipment = relationship("Equipment", backref="work_orders")
@@ -2970,6 +3019,40 @@ class Account(Base):
     journal_lines = relationship("JournalEntryLine", back_populates="account")
 
 
+class AccountClosure(Base):
+    """
+    Account Closure - One row per (ancestor, descendant) pair of the chart of
+    accounts, including each account paired with itself at depth 0.
+    Lets reports select every account under a header in one query.
+    Rebuilt per company whenever accounts are added, removed or re-parented.
+    """
+    __tablename__ = "account_closures"
+
+    ancestor_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False, index=True)
+    depth = Column(Integer, nullable=False, default=0)
+
+
+@event.listens_for(Session, "after_flush")
+def _rebuild_account_closures(session, flush_context):
+    """Keep account_closures in step with inserted, deleted and re-parented accounts."""
+    company_ids = {
+        obj.company_id for obj in list(session.new) + list(session.deleted)
+        if isinstance(obj, Account)
+    }
+    company_ids.update(
+        obj.company_id for obj in session.dirty
+        if isinstance(obj, Account) and inspect(obj).attrs.parent_id.history.has_changes()
+    )
+    if company_ids:
+        from app.services.ledger_balances import rebuild_account_closure
+
+        connection = session.connection()
+        for company_id in company_ids:
+            rebuild_account_closure(connection, company_id)
+
+
 class FiscalPeriod(Base):
     """
     Fiscal Period - Defines accounting periods (months) within a fiscal year.
@@ -2994,6 +3077,10 @@ class FiscalPeriod(Base):
     closed_at = Column(DateTime, nullable=True)
     closed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
 
+    # When the period's AccountBalance rows were last rebuilt from journal lines
+    # (closed periods only, see app/services/ledger_balances.py)
+    balances_refreshed_at = Column(DateTime, nullable=True)
+
     # Audit
     created_at = Column(DateTime, default=func.now())
 
@@ -3055,6 +3142,8 @@ class JournalEntry(Base):
     # Unique constraint per company
     __table_args__ = (
         UniqueConstraint('company_id', 'entry_number', name='uq_journal_entry_number'),
+        # Entries changed since a period's balances were materialized
+        Index('ix_journal_entries_company_updated', 'company_id', 'updated_at'),
     )
 
     # Relationships
@@ -3122,7 +3211,8 @@ class JournalEntryLine(Base):
 class AccountBalance(Base):
     """
     Account Balance - Pre-computed balances by account, site, and period for fast reporting.
-    Updated when journal entries are posted.
+    Updated when journal entries are posted, and rebuilt from journal lines with
+    opening balances rolled forward when a period is closed.
     """
     __tablename__ = "account_balances"
 
@@ -3153,6 +3243,10 @@ class AccountBalance(Base):
     __table_args__ = (
         UniqueConstraint('company_id', 'account_id', 'fiscal_period_id', 'business_unit_id', 'site_id',
                         name='uq_account_balance_period_bu'),
+        # Same key with NULL business unit / site treated as equal: the conflict
+        # target of the balance upsert (see upsert_account_balances in journal_posting.py)
+        Index('uq_account_balance_key', company_id, account_id, fiscal_period_id,
+              func.coalesce(business_unit_id, 0), func.coalesce(site_id, 0), unique=True),
     )
 
     # Relationships
@@ -5725,3 +5819,25 @@ class RFQDocument(Base):
     rfq = relationship("RFQ", back_populates="documents")
     image = relationship("ProcessedImage")
     uploader = relationship("User", foreign_keys=[uploaded_by])
+
+
+class DocumentSequence(Base):
+    """
+    Document number counter per company and prefix (e.g. "WO-2026-", "JE-2026-").
+    company_id NULL is a counter shared by all companies (e.g. "REC-2026-").
+    Reserved with an upsert on this row - see app/services/sequences.py.
+    """
+    __tablename__ = "document_sequences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True)
+    prefix = Column(String(50), nullable=False)
+    last_value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('company_id', 'prefix', name='uq_document_sequence_company_prefix'),
+        # NULLs never conflict in the constraint above: shared counters get their own key
+        Index('uq_document_sequence_global_prefix', 'prefix', unique=True,
+              postgresql_where=company_id.is_(None), sqlite_where=company_id.is_(None)),
+    )
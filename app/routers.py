@@ -0,0 +1,160 @@
+"""
+Router Registry and Deployment Profiles
+
+Every API router is listed once in ROUTERS, in mount order, with the router
+groups it belongs to. A deployment profile (settings.app_profile, APP_PROFILE
+env or `python run.py --profile ...`) names the groups a process serves, and
+only those router modules are imported and mounted. This lets the same code
+base run as separate process pools:
+
+- api        tenant admin API, client portal and platform admin
+- mobile     HHD mobile app surface: device login/RFQs plus the work order,
+             asset, stock, checklist and calendar routers that accept HHD tokens
+- documents  document upload/OCR/AI routes; the only profile that starts the
+             document queue and bulk upload worker pools (they start on first use)
+- portal     client portal only
+- platform   platform admin only
+- all        everything (default, single process)
+
+Profiles can be combined with commas, e.g. APP_PROFILE=api,documents.
+Routers shared by several pools (e.g. work_orders in api and mobile) are
+mounted in each; the load balancer sends each client to its pool by host
+name (mobile app, client portal) or path prefix (/api/images,
+/api/admin/images for documents).
+
+Usage:
+    from app.routers import include_routers
+
+    include_routers(app, settings.app_profile)
+"""
+import logging
+import importlib
+from typing import FrozenSet, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+CORE = "core"
+TENANT = "tenant"
+DOCUMENTS = "documents"
+MOBILE = "mobile"
+PORTAL = "portal"
+PLATFORM = "platform"
+
+PROFILES = {
+    "all": frozenset({CORE, TENANT, DOCUMENTS, MOBILE, PORTAL, PLATFORM}),
+    "api": frozenset({CORE, TENANT, PORTAL, PLATFORM}),
+    "mobile": frozenset({MOBILE}),
+    "documents": frozenset({DOCUMENTS}),
+    "portal": frozenset({PORTAL}),
+    "platform": frozenset({PLATFORM}),
+}
+
+
+class RouterSpec(NamedTuple):
+    module: str  # Module under app.api exposing `router`
+    prefix: str
+    tags: List[str]
+    groups: FrozenSet[str]
+
+
+def _spec(module: str, prefix: str, tag: str, *groups: str) -> RouterSpec:
+    return RouterSpec(module, prefix, [tag], frozenset(groups))
+
+
+ROUTERS: Tuple[RouterSpec, ...] = (
+    _spec("auth", "/api/auth", "Authentication", CORE),
+    _spec("images", "/api/images", "Images", DOCUMENTS),
+    _spec("otp", "/api/otp", "OTP", CORE),
+    _spec("admin", "/api", "Admin", TENANT),
+    _spec("admin_images", "/api", "Admin", DOCUMENTS),
+    _spec("document_types", "/api/document-types", "Document Types", DOCUMENTS, TENANT),
+    # REMOVED: Vendor API - Use Address Book with search_type='V' instead
+    _spec("plans", "/api", "Plans", CORE),
+    _spec("companies", "/api", "Companies", CORE),
+    # REMOVED: Branches API - Use Sites with Address Book instead
+    _spec("projects", "/api", "Projects", TENANT),
+    _spec("operators", "/api", "Operators", TENANT),
+    _spec("handheld_devices", "/api", "HandHeld Devices", TENANT),
+    _spec("assets", "/api/assets", "Assets", TENANT, MOBILE),
+    _spec("attendance", "/api", "Attendance", TENANT),
+    _spec("work_orders", "/api", "Work Orders", TENANT, MOBILE),
+    _spec("warehouses", "/api", "Warehouses", TENANT),
+    _spec("pm_checklists", "/api", "PM Checklists", TENANT, MOBILE),
+    _spec("pm_work_orders", "/api", "PM Work Orders", TENANT),
+    _spec("dashboard", "/api", "Dashboard", TENANT),
+    _spec("item_master", "/api", "Item Master", TENANT, MOBILE),
+    _spec("cycle_count", "/api", "Cycle Count", TENANT),
+    _spec("hhd_auth", "/api", "HHD Auth", MOBILE),
+    _spec("users", "/api", "Users", TENANT),
+    _spec("sites", "/api/sites", "Sites", TENANT),
+    _spec("contracts", "/api/contracts", "Contracts", TENANT),
+    _spec("tickets", "/api", "Tickets", TENANT),
+    _spec("ticket_timeline", "/api", "Ticket Timeline", TENANT),
+    _spec("calendar", "/api/calendar", "Calendar", TENANT, MOBILE),
+    _spec("technician_site_shifts", "/api", "Technicians Site Shifts", TENANT),
+    _spec("technicians", "/api", "Technicians", TENANT),
+    _spec("condition_reports", "/api/condition-reports", "Condition Reports", TENANT),
+    _spec("technician_evaluations", "/api/technician-evaluations", "Technician Evaluations", TENANT),
+    _spec("nps", "/api/nps", "Net Promoter Score", TENANT),
+    _spec("petty_cash", "/api/petty-cash", "Petty Cash", TENANT),
+    _spec("docs", "/api/docs", "Documentation", CORE),
+    _spec("allocations", "/api/allocations", "Invoice Allocations", TENANT),
+    _spec("accounting", "/api/accounting", "Accounting", TENANT),
+    _spec("business_units", "/api", "Business Units", TENANT),
+    _spec("exchange_rates", "/api", "Exchange Rates", TENANT),
+    _spec("purchase_requests", "/api/purchase-requests", "Purchase Requests", TENANT),
+    _spec("purchase_orders", "/api/purchase-orders", "Purchase Orders", TENANT),
+    _spec("goods_receipts", "/api/goods-receipts", "Goods Receipts", TENANT),
+    _spec("rfq", "/api/rfqs", "RFQ - Request for Quotation", TENANT),
+    # Mobile HHD RFQ (Parts Requests for Technicians)
+    _spec("hhd_rfq", "/api/hhd", "HHD - Mobile Parts Requests", MOBILE),
+    # CRM
+    _spec("crm_leads", "/api", "CRM - Leads", TENANT),
+    _spec("crm_opportunities", "/api", "CRM - Opportunities", TENANT),
+    _spec("crm_activities", "/api", "CRM - Activities", TENANT),
+    _spec("crm_campaigns", "/api", "CRM - Campaigns", TENANT),
+    _spec("tools", "/api", "Tools Management", TENANT),
+    _spec("disposals", "/api", "Disposals", TENANT),
+    # Address Book (Oracle JDE F0101 equivalent)
+    # NOTE: Clients are managed via Address Book with search_type='C' (Customer)
+    _spec("address_book", "/api", "Address Book", TENANT),
+    # REMOVED: Clients API - Use Address Book with search_type='C' instead
+    # Supplier Invoice & Payment (Procure-to-Pay)
+    _spec("supplier_invoices", "/api/supplier-invoices", "Supplier Invoices", TENANT),
+    _spec("supplier_payments", "/api/supplier-payments", "Supplier Payments", TENANT),
+    _spec("import_export", "/api", "Import Export", TENANT),
+    _spec("roles", "/api/roles", "Roles", TENANT),
+    _spec("fleet", "/api/fleet", "Fleet Management", TENANT),
+    # Client Portal
+    _spec("client_portal", "/api", "Client Portal", PORTAL),
+    _spec("client_admin", "/api", "Client Admin", TENANT),
+    # Platform Admin (Super Admin for managing subscriptions)
+    _spec("platform_admin", "/api", "Platform Admin", PLATFORM),
+    _spec("upgrade_requests", "/api", "Upgrade Requests", TENANT),
+)
+
+
+def resolve_profile(profile: str) -> FrozenSet[str]:
+    """The router groups of a profile name or comma-separated list of names."""
+    groups = set()
+    for name in (part.strip() for part in (profile or "all").split(",")):
+        if name not in PROFILES:
+            raise ValueError(f"Unknown APP_PROFILE '{name}'. Valid profiles: {', '.join(PROFILES)}")
+        groups |= PROFILES[name]
+    return frozenset(groups)
+
+
+def routers_for_profile(profile: str) -> List[RouterSpec]:
+    """The routers a profile mounts, in mount order."""
+    groups = resolve_profile(profile)
+    return [spec for spec in ROUTERS if spec.groups & groups]
+
+
+def include_routers(app, profile: str) -> List[RouterSpec]:
+    """Import and mount the routers of a profile. Modules of other profiles are never imported."""
+    specs = routers_for_profile(profile)
+    for spec in specs:
+        module = importlib.import_module(f"app.api.{spec.module}")
+        app.include_router(module.router, prefix=spec.prefix, tags=spec.tags)
+    logger.info(f"[PROFILE] '{profile}': mounted {len(specs)}/{len(ROUTERS)} routers")
+    return specs
@@ -105,6 +105,7 @@ class ProcessedImage(ProcessedImageBase):
     structured_data: Optional[str] = None
     extraction_confidence: float = 0.0
     processing_method: str = "basic"
+    processing_error: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     
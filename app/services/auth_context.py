@@ -0,0 +1,168 @@
+"""
+Request Authentication Context
+
+Resolves "who is calling" once per request and shares it between the
+middlewares (subscription enforcement, permissions) and the route
+dependencies (get_current_user, get_current_user_or_hhd, get_current_admin...).
+
+Per authenticated request this means one JWT decode, one User query and one
+DB session (subscription enforcement reads the company from
+app/services/subscription_cache.py):
+the session opened for the auth lookups is kept on request.state.db and
+get_db hands the same session to the route. RequestDBMiddleware
+(app/middlewares/request_db_middleware.py) closes it after every request.
+
+Usage:
+    from app.services.auth_context import get_auth_context, get_context_user
+
+    # Middleware
+    auth = get_auth_context(request)
+    if auth.user is None: ...
+
+    # Dependency
+    def get_current_user(request: Request, credentials=Depends(security)):
+        return get_context_user(request, credentials.credentials)
+"""
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from starlette.requests import HTTPConnection
+
+from app.database import SessionLocal
+from app.utils.security import decode_token
+
+_NOT_LOADED = object()
+
+
+def get_request_db(connection: HTTPConnection) -> Session:
+    """The request's shared DB session, opened on first use."""
+    db = getattr(connection.state, "db", None)
+    if db is None:
+        db = SessionLocal()
+        connection.state.db = db
+    return db
+
+
+def mark_request_db_managed(connection: HTTPConnection):
+    """Record that RequestDBMiddleware will close this request's shared session."""
+    connection.state.db_managed = True
+
+
+def is_request_db_managed(connection: HTTPConnection) -> bool:
+    return getattr(connection.state, "db_managed", False)
+
+
+def close_request_db(connection: HTTPConnection):
+    """Close the shared session. Called by RequestDBMiddleware once the response has been sent."""
+    db = getattr(connection.state, "db", None)
+    if db is not None:
+        del connection.state.db
+        db.close()
+
+
+class AuthContext:
+    """
+    The caller of one request: token payload, user and company.
+
+    User and company are loaded lazily (at most once) through the request's
+    shared DB session, so middlewares that only need the token pay nothing.
+    """
+
+    def __init__(self, connection: HTTPConnection, token: Optional[str]):
+        self._connection = connection
+        self.token = token
+        self.payload: Optional[dict] = decode_token(token) if token else None
+        self._user = _NOT_LOADED
+        self._company = _NOT_LOADED
+
+    @property
+    def subject(self) -> Optional[str]:
+        """The token's "sub" claim: the user's email, or hhd:<id> for device tokens."""
+        return self.payload.get("sub") if self.payload else None
+
+    @property
+    def is_hhd(self) -> bool:
+        sub = self.subject
+        return bool(self.payload) and (self.payload.get("type") == "hhd" or bool(sub and sub.startswith("hhd:")))
+
+    @property
+    def db(self) -> Session:
+        return get_request_db(self._connection)
+
+    @property
+    def user(self):
+        """The User the token belongs to, or None (invalid token, device token, unknown email)."""
+        if self._user is _NOT_LOADED:
+            self._user = None
+            if self.subject and not self.is_hhd:
+                from app.models import User
+                self._user = self.db.query(User).filter(User.email == self.subject).first()
+        return self._user
+
+    async def get_user(self):
+        """self.user for async callers (middlewares): the lookup runs in the worker threadpool."""
+        if self._user is _NOT_LOADED:
+            from app.utils.concurrency import run_sync
+            await run_sync(getattr, self, "user")
+        return self._user
+
+    @property
+    def company(self):
+        """The user's Company, or None."""
+        if self._company is _NOT_LOADED:
+            user = self.user
+            self._company = user.company if user is not None and user.company_id else None
+        return self._company
+
+
+def _bearer_token(connection: HTTPConnection) -> Optional[str]:
+    authorization = connection.headers.get("Authorization")
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+def get_auth_context(connection: HTTPConnection, token: str = None) -> AuthContext:
+    """
+    The request's AuthContext, created on first use and cached on request.state.auth.
+
+    Pass token when it comes from somewhere other than the Authorization header;
+    a context for a different token is built but not cached.
+    """
+    auth = getattr(connection.state, "auth", None)
+    if auth is not None and (token is None or token == auth.token):
+        return auth
+
+    header_token = _bearer_token(connection)
+    if token is not None and token != header_token:
+        return AuthContext(connection, token)
+
+    auth = AuthContext(connection, header_token)
+    connection.state.auth = auth
+    return auth
+
+
+def get_context_user(connection: HTTPConnection, token: str):
+    """
+    Resolve the authenticated User for a route dependency.
+
+    Raises 401 like the module-level get_current_user dependencies always have.
+    """
+    auth = get_auth_context(connection, token)
+    if not auth.subject:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+
+    user = auth.user
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return user
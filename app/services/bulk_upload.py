@@ -0,0 +1,516 @@
+"""
+Concurrent Bulk Upload Pipeline
+
+Processes the files of one admin bulk upload (POST /admin/images/upload-bulk)
+in two phases:
+
+1. Extraction - each file is converted (PDF first page), OCR'd / AI-extracted,
+   resized and uploaded to S3 on a bounded worker pool, so a batch takes about
+   (files / workers) x the time of one document instead of the sum of all.
+   Workers don't touch the database.
+2. Save - a single DB session then looks up vendors (one lookup per supplier
+   per batch), checks duplicates, creates the ProcessedImage and InvoiceItem
+   records (Item Master loaded once per batch) and commits once. Each file is
+   written inside its own savepoint, so one bad file doesn't drop the others.
+
+Progress is tracked per file and exposed by batch id. Snapshots are mirrored
+to the cache so the status endpoint works from any API process:
+
+    queued -> processing -> processed -> saved | duplicate | failed
+
+Usage:
+    from app.services.bulk_upload import bulk_upload_pipeline
+
+    batch = bulk_upload_pipeline.create_batch(user_id, company_id, "invoice", None)
+    batch.add_file(filename, content, is_pdf, content_hash, cached_results)
+
+    response = await bulk_upload_pipeline.run(batch)   # wait for the results
+    bulk_upload_pipeline.start(batch)                  # or run in the background
+
+    snapshot = await bulk_upload_pipeline.get_status(batch_id, company_id)
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Batches finished longer ago than this are dropped from the in-process registry
+# (the cached snapshot lives for settings.bulk_upload_status_ttl)
+LOCAL_BATCH_RETENTION = 3600
+
+
+@dataclass
+class BulkUploadFile:
+    """One file of a bulk upload and its progress through the pipeline."""
+    index: int
+    filename: str
+    content: Optional[bytes]
+    is_pdf: bool = False
+    content_hash: Optional[str] = None
+    cached_results: Optional[dict] = None
+    status: str = "queued"
+    error: Optional[str] = None
+    # Set by the extraction phase
+    unique_filename: Optional[str] = None
+    temp_file_path: Optional[str] = None
+    processed_image_path: Optional[str] = None
+    s3_key: Optional[str] = None
+    s3_url: Optional[str] = None
+    processing_status: Optional[str] = None
+    invoice_results: Optional[dict] = None
+    # Set by the save phase
+    result: Optional[dict] = None
+    error_entry: Optional[dict] = None
+
+
+@dataclass
+class BulkUploadBatch:
+    """A bulk upload request: its files, progress and (once done) the response."""
+    batch_id: str
+    user_id: int
+    company_id: Optional[int]
+    document_type: str = "invoice"
+    invoice_category: Optional[str] = None
+    status: str = "processing"
+    files: List[BulkUploadFile] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+    response: Optional[dict] = None
+    finished_at: Optional[float] = None
+
+    def add_file(self, filename: str, content: bytes, is_pdf: bool = False,
+                 content_hash: str = None, cached_results: dict = None) -> BulkUploadFile:
+        upload = BulkUploadFile(
+            index=len(self.files),
+            filename=filename,
+            content=content,
+            is_pdf=is_pdf,
+            content_hash=content_hash,
+            cached_results=cached_results
+        )
+        self.files.append(upload)
+        return upload
+
+    def add_rejected(self, filename: str, error: str):
+        """Record a file that was rejected before processing (e.g. unsupported type)."""
+        upload = self.add_file(filename, None)
+        upload.status = "failed"
+        upload.error = error
+        upload.error_entry = {"filename": filename, "error": error}
+
+    def snapshot(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for upload in self.files:
+            counts[upload.status] = counts.get(upload.status, 0) + 1
+
+        snapshot = {
+            "batch_id": self.batch_id,
+            "status": self.status,
+            "total_files": len(self.files),
+            "processed": sum(counts.get(s, 0) for s in ("processed", "saved", "duplicate", "failed")),
+            "successful": counts.get("saved", 0),
+            "failed": counts.get("failed", 0),
+            "skipped_duplicates": counts.get("duplicate", 0),
+            "created_at": self.created_at.isoformat(),
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "files": [
+                {
+                    "filename": upload.filename,
+                    "status": upload.status,
+                    "id": upload.result["id"] if upload.result else None,
+                    "error": upload.error
+                }
+                for upload in self.files
+            ]
+        }
+        if self.response is not None:
+            snapshot["results"] = self.response["results"]
+            snapshot["errors"] = self.response["errors"]
+        return snapshot
+
+    def build_response(self) -> Dict[str, Any]:
+        """Response in the shape the bulk endpoint has always returned."""
+        results = [upload.result for upload in self.files if upload.result]
+        errors = [upload.error_entry for upload in self.files if upload.error_entry]
+
+        # Count duplicates separately
+        duplicates = [e for e in errors if e.get("is_duplicate")]
+        other_errors = [e for e in errors if not e.get("is_duplicate")]
+
+        return {
+            "success": len(results) > 0,
+            "batch_id": self.batch_id,
+            "total_files": len(self.files),
+            "successful": len(results),
+            "failed": len(other_errors),
+            "skipped_duplicates": len(duplicates),
+            "results": results,
+            "errors": errors
+        }
+
+
+def _remove_file(path: Optional[str]):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def _fail(upload: BulkUploadFile, error: str):
+    upload.status = "failed"
+    upload.error = error
+    upload.error_entry = {"filename": upload.filename, "error": error}
+    _remove_file(upload.temp_file_path)
+    if upload.processed_image_path != upload.temp_file_path:
+        _remove_file(upload.processed_image_path)
+
+
+def extract_bulk_file(upload: BulkUploadFile):
+    """
+    Extraction phase for one file (runs on a worker thread, no DB access).
+
+    Converts PDFs, runs OCR/AI (unless the result came from the document
+    cache), resizes and uploads the stored image. Errors are recorded on the
+    file rather than raised.
+    """
+    from app.services.s3 import upload_to_s3, process_image
+
+    upload.status = "processing"
+    try:
+        content = upload.content
+        # Convert PDF to image if necessary (the original PDF is kept for multi-page extraction)
+        pdf_bytes = content if upload.is_pdf else None
+        if upload.is_pdf:
+            from app.services.pdf_ingestion import render_pdf_preview
+            try:
+                content = render_pdf_preview(content)
+            except Exception as e:
+                raise Exception(f"Failed to convert PDF to image: {e}")
+            upload.unique_filename = f"{uuid.uuid4()}.png"
+        else:
+            file_extension = upload.filename.split(".")[-1] if "." in upload.filename else "jpg"
+            upload.unique_filename = f"{uuid.uuid4()}.{file_extension}"
+
+        os.makedirs("uploads", exist_ok=True)
+        upload.temp_file_path = f"uploads/{upload.unique_filename}"
+        with open(upload.temp_file_path, "wb") as buffer:
+            buffer.write(content)
+
+        # Vendor lookup needs the DB, so it runs later in the save phase
+        upload.processed_image_path, upload.invoice_results = process_image(
+            upload.temp_file_path, content, None, None,
+            invoice_results=upload.cached_results, pdf_bytes=pdf_bytes
+        )
+
+        # Try to upload to S3, fallback to local if it fails
+        try:
+            s3_key, _ = upload_to_s3(upload.processed_image_path, upload.unique_filename)
+            upload.s3_key = s3_key
+            upload.s3_url = s3_key
+            upload.processing_status = "completed"
+
+            _remove_file(upload.processed_image_path)
+            _remove_file(upload.temp_file_path)
+
+        except Exception as s3_error:
+            logger.warning(f"S3 upload failed for {upload.filename}, using local storage: {s3_error}")
+            upload.s3_key = f"local/{upload.unique_filename}"
+            upload.s3_url = f"local/{upload.unique_filename}"
+            upload.processing_status = "completed_local"
+
+            if upload.processed_image_path != upload.temp_file_path:
+                shutil.move(upload.processed_image_path, upload.temp_file_path)
+                upload.processed_image_path = upload.temp_file_path
+
+        upload.status = "processed"
+
+    except Exception as e:
+        logger.error(f"[BULK_UPLOAD] Processing {upload.filename} failed: {e}")
+        _fail(upload, str(e))
+    finally:
+        upload.content = None  # Release the upload bytes as soon as the file is done
+
+
+def save_bulk_results(batch: BulkUploadBatch):
+    """
+    Save phase: persist every processed file of the batch in one DB session
+    and one commit. Runs on a worker thread.
+    """
+    from app.models import ProcessedImage, Company
+    from app.api.admin import (
+        ItemLookupCache, process_invoice_line_items,
+        extract_invoice_info_for_duplicate_check, check_duplicate_invoice
+    )
+    from app.services.enhanced_invoice_processing import apply_vendor_lookup
+
+    uploads = [upload for upload in batch.files if upload.status == "processed"]
+    if not uploads:
+        return
+
+    db = SessionLocal()
+    try:
+        vendor_cache: Dict[tuple, Dict[str, Any]] = {}
+        item_lookup = None
+        if batch.document_type == "invoice" and batch.company_id:
+            item_lookup = ItemLookupCache(db, batch.company_id)
+
+        saved = []
+        documents_processed = 0
+
+        for upload in uploads:
+            invoice_results = upload.invoice_results
+
+            # Every file is counted, duplicate or served from the result cache.
+            # Cache hits already carry their vendor lookup.
+            documents_processed += 1
+            if not upload.cached_results and invoice_results.get("structured_data"):
+                invoice_results["structured_data"], invoice_results["vendor_lookup"] = apply_vendor_lookup(
+                    invoice_results["structured_data"], db, batch.company_id, vendor_cache
+                )
+
+            structured_data = invoice_results.get("structured_data")
+            savepoint = db.begin_nested()
+            try:
+                # Prepare structured data for storage
+                structured_data_json = None
+                extraction_confidence = 0.0
+
+                if structured_data:
+                    structured_data_json = json.dumps(structured_data)
+                    if isinstance(structured_data, dict):
+                        validation = structured_data.get("validation", {})
+                        extraction_confidence = float(validation.get("confidence_score", 0))
+
+                        # Check for duplicate invoice (within same company). Earlier files of
+                        # this batch are flushed, so duplicates inside the batch are caught too.
+                        invoice_number, supplier_name = extract_invoice_info_for_duplicate_check(structured_data)
+                        is_duplicate, existing_id = check_duplicate_invoice(
+                            db, invoice_number, supplier_name, batch.company_id
+                        )
+
+                        if is_duplicate:
+                            savepoint.rollback()
+                            _remove_file(upload.temp_file_path)
+                            upload.status = "duplicate"
+                            upload.error = f"Duplicate invoice - Invoice number '{invoice_number}' already exists (ID: {existing_id})"
+                            upload.error_entry = {
+                                "filename": upload.filename,
+                                "error": upload.error,
+                                "is_duplicate": True,
+                                "existing_id": existing_id
+                            }
+                            continue
+
+                enhancement_features = invoice_results.get("enhancement_features", {})
+
+                db_image = ProcessedImage(
+                    user_id=batch.user_id,
+                    original_filename=upload.filename,
+                    s3_key=upload.s3_key,
+                    s3_url=upload.s3_url,
+                    processing_status=upload.processing_status,
+                    document_type=batch.document_type,
+                    invoice_category=batch.invoice_category if batch.document_type == "invoice" else None,
+                    ocr_extracted_words=int(invoice_results.get("total_words_extracted", 0)),
+                    ocr_average_confidence=float(invoice_results.get("average_confidence", 0.0)),
+                    ocr_preprocessing_methods=int(enhancement_features.get("multiple_preprocessing", 1)),
+                    patterns_detected=int(enhancement_features.get("pattern_recognition", 0)),
+                    has_structured_data=bool(structured_data),
+                    structured_data=structured_data_json,
+                    extraction_confidence=float(extraction_confidence),
+                    processing_method="enhanced"
+                )
+                db.add(db_image)
+                db.flush()
+
+                # Process line items: match with Item Master and create InvoiceItem records
+                line_items_result = None
+                if structured_data and batch.document_type == "invoice":
+                    line_items_result = process_invoice_line_items(
+                        db=db,
+                        invoice_id=db_image.id,
+                        structured_data=structured_data,
+                        company_id=batch.company_id,
+                        user_id=batch.user_id,
+                        item_lookup=item_lookup,
+                        commit=False
+                    )
+
+                savepoint.commit()
+                saved.append((upload, db_image, structured_data_json, line_items_result))
+
+            except Exception as e:
+                savepoint.rollback()
+                logger.error(f"[BULK_UPLOAD] Saving {upload.filename} failed: {e}")
+                _fail(upload, str(e))
+
+        if documents_processed and batch.company_id:
+            company = db.query(Company).filter(Company.id == batch.company_id).first()
+            if company:
+                company.documents_used_this_month += documents_processed
+                logger.info(f"[DOCUMENT_COUNTER] Bulk upload - Company {company.id}: +{documents_processed}, now {company.documents_used_this_month}")
+
+        db.commit()
+
+        for upload, db_image, structured_data_json, line_items_result in saved:
+            upload.status = "saved"
+            upload.result = {
+                "id": db_image.id,
+                "original_filename": db_image.original_filename,
+                "processing_status": db_image.processing_status,
+                "document_type": db_image.document_type,
+                "created_at": db_image.created_at.isoformat(),
+                "structured_data": structured_data_json,
+                "vendor_lookup": upload.invoice_results.get("vendor_lookup"),
+                "line_items_processing": line_items_result
+            }
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[BULK_UPLOAD] Batch {batch.batch_id} commit failed: {e}")
+        for upload in uploads:
+            if upload.status in ("processed", "saved"):
+                upload.result = None
+                _fail(upload, f"Database commit failed: {e}")
+    finally:
+        db.close()
+
+
+class BulkUploadPipeline:
+    """
+    Worker pool and in-process registry for bulk upload batches.
+
+    The executor is created lazily on the first batch, like the document queue.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batches: Dict[str, BulkUploadBatch] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self) -> int:
+        return max(1, self._max_workers or settings.bulk_upload_workers)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="bulk-upload"
+            )
+            logger.info(f"Bulk upload pipeline started with {self.max_workers} workers")
+        return self._executor
+
+    def create_batch(self, user_id: int, company_id: Optional[int],
+                     document_type: str = "invoice", invoice_category: str = None) -> BulkUploadBatch:
+        batch = BulkUploadBatch(
+            batch_id=uuid.uuid4().hex,
+            user_id=user_id,
+            company_id=company_id,
+            document_type=document_type,
+            invoice_category=invoice_category
+        )
+        with self._lock:
+            self._prune()
+            self._batches[batch.batch_id] = batch
+        return batch
+
+    def _prune(self):
+        cutoff = time.monotonic() - LOCAL_BATCH_RETENTION
+        for batch_id in [b.batch_id for b in self._batches.values() if b.finished_at and b.finished_at < cutoff]:
+            del self._batches[batch_id]
+
+    async def run(self, batch: BulkUploadBatch) -> Dict[str, Any]:
+        """Process a batch and return the bulk upload response."""
+        from app.services.cache import cache_service
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        logger.info(f"[BULK_UPLOAD] Batch {batch.batch_id}: {len(batch.files)} files, {self.max_workers} workers")
+
+        try:
+            await self._publish(batch)
+
+            futures = [
+                loop.run_in_executor(executor, extract_bulk_file, upload)
+                for upload in batch.files if upload.status == "queued"
+            ]
+            for future in asyncio.as_completed(futures):
+                await future
+                await self._publish(batch)
+
+            batch.status = "saving"
+            await loop.run_in_executor(executor, save_bulk_results, batch)
+
+            # Cache fresh results (after the vendor lookup, like the single upload does)
+            for upload in batch.files:
+                if upload.status == "saved" and upload.content_hash and not upload.cached_results:
+                    await cache_service.set_document_result(batch.company_id, upload.content_hash, upload.invoice_results)
+
+            batch.status = "completed"
+
+        except Exception as e:
+            logger.error(f"[BULK_UPLOAD] Batch {batch.batch_id} failed: {e}")
+            for upload in batch.files:
+                if upload.status in ("queued", "processing", "processed"):
+                    _fail(upload, str(e))
+            batch.status = "failed"
+
+        batch.response = batch.build_response()
+        batch.completed_at = datetime.utcnow()
+        batch.finished_at = time.monotonic()
+        await self._publish(batch)
+
+        response = batch.response
+        logger.info(
+            f"[BULK_UPLOAD] Batch {batch.batch_id} {batch.status}: {response['successful']} saved, "
+            f"{response['skipped_duplicates']} duplicates, {response['failed']} failed"
+        )
+        return response
+
+    def start(self, batch: BulkUploadBatch):
+        """Run a batch in the background of the current event loop."""
+        task = asyncio.get_running_loop().create_task(self.run(batch))
+        # Keep a reference so the task isn't garbage collected before it finishes
+        self._tasks[batch.batch_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(batch.batch_id, None))
+        return task
+
+    async def _publish(self, batch: BulkUploadBatch):
+        if not batch.company_id:
+            return
+        from app.services.cache import cache_service
+        await cache_service.set_bulk_upload_status(batch.company_id, batch.batch_id, batch.snapshot())
+
+    async def get_status(self, batch_id: str, company_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Progress snapshot of a batch of this company, or None if unknown."""
+        batch = self._batches.get(batch_id)
+        if batch is not None:
+            return batch.snapshot() if batch.company_id == company_id else None
+        if not company_id:
+            return None
+        from app.services.cache import cache_service
+        return await cache_service.get_bulk_upload_status(company_id, batch_id)
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+            logger.info("Bulk upload pipeline stopped")
+
+
+# Global pipeline instance - import this in other modules
+bulk_upload_pipeline = BulkUploadPipeline()
@@ -20,8 +20,18 @@ Usage:
 
     # Invalidate on mutations
     await cache_service.invalidate_items(company_id)
+
+    # Several keys in one round-trip
+    values = await cache_service.get_many(company_id, [("document_result", h1), ("document_result", h2)])
+
+Invalidation of items, ledger, stock and document result caches is generation based: each of
+these namespaces has a per-company version counter that is embedded in its
+cache keys. Invalidating is a single INCR of the counter; entries written
+under an older version are never read again and simply expire by TTL. This
+avoids SCAN, whose cost grows with the whole (multi-tenant) keyspace.
 """
 import json
+import time
 import logging
 import hashlib
 import aiohttp
@@ -53,6 +63,7 @@ class CacheService:
         self._use_upstash = False
         self._upstash_url = None
         self._upstash_token = None
+        self._http: Optional[aiohttp.ClientSession] = None
 
     async def connect(self):
         """Initialize Redis connection (local or Upstash)"""
@@ -75,21 +86,26 @@ class CacheService:
             self._upstash_token = settings.upstash_redis_rest_token
             self._use_upstash = True
 
+            # One long-lived session for all requests: connections (and their TLS
+            # handshakes) are kept alive and reused instead of opened per command
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=settings.upstash_max_connections),
+                timeout=aiohttp.ClientTimeout(total=settings.upstash_request_timeout),
+                headers={"Authorization": f"Bearer {self._upstash_token}"}
+            )
+
             # Test connection with PING
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self._upstash_url}/ping",
-                    headers={"Authorization": f"Bearer {self._upstash_token}"}
-                ) as response:
-                    if response.status == 200:
-                        self._connected = True
-                        logger.info(f"Upstash Redis connected successfully to {self._upstash_url}")
-                    else:
-                        raise Exception(f"Upstash PING failed: {response.status}")
+            async with self._http.post(f"{self._upstash_url}/ping") as response:
+                if response.status == 200:
+                    self._connected = True
+                    logger.info(f"Upstash Redis connected successfully to {self._upstash_url}")
+                else:
+                    raise Exception(f"Upstash PING failed: {response.status}")
         except Exception as e:
             logger.warning(f"Failed to connect to Upstash Redis (caching disabled): {e}")
             self._connected = False
             self._use_upstash = False
+            await self._close_http()
 
     async def _connect_local_redis(self, settings):
         """Connect to local Redis server"""
@@ -109,10 +125,16 @@ class CacheService:
             self._redis = None
             self._connected = False
 
+    async def _close_http(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
     async def disconnect(self):
         """Close Redis connection"""
         if self._redis and not self._use_upstash:
             await self._redis.close()
+        await self._close_http()
         self._connected = False
         logger.info("Redis cache connection closed")
 
@@ -120,7 +142,7 @@ class CacheService:
     def is_connected(self) -> bool:
         """Check if Redis is connected and available"""
         if self._use_upstash:
-            return self._connected and self._upstash_url is not None
+            return self._connected and self._http is not None
         return self._connected and self._redis is not None
 
     def _key(self, company_id: int, *parts: str) -> str:
@@ -135,26 +157,70 @@ class CacheService:
     async def _upstash_request(self, command: list) -> Any:
         """Execute Upstash REST API request"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self._upstash_url,
-                    headers={
-                        "Authorization": f"Bearer {self._upstash_token}",
-                        "Content-Type": "application/json"
-                    },
-                    json=command
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data.get("result")
-                    else:
-                        text = await response.text()
-                        logger.warning(f"Upstash request failed: {response.status} - {text}")
-                        return None
+            async with self._http.post(self._upstash_url, json=command) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data.get("result")
+                else:
+                    text = await response.text()
+                    logger.warning(f"Upstash request failed: {response.status} - {text}")
+                    return None
         except Exception as e:
             logger.warning(f"Upstash request error: {e}")
             return None
 
+    async def _upstash_pipeline(self, commands: List[list]) -> List[Any]:
+        """
+        Execute several commands in one Upstash REST round-trip (/pipeline).
+
+        Returns one result per command (None where that command failed).
+        """
+        if not commands:
+            return []
+        try:
+            async with self._http.post(f"{self._upstash_url}/pipeline", json=commands) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    results = []
+                    for entry in data:
+                        if "error" in entry:
+                            logger.warning(f"Upstash pipeline command failed: {entry['error']}")
+                        results.append(entry.get("result"))
+                    return results
+                else:
+                    text = await response.text()
+                    logger.warning(f"Upstash pipeline failed: {response.status} - {text}")
+                    return [None] * len(commands)
+        except Exception as e:
+            logger.warning(f"Upstash pipeline error: {e}")
+            return [None] * len(commands)
+
+    async def pipeline(self, commands: List[list]) -> List[Any]:
+        """
+        Execute raw commands (full keys) in a single round-trip.
+
+        Uses Upstash /pipeline or a non-transactional redis-py pipeline.
+        Returns one result per command, None where that command failed; all
+        None if the cache is unavailable.
+        """
+        if not self.is_connected or not commands:
+            return [None] * len(commands)
+        if self._use_upstash:
+            return await self._upstash_pipeline(commands)
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            for command in commands:
+                pipe.execute_command(*command)
+            results = await pipe.execute(raise_on_error=False)
+            # redis-py returns the exception object in place of a failed command's result
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.warning(f"Cache pipeline command failed: {result}")
+            return [None if isinstance(result, Exception) else result for result in results]
+        except Exception as e:
+            logger.warning(f"Cache pipeline error: {e}")
+            return [None] * len(commands)
+
     async def get(self, company_id: int, *key_parts: str) -> Optional[Any]:
         """Get cached value for a specific company"""
         if not self.is_connected:
@@ -176,6 +242,30 @@ class CacheService:
             logger.warning(f"Cache get error: {e}")
             return None
 
+    async def get_many(self, company_id: int, keys: List[tuple]) -> List[Optional[Any]]:
+        """
+        Get several cached values of a company in one round-trip (MGET).
+
+        keys is a list of key part tuples; returns values in the same order,
+        None for misses.
+        """
+        if not self.is_connected or not keys:
+            return [None] * len(keys)
+        try:
+            full_keys = [self._key(company_id, *key_parts) for key_parts in keys]
+
+            if self._use_upstash:
+                data = await self._upstash_request(["MGET", *full_keys])
+            else:
+                data = await self._redis.mget(full_keys)
+
+            data = data or [None] * len(full_keys)
+            logger.debug(f"Cache MGET: {sum(1 for d in data if d)}/{len(full_keys)} hits")
+            return [json.loads(d) if d else None for d in data]
+        except Exception as e:
+            logger.warning(f"Cache get_many error: {e}")
+            return [None] * len(keys)
+
     async def set(
         self,
         company_id: int,
@@ -229,23 +319,30 @@ class CacheService:
             full_pattern = f"company:{company_id}:{pattern}"
 
             if self._use_upstash:
-                # Upstash: Use SCAN to find keys, then delete
+                # Upstash: SCAN to find keys; the DEL for each page rides in the same
+                # /pipeline round-trip as the next SCAN
                 cursor = "0"
-                all_keys = []
+                pending_keys = []
+                deleted = 0
                 while True:
-                    result = await self._upstash_request(["SCAN", cursor, "MATCH", full_pattern, "COUNT", "100"])
-                    if result:
-                        cursor = result[0]
-                        keys = result[1] if len(result) > 1 else []
-                        all_keys.extend(keys)
-                        if cursor == "0":
-                            break
-                    else:
+                    commands = [["SCAN", cursor, "MATCH", full_pattern, "COUNT", "1000"]]
+                    if pending_keys:
+                        commands.insert(0, ["DEL", *pending_keys])
+                        deleted += len(pending_keys)
+                    result = (await self._upstash_pipeline(commands))[-1]
+                    if not result:
+                        pending_keys = []
+                        break
+                    cursor = str(result[0])
+                    pending_keys = result[1] if len(result) > 1 else []
+                    if cursor == "0":
                         break
 
-                if all_keys:
-                    await self._upstash_request(["DEL", *all_keys])
-                    logger.info(f"Cache INVALIDATE: {len(all_keys)} keys matching '{full_pattern}'")
+                if pending_keys:
+                    await self._upstash_request(["DEL", *pending_keys])
+                    deleted += len(pending_keys)
+                if deleted:
+                    logger.info(f"Cache INVALIDATE: {deleted} keys matching '{full_pattern}'")
             else:
                 keys = []
                 async for key in self._redis.scan_iter(match=full_pattern):
@@ -256,6 +353,75 @@ class CacheService:
         except Exception as e:
             logger.warning(f"Cache invalidate error: {e}")
 
+    # ================================================================
+    # Namespace Versions (generation-based invalidation)
+    # ================================================================
+
+    def _version_key(self, company_id: int, namespace: str) -> str:
+        return self._key(company_id, "version", namespace)
+
+    async def namespace_version(self, company_id: int, *namespaces: str) -> Optional[str]:
+        """
+        Current generation of one or more namespaces, as a cache key component.
+
+        Returns None if the cache is unavailable (callers then skip caching).
+        A missing counter is seeded with the current time in ms rather than 0,
+        so that if a counter is ever evicted, its new generations can't collide
+        with entries written before the eviction.
+        """
+        if not self.is_connected:
+            return None
+        try:
+            keys = [self._version_key(company_id, namespace) for namespace in namespaces]
+
+            if self._use_upstash:
+                versions = await self._upstash_request(["MGET", *keys])
+            else:
+                versions = await self._redis.mget(keys)
+            if versions is None:
+                return None
+
+            missing = [key for key, version in zip(keys, versions) if version is None]
+            if missing:
+                seed = str(int(time.time() * 1000))
+                results = await self.pipeline(
+                    [["SET", key, seed, "NX"] for key in missing] + [["MGET", *keys]]
+                )
+                versions = results[-1]
+                if not versions or any(version is None for version in versions):
+                    return None
+
+            return "v" + ".".join(str(version) for version in versions)
+        except Exception as e:
+            logger.warning(f"Cache version lookup error: {e}")
+            return None
+
+    async def bump_version(self, company_id: int, *namespaces: str):
+        """Invalidate every entry of the given namespaces (one INCR each, one round-trip)"""
+        if not self.is_connected:
+            return
+        await self.pipeline([["INCR", self._version_key(company_id, namespace)] for namespace in namespaces])
+        logger.debug(f"Cache INVALIDATE: company {company_id} namespaces {', '.join(namespaces)}")
+
+    async def bump_version_for_companies(self, company_ids: List[int], namespace: str):
+        """bump_version of one namespace for many companies (one round-trip)"""
+        if not self.is_connected or not company_ids:
+            return
+        await self.pipeline([["INCR", self._version_key(company_id, namespace)] for company_id in company_ids])
+        logger.debug(f"Cache INVALIDATE: namespace {namespace} for {len(company_ids)} companies")
+
+    async def _get_versioned(self, company_id: int, namespace: str, *key_parts: str) -> Optional[Any]:
+        version = await self.namespace_version(company_id, namespace)
+        if version is None:
+            return None
+        return await self.get(company_id, *key_parts, version)
+
+    async def _set_versioned(self, company_id: int, namespace: str, *key_parts: str, value: Any, ttl: int = None):
+        version = await self.namespace_version(company_id, namespace)
+        if version is None:
+            return
+        await self.set(company_id, *key_parts, version, value=value, ttl=ttl)
+
     # ================================================================
     # Item Master Cache Methods
     # ================================================================
@@ -268,8 +434,8 @@ class CacheService:
         filters_hash: str
     ) -> Optional[dict]:
         """Get cached paginated items list"""
-        return await self.get(
-            company_id, "items", f"p{page}", f"s{page_size}", filters_hash
+        return await self._get_versioned(
+            company_id, "items", "items", f"p{page}", f"s{page_size}", filters_hash
         )
 
     async def set_items_page(
@@ -281,33 +447,34 @@ class CacheService:
         data: dict
     ):
         """Cache paginated items list (5 min TTL)"""
-        await self.set(
-            company_id, "items", f"p{page}", f"s{page_size}", filters_hash,
+        await self._set_versioned(
+            company_id, "items", "items", f"p{page}", f"s{page_size}", filters_hash,
             value=data,
             ttl=300  # 5 minutes
         )
 
     async def get_item_detail(self, company_id: int, item_id: int) -> Optional[dict]:
         """Get cached single item details"""
-        return await self.get(company_id, "item", str(item_id))
+        return await self._get_versioned(company_id, "item", "item", str(item_id))
 
     async def set_item_detail(self, company_id: int, item_id: int, data: dict):
         """Cache single item details (10 min TTL)"""
-        await self.set(
-            company_id, "item", str(item_id),
+        await self._set_versioned(
+            company_id, "item", "item", str(item_id),
             value=data,
             ttl=600  # 10 minutes
         )
 
     async def invalidate_items(self, company_id: int):
-        """Invalidate all item caches for a company"""
-        await self.invalidate_pattern(company_id, "items:*")
-        await self.invalidate_pattern(company_id, "item:*")
+        """Invalidate all item caches (lists and details) for a company"""
+        await self.bump_version(company_id, "items", "item")
 
     async def invalidate_item(self, company_id: int, item_id: int):
         """Invalidate specific item and list caches"""
-        await self.delete(company_id, "item", str(item_id))
-        await self.invalidate_pattern(company_id, "items:*")
+        version = await self.namespace_version(company_id, "item")
+        if version is not None:
+            await self.delete(company_id, "item", str(item_id), version)
+        await self.bump_version(company_id, "items")
 
     # ================================================================
     # Warehouse Stock Cache Methods
@@ -319,7 +486,7 @@ class CacheService:
         warehouse_id: int
     ) -> Optional[dict]:
         """Get cached warehouse stock levels"""
-        return await self.get(company_id, "warehouse", str(warehouse_id), "stock")
+        return await self._get_versioned(company_id, "stock", "warehouse", str(warehouse_id), "stock")
 
     async def set_warehouse_stock(
         self,
@@ -328,20 +495,21 @@ class CacheService:
         data: dict
     ):
         """Cache warehouse stock (2 min TTL - changes frequently)"""
-        await self.set(
-            company_id, "warehouse", str(warehouse_id), "stock",
+        await self._set_versioned(
+            company_id, "stock", "warehouse", str(warehouse_id), "stock",
             value=data,
             ttl=120  # 2 minutes
         )
 
     async def invalidate_warehouse_stock(self, company_id: int, warehouse_id: int):
         """Invalidate stock cache for specific warehouse"""
-        await self.delete(company_id, "warehouse", str(warehouse_id), "stock")
+        version = await self.namespace_version(company_id, "stock")
+        if version is not None:
+            await self.delete(company_id, "warehouse", str(warehouse_id), "stock", version)
 
     async def invalidate_all_stock(self, company_id: int):
-        """Invalidate all stock caches for a company"""
-        await self.invalidate_pattern(company_id, "warehouse:*:stock")
-        await self.invalidate_pattern(company_id, "hhd:*:stock")
+        """Invalidate all stock caches (warehouses and HHDs) for a company"""
+        await self.bump_version(company_id, "stock")
 
     # ================================================================
     # HHD Stock Cache Methods
@@ -353,7 +521,7 @@ class CacheService:
         hhd_id: int
     ) -> Optional[dict]:
         """Get cached HHD stock levels"""
-        return await self.get(company_id, "hhd", str(hhd_id), "stock")
+        return await self._get_versioned(company_id, "stock", "hhd", str(hhd_id), "stock")
 
     async def set_hhd_stock(
         self,
@@ -362,15 +530,17 @@ class CacheService:
         data: dict
     ):
         """Cache HHD stock (2 min TTL)"""
-        await self.set(
-            company_id, "hhd", str(hhd_id), "stock",
+        await self._set_versioned(
+            company_id, "stock", "hhd", str(hhd_id), "stock",
             value=data,
             ttl=120  # 2 minutes
         )
 
     async def invalidate_hhd_stock(self, company_id: int, hhd_id: int):
         """Invalidate stock cache for specific HHD"""
-        await self.delete(company_id, "hhd", str(hhd_id), "stock")
+        version = await self.namespace_version(company_id, "stock")
+        if version is not None:
+            await self.delete(company_id, "hhd", str(hhd_id), "stock", version)
 
     # ================================================================
     # Item Ledger Cache Methods
@@ -383,7 +553,7 @@ class CacheService:
         filters_hash: str
     ) -> Optional[List]:
         """Get cached ledger entries for an item"""
-        return await self.get(company_id, "item", str(item_id), "ledger", filters_hash)
+        return await self._get_versioned(company_id, "ledger", "item", str(item_id), "ledger", filters_hash)
 
     async def set_item_ledger(
         self,
@@ -393,8 +563,8 @@ class CacheService:
         data: List
     ):
         """Cache ledger entries (15 min TTL - append-only data)"""
-        await self.set(
-            company_id, "item", str(item_id), "ledger", filters_hash,
+        await self._set_versioned(
+            company_id, "ledger", "item", str(item_id), "ledger", filters_hash,
             value=data,
             ttl=900  # 15 minutes
         )
@@ -405,7 +575,7 @@ class CacheService:
         filters_hash: str
     ) -> Optional[dict]:
         """Get cached ledger list (all items)"""
-        return await self.get(company_id, "ledger", filters_hash)
+        return await self._get_versioned(company_id, "ledger", "ledger", filters_hash)
 
     async def set_ledger_list(
         self,
@@ -414,17 +584,21 @@ class CacheService:
         data: dict
     ):
         """Cache ledger list (10 min TTL)"""
-        await self.set(
-            company_id, "ledger", filters_hash,
+        await self._set_versioned(
+            company_id, "ledger", "ledger", filters_hash,
             value=data,
             ttl=600  # 10 minutes
         )
 
     async def invalidate_ledger(self, company_id: int, item_id: Optional[int] = None):
-        """Invalidate ledger caches"""
-        if item_id:
-            await self.invalidate_pattern(company_id, f"item:{item_id}:ledger:*")
-        await self.invalidate_pattern(company_id, "ledger:*")
+        """
+        Invalidate ledger caches.
+
+        Every ledger mutation also changes the all-items ledger list, so the whole
+        ledger namespace (lists and per-item ledgers) is bumped; item_id is accepted
+        for existing callers.
+        """
+        await self.bump_version(company_id, "ledger")
 
     # ================================================================
     # Invoice Item Suggestions Cache Methods
@@ -459,10 +633,135 @@ class CacheService:
             await self.invalidate_pattern(company_id, "invoice_suggestions:*")
 
 
+    # ================================================================
+    # Document Processing Result Cache Methods
+    # ================================================================
+
+    async def get_document_result(
+        self,
+        company_id: int,
+        content_hash: str
+    ) -> Optional[dict]:
+        """Get cached OCR/AI processing result for an uploaded file's content hash"""
+        result = await self._get_versioned(company_id, "document_result", "document_result", content_hash)
+        if result:
+            result["cache_hit"] = True
+            result.setdefault("ocr_data", {"words": [], "lines": [], "patterns": {}})
+        return result
+
+    async def get_document_results(
+        self,
+        company_id: int,
+        content_hashes: List[str]
+    ) -> List[Optional[dict]]:
+        """get_document_result for several uploads in one round-trip"""
+        version = await self.namespace_version(company_id, "document_result")
+        if version is None:
+            return [None] * len(content_hashes)
+        results = await self.get_many(
+            company_id, [("document_result", content_hash, version) for content_hash in content_hashes]
+        )
+        for result in results:
+            if result:
+                result["cache_hit"] = True
+                result.setdefault("ocr_data", {"words": [], "lines": [], "patterns": {}})
+        return results
+
+    async def set_document_result(
+        self,
+        company_id: int,
+        content_hash: str,
+        data: dict
+    ):
+        """
+        Cache a successful process_invoice_image_enhanced result.
+
+        Raw OCR words/lines are dropped - callers only read the structured
+        data, counters and vendor lookup - so entries stay small.
+        """
+        from app.config import settings
+        if not data or not data.get("success"):
+            return
+        payload = {k: v for k, v in data.items() if k not in ("ocr_data", "cache_hit")}
+        await self._set_versioned(
+            company_id, "document_result", "document_result", content_hash,
+            value=payload,
+            ttl=settings.document_cache_ttl
+        )
+
+    async def invalidate_document_results(self, company_id: int):
+        """
+        Invalidate all cached document processing results for a company.
+
+        Cached results carry the vendor lookup, so this runs whenever a vendor
+        in the company's Address Book changes.
+        """
+        await self.bump_version(company_id, "document_result")
+
+    # ================================================================
+    # Bulk Upload Progress Methods
+    # ================================================================
+
+    async def get_bulk_upload_status(self, company_id: int, batch_id: str) -> Optional[dict]:
+        """Get the latest progress snapshot of a bulk upload batch"""
+        return await self.get(company_id, "bulk_upload", batch_id)
+
+    async def set_bulk_upload_status(self, company_id: int, batch_id: str, data: dict):
+        """
+        Store a bulk upload progress snapshot.
+
+        Lets any API process answer the status endpoint, not only the one
+        running the batch.
+        """
+        from app.config import settings
+        await self.set(
+            company_id, "bulk_upload", batch_id,
+            value=data,
+            ttl=settings.bulk_upload_status_ttl
+        )
+
+
 # ================================================================
 # Helper Functions
 # ================================================================
 
+def _hash_image_content(content: bytes, digest):
+    from PIL import Image, ImageOps
+    import io
+
+    with Image.open(io.BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image)
+        digest.update(f"image:{image.mode}:{image.width}x{image.height}:".encode())
+        digest.update(image.tobytes())
+
+
+def hash_document(content: bytes) -> str:
+    """
+    Content address for an uploaded document.
+
+    - images: SHA-256 over the decoded, EXIF-oriented pixels, so the same
+      photo re-saved on the way (app retries, forwarded emails) maps to the
+      same processing result; metadata and lossless re-encoding don't change
+      the key;
+    - PDFs: SHA-256 of the raw bytes. Page content streams alone don't
+      identify a PDF: template invoices share them and differ only in form
+      XObjects, fonts and other resources.
+
+    Falls back to the raw bytes if the image can't be decoded. CPU-bound:
+    call it from a worker thread in async code.
+    """
+    if content[:5] == b"%PDF-":
+        return hashlib.sha256(content).hexdigest()
+
+    digest = hashlib.sha256()
+    try:
+        _hash_image_content(content, digest)
+    except Exception as e:
+        logger.debug(f"Could not normalize document for hashing, using raw bytes: {e}")
+        return hashlib.sha256(content).hexdigest()
+    return digest.hexdigest()
+
+
 def hash_filters(**filters) -> str:
     """
     Create a short hash of filter parameters for cache key.
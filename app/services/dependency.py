@@ -1,34 +1,19 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import User, RolePermission, Permission
+from app.models import User
 
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.utils.security import verify_token
+from app.services.auth_context import get_context_user
+from app.services.permission_cache import permission_cache
 
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get the current authenticated user"""
-    token = credentials.credentials
-    email = verify_token(token)
-
-    if not email:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-
-    user = db.query(User).filter(User.email == email).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    return user  
+    # Token and user are resolved once per request and shared with the middlewares
+    return get_context_user(request, credentials.credentials)
 
 def require_permission(module: str, action: str):
     """Dependency to check if current user has a specific permission"""
@@ -36,18 +21,7 @@ def require_permission(module: str, action: str):
         current_user: User = Depends(get_current_user),
         db: Session = Depends(get_db)
     ):
-        # Load permissions of the user's role
-        role_permissions = (
-            db.query(RolePermission)
-            .join(Permission)
-            .filter(RolePermission.role_id == current_user.role_id)
-            .all()
-        )
-
-        allowed = any(
-            rp.permission.module == module and rp.permission.action == action
-            for rp in role_permissions
-        )
+        allowed = await permission_cache.has_permission(db, current_user, module, action)
 
         if not allowed:
             raise HTTPException(
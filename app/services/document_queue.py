@@ -0,0 +1,423 @@
+"""
+Background Document Processing Queue
+
+Runs the invoice OCR/AI pipeline outside the request/response cycle.
+
+Uploads submitted with ``async_processing=true`` are persisted immediately as a
+ProcessedImage in ``queued`` status and handed to a bounded local worker pool.
+Each job opens its own DB session, retries failed attempts with a linear
+backoff, and moves the record through:
+
+    queued -> processing -> completed | completed_local | failed
+
+Worker threads (rather than processes) are used because the heavy steps -
+Tesseract (subprocess), OpenCV and the Gemini HTTP call - release the GIL,
+and the vendor lookup needs a regular SQLAlchemy session.
+
+The queue itself lives in process memory. A record left ``queued`` or
+``processing`` for longer than ``document_queue_stale_after`` (the process
+that owned it was restarted) is stale: recover_stale_jobs() re-enqueues such
+records on startup, or marks them failed when the upload is gone or the
+attempts are used up, and /images/{id}/retry accepts them.
+
+The uploader's document quota is reserved when a job is enqueued
+(reserve_document_quota, a conditional UPDATE, so concurrent uploads can't
+take the counter below zero) and given back when the job fails permanently.
+
+Usage:
+    from app.services.document_queue import document_queue
+
+    document_queue.submit(DocumentJob(image_id=..., file_path=..., ...))
+
+    # On startup (processes that mount the image routes)
+    recover_stale_jobs()
+
+    # On shutdown
+    document_queue.shutdown()
+"""
+import os
+import time
+import shutil
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from sqlalchemy import func, or_, select
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Statuses of a record some process's queue is (or was) working on
+ACTIVE_STATUSES = ("queued", "processing")
+
+
+@dataclass
+class DocumentJob:
+    """A single queued upload waiting for OCR/AI processing."""
+    image_id: int
+    file_path: str  # Local file written at upload time (uploads/<unique_filename>)
+    unique_filename: str
+    user_id: int
+    company_id: Optional[int]
+    document_type: str = "invoice"
+    content_hash: Optional[str] = None  # Set when the result should go to the document result cache
+    pdf_path: Optional[str] = None  # Original PDF for multi-page extraction (file_path is its first-page render)
+
+
+class DocumentQueue:
+    """
+    Bounded worker pool for document processing jobs.
+
+    The executor is created lazily on first submit so that importing this
+    module (or running a process that never accepts uploads) costs nothing.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def max_workers(self) -> int:
+        return max(1, self._max_workers or settings.document_queue_workers)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="document-queue"
+            )
+            logger.info(f"Document queue started with {self.max_workers} workers")
+        return self._executor
+
+    def submit(self, job: DocumentJob):
+        """Hand a job to the worker pool. Returns immediately."""
+        logger.info(f"[DOCUMENT_QUEUE] Queued image {job.image_id} ({job.unique_filename})")
+        # Remember the app's event loop so workers can hand async cache writes back to it
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called from a sync route handler (worker thread): ask the loop that runs it
+            try:
+                from anyio import from_thread
+                self._loop = from_thread.run_sync(asyncio.get_running_loop)
+            except RuntimeError:
+                pass
+        return self._get_executor().submit(self._run_with_retries, job)
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting jobs. In-flight jobs finish unless the process exits."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+            logger.info("Document queue stopped")
+
+    def _run_with_retries(self, job: DocumentJob):
+        max_attempts = max(1, settings.document_queue_max_attempts)
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                invoice_results = process_document_job(job)
+                self._cache_result(job, invoice_results)
+                return
+            except Exception as e:
+                logger.warning(
+                    f"[DOCUMENT_QUEUE] Image {job.image_id} attempt {attempt}/{max_attempts} failed: {e}"
+                )
+                if attempt < max_attempts:
+                    time.sleep(settings.document_queue_retry_delay * attempt)
+                else:
+                    _mark_failed(job, str(e))
+
+    def _cache_result(self, job: DocumentJob, invoice_results: Optional[dict]):
+        """Store the result in the document result cache (async API) from a worker thread."""
+        if not (job.content_hash and job.company_id and invoice_results and self._loop):
+            return
+        from app.services.cache import cache_service
+        try:
+            asyncio.run_coroutine_threadsafe(
+                cache_service.set_document_result(job.company_id, job.content_hash, invoice_results),
+                self._loop
+            )
+        except Exception as e:
+            logger.warning(f"[DOCUMENT_QUEUE] Could not cache result for image {job.image_id}: {e}")
+
+
+def reserve_document_quota(db, user_id: int) -> bool:
+    """
+    Take one document from the user's quota for a queued job, in the caller's
+    transaction. False (nothing taken) if no documents remain.
+    """
+    from app.models import User
+
+    return db.query(User).filter(
+        User.id == user_id,
+        User.remaining_documents > 0
+    ).update({User.remaining_documents: User.remaining_documents - 1}, synchronize_session=False) == 1
+
+
+def refund_document_quota(db, user_id: Optional[int]):
+    """Give back the document reserved for a job that won't complete, in the caller's transaction."""
+    from app.models import User
+
+    if user_id is None:
+        return
+    db.query(User).filter(User.id == user_id).update(
+        {User.remaining_documents: User.remaining_documents + 1}, synchronize_session=False
+    )
+
+
+def _mark_failed(job: DocumentJob, error: str):
+    """
+    Record a permanent failure and refund the reserved document. The uploaded
+    file is kept so the job can be retried.
+    """
+    from app.models import ProcessedImage
+
+    db = SessionLocal()
+    try:
+        failed = db.query(ProcessedImage).filter(
+            ProcessedImage.id == job.image_id,
+            ProcessedImage.processing_status != "failed"
+        ).update({
+            ProcessedImage.processing_status: "failed",
+            ProcessedImage.processing_error: error[:2000],
+            ProcessedImage.updated_at: func.now(),
+        }, synchronize_session=False)
+        if failed:
+            refund_document_quota(db, job.user_id)
+        db.commit()
+        logger.error(f"[DOCUMENT_QUEUE] Image {job.image_id} failed permanently: {error}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[DOCUMENT_QUEUE] Could not mark image {job.image_id} as failed: {e}")
+    finally:
+        db.close()
+
+
+def _db_now(db) -> datetime:
+    """Database clock, the one ProcessedImage.updated_at is stamped with (naive, like the column)."""
+    now = db.execute(select(func.now())).scalar()
+    return now.replace(tzinfo=None) if now.tzinfo else now
+
+
+def stale_before(db) -> datetime:
+    """Queued/processing records last updated before this are no longer owned by a live worker."""
+    return _db_now(db) - timedelta(seconds=settings.document_queue_stale_after)
+
+
+def is_stale(image, cutoff: datetime) -> bool:
+    """A queued/processing record whose worker is gone (see stale_before)."""
+    return image.processing_status in ACTIVE_STATUSES and (image.updated_at is None or image.updated_at < cutoff)
+
+
+def job_for_image(image, company_id: Optional[int]) -> Optional[DocumentJob]:
+    """Rebuild the job of a ProcessedImage from its local upload, or None if the file is gone."""
+    unique_filename = (image.s3_key or "").replace("local/", "")
+    file_path = f"uploads/{unique_filename}"
+    if not unique_filename or not os.path.exists(file_path):
+        return None
+
+    # PDF uploads keep the original next to the first-page render until processed
+    pdf_path = f"uploads/{unique_filename.rsplit('.', 1)[0]}.pdf"
+    return DocumentJob(
+        image_id=image.id,
+        file_path=file_path,
+        unique_filename=unique_filename,
+        user_id=image.user_id,
+        company_id=company_id,
+        document_type=image.document_type or "invoice",
+        pdf_path=pdf_path if os.path.exists(pdf_path) else None
+    )
+
+
+def recover_stale_jobs() -> int:
+    """
+    Re-enqueue the stale queued/processing records left by a restarted process.
+
+    Each record is claimed with a conditional UPDATE, so processes starting at
+    the same time recover it once. Records whose upload is gone or whose
+    attempts are used up are marked failed and their reserved document is
+    refunded. Returns the number re-enqueued.
+    """
+    from app.models import ProcessedImage, User
+
+    db = SessionLocal()
+    recovered = failed = 0
+    try:
+        cutoff = stale_before(db)
+        stale = or_(ProcessedImage.updated_at.is_(None), ProcessedImage.updated_at < cutoff)
+        rows = db.query(ProcessedImage, User.company_id).outerjoin(
+            User, ProcessedImage.user_id == User.id
+        ).filter(
+            ProcessedImage.processing_status.in_(ACTIVE_STATUSES),
+            stale
+        ).all()
+
+        for image, company_id in rows:
+            job = job_for_image(image, company_id)
+            exhausted = (image.processing_attempts or 0) >= max(1, settings.document_queue_max_attempts)
+            if job is None or exhausted:
+                values = {
+                    ProcessedImage.processing_status: "failed",
+                    ProcessedImage.processing_error: "Upload is no longer available" if job is None
+                    else "Processing was interrupted too many times",
+                }
+            else:
+                values = {ProcessedImage.processing_status: "queued"}
+            values[ProcessedImage.updated_at] = func.now()
+
+            claimed = db.query(ProcessedImage).filter(
+                ProcessedImage.id == image.id,
+                ProcessedImage.processing_status.in_(ACTIVE_STATUSES),
+                stale
+            ).update(values, synchronize_session=False)
+            if claimed and values[ProcessedImage.processing_status] == "failed":
+                refund_document_quota(db, image.user_id)
+            db.commit()
+            if not claimed:
+                continue  # Recovered by another process
+
+            if values[ProcessedImage.processing_status] == "queued":
+                document_queue.submit(job)
+                recovered += 1
+            else:
+                failed += 1
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[DOCUMENT_QUEUE] Stale job recovery failed: {e}")
+    finally:
+        db.close()
+
+    if recovered or failed:
+        logger.info(f"[DOCUMENT_QUEUE] Recovered stale jobs: {recovered} re-enqueued, {failed} marked failed")
+    return recovered
+
+
+def process_document_job(job: DocumentJob):
+    """
+    Run the full upload pipeline for a queued ProcessedImage.
+
+    Mirrors the synchronous /images/upload flow: OCR/AI extraction, document
+    counter, S3 upload (local fallback), structured data and line items. The
+    quota was reserved on enqueue. Returns the processing result; raises on failure so the caller can retry.
+    """
+    import json
+    from app.models import ProcessedImage, Company
+    from app.services.s3 import upload_to_s3, process_image
+    from app.api.admin import process_invoice_line_items
+
+    db = SessionLocal()
+    try:
+        image = db.query(ProcessedImage).filter(ProcessedImage.id == job.image_id).first()
+        if not image:
+            logger.warning(f"[DOCUMENT_QUEUE] Image {job.image_id} no longer exists, dropping job")
+            refund_document_quota(db, job.user_id)
+            db.commit()
+            return None
+
+        image.processing_status = "processing"
+        image.processing_attempts = (image.processing_attempts or 0) + 1
+        db.commit()
+
+        if not os.path.exists(job.file_path):
+            raise FileNotFoundError(f"Uploaded file not found: {job.file_path}")
+
+        with open(job.file_path, "rb") as f:
+            file_bytes = f.read()
+
+        pdf_bytes = None
+        if job.pdf_path and os.path.exists(job.pdf_path):
+            with open(job.pdf_path, "rb") as f:
+                pdf_bytes = f.read()
+
+        processed_image_path, invoice_results = process_image(
+            job.file_path, file_bytes, db, job.company_id, pdf_bytes=pdf_bytes
+        )
+
+        if not invoice_results.get("success", True):
+            if processed_image_path != job.file_path and os.path.exists(processed_image_path):
+                os.remove(processed_image_path)
+            raise Exception(invoice_results.get("error") or "Document processing failed")
+
+        # Count the API usage as soon as OCR/AI has run (same as the sync upload)
+        if job.company_id:
+            company = db.query(Company).filter(Company.id == job.company_id).first()
+            if company:
+                company.documents_used_this_month += 1
+                logger.info(f"[DOCUMENT_COUNTER] Queued upload - Company {company.id}: incremented to {company.documents_used_this_month}")
+
+        # Try to upload to S3, fallback to local if it fails
+        uploaded_files = []
+        try:
+            s3_key, _ = upload_to_s3(processed_image_path, job.unique_filename)
+            image.s3_key = s3_key
+            image.s3_url = s3_key
+            image.processing_status = "completed"
+
+            # Removed after the commit: a failed commit must leave the upload for the retry
+            uploaded_files = [processed_image_path, job.file_path]
+
+        except Exception as s3_error:
+            logger.warning(f"S3 upload failed, using local storage: {s3_error}")
+            image.s3_key = f"local/{job.unique_filename}"
+            image.s3_url = f"local/{job.unique_filename}"
+            image.processing_status = "completed_local"
+
+            if processed_image_path != job.file_path:
+                shutil.move(processed_image_path, job.file_path)
+
+        structured_data = invoice_results.get("structured_data")
+        extraction_confidence = 0.0
+        if isinstance(structured_data, dict):
+            validation = structured_data.get("validation", {})
+            extraction_confidence = float(validation.get("confidence_score", 0))
+
+        enhancement_features = invoice_results.get("enhancement_features", {})
+
+        image.ocr_extracted_words = int(invoice_results.get("total_words_extracted", 0))
+        image.ocr_average_confidence = float(invoice_results.get("average_confidence", 0.0))
+        image.ocr_preprocessing_methods = int(enhancement_features.get("multiple_preprocessing", 1))
+        image.patterns_detected = int(enhancement_features.get("pattern_recognition", 0))
+        image.has_structured_data = bool(structured_data)
+        image.structured_data = json.dumps(structured_data) if structured_data else None
+        image.extraction_confidence = extraction_confidence
+        image.processing_method = "enhanced"
+        image.processing_error = None
+
+        db.commit()
+
+        for path in uploaded_files + [job.pdf_path]:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+        if structured_data and job.document_type == "invoice" and job.company_id:
+            try:
+                line_items_result = process_invoice_line_items(
+                    db=db,
+                    invoice_id=image.id,
+                    structured_data=structured_data,
+                    company_id=job.company_id,
+                    user_id=job.user_id
+                )
+                logger.info(f"Line items processing: {line_items_result}")
+            except Exception as line_items_error:
+                logger.error(f"Error processing line items: {line_items_error}")
+
+        logger.info(f"[DOCUMENT_QUEUE] Image {job.image_id} processed ({image.processing_status})")
+        return invoice_results
+
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# Global queue instance - import this in other modules
+document_queue = DocumentQueue()
@@ -9,8 +9,6 @@ from email.mime.application import MIMEApplication
 from email import encoders
 from typing import Dict, Any, List
 from datetime import datetime
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from app.config import settings
 
 
@@ -171,6 +169,8 @@ CoreSRP Team
 
     def _create_excel_file(self, invoice_data_list: List[Dict[str, Any]]) -> bytes:
         """Create Excel file with Header and Details sheets"""
+        from openpyxl import Workbook
+
         wb = Workbook()
         
         # Remove default sheet
@@ -192,6 +192,7 @@ CoreSRP Team
 
     def _create_header_sheet(self, sheet, invoice_data_list: List[Dict[str, Any]]):
         """Create header sheet with summary information"""
+        from openpyxl.styles import Font, PatternFill, Alignment
         
         # Set up header row
         headers = [
@@ -253,6 +254,7 @@ CoreSRP Team
 
     def _create_details_sheet(self, sheet, invoice_data_list: List[Dict[str, Any]]):
         """Create details sheet with line items"""
+        from openpyxl.styles import Font, PatternFill, Alignment
         
         # Set up header row
         headers = [
@@ -4,10 +4,14 @@ import numpy as np
 import logging
 import os
 import json
+import copy
 from PIL import Image
 import google.generativeai as genai
 from typing import Optional, Dict, Any, List
 import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
 
 from app.config import settings
 
@@ -72,46 +76,123 @@ def preprocess_image_for_ocr_enhanced(file_bytes: bytes) -> List[np.ndarray]:
         raise
 
 
-def perform_enhanced_ocr(images: List[np.ndarray]) -> Dict[str, Any]:
+def _ocr_preprocessing_variant(index: int, image: np.ndarray) -> Dict[str, Any]:
+    """
+    Run Tesseract on a single preprocessed variant.
+    Safe to call from worker threads - pytesseract shells out to the tesseract binary.
+    """
+    data = pytesseract.image_to_data(image, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+
+    words_from_image = []
+    confidences = []
+    n_boxes = len(data['text'])
+
+    for j in range(n_boxes):
+        text = data['text'][j]
+        confidence = int(data['conf'][j])
+
+        if text.strip() and confidence > 30:  # Lower threshold for more data
+            words_from_image.append({
+                'text': text,
+                'left': data['left'][j],
+                'top': data['top'][j],
+                'width': data['width'][j],
+                'height': data['height'][j],
+                'confidence': confidence,
+                'preprocessing_method': index
+            })
+            confidences.append(confidence)
+
+    return {
+        'index': index,
+        'words': words_from_image,
+        'confidences': confidences,
+        'average_confidence': sum(confidences) / len(confidences) if confidences else 0
+    }
+
+
+_ocr_executor: Optional[ThreadPoolExecutor] = None
+_ocr_executor_lock = threading.Lock()
+
+
+def get_ocr_executor() -> ThreadPoolExecutor:
+    """
+    Process-wide Tesseract pool (settings.ocr_max_workers threads), shared by
+    every document so the document queue and bulk upload workers together
+    never run more OCR at once than this.
+    """
+    global _ocr_executor
+    if _ocr_executor is None:
+        with _ocr_executor_lock:
+            if _ocr_executor is None:
+                _ocr_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.ocr_max_workers),
+                    thread_name_prefix="ocr-variant"
+                )
+    return _ocr_executor
+
+
+def perform_enhanced_ocr(
+    images: List[np.ndarray],
+    max_workers: Optional[int] = None,
+    target_confidence: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Performs OCR on multiple processed images and combines results.
+
+    Variants are OCR'd on the shared OCR pool (get_ocr_executor). If
+    target_confidence (default settings.ocr_target_confidence) is > 0, at most
+    max_workers (default settings.ocr_variants_per_document) variants of the
+    document are in flight, and no further variant is started once one reaches
+    that average confidence; variants already running are awaited and kept.
     """
     try:
         all_words = []
         confidence_scores = []
-        
-        for i, image in enumerate(images):
-            try:
-                # Get word-level data
-                data = pytesseract.image_to_data(image, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
-                
-                words_from_image = []
-                n_boxes = len(data['text'])
-                
-                for j in range(n_boxes):
-                    text = data['text'][j]
-                    confidence = int(data['conf'][j])
-                    
-                    if text.strip() and confidence > 30:  # Lower threshold for more data
-                        word_info = {
-                            'text': text,
-                            'left': data['left'][j],
-                            'top': data['top'][j],
-                            'width': data['width'][j],
-                            'height': data['height'][j],
-                            'confidence': confidence,
-                            'preprocessing_method': i
-                        }
-                        words_from_image.append(word_info)
-                        confidence_scores.append(confidence)
-                
-                all_words.extend(words_from_image)
-                logger.info(f"Preprocessing method {i}: extracted {len(words_from_image)} words")
-                
-            except Exception as e:
-                logger.warning(f"OCR failed for preprocessing method {i}: {e}")
-                continue
-        
+
+        if max_workers is None:
+            max_workers = settings.ocr_variants_per_document
+        if target_confidence is None:
+            target_confidence = settings.ocr_target_confidence
+        # Without an early exit every variant runs anyway: submit them all
+        in_flight_limit = max(1, max_workers) if target_confidence else max(1, len(images))
+
+        executor = get_ocr_executor()
+        variant_results = {}
+        pending = {}
+        next_index = 0
+        target_reached = False
+
+        while pending or (next_index < len(images) and not target_reached):
+            while not target_reached and next_index < len(images) and len(pending) < in_flight_limit:
+                pending[executor.submit(_ocr_preprocessing_variant, next_index, images[next_index])] = next_index
+                next_index += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"OCR failed for preprocessing method {i}: {e}")
+                    continue
+
+                variant_results[i] = result
+                logger.info(f"Preprocessing method {i}: extracted {len(result['words'])} words")
+
+                if (target_confidence and not target_reached and result['words']
+                        and result['average_confidence'] >= target_confidence):
+                    target_reached = True
+                    logger.info(
+                        f"Preprocessing method {i} reached {result['average_confidence']:.1f}% confidence "
+                        f"(target {target_confidence}%), skipped {len(images) - next_index} remaining variants"
+                    )
+
+        # Combine in variant order so results don't depend on thread scheduling
+        for i in sorted(variant_results):
+            all_words.extend(variant_results[i]['words'])
+            confidence_scores.extend(variant_results[i]['confidences'])
+
         # Remove duplicates based on position and text similarity
         unique_words = remove_duplicate_words(all_words)
         
@@ -147,30 +228,56 @@ def perform_enhanced_ocr(images: List[np.ndarray]) -> Dict[str, Any]:
         }
 
 
-def remove_duplicate_words(words: List[Dict]) -> List[Dict]:
-    """Remove duplicate words based on position and text similarity."""
-    unique_words = []
-    position_threshold = 15  # pixels
-    
+def remove_duplicate_words(words: List[Dict], position_threshold: int = 15) -> List[Dict]:
+    """
+    Remove duplicate words based on position and text similarity.
+
+    Two words are duplicates when their lower-cased text matches and the Manhattan
+    distance between their top-left corners is below position_threshold pixels;
+    the higher-confidence word is kept.
+
+    Kept words are bucketed in a grid of position_threshold-sized cells keyed by
+    lower-cased text, so each word is only compared with same-text words in the
+    3x3 neighbouring cells instead of every word kept so far. Matching and output
+    order are identical to the original pairwise scan.
+    """
+    # (text, cell_x, cell_y) -> [(seq, word), ...]
+    buckets: Dict[tuple, List[tuple]] = {}
+    # seq -> (word, bucket key); dict insertion order == original list order
+    kept: Dict[int, tuple] = {}
+    next_seq = 0
+
     for word in words:
-        is_duplicate = False
-        for existing in unique_words:
-            # Check if words are in similar positions
-            pos_diff = abs(word['left'] - existing['left']) + abs(word['top'] - existing['top'])
-            text_similarity = word['text'].lower() == existing['text'].lower()
-            
-            if pos_diff < position_threshold and text_similarity:
-                # Keep the word with higher confidence
-                if word['confidence'] > existing['confidence']:
-                    unique_words.remove(existing)
-                    unique_words.append(word)
-                is_duplicate = True
-                break
-        
-        if not is_duplicate:
-            unique_words.append(word)
-    
-    return unique_words
+        text = word['text'].lower()
+        cell_x = word['left'] // position_threshold
+        cell_y = word['top'] // position_threshold
+
+        # The pairwise scan matched the first kept word in list order, i.e. lowest seq
+        match = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for seq, existing in buckets.get((text, cell_x + dx, cell_y + dy), ()):
+                    pos_diff = abs(word['left'] - existing['left']) + abs(word['top'] - existing['top'])
+                    if pos_diff < position_threshold and (match is None or seq < match):
+                        match = seq
+
+        if match is not None:
+            existing, existing_key = kept[match]
+            # Keep the word with higher confidence
+            if word['confidence'] <= existing['confidence']:
+                continue
+            del kept[match]
+            bucket = buckets[existing_key]
+            bucket.remove((match, existing))
+            if not bucket:
+                del buckets[existing_key]
+
+        key = (text, cell_x, cell_y)
+        buckets.setdefault(key, []).append((next_seq, word))
+        kept[next_seq] = (word, key)
+        next_seq += 1
+
+    return [word for word, _ in kept.values()]
 
 
 def group_words_into_lines(words: List[Dict]) -> List[Dict]:
@@ -291,39 +398,54 @@ def extract_patterns_from_text(words: List[Dict]) -> Dict[str, List]:
     return patterns
 
 
-def extract_with_vision_ai(file_bytes: bytes, ocr_data: Dict = None) -> Optional[Dict[str, Any]]:
+def _prepare_image_for_vision(file_bytes: bytes):
+    """Decode, convert to RGB and downscale an image for Gemini. Returns (PIL image, PNG bytes)."""
+    import io
+
+    # Convert bytes to PIL Image to ensure proper format
+    img = Image.open(io.BytesIO(file_bytes))
+
+    # Ensure image is in RGB mode (Gemini works best with RGB)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    # Resize if image is too large (Gemini has limits)
+    max_dimension = 4096
+    if max(img.size) > max_dimension:
+        ratio = max_dimension / max(img.size)
+        new_size = (int(img.width * ratio), int(img.height * ratio))
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+    # Convert to bytes for Gemini
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format='PNG', quality=95)
+    return img, img_byte_arr.getvalue()
+
+
+def extract_with_vision_ai(
+    file_bytes: bytes,
+    ocr_data: Dict = None,
+    additional_pages: List[bytes] = None,
+    timeout: Optional[float] = None
+) -> Optional[Dict[str, Any]]:
     """
     Extract invoice data using Gemini's vision capabilities directly on the image.
     This provides much better accuracy than OCR-based extraction.
+    additional_pages: further page images of the same document (multi-page PDFs),
+    sent in the same request so line items on later pages are included.
+    timeout: deadline of the Gemini request in seconds (default settings.vision_ai_timeout).
     """
     if not settings.google_api_key:
         logger.warning("Google API key not configured, skipping AI processing")
         return None
 
     try:
-        import base64
-        from PIL import Image
-        import io
-
-        # Prepare the image for Gemini Vision
-        # Convert bytes to PIL Image to ensure proper format
-        img = Image.open(io.BytesIO(file_bytes))
-
-        # Ensure image is in RGB mode (Gemini works best with RGB)
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        # Resize if image is too large (Gemini has limits)
-        max_dimension = 4096
-        if max(img.size) > max_dimension:
-            ratio = max_dimension / max(img.size)
-            new_size = (int(img.width * ratio), int(img.height * ratio))
-            img = img.resize(new_size, Image.Resampling.LANCZOS)
-
-        # Convert to bytes for Gemini
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format='PNG', quality=95)
-        img_byte_arr = img_byte_arr.getvalue()
+        # Prepare the image(s) for Gemini Vision
+        img, img_byte_arr = _prepare_image_for_vision(file_bytes)
+        page_parts = [{"mime_type": "image/png", "data": img_byte_arr}]
+        for page_bytes in additional_pages or []:
+            _, page_png = _prepare_image_for_vision(page_bytes)
+            page_parts.append({"mime_type": "image/png", "data": page_png})
 
         # Create the prompt for vision-based extraction
         prompt = get_invoice_extraction_prompt()
@@ -341,11 +463,13 @@ def extract_with_vision_ai(file_bytes: bytes, ocr_data: Dict = None) -> Optional
             generation_config=generation_config
         )
 
-        # Send image directly to Gemini Vision
-        response = model.generate_content([
-            prompt,
-            {"mime_type": "image/png", "data": img_byte_arr}
-        ])
+        # Send image(s) directly to Gemini Vision
+        if len(page_parts) > 1:
+            prompt += f"\n\nThe document has {len(page_parts)} pages, provided in order. Treat them as ONE invoice and extract line items from every page."
+        response = model.generate_content(
+            [prompt] + page_parts,
+            request_options={"timeout": timeout or settings.vision_ai_timeout}
+        )
 
         if response and response.candidates and response.candidates[0].content.parts:
             text_response = response.candidates[0].content.parts[0].text
@@ -372,6 +496,7 @@ def extract_with_vision_ai(file_bytes: bytes, ocr_data: Dict = None) -> Optional
                     'extraction_method': 'vision_ai',
                     'model': 'gemini-2.0-flash',
                     'image_size': f"{img.width}x{img.height}",
+                    'pages': len(page_parts),
                     'ocr_words_extracted': ocr_data.get('total_words', 0) if ocr_data else 0,
                     'ocr_confidence': ocr_data.get('average_confidence', 0) if ocr_data else 0
                 }
@@ -1288,23 +1413,9 @@ def validate_line_item_calculations(structured_data: Dict[str, Any]) -> Dict[str
 
 def generate_address_number(db_session, company_id: int) -> str:
     """Generate sequential address number for the company."""
-    from app.models import AddressBook
-    from sqlalchemy import func
-
-    # Get the max address_number for this company
-    max_num = db_session.query(func.max(AddressBook.address_number)).filter(
-        AddressBook.company_id == company_id
-    ).scalar()
-
-    if max_num:
-        try:
-            next_num = int(max_num) + 1
-        except ValueError:
-            next_num = 1
-    else:
-        next_num = 1
+    from app.api.address_book import generate_next_address_number
 
-    return str(next_num).zfill(8)  # 8-digit format like "00000001"
+    return generate_next_address_number(db_session, company_id)
 
 
 def lookup_vendor_in_database(supplier_name: str, db_session=None, supplier_data: Dict = None, company_id: int = None) -> Dict[str, Any]:
@@ -1575,47 +1686,103 @@ def apply_vendor_data_to_invoice(structured_data: Dict[str, Any], vendor_data: D
     return structured_data
 
 
-def process_invoice_image_enhanced(file_bytes: bytes, db_session=None, company_id: int = None) -> Dict[str, Any]:
+_vision_executor: Optional[ThreadPoolExecutor] = None
+_vision_executor_lock = threading.Lock()
+
+
+def _get_vision_executor() -> ThreadPoolExecutor:
+    """Shared pool for Vision AI calls, so timed-out requests can't pile up unbounded threads."""
+    global _vision_executor
+    if _vision_executor is None:
+        with _vision_executor_lock:
+            if _vision_executor is None:
+                _vision_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.vision_ai_max_concurrency),
+                    thread_name_prefix="vision-ai"
+                )
+    return _vision_executor
+
+
+def _run_vision_extraction(started_at: float, file_bytes: bytes, additional_pages: List[bytes] = None):
     """
-    Enhanced main function to process invoice images with comprehensive data extraction.
-    Uses Vision AI as primary extraction method for better accuracy.
-    Optionally checks vendor database if db_session is provided.
-    If company_id is provided and vendor not found, auto-creates the vendor.
+    Vision AI call of start_vision_extraction. The Gemini request gets the time
+    left until the caller gives up, so a worker is freed when the caller stops
+    waiting (cancel() can't stop a call that has started).
+    """
+    remaining = settings.vision_ai_timeout - (time.monotonic() - started_at)
+    if remaining <= 0:
+        return None  # Queued behind other calls until the caller gave up
+    return extract_with_vision_ai(file_bytes, None, additional_pages, timeout=remaining)
+
+
+def start_vision_extraction(file_bytes: bytes, additional_pages: List[bytes] = None):
+    """
+    Launch Vision AI extraction in the background.
+    Returns (future, started_at) for wait_for_vision_extraction, or (None, None) if AI is not configured.
     """
+    if not settings.google_api_key:
+        return None, None
+    started_at = time.monotonic()
+    future = _get_vision_executor().submit(_run_vision_extraction, started_at, file_bytes, additional_pages)
+    return future, started_at
+
+
+def wait_for_vision_extraction(vision_future, started_at: float) -> Optional[Dict[str, Any]]:
+    """Join a Vision AI extraction, giving up once settings.vision_ai_timeout has elapsed since launch."""
+    if vision_future is None:
+        return None
+    remaining = max(0.0, settings.vision_ai_timeout - (time.monotonic() - started_at))
     try:
-        # First, try Vision AI extraction (most accurate method)
-        # This sends the image directly to Gemini for analysis
-        logger.info("Attempting Vision AI extraction (primary method)...")
-        structured_data = extract_with_vision_ai(file_bytes)
+        return vision_future.result(timeout=remaining)
+    except FutureTimeoutError:
+        vision_future.cancel()
+        logger.warning(f"Vision AI extraction timed out after {settings.vision_ai_timeout}s")
+    except Exception as e:
+        logger.error(f"Vision AI extraction failed: {e}")
+    return None
 
-        # Also run OCR for metadata and as fallback data source
-        processed_images = preprocess_image_for_ocr_enhanced(file_bytes)
-        ocr_results = perform_enhanced_ocr(processed_images)
 
-        # If Vision AI failed, fall back to OCR-based extraction
-        if not structured_data:
-            logger.warning("Vision AI extraction failed, falling back to OCR-based extraction...")
-            if ocr_results['words']:
-                structured_data = extract_enhanced_structured_data_with_ai(
-                    ocr_results,
-                    ocr_results['patterns']
-                )
+def _vendor_cache_key(supplier_name: Optional[str], supplier_data: Dict) -> tuple:
+    """Normalized supplier identifiers - invoices with the same key resolve to the same vendor."""
+    def norm(value):
+        return "".join(str(value).upper().split()).replace("-", "") if value else ""
+
+    return (
+        norm(supplier_data.get("vat_number") or supplier_data.get("tax_id")),
+        norm(supplier_data.get("registration_number")),
+        norm(supplier_data.get("email")),
+        norm(supplier_name),
+        "".join(filter(str.isdigit, str(supplier_data.get("phone") or "")))
+    )
+
+
+def apply_vendor_lookup(
+    structured_data: Optional[Dict[str, Any]],
+    db_session=None,
+    company_id: int = None,
+    vendor_cache: Optional[Dict[tuple, Dict[str, Any]]] = None
+) -> tuple:
+    """
+    Look up (or auto-create) the invoice's vendor and apply its Address Book data.
+
+    Pass a vendor_cache dict to share lookups between invoices of one batch:
+    invoices from the same supplier then cost one lookup, and a vendor
+    auto-created for the first invoice is reused instead of created again.
 
-        # Update metadata with OCR stats if we have them
-        if structured_data and ocr_results:
-            if 'processing_metadata' not in structured_data:
-                structured_data['processing_metadata'] = {}
-            structured_data['processing_metadata']['ocr_words_extracted'] = ocr_results.get('total_words', 0)
-            structured_data['processing_metadata']['ocr_confidence'] = ocr_results.get('average_confidence', 0)
-
-        # Vendor lookup if structured data contains supplier info
-        # Use multi-attribute matching for better accuracy
-        # If no vendor found and company_id provided, auto-create vendor
-        vendor_lookup = {"found": False, "vendor": None, "suggestions": [], "extracted_name": None}
-        if structured_data and structured_data.get("supplier"):
-            supplier_data = structured_data["supplier"]
-            supplier_name = supplier_data.get("company_name")
-            if supplier_name or supplier_data:
+    Returns (structured_data, vendor_lookup).
+    """
+    # Vendor lookup if structured data contains supplier info
+    # Use multi-attribute matching for better accuracy
+    # If no vendor found and company_id provided, auto-create vendor
+    vendor_lookup = {"found": False, "vendor": None, "suggestions": [], "extracted_name": None}
+    if structured_data and structured_data.get("supplier"):
+        supplier_data = structured_data["supplier"]
+        supplier_name = supplier_data.get("company_name")
+        if supplier_name or supplier_data:
+            cache_key = _vendor_cache_key(supplier_name, supplier_data) if vendor_cache is not None else None
+            if cache_key is not None and cache_key in vendor_cache:
+                vendor_lookup = copy.deepcopy(vendor_cache[cache_key])
+            else:
                 # Pass full supplier data for multi-attribute matching and company_id for auto-creation
                 vendor_lookup = lookup_vendor_in_database(
                     supplier_name,
@@ -1623,42 +1790,105 @@ def process_invoice_image_enhanced(file_bytes: bytes, db_session=None, company_i
                     supplier_data=supplier_data,
                     company_id=company_id
                 )
+                if cache_key is not None:
+                    vendor_cache[cache_key] = copy.deepcopy(vendor_lookup)
+
+            # If vendor found or created, apply accurate vendor data to the invoice
+            # This replaces potentially inaccurate OCR data with verified database info
+            if vendor_lookup.get("found") and vendor_lookup.get("vendor"):
+                structured_data = apply_vendor_data_to_invoice(
+                    structured_data,
+                    vendor_lookup["vendor"]
+                )
+                logger.info(f"Vendor matched via {vendor_lookup.get('match_method', 'unknown')} - applied vendor data to invoice")
 
-                # If vendor found or created, apply accurate vendor data to the invoice
-                # This replaces potentially inaccurate OCR data with verified database info
-                if vendor_lookup.get("found") and vendor_lookup.get("vendor"):
-                    structured_data = apply_vendor_data_to_invoice(
-                        structured_data,
-                        vendor_lookup["vendor"]
-                    )
-                    logger.info(f"Vendor matched via {vendor_lookup.get('match_method', 'unknown')} - applied vendor data to invoice")
+    return structured_data, vendor_lookup
 
-        return {
-            "success": True,
-            "ocr_data": ocr_results,
-            "structured_data": structured_data,
-            "total_words_extracted": ocr_results['total_words'],
-            "average_confidence": ocr_results['average_confidence'],
-            "vendor_lookup": vendor_lookup,
-            "enhancement_features": {
-                "vision_ai_used": structured_data.get('processing_metadata', {}).get('extraction_method') == 'vision_ai' if structured_data else False,
-                "multiple_preprocessing": len(processed_images),
-                "pattern_recognition": len(ocr_results['patterns']),
-                "line_detection": len(ocr_results['lines']),
-                "duplicate_removal": True,
-                "comprehensive_fields": True
-            }
+
+def finalize_invoice_results(
+    structured_data: Optional[Dict[str, Any]],
+    ocr_results: Dict[str, Any],
+    preprocessing_count: int,
+    db_session=None,
+    company_id: int = None
+) -> Dict[str, Any]:
+    """
+    Shared tail of the invoice pipelines: fall back to OCR-text AI extraction,
+    attach OCR stats, look up (or auto-create) the vendor and build the result dict.
+    """
+    # If Vision AI failed, fall back to OCR-based extraction
+    if not structured_data:
+        logger.warning("Vision AI extraction failed, falling back to OCR-based extraction...")
+        if ocr_results['words']:
+            structured_data = extract_enhanced_structured_data_with_ai(
+                ocr_results,
+                ocr_results['patterns']
+            )
+
+    # Update metadata with OCR stats if we have them
+    if structured_data and ocr_results:
+        if 'processing_metadata' not in structured_data:
+            structured_data['processing_metadata'] = {}
+        structured_data['processing_metadata']['ocr_words_extracted'] = ocr_results.get('total_words', 0)
+        structured_data['processing_metadata']['ocr_confidence'] = ocr_results.get('average_confidence', 0)
+
+    structured_data, vendor_lookup = apply_vendor_lookup(structured_data, db_session, company_id)
+
+    return {
+        "success": True,
+        "ocr_data": ocr_results,
+        "structured_data": structured_data,
+        "total_words_extracted": ocr_results['total_words'],
+        "average_confidence": ocr_results['average_confidence'],
+        "vendor_lookup": vendor_lookup,
+        "enhancement_features": {
+            "vision_ai_used": structured_data.get('processing_metadata', {}).get('extraction_method') == 'vision_ai' if structured_data else False,
+            "multiple_preprocessing": preprocessing_count,
+            "pattern_recognition": len(ocr_results['patterns']),
+            "line_detection": len(ocr_results['lines']),
+            "duplicate_removal": True,
+            "comprehensive_fields": True
         }
+    }
+
+
+def failed_invoice_results(error: str) -> Dict[str, Any]:
+    """Result dict returned when an invoice pipeline fails."""
+    return {
+        "success": False,
+        "error": error,
+        "ocr_data": {"words": [], "lines": [], "patterns": {}},
+        "structured_data": None,
+        "total_words_extracted": 0,
+        "average_confidence": 0,
+        "vendor_lookup": {"found": False, "vendor": None, "suggestions": [], "extracted_name": None},
+        "enhancement_features": {}
+    }
+
+
+def process_invoice_image_enhanced(file_bytes: bytes, db_session=None, company_id: int = None) -> Dict[str, Any]:
+    """
+    Enhanced main function to process invoice images with comprehensive data extraction.
+    Uses Vision AI as primary extraction method for better accuracy.
+    Optionally checks vendor database if db_session is provided.
+    If company_id is provided and vendor not found, auto-creates the vendor.
+    """
+    try:
+        # Vision AI extraction is the primary (most accurate) method. It is a network
+        # round-trip to Gemini, so launch it in the background and run the CPU-bound
+        # OCR (metadata + fallback data source) while we wait.
+        logger.info("Attempting Vision AI extraction (primary method)...")
+        vision_future, started_at = start_vision_extraction(file_bytes)
+
+        processed_images = preprocess_image_for_ocr_enhanced(file_bytes)
+        ocr_results = perform_enhanced_ocr(processed_images)
+
+        structured_data = wait_for_vision_extraction(vision_future, started_at)
+
+        return finalize_invoice_results(
+            structured_data, ocr_results, len(processed_images), db_session, company_id
+        )
 
     except Exception as e:
         logger.error(f"Enhanced invoice processing failed: {e}")
-        return {
-            "success": False,
-            "error": str(e),
-            "ocr_data": {"words": [], "lines": [], "patterns": {}},
-            "structured_data": None,
-            "total_words_extracted": 0,
-            "average_confidence": 0,
-            "vendor_lookup": {"found": False, "vendor": None, "suggestions": [], "extracted_name": None},
-            "enhancement_features": {}
-        }
\ No newline at end of file
+        return failed_invoice_results(str(e))
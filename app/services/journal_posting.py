@@ -7,14 +7,17 @@ Handles automatic creation of journal entries from source documents:
 - Inventory transactions (PO receiving, adjustments, transfers)
 """
 
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc
+from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Optional, Tuple, List, Dict, Any
+from typing import Optional, Tuple, List, Dict, Any, Callable, Iterable
+from collections import deque
 import json
 import logging
 
+from app.database import dialect_insert
+from app.services.sequences import reserve_numbers, release, max_suffix
 from app.models import (
     User, Company, Site, Warehouse, BusinessUnit, Client, Contract, AddressBook,
     AccountType, Account, FiscalPeriod, JournalEntry, JournalEntryLine,
@@ -28,6 +31,122 @@ from app.models import (
 
 logger = logging.getLogger(__name__)
 
+# Conflict target of the AccountBalance upsert: uq_account_balance_key, in which
+# a NULL business unit / site counts as one value
+ACCOUNT_BALANCE_KEY = [
+    AccountBalance.company_id, AccountBalance.account_id, AccountBalance.fiscal_period_id,
+    # Literal 0, not a bound parameter: the conflict target must match the index expression
+    func.coalesce(AccountBalance.business_unit_id, literal_column("0")),
+    func.coalesce(AccountBalance.site_id, literal_column("0")),
+]
+
+
+def entry_number_prefix() -> str:
+    """Prefix of this year's journal entry numbers"""
+    return f"JE-{datetime.now().year}-"
+
+
+def generate_entry_number(db: Session, company_id: int) -> str:
+    """Next JE-{year}-NNNNNN journal entry number of the company (shared by every posting path)"""
+    return reserve_entry_numbers(db, company_id, 1)[0]
+
+
+def reserve_entry_numbers(db: Session, company_id: int, count: int, prefix: Optional[str] = None) -> List[str]:
+    """count consecutive journal entry numbers in one round-trip (batch posting)"""
+    prefix = prefix or entry_number_prefix()
+    return reserve_numbers(
+        db, company_id, prefix, count, width=6,
+        seed=lambda: max_suffix(db, JournalEntry.entry_number, JournalEntry.company_id, company_id, prefix)
+    )
+
+
+def load_normal_balances(db: Session, account_ids, cache: Optional[Dict[int, Optional[str]]] = None) -> Dict[int, Optional[str]]:
+    """account_id -> normal balance ("debit"/"credit") in one query, filling and reusing cache"""
+    cache = {} if cache is None else cache
+    missing = {account_id for account_id in account_ids if account_id not in cache}
+    if missing:
+        rows = db.query(Account.id, AccountType.normal_balance).outerjoin(
+            AccountType, Account.account_type_id == AccountType.id
+        ).filter(Account.id.in_(missing)).all()
+        for account_id, normal_balance in rows:
+            cache[account_id] = normal_balance
+        for account_id in missing - {row.id for row in rows}:
+            cache[account_id] = None
+    return cache
+
+
+def upsert_account_balances(db: Session, entry: JournalEntry, normal_balances: Optional[Dict[int, Optional[str]]] = None):
+    """Add a posted entry's lines to AccountBalance (see upsert_entries_account_balances)"""
+    upsert_entries_account_balances(db, [entry], normal_balances)
+
+
+def upsert_entries_account_balances(db: Session, entries: List[JournalEntry],
+                                    normal_balances: Optional[Dict[int, Optional[str]]] = None):
+    """
+    Add posted entries' lines to AccountBalance with one INSERT ... ON CONFLICT DO UPDATE.
+
+    Lines are summed per (period, account, business unit, site) in Decimal and
+    applied as increments in SQL, so concurrent postings to the same account add up
+    instead of overwriting each other. closing_balance moves by the signed
+    activity (debit - credit for debit-normal accounts, credit - debit
+    otherwise), which keeps closing = opening + signed period activity.
+    Accounts without an account type keep their closing balance.
+    """
+    lines = [
+        (entry, line) for entry in entries if entry.fiscal_period_id
+        for line in entry.lines
+    ]
+    if not lines:
+        return
+
+    normal_balances = load_normal_balances(db, {line.account_id for _, line in lines}, normal_balances)
+
+    deltas: Dict[tuple, List[Decimal]] = {}
+    for entry, line in lines:
+        key = (entry.company_id, entry.fiscal_period_id, line.account_id, line.business_unit_id, line.site_id)
+        debit = Decimal(str(line.debit or 0))
+        credit = Decimal(str(line.credit or 0))
+        normal_balance = normal_balances.get(line.account_id)
+        if normal_balance == "debit":
+            closing = debit - credit
+        elif normal_balance:
+            closing = credit - debit
+        else:
+            closing = Decimal("0")
+        delta = deltas.setdefault(key, [Decimal("0"), Decimal("0"), Decimal("0")])
+        delta[0] += debit
+        delta[1] += credit
+        delta[2] += closing
+
+    # Rows in key order so concurrent postings lock balance rows in the same order
+    rows = [
+        {
+            "company_id": company_id,
+            "account_id": account_id,
+            "fiscal_period_id": fiscal_period_id,
+            "business_unit_id": business_unit_id,
+            "site_id": site_id,
+            "period_debit": debit,
+            "period_credit": credit,
+            "opening_balance": Decimal("0"),
+            "closing_balance": closing,
+        }
+        for (company_id, fiscal_period_id, account_id, business_unit_id, site_id), (debit, credit, closing)
+        in sorted(deltas.items(), key=lambda item: tuple(-1 if v is None else v for v in item[0]))
+    ]
+
+    stmt = dialect_insert(db, AccountBalance).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=ACCOUNT_BALANCE_KEY,
+        set_={
+            "period_debit": AccountBalance.period_debit + stmt.excluded.period_debit,
+            "period_credit": AccountBalance.period_credit + stmt.excluded.period_credit,
+            "closing_balance": AccountBalance.closing_balance + stmt.excluded.closing_balance,
+            "updated_at": func.now(),
+        }
+    )
+    db.execute(stmt)
+
 
 class JournalPostingService:
     """Service for creating journal entries from source documents"""
@@ -38,6 +157,15 @@ class JournalPostingService:
         self.user_id = user_id
         self._mappings_cache = None
         self._warehouse_bu_cache = {}
+        self._default_bu_cache: Dict[str, Optional[int]] = {}
+        self._fiscal_periods_cache: Optional[List[FiscalPeriod]] = None
+        self._exchange_rate_cache: Dict[Tuple[str, str], Decimal] = {}
+        self._company_currency: Optional[str] = None
+        self._normal_balance_cache: Dict[int, Optional[str]] = {}
+        # Batch mode state (see post_batch)
+        self._batch_numbers: Optional[deque] = None
+        self._batch_issued: List[str] = []
+        self._batch_entries: List[JournalEntry] = []
 
     def _get_business_unit_from_warehouse(self, warehouse_id: Optional[int]) -> Optional[int]:
         """Get business_unit_id from a warehouse, with caching"""
@@ -57,14 +185,16 @@ class JournalPostingService:
         return bu_id
 
     def _get_default_business_unit(self, bu_type: str = "profit_loss") -> Optional[int]:
-        """Get the default business unit for a given type (balance_sheet or profit_loss)"""
-        bu = self.db.query(BusinessUnit).filter(
-            BusinessUnit.company_id == self.company_id,
-            BusinessUnit.bu_type == bu_type,
-            BusinessUnit.is_active == True,
-            BusinessUnit.parent_id == None  # Top-level BU
-        ).first()
-        return bu.id if bu else None
+        """Get the default business unit for a given type (balance_sheet or profit_loss), with caching"""
+        if bu_type not in self._default_bu_cache:
+            bu = self.db.query(BusinessUnit).filter(
+                BusinessUnit.company_id == self.company_id,
+                BusinessUnit.bu_type == bu_type,
+                BusinessUnit.is_active == True,
+                BusinessUnit.parent_id == None  # Top-level BU
+            ).first()
+            self._default_bu_cache[bu_type] = bu.id if bu else None
+        return self._default_bu_cache[bu_type]
 
     def _get_mappings(self) -> dict:
         """Load and cache account mappings"""
@@ -95,85 +225,119 @@ class JournalPostingService:
         return mappings.get((transaction_type, None))
 
     def _generate_entry_number(self) -> str:
-        """Generate unique journal entry number"""
-        year = datetime.now().year
-        prefix = f"JE-{year}-"
-
-        last_entry = self.db.query(JournalEntry).filter(
-            JournalEntry.company_id == self.company_id,
-            JournalEntry.entry_number.like(f"{prefix}%")
-        ).order_by(desc(JournalEntry.entry_number)).first()
-
-        if last_entry:
-            try:
-                last_num = int(last_entry.entry_number.split("-")[-1])
-                next_num = last_num + 1
-            except (ValueError, IndexError):
-                next_num = 1
-        else:
-            next_num = 1
-
-        return f"{prefix}{next_num:06d}"
+        """Generate unique journal entry number (from the reserved block in batch mode)"""
+        if self._batch_numbers:
+            number = self._batch_numbers.popleft()
+            self._batch_issued.append(number)
+            return number
+        return generate_entry_number(self.db, self.company_id)
 
     def _get_fiscal_period(self, entry_date: date) -> Optional[FiscalPeriod]:
-        """Get fiscal period for a date"""
-        return self.db.query(FiscalPeriod).filter(
-            FiscalPeriod.company_id == self.company_id,
-            FiscalPeriod.start_date <= entry_date,
-            FiscalPeriod.end_date >= entry_date,
-            FiscalPeriod.status != "closed"
-        ).first()
+        """Get the open fiscal period for a date (all open periods are loaded once)"""
+        if self._fiscal_periods_cache is None:
+            self._fiscal_periods_cache = self.db.query(FiscalPeriod).filter(
+                FiscalPeriod.company_id == self.company_id,
+                FiscalPeriod.status != "closed"
+            ).order_by(FiscalPeriod.start_date).all()
+        for period in self._fiscal_periods_cache:
+            if period.start_date <= entry_date <= period.end_date:
+                return period
+        return None
 
     def _update_account_balance(self, entry: JournalEntry):
-        """Update account balances after posting"""
-        if not entry.fiscal_period_id:
+        """Update account balances after posting (once for the whole batch in batch mode)"""
+        if self._batch_numbers is not None:
+            self._batch_entries.append(entry)
             return
+        upsert_account_balances(self.db, entry, self._normal_balance_cache)
 
-        for line in entry.lines:
-            # Query by both site_id and business_unit_id for proper balance tracking
-            balance = self.db.query(AccountBalance).filter(
-                AccountBalance.company_id == self.company_id,
-                AccountBalance.account_id == line.account_id,
-                AccountBalance.fiscal_period_id == entry.fiscal_period_id,
-                AccountBalance.site_id == line.site_id,
-                AccountBalance.business_unit_id == line.business_unit_id
-            ).first()
+    def _commit(self):
+        """Commit a posted document; batch mode commits once at the end"""
+        if self._batch_numbers is None:
+            self.db.commit()
 
-            if not balance:
-                balance = AccountBalance(
-                    company_id=self.company_id,
-                    account_id=line.account_id,
-                    fiscal_period_id=entry.fiscal_period_id,
-                    site_id=line.site_id,
-                    business_unit_id=line.business_unit_id,
-                    period_debit=0,
-                    period_credit=0,
-                    opening_balance=0,
-                    closing_balance=0
-                )
-                self.db.add(balance)
-
-            balance.period_debit = float(Decimal(str(balance.period_debit)) + Decimal(str(line.debit)))
-            balance.period_credit = float(Decimal(str(balance.period_credit)) + Decimal(str(line.credit)))
-
-            # Get account's normal balance
-            account = self.db.query(Account).options(
-                joinedload(Account.account_type)
-            ).filter(Account.id == line.account_id).first()
-
-            if account and account.account_type:
-                if account.account_type.normal_balance == "debit":
-                    balance.closing_balance = float(
-                        Decimal(str(balance.opening_balance)) +
-                        Decimal(str(balance.period_debit)) -
-                        Decimal(str(balance.period_credit))
-                    )
-                else:
-                    balance.closing_balance = float(
-                        Decimal(str(balance.opening_balance)) +
-                        Decimal(str(balance.period_credit)) -
-                        Decimal(str(balance.period_debit))
-                    )
+    def post_batch(self, post_method: Callable[..., Optional[JournalEntry]], documents: Iterable[Any],
+                   **kwargs) -> Dict[str, Any]:
+        """
+        Post many source documents with one of the post_* methods in a single transaction.
+
+        Example:
+            service.post_batch(service.post_invoice_allocation, periods, post_immediately=True)
+
+        Mappings, fiscal periods, business units and exchange rates are
+        resolved once for the batch and entry numbers come from one reserved
+        block. Entries and lines are written by a single flush (multi-row
+        INSERTs) and balances by one aggregated upsert, then committed once.
+
+        A document that raises is rolled back on its own (its new rows are
+        discarded and its entry number reused) and reported as failed; a
+        document the method skips (returns None, e.g. no account mapping) is
+        reported as skipped. Errors while writing the batch roll back the
+        whole batch and are raised.
+
+        Returns counts and one result per document:
+            {"posted": 2, "skipped": 0, "failed": 1, "results": [
+                {"source_id": 7, "status": "posted", "entry_number": "JE-2026-000123", "error": None}, ...]}
+        """
+        documents = list(documents)
+        counts = {"posted": 0, "skipped": 0, "failed": 0}
+        results = []
+        if not documents:
+            return {**counts, "results": results}
+
+        prefix = entry_number_prefix()
+        self._batch_numbers = deque(reserve_entry_numbers(self.db, self.company_id, len(documents), prefix))
+        self._batch_entries = []
+        try:
+            for document in documents:
+                self._batch_issued = []
+                pending = set(self.db.new)
+                try:
+                    entry = post_method(document, **kwargs)
+                except Exception as e:
+                    # Discard this document's unflushed rows and changes, keep its number for the next one
+                    added = set(self.db.new) - pending
+                    for obj in added:
+                        # Expunging an entry cascades to its lines
+                        if obj in self.db:
+                            self.db.expunge(obj)
+                    if document in self.db and document not in self.db.new:
+                        self.db.expire(document)
+                    self._batch_entries = [entry for entry in self._batch_entries if entry not in added]
+                    self._batch_numbers.extendleft(reversed(self._batch_issued))
+                    logger.warning(f"[JOURNAL] Batch posting failed for {type(document).__name__} {getattr(document, 'id', None)}: {e}")
+                    counts["failed"] += 1
+                    results.append({
+                        "source_id": getattr(document, "id", None), "status": "failed",
+                        "entry_number": None, "error": str(e)
+                    })
+                    continue
+
+                status = "posted" if entry is not None else "skipped"
+                counts[status] += 1
+                results.append({
+                    "source_id": getattr(document, "id", None), "status": status,
+                    "entry_number": entry.entry_number if entry is not None else None, "error": None
+                })
+
+            # Numbers the batch did not use go back to the sequence
+            release(self.db, self.company_id, prefix, len(self._batch_numbers))
+            self.db.flush()
+            upsert_entries_account_balances(self.db, self._batch_entries, self._normal_balance_cache)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            self._batch_numbers = None
+            self._batch_issued = []
+            self._batch_entries = []
+
+        logger.info(
+            f"[JOURNAL] Batch {getattr(post_method, '__name__', 'post')} for company {self.company_id}: "
+            f"{counts['posted']} posted, {counts['skipped']} skipped, {counts['failed']} failed"
+        )
+        return {**counts, "results": results}
 
     def post_invoice_allocation(
         self,
@@ -228,7 +392,7 @@ class JournalPostingService:
             vat_amount = total_tax / allocation.number_of_periods
 
         # Get vendor info
-        vendor_id = invoice.vendor_id
+        vendor_id = invoice.address_book_id
         supplier_info = invoice_data.get("supplier", {})
         invoice_number = invoice_data.get("document_info", {}).get("invoice_number", "")
 
@@ -251,7 +415,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -259,7 +422,7 @@ class JournalPostingService:
         # Debit: Expense account
         if mapping.debit_account_id:
             expense_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.debit_account_id,
                 debit=amount - vat_amount,  # Net amount
                 credit=0,
@@ -279,7 +442,7 @@ class JournalPostingService:
             vat_mapping = self._get_mapping("invoice_vat")
             if vat_mapping and vat_mapping.debit_account_id:
                 vat_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=vat_mapping.debit_account_id,
                     debit=vat_amount,
                     credit=0,
@@ -297,7 +460,7 @@ class JournalPostingService:
         # Credit: Accounts Payable
         if mapping.credit_account_id:
             payable_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.credit_account_id,
                 debit=0,
                 credit=amount,  # Full amount including VAT
@@ -321,7 +484,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for allocation period {period.id}")
 
         return entry
@@ -406,7 +569,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -415,7 +577,7 @@ class JournalPostingService:
         if labor_cost > 0 and labor_mapping:
             if labor_mapping.debit_account_id:
                 labor_debit = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=labor_mapping.debit_account_id,
                     debit=labor_cost,
                     credit=0,
@@ -432,7 +594,7 @@ class JournalPostingService:
 
             if labor_mapping.credit_account_id:
                 labor_credit = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=labor_mapping.credit_account_id,
                     debit=0,
                     credit=labor_cost,
@@ -450,7 +612,7 @@ class JournalPostingService:
         if parts_cost > 0 and parts_mapping:
             if parts_mapping.debit_account_id:
                 parts_debit = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=parts_mapping.debit_account_id,
                     debit=parts_cost,
                     credit=0,
@@ -467,7 +629,7 @@ class JournalPostingService:
 
             if parts_mapping.credit_account_id:
                 parts_credit = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=parts_mapping.credit_account_id,
                     debit=0,
                     credit=parts_cost,
@@ -490,7 +652,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for work order {work_order.id}")
 
         return entry
@@ -678,7 +840,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -691,7 +852,7 @@ class JournalPostingService:
         ar_account_id = ar_mapping.debit_account_id if ar_mapping else None
         if ar_account_id and total_receivable > 0:
             ar_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=ar_account_id,
                 debit=float(total_receivable),
                 credit=0,
@@ -712,7 +873,7 @@ class JournalPostingService:
         revenue_account_id = revenue_mapping.credit_account_id if revenue_mapping else None
         if revenue_account_id and billable_amount > 0:
             revenue_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=revenue_account_id,
                 debit=0,
                 credit=float(billable_amount),
@@ -733,7 +894,7 @@ class JournalPostingService:
         vat_account_id = vat_output_mapping.credit_account_id if vat_output_mapping else None
         if vat_account_id and vat_amount > 0:
             vat_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=vat_account_id,
                 debit=0,
                 credit=float(vat_amount),
@@ -755,7 +916,7 @@ class JournalPostingService:
             # DR: Cost of Goods Sold - Labor
             if labor_cogs_mapping.debit_account_id:
                 labor_cogs_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=labor_cogs_mapping.debit_account_id,
                     debit=float(labor_cost),
                     credit=0,
@@ -774,7 +935,7 @@ class JournalPostingService:
             # CR: Accrued Labor / Labor Payable
             if labor_cogs_mapping.credit_account_id:
                 labor_payable_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=labor_cogs_mapping.credit_account_id,
                     debit=0,
                     credit=float(labor_cost),
@@ -796,7 +957,7 @@ class JournalPostingService:
             # DR: Cost of Goods Sold - Parts
             if parts_cogs_mapping.debit_account_id:
                 parts_cogs_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=parts_cogs_mapping.debit_account_id,
                     debit=float(parts_cost),
                     credit=0,
@@ -815,7 +976,7 @@ class JournalPostingService:
             # CR: Inventory
             if parts_cogs_mapping.credit_account_id:
                 inventory_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=parts_cogs_mapping.credit_account_id,
                     debit=0,
                     credit=float(parts_cost),
@@ -847,7 +1008,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created billing journal entry {entry.entry_number} for work order {work_order.id} - "
                    f"Revenue: {billable_amount}, VAT: {vat_amount}, Labor COGS: {labor_cost}, Parts COGS: {parts_cost}")
 
@@ -905,7 +1066,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -913,7 +1073,7 @@ class JournalPostingService:
         # Debit: Expense account
         if mapping.debit_account_id:
             expense_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.debit_account_id,
                 debit=amount,
                 credit=0,
@@ -930,7 +1090,7 @@ class JournalPostingService:
         # Credit: Petty Cash Fund
         if mapping.credit_account_id:
             fund_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.credit_account_id,
                 debit=0,
                 credit=amount,
@@ -950,7 +1110,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for petty cash {transaction.id}")
 
         return entry
@@ -990,7 +1150,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -998,7 +1157,7 @@ class JournalPostingService:
         # Debit: Petty Cash Fund
         if mapping.debit_account_id:
             fund_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.debit_account_id,
                 debit=amount,
                 credit=0,
@@ -1012,7 +1171,7 @@ class JournalPostingService:
         # Credit: Cash/Bank
         if mapping.credit_account_id:
             cash_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.credit_account_id,
                 debit=0,
                 credit=amount,
@@ -1032,7 +1191,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for replenishment {replenishment.id}")
 
         return entry
@@ -1045,25 +1204,33 @@ class JournalPostingService:
         if from_currency.upper() == to_currency.upper():
             return Decimal("1")
 
+        key = (from_currency.upper(), to_currency.upper())
+        if key in self._exchange_rate_cache:
+            return self._exchange_rate_cache[key]
+
         # Check for manual rate in database
         rate = self.db.query(ExchangeRate).filter(
             ExchangeRate.company_id == self.company_id,
-            ExchangeRate.from_currency == from_currency.upper(),
-            ExchangeRate.to_currency == to_currency.upper(),
+            ExchangeRate.from_currency == key[0],
+            ExchangeRate.to_currency == key[1],
             ExchangeRate.is_active == True
         ).first()
 
         if rate:
+            self._exchange_rate_cache[key] = rate.rate
             return rate.rate
 
         # Fallback to 1 if no rate found
         logger.warning(f"No exchange rate found for {from_currency}/{to_currency}, using 1:1")
+        self._exchange_rate_cache[key] = Decimal("1")
         return Decimal("1")
 
     def _get_company_currency(self) -> str:
         """Get the company's primary currency"""
-        company = self.db.query(Company).filter(Company.id == self.company_id).first()
-        return company.primary_currency if company and company.primary_currency else "USD"
+        if self._company_currency is None:
+            company = self.db.query(Company).filter(Company.id == self.company_id).first()
+            self._company_currency = company.primary_currency if company and company.primary_currency else "USD"
+        return self._company_currency
 
     def post_po_receiving(
         self,
@@ -1143,7 +1310,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -1151,7 +1317,7 @@ class JournalPostingService:
         # Debit: Inventory account (asset increases)
         if mapping.debit_account_id:
             inv_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.debit_account_id,
                 debit=float(line_total_base),
                 credit=0,
@@ -1171,7 +1337,7 @@ class JournalPostingService:
             vat_mapping = self._get_mapping("po_receive_vat")
             if vat_mapping and vat_mapping.debit_account_id:
                 vat_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=vat_mapping.debit_account_id,
                     debit=float(tax_amount),
                     credit=0,
@@ -1188,7 +1354,7 @@ class JournalPostingService:
         total_credit = float(line_total_base + tax_amount)
         if mapping.credit_account_id:
             payable_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=mapping.credit_account_id,
                 debit=0,
                 credit=total_credit,
@@ -1208,7 +1374,7 @@ class JournalPostingService:
                 fx_account_id = fx_mapping.debit_account_id if exchange_gain_loss > 0 else fx_mapping.credit_account_id
                 if fx_account_id:
                     fx_line = JournalEntryLine(
-                        journal_entry_id=entry.id,
+                        journal_entry=entry,
                         account_id=fx_account_id,
                         debit=float(exchange_gain_loss) if exchange_gain_loss > 0 else 0,
                         credit=float(abs(exchange_gain_loss)) if exchange_gain_loss < 0 else 0,
@@ -1229,7 +1395,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for PO receiving {po.po_number}")
 
         return entry
@@ -1297,7 +1463,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -1306,7 +1471,7 @@ class JournalPostingService:
             # DR: Inventory (asset increases)
             if mapping.debit_account_id:
                 inv_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.debit_account_id,
                     debit=total_cost,
                     credit=0,
@@ -1321,7 +1486,7 @@ class JournalPostingService:
             # CR: Adjustment account
             if mapping.credit_account_id:
                 adj_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.credit_account_id,
                     debit=0,
                     credit=total_cost,
@@ -1335,7 +1500,7 @@ class JournalPostingService:
             # DR: Adjustment/Expense account
             if mapping.debit_account_id:
                 adj_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.debit_account_id,
                     debit=total_cost,
                     credit=0,
@@ -1350,7 +1515,7 @@ class JournalPostingService:
             # CR: Inventory (asset decreases)
             if mapping.credit_account_id:
                 inv_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.credit_account_id,
                     debit=0,
                     credit=total_cost,
@@ -1371,7 +1536,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for stock adjustment {ledger_entry.transaction_number}")
 
         return entry
@@ -1436,7 +1601,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -1445,7 +1609,7 @@ class JournalPostingService:
             # Inventory gain
             if mapping.debit_account_id:
                 inv_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.debit_account_id,
                     debit=total_cost,
                     credit=0,
@@ -1459,7 +1623,7 @@ class JournalPostingService:
 
             if mapping.credit_account_id:
                 adj_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.credit_account_id,
                     debit=0,
                     credit=total_cost,
@@ -1473,7 +1637,7 @@ class JournalPostingService:
             # Inventory loss
             if mapping.debit_account_id:
                 adj_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.debit_account_id,
                     debit=total_cost,
                     credit=0,
@@ -1487,7 +1651,7 @@ class JournalPostingService:
 
             if mapping.credit_account_id:
                 inv_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.credit_account_id,
                     debit=0,
                     credit=total_cost,
@@ -1508,7 +1672,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for cycle count {cycle_count_number}")
 
         return entry
@@ -1620,7 +1784,6 @@ class JournalPostingService:
             created_by=self.user_id
         )
         self.db.add(entry)
-        self.db.flush()
 
         lines = []
         line_number = 1
@@ -1647,7 +1810,7 @@ class JournalPostingService:
                     desc += f" (incl. landed costs: {allocated_extra:.2f})"
 
                 inv_line = JournalEntryLine(
-                    journal_entry_id=entry.id,
+                    journal_entry=entry,
                     account_id=mapping.debit_account_id,
                     debit=Decimal(str(round(line_value_base, 2))),
                     credit=Decimal('0'),
@@ -1666,7 +1829,7 @@ class JournalPostingService:
         # DR: VAT Input (if applicable) - on invoice amount only
         if tax_amount_base > 0 and vat_mapping and vat_mapping.debit_account_id:
             vat_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=vat_mapping.debit_account_id,
                 debit=Decimal(str(round(tax_amount_base, 2))),
                 credit=Decimal('0'),
@@ -1688,7 +1851,7 @@ class JournalPostingService:
 
         if credit_account_id:
             ap_line = JournalEntryLine(
-                journal_entry_id=entry.id,
+                journal_entry=entry,
                 account_id=credit_account_id,
                 debit=Decimal('0'),
                 credit=Decimal(str(round(total_invoice_with_tax_base, 2))),
@@ -1738,7 +1901,7 @@ class JournalPostingService:
                 if extra_credit_account:
                     cost_type_label = extra_cost.cost_description or extra_cost.cost_type.replace('_', ' ').title()
                     extra_cost_line = JournalEntryLine(
-                        journal_entry_id=entry.id,
+                        journal_entry=entry,
                         account_id=extra_credit_account,
                         debit=Decimal('0'),
                         credit=Decimal(str(round(cost_amount_base, 2))),
@@ -1767,7 +1930,7 @@ class JournalPostingService:
                     fx_account_id = exchange_mapping.debit_account_id if total_credits > total_debits else exchange_mapping.credit_account_id
                     if fx_account_id:
                         fx_line = JournalEntryLine(
-                            journal_entry_id=entry.id,
+                            journal_entry=entry,
                             account_id=fx_account_id,
                             debit=Decimal(str(diff)) if total_credits > total_debits else Decimal('0'),
                             credit=Decimal('0') if total_credits > total_debits else Decimal(str(diff)),
@@ -1788,7 +1951,7 @@ class JournalPostingService:
             entry.posted_by = self.user_id
             self._update_account_balance(entry)
 
-        self.db.commit()
+        self._commit()
         logger.info(f"Created journal entry {entry.entry_number} for GRN {grn.grn_number}")
 
         return entry
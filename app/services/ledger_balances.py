@@ -0,0 +1,437 @@
+"""
+Ledger Balances for Financial Reports
+
+Trial balance, P&L and balance sheet are read from materialized period
+balances instead of summing every journal line since the first posting:
+
+- When a fiscal period is closed, its AccountBalance rows are rebuilt from
+  the posted journal lines dated inside the period, and opening balances are
+  rolled forward from the previous closed period (refresh_period_balances).
+  closing_balance is then the cumulative balance at the period end. Each
+  period is one INSERT ... SELECT; recompute_balances runs the same rebuild
+  over a date range or a whole company after data corrections.
+- A report as of a date starts from the closing balances of the latest
+  closed period that is still current, and adds the raw journal lines of the
+  open tail after it (account_balances_as_of). A date range is the
+  difference of two such balances (account_activity).
+- A closed period stops being current as soon as an entry dated on or before
+  its end is posted, reversed or otherwise updated after the rebuild
+  (JournalEntry.updated_at, indexed per company). Reports then start from an
+  earlier period, and closing the next period rebuilds from there.
+
+Amounts are returned as net debit (debit - credit) per account, in Decimal.
+
+The chart of accounts hierarchy is kept in account_closures (ancestor,
+descendant, depth), rebuilt per company by a flush hook in app.models, so all
+accounts under a header are one query (descendant_account_ids).
+
+Usage:
+    from app.services.ledger_balances import account_balances_as_of, account_activity
+
+    balances = account_balances_as_of(db, company_id, as_of_date, site_id=site_id)
+    activity = account_activity(db, company_id, start_date, end_date)
+"""
+import time
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import case, delete, func, insert, literal, literal_column, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Account, AccountBalance, AccountClosure, AccountType, FiscalPeriod, JournalEntry, JournalEntryLine
+)
+from app.services.journal_posting import load_normal_balances
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+
+# Entries updated this long before a rebuild still mark the period stale: PostgreSQL
+# stamps updated_at with the transaction start, which can precede the rebuild while
+# the transaction commits after it
+STALE_MARGIN = timedelta(minutes=1)
+
+# Guard against parent_id cycles when expanding the account tree
+MAX_ACCOUNT_DEPTH = 50
+
+
+# =============================================================================
+# Account hierarchy (closure table)
+# =============================================================================
+
+def rebuild_account_closure(connection, company_id: int):
+    """Recompute the (ancestor, descendant, depth) rows of a company's chart of accounts."""
+    accounts = Account.__table__
+    closures = AccountClosure.__table__
+
+    tree = select(
+        accounts.c.company_id,
+        accounts.c.id.label("ancestor_id"),
+        accounts.c.id.label("descendant_id"),
+        literal(0).label("depth")
+    ).where(accounts.c.company_id == company_id).cte("account_tree", recursive=True)
+    child = accounts.alias("child")
+    tree = tree.union_all(
+        select(tree.c.company_id, tree.c.ancestor_id, child.c.id, tree.c.depth + 1)
+        .where(child.c.parent_id == tree.c.descendant_id, tree.c.depth < MAX_ACCOUNT_DEPTH)
+    )
+
+    connection.execute(delete(closures).where(closures.c.company_id == company_id))
+    connection.execute(
+        insert(closures).from_select(
+            ["company_id", "ancestor_id", "descendant_id", "depth"],
+            select(tree.c.company_id, tree.c.ancestor_id, tree.c.descendant_id, tree.c.depth)
+        )
+    )
+
+
+def descendant_account_ids(db: Session, company_id: int, ancestor_ids: Iterable[int],
+                           include_self: bool = False) -> Set[int]:
+    """Ids of every account under the given accounts, at any depth."""
+    ancestor_ids = [account_id for account_id in ancestor_ids if account_id]
+    if not ancestor_ids:
+        return set()
+
+    exists = db.query(AccountClosure.descendant_id).filter(AccountClosure.company_id == company_id).first()
+    if not exists:
+        # Chart created before account_closures existed
+        rebuild_account_closure(db.connection(), company_id)
+
+    query = db.query(AccountClosure.descendant_id).filter(
+        AccountClosure.company_id == company_id,
+        AccountClosure.ancestor_id.in_(ancestor_ids)
+    )
+    if not include_self:
+        query = query.filter(AccountClosure.depth > 0)
+    return {row.descendant_id for row in query}
+
+
+# =============================================================================
+# Materialized period balances
+# =============================================================================
+
+def _db_now(db: Session) -> datetime:
+    """Database clock, the one JournalEntry.updated_at is stamped with (naive, like the column)."""
+    now = db.execute(select(func.now())).scalar()
+    return now.replace(tzinfo=None) if now.tzinfo else now
+
+
+def _signed(net_debit: Decimal, normal_balance: Optional[str]) -> Decimal:
+    """Net debit <-> balance in the account's normal direction (the transform is its own inverse)."""
+    return net_debit if normal_balance == "debit" else -net_debit
+
+
+def _current_periods(db: Session, company_id: int, on_or_before: date) -> List[FiscalPeriod]:
+    """
+    Closed, materialized periods ending on or before the date whose balances
+    are still current, latest first.
+    """
+    candidates = db.query(FiscalPeriod).filter(
+        FiscalPeriod.company_id == company_id,
+        FiscalPeriod.status == "closed",
+        FiscalPeriod.balances_refreshed_at.isnot(None),
+        FiscalPeriod.end_date <= on_or_before
+    ).order_by(FiscalPeriod.end_date.desc()).all()
+    if not candidates:
+        return []
+
+    # Entries of the covered dates changed since the oldest rebuild (normally none)
+    changed = db.query(JournalEntry.entry_date, JournalEntry.updated_at).filter(
+        JournalEntry.company_id == company_id,
+        JournalEntry.updated_at > min(p.balances_refreshed_at for p in candidates) - STALE_MARGIN,
+        JournalEntry.entry_date <= candidates[0].end_date,
+        JournalEntry.status != "draft"
+    ).all()
+
+    return [
+        period for period in candidates
+        if not any(
+            entry_date <= period.end_date and updated_at > period.balances_refreshed_at - STALE_MARGIN
+            for entry_date, updated_at in changed
+        )
+    ]
+
+
+def _line_totals(db: Session, company_id: int, after: Optional[date], through: date,
+                 site_id: Optional[int] = None, business_unit_id: Optional[int] = None,
+                 include_unassigned: bool = False):
+    """Posted line totals (debit, credit) per account dated in (after, through]."""
+    query = db.query(
+        JournalEntryLine.account_id,
+        func.coalesce(func.sum(JournalEntryLine.debit), 0).label("total_debit"),
+        func.coalesce(func.sum(JournalEntryLine.credit), 0).label("total_credit")
+    ).join(
+        JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id
+    ).filter(
+        JournalEntry.company_id == company_id,
+        JournalEntry.status == "posted",
+        JournalEntry.entry_date <= through
+    )
+    if after is not None:
+        query = query.filter(JournalEntry.entry_date > after)
+    query = _filter_dimensions(query, JournalEntryLine, site_id, business_unit_id, include_unassigned)
+    return query.group_by(JournalEntryLine.account_id).all()
+
+
+def _filter_dimensions(query, model, site_id: Optional[int], business_unit_id: Optional[int],
+                       include_unassigned: bool):
+    """Site / business unit filter; include_unassigned also keeps company-level (NULL) amounts."""
+    for column, value in ((model.site_id, site_id), (model.business_unit_id, business_unit_id)):
+        if value:
+            query = query.filter(or_(column == value, column.is_(None)) if include_unassigned else column == value)
+    return query
+
+
+def _rebuild_period(db: Session, company_id: int, period: FiscalPeriod, previous: Optional[FiscalPeriod]) -> int:
+    """
+    Replace a period's AccountBalance rows with one INSERT ... SELECT.
+
+    Opening balances are the previous period's closing balances (none for the
+    first period) plus the posted lines dated between the two periods; the
+    period columns sum the lines dated inside the period. Returns rows written.
+    """
+    lines = JournalEntryLine.__table__
+    entries = JournalEntry.__table__
+    balances = AccountBalance.__table__
+    accounts = Account.__table__
+    account_types = AccountType.__table__
+    zero = literal_column("0")
+
+    def posted_lines(net_debit, debit, credit, after: Optional[date], through: date):
+        query = select(
+            lines.c.account_id, lines.c.business_unit_id, lines.c.site_id,
+            net_debit.label("opening"), debit.label("debit"), credit.label("credit")
+        ).select_from(
+            lines.join(entries, lines.c.journal_entry_id == entries.c.id)
+        ).where(
+            entries.c.company_id == company_id,
+            entries.c.status == "posted",
+            entries.c.entry_date <= through
+        )
+        return query.where(entries.c.entry_date > after) if after is not None else query
+
+    line_debit = func.coalesce(lines.c.debit, 0)
+    line_credit = func.coalesce(lines.c.credit, 0)
+    parts = [
+        # Period activity
+        posted_lines(zero, line_debit, line_credit, period.start_date - timedelta(days=1), period.end_date),
+    ]
+    gap_end = period.start_date - timedelta(days=1)
+    if previous is None or previous.end_date < gap_end:
+        # Lines between the previous period and this one (or before the first period) move the opening balance
+        parts.append(posted_lines(line_debit - line_credit, zero, zero, previous.end_date if previous else None, gap_end))
+    if previous is not None:
+        # Previous closing balance, stored in the normal direction, back to net debit
+        previous_type = account_types.alias("previous_type")
+        previous_account = accounts.alias("previous_account")
+        parts.append(
+            select(
+                balances.c.account_id, balances.c.business_unit_id, balances.c.site_id,
+                case(
+                    (previous_type.c.normal_balance == "debit", balances.c.closing_balance),
+                    else_=-balances.c.closing_balance
+                ).label("opening"),
+                zero.label("debit"), zero.label("credit")
+            ).select_from(
+                balances.join(previous_account, balances.c.account_id == previous_account.c.id)
+                .outerjoin(previous_type, previous_account.c.account_type_id == previous_type.c.id)
+            ).where(
+                balances.c.company_id == company_id,
+                balances.c.fiscal_period_id == previous.id
+            )
+        )
+
+    source = union_all(*parts).subquery("source")
+    totals = select(
+        source.c.account_id, source.c.business_unit_id, source.c.site_id,
+        func.sum(source.c.opening).label("opening"),
+        func.sum(source.c.debit).label("debit"),
+        func.sum(source.c.credit).label("credit")
+    ).group_by(
+        source.c.account_id, source.c.business_unit_id, source.c.site_id
+    ).having(or_(
+        func.sum(source.c.opening) != 0, func.sum(source.c.debit) != 0, func.sum(source.c.credit) != 0
+    )).subquery("totals")
+
+    # Stored balances are in the account's normal direction (credit for accounts without a type)
+    sign = case((account_types.c.normal_balance == "debit", 1), else_=-1)
+    rows = select(
+        literal(company_id), totals.c.account_id, literal(period.id),
+        totals.c.business_unit_id, totals.c.site_id,
+        totals.c.debit, totals.c.credit,
+        sign * totals.c.opening,
+        sign * (totals.c.opening + totals.c.debit - totals.c.credit)
+    ).select_from(
+        totals.join(accounts, totals.c.account_id == accounts.c.id)
+        .outerjoin(account_types, accounts.c.account_type_id == account_types.c.id)
+    )
+
+    db.execute(delete(balances).where(
+        balances.c.company_id == company_id,
+        balances.c.fiscal_period_id == period.id
+    ))
+    result = db.execute(insert(balances).from_select(
+        ["company_id", "account_id", "fiscal_period_id", "business_unit_id", "site_id",
+         "period_debit", "period_credit", "opening_balance", "closing_balance"],
+        rows
+    ))
+    return max(result.rowcount or 0, 0)
+
+
+def _rebuild_chain(db: Session, company_id: int, periods: List[FiscalPeriod],
+                   base: Optional[FiscalPeriod]) -> int:
+    """
+    Rebuild periods in date order, each opening from the one before (the first
+    from base). Closed periods are stamped as refreshed. Returns rows written.
+    """
+    refreshed_at = _db_now(db)
+    written = 0
+    previous = base
+    for period in periods:
+        written += _rebuild_period(db, company_id, period, previous)
+        if period.status == "closed":
+            period.balances_refreshed_at = refreshed_at
+        previous = period
+    db.flush()
+    return written
+
+
+def refresh_period_balances(db: Session, company_id: int, period: FiscalPeriod) -> int:
+    """
+    Rebuild the AccountBalance rows of a closed period and of every closed
+    period after it, rolling opening balances forward in date order.
+
+    Starts earlier when an earlier closed period is no longer current, so the
+    whole chain is exact again afterwards. Returns the number of rows written.
+    The caller commits.
+    """
+    current = _current_periods(db, company_id, period.start_date - timedelta(days=1))
+    base = current[0] if current else None
+
+    query = db.query(FiscalPeriod).filter(
+        FiscalPeriod.company_id == company_id,
+        FiscalPeriod.status == "closed"
+    )
+    if base:
+        query = query.filter(FiscalPeriod.start_date > base.end_date)
+    periods = query.order_by(FiscalPeriod.start_date).all()
+    if not periods:
+        return 0
+
+    written = _rebuild_chain(db, company_id, periods, base)
+    logger.info(
+        f"[LEDGER] Refreshed balances of {len(periods)} closed period(s) for company {company_id} "
+        f"from {periods[0].period_name}: {written} rows"
+    )
+    return written
+
+
+def recompute_balances(db: Session, company_id: int, start_date: Optional[date] = None,
+                       end_date: Optional[date] = None) -> dict:
+    """
+    Rebuild the AccountBalance rows of every fiscal period (open or closed)
+    overlapping start_date..end_date, or of the whole company without dates,
+    after data corrections.
+
+    One INSERT ... SELECT per period, in date order, so each period opens
+    with the closing balances just written for the one before; the first
+    period opens from the latest current closed period before it. Closed
+    periods after the range were rolled forward from the old balances and are
+    marked for rebuild: reports read raw lines past the range until the next
+    period close refreshes them. The caller commits.
+    """
+    started = time.perf_counter()
+
+    query = db.query(FiscalPeriod).filter(FiscalPeriod.company_id == company_id)
+    if start_date:
+        query = query.filter(FiscalPeriod.end_date >= start_date)
+    if end_date:
+        query = query.filter(FiscalPeriod.start_date <= end_date)
+    periods = query.order_by(FiscalPeriod.start_date).all()
+
+    base = None
+    if periods:
+        current = _current_periods(db, company_id, periods[0].start_date - timedelta(days=1))
+        base = current[0] if current else None
+    written = _rebuild_chain(db, company_id, periods, base)
+
+    invalidated = 0
+    if periods:
+        invalidated = db.query(FiscalPeriod).filter(
+            FiscalPeriod.company_id == company_id,
+            FiscalPeriod.start_date > periods[-1].end_date,
+            FiscalPeriod.balances_refreshed_at.isnot(None)
+        ).update({FiscalPeriod.balances_refreshed_at: None}, synchronize_session=False)
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = round(written / elapsed) if elapsed > 0 else written
+    logger.info(
+        f"[LEDGER] Recomputed balances of {len(periods)} period(s) for company {company_id}: "
+        f"{written} rows in {elapsed:.2f}s ({rows_per_second} rows/s)"
+    )
+    return {
+        "periods": [
+            {"fiscal_period_id": period.id, "period_name": period.period_name, "status": period.status}
+            for period in periods
+        ],
+        "rows_written": written,
+        "later_periods_invalidated": invalidated,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": rows_per_second,
+    }
+
+
+# =============================================================================
+# Report queries
+# =============================================================================
+
+def account_balances_as_of(db: Session, company_id: int, as_of: date,
+                           site_id: Optional[int] = None, business_unit_id: Optional[int] = None,
+                           include_unassigned: bool = False) -> Dict[int, Decimal]:
+    """
+    Net debit per account of all posted entries dated on or before as_of:
+    closing balances of the latest current closed period plus the raw lines after it.
+    """
+    totals: Dict[int, Decimal] = {}
+    current = _current_periods(db, company_id, as_of)
+    base = current[0] if current else None
+
+    if base:
+        query = db.query(
+            AccountBalance.account_id,
+            func.sum(AccountBalance.closing_balance).label("closing_balance")
+        ).filter(
+            AccountBalance.company_id == company_id,
+            AccountBalance.fiscal_period_id == base.id
+        )
+        query = _filter_dimensions(query, AccountBalance, site_id, business_unit_id, include_unassigned)
+        rows = query.group_by(AccountBalance.account_id).all()
+        normal_balances = load_normal_balances(db, {row.account_id for row in rows})
+        for account_id, closing in rows:
+            totals[account_id] = _signed(Decimal(str(closing or 0)), normal_balances.get(account_id))
+
+    if base is None or base.end_date < as_of:
+        for account_id, debit, credit in _line_totals(
+            db, company_id, base.end_date if base else None, as_of,
+            site_id, business_unit_id, include_unassigned
+        ):
+            totals[account_id] = totals.get(account_id, ZERO) + Decimal(str(debit)) - Decimal(str(credit))
+
+    return totals
+
+
+def account_activity(db: Session, company_id: int, start_date: date, end_date: date,
+                     site_id: Optional[int] = None, business_unit_id: Optional[int] = None,
+                     include_unassigned: bool = False) -> Dict[int, Decimal]:
+    """Net debit per account of posted entries dated from start_date through end_date."""
+    closing = account_balances_as_of(db, company_id, end_date, site_id, business_unit_id, include_unassigned)
+    opening = account_balances_as_of(
+        db, company_id, start_date - timedelta(days=1), site_id, business_unit_id, include_unassigned
+    )
+    return {
+        account_id: closing.get(account_id, ZERO) - opening.get(account_id, ZERO)
+        for account_id in set(closing) | set(opening)
+    }
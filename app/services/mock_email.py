@@ -9,8 +9,6 @@ import io
 from datetime import datetime
 from typing import Dict, Any, List
 from pathlib import Path
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 
 
 class MockEmailService:
@@ -118,6 +116,8 @@ class MockEmailService:
 
     def _create_excel_file(self, invoice_data_list: List[Dict[str, Any]]) -> bytes:
         """Create Excel file with Header and Details sheets (same as EmailService)"""
+        from openpyxl import Workbook
+
         wb = Workbook()
         
         # Remove default sheet
@@ -139,6 +139,7 @@ class MockEmailService:
 
     def _create_header_sheet(self, sheet, invoice_data_list: List[Dict[str, Any]]):
         """Create header sheet with summary information (same as EmailService)"""
+        from openpyxl.styles import Font, PatternFill, Alignment
         
         # Set up header row
         headers = [
@@ -200,6 +201,7 @@ class MockEmailService:
 
     def _create_details_sheet(self, sheet, invoice_data_list: List[Dict[str, Any]]):
         """Create details sheet with line items (same as EmailService)"""
+        from openpyxl.styles import Font, PatternFill, Alignment
         
         # Set up header row
         headers = [
@@ -0,0 +1,215 @@
+"""
+Multi-page PDF Ingestion
+
+Feeds PDF invoices into the OCR/AI pipeline page by page with PyMuPDF.
+
+- The first few pages (settings.pdf_vision_max_pages) are always rendered for
+  the Vision AI request, which runs while the words are being collected.
+- Digital PDFs (every page has an embedded text layer) skip Tesseract: words
+  and positions come straight from the text layer.
+- Scanned PDFs are rendered one page at a time at a DPI chosen from the page
+  size, OCR'd, and released before the next page, so memory stays bounded by
+  a single page (plus the pages kept for the Vision AI request).
+
+Usage:
+    from app.services.pdf_ingestion import process_invoice_pdf, render_pdf_preview
+
+    invoice_results = process_invoice_pdf(pdf_bytes, db_session, company_id)
+    preview_png = render_pdf_preview(pdf_bytes)
+"""
+import logging
+from typing import Dict, Any, List
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Text-layer coordinates are scaled to 300 DPI pixels so they are comparable with
+# OCR'd page renders (group_words_into_lines uses pixel thresholds)
+TEXT_LAYER_SCALE = 300 / 72
+# Vertical gap between stacked pages when words from several pages are combined
+PAGE_GAP_PX = 50
+
+
+def _open_pdf(pdf_bytes: bytes):
+    import fitz  # PyMuPDF
+
+    document = fitz.open(stream=pdf_bytes, filetype="pdf")
+    if len(document) == 0:
+        document.close()
+        raise ValueError("PDF has no pages")
+    return document
+
+
+def choose_render_dpi(page, target_long_edge_px: int = None) -> int:
+    """
+    Pick a render DPI so the page's long edge is about target_long_edge_px pixels.
+
+    An A4/Letter page lands near 300 DPI; large-format pages (A3, drawings) are
+    rendered at lower DPI instead of producing huge pixmaps. Clamped to
+    settings.pdf_min_dpi..settings.pdf_max_dpi.
+    """
+    target = target_long_edge_px or settings.pdf_render_target_px
+    long_edge_pt = max(page.rect.width, page.rect.height) or 792
+    dpi = int(target * 72 / long_edge_pt)
+    return max(settings.pdf_min_dpi, min(settings.pdf_max_dpi, dpi))
+
+
+def render_page_png(page, dpi: int) -> bytes:
+    """Render a single page to PNG bytes (grayscale, no alpha)."""
+    import fitz
+
+    return page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False).tobytes("png")
+
+
+def render_pdf_preview(pdf_bytes: bytes) -> bytes:
+    """Render the first page as the stored document image, sized for viewing."""
+    document = _open_pdf(pdf_bytes)
+    try:
+        page = document.load_page(0)
+        dpi = choose_render_dpi(page, settings.pdf_preview_target_px)
+        return page.get_pixmap(dpi=dpi, alpha=False).tobytes("png")
+    finally:
+        document.close()
+
+
+def has_text_layer(page) -> bool:
+    """True if the page carries enough embedded text to skip OCR."""
+    text = page.get_text("text") or ""
+    return len("".join(text.split())) >= settings.pdf_text_layer_min_chars
+
+
+def extract_text_layer_words(page, page_index: int, y_offset: int) -> List[Dict]:
+    """
+    Words from the embedded text layer in the same shape perform_enhanced_ocr produces.
+    Coordinates are 300 DPI pixels, shifted down by y_offset for stacked pages.
+    """
+    words = []
+    for x0, y0, x1, y1, text, *_ in page.get_text("words"):
+        if not text.strip():
+            continue
+        words.append({
+            'text': text,
+            'left': int(x0 * TEXT_LAYER_SCALE),
+            'top': int(y0 * TEXT_LAYER_SCALE) + y_offset,
+            'width': int((x1 - x0) * TEXT_LAYER_SCALE),
+            'height': int((y1 - y0) * TEXT_LAYER_SCALE),
+            'confidence': 100,
+            'preprocessing_method': 'text_layer',
+            'page': page_index
+        })
+    return words
+
+
+def _build_ocr_results(words: List[Dict], confidences: List[float], preprocessing_methods: int) -> Dict[str, Any]:
+    from app.services.enhanced_invoice_processing import group_words_into_lines, extract_patterns_from_text
+
+    sorted_words = sorted(words, key=lambda k: (k['top'], k['left']))
+    return {
+        'words': sorted_words,
+        'lines': group_words_into_lines(sorted_words),
+        'patterns': extract_patterns_from_text(sorted_words),
+        'total_words': len(sorted_words),
+        'average_confidence': sum(confidences) / len(confidences) if confidences else 0,
+        'unique_preprocessing_methods': preprocessing_methods
+    }
+
+
+def process_invoice_pdf(pdf_bytes: bytes, db_session=None, company_id: int = None) -> Dict[str, Any]:
+    """
+    PDF counterpart of process_invoice_image_enhanced.
+
+    Processes up to settings.pdf_max_pages pages and returns the same result
+    shape, plus a "pdf" section (page counts, DPI, whether the text layer was used).
+    """
+    from app.services.enhanced_invoice_processing import (
+        preprocess_image_for_ocr_enhanced, perform_enhanced_ocr,
+        start_vision_extraction, wait_for_vision_extraction,
+        finalize_invoice_results, failed_invoice_results
+    )
+
+    try:
+        document = _open_pdf(pdf_bytes)
+    except ImportError:
+        return failed_invoice_results("PDF processing is not available. Please install PyMuPDF (pip install pymupdf).")
+    except Exception as e:
+        return failed_invoice_results(f"Failed to open PDF: {e}")
+
+    try:
+        total_pages = len(document)
+        page_count = min(total_pages, max(1, settings.pdf_max_pages))
+        if page_count < total_pages:
+            logger.warning(f"PDF has {total_pages} pages, processing the first {page_count}")
+
+        digital = all(has_text_layer(document.load_page(i)) for i in range(page_count))
+
+        all_words: List[Dict] = []
+        confidences: List[float] = []
+        render_dpis: List[int] = []
+        preprocessing_methods = 1
+        y_offset = 0
+
+        # Render the first pages for Vision AI up front so the Gemini call overlaps
+        # the text-layer read or the page-by-page OCR below
+        vision_page_count = min(page_count, max(1, settings.pdf_vision_max_pages))
+        vision_pages = []
+        for i in range(vision_page_count):
+            page = document.load_page(i)
+            vision_pages.append(render_page_png(page, choose_render_dpi(page)))
+        vision_future, started_at = start_vision_extraction(vision_pages[0], vision_pages[1:])
+
+        if digital:
+            # Text layer: exact text and positions, no Tesseract
+            for i in range(page_count):
+                page = document.load_page(i)
+                page_words = extract_text_layer_words(page, i, y_offset)
+                all_words.extend(page_words)
+                confidences.extend(w['confidence'] for w in page_words)
+                y_offset += int(page.rect.height * TEXT_LAYER_SCALE) + PAGE_GAP_PX
+            logger.info(f"Digital PDF: {len(all_words)} words from the text layer of {page_count} pages (OCR skipped)")
+        else:
+            for i in range(page_count):
+                page = document.load_page(i)
+                dpi = choose_render_dpi(page)
+                render_dpis.append(dpi)
+                page_png = vision_pages[i] if i < len(vision_pages) else render_page_png(page, dpi)
+
+                processed_images = preprocess_image_for_ocr_enhanced(page_png)
+                preprocessing_methods = len(processed_images)
+                page_ocr = perform_enhanced_ocr(processed_images)
+
+                for word in page_ocr['words']:
+                    word['top'] += y_offset
+                    word['page'] = i
+                all_words.extend(page_ocr['words'])
+                if page_ocr['total_words']:
+                    confidences.append(page_ocr['average_confidence'])
+
+                y_offset += int(page.rect.height * dpi / 72) + PAGE_GAP_PX
+                # Release this page's render and preprocessing variants before the next one
+                del processed_images, page_png
+                if i < len(vision_pages):
+                    vision_pages[i] = None
+
+            logger.info(f"Scanned PDF: OCR'd {page_count} pages at {render_dpis} DPI, {len(all_words)} words")
+
+        ocr_results = _build_ocr_results(all_words, confidences, preprocessing_methods)
+
+        structured_data = wait_for_vision_extraction(vision_future, started_at)
+
+        results = finalize_invoice_results(
+            structured_data, ocr_results, 0 if digital else preprocessing_methods, db_session, company_id
+        )
+        results["pdf"] = {
+            "total_pages": total_pages,
+            "processed_pages": page_count,
+            "text_layer_used": digital,
+            "render_dpi": render_dpis
+        }
+        return results
+
+    except Exception as e:
+        logger.error(f"PDF invoice processing failed: {e}")
+        return failed_invoice_results(str(e))
+    finally:
+        document.close()
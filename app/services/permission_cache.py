@@ -0,0 +1,168 @@
+"""
+Role Permission Cache
+
+Keeps each role's permissions in-process as a compiled frozenset of
+(module, action) pairs, so the permission middleware and require_permission
+answer with a set lookup instead of a RolePermission/Permission join per
+request.
+
+Consistency across workers uses the per-company version counters of the
+cache service (namespace "permissions"): the roles API bumps the counter after
+every role or permission edit, and a worker re-reads the counter at most every
+settings.permission_cache_check_interval seconds. Between checks a lookup costs
+no DB or Redis round-trip at all. When Redis is unavailable, cached roles are
+reloaded after settings.permission_cache_ttl seconds instead.
+
+Usage:
+    from app.services.permission_cache import permission_cache
+
+    # Async code (middleware, dependencies)
+    if await permission_cache.has_permission(db, user, "purchase_orders", "approve"): ...
+
+    # Sync route handlers, after committing a role/permission change
+    notify_permissions_changed(db, company_id)
+"""
+import time
+import logging
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.concurrency import run_sync
+
+logger = logging.getLogger(__name__)
+
+PERMISSIONS_NAMESPACE = "permissions"
+
+PermissionSet = FrozenSet[Tuple[str, str]]
+
+
+@dataclass
+class _RoleEntry:
+    company_id: Optional[int]
+    version: Optional[str]  # None when loaded without Redis
+    permissions: PermissionSet  # Exact (module, action) pairs
+    permissions_folded: PermissionSet  # Lowercased pairs for case-insensitive checks
+    loaded_at: float
+    checked_at: float
+
+
+def load_role_permissions(db: Session, role_id: int) -> PermissionSet:
+    """Read a role's (module, action) pairs from the database."""
+    from app.models import RolePermission, Permission
+
+    rows = (
+        db.query(Permission.module, Permission.action)
+        .join(RolePermission, RolePermission.permission_id == Permission.id)
+        .filter(RolePermission.role_id == role_id)
+        .all()
+    )
+    return frozenset((module, action) for module, action in rows)
+
+
+class PermissionCache:
+    """In-process role_id -> compiled permission set, invalidated by version stamp."""
+
+    def __init__(self):
+        self._entries: Dict[int, _RoleEntry] = {}
+
+    async def get_role_permissions(
+        self,
+        db: Session,
+        role_id: int,
+        company_id: Optional[int],
+        case_sensitive: bool = True
+    ) -> PermissionSet:
+        """The role's permission set, reloaded only when its company's version changed."""
+        from app.services.cache import cache_service
+
+        now = time.monotonic()
+        entry = self._entries.get(role_id)
+
+        if entry is not None and now - entry.checked_at < settings.permission_cache_check_interval:
+            return entry.permissions if case_sensitive else entry.permissions_folded
+
+        # Read the version before loading so a concurrent edit can only make the entry look stale
+        version = await cache_service.namespace_version(company_id, PERMISSIONS_NAMESPACE)
+
+        if entry is not None and entry.company_id == company_id:
+            fresh = (
+                entry.version == version if version is not None
+                else now - entry.loaded_at < settings.permission_cache_ttl
+            )
+            if fresh:
+                entry.checked_at = now
+                return entry.permissions if case_sensitive else entry.permissions_folded
+
+        permissions = await run_sync(load_role_permissions, db, role_id)
+        entry = _RoleEntry(
+            company_id=company_id,
+            version=version,
+            permissions=permissions,
+            permissions_folded=frozenset((m.lower(), a.lower()) for m, a in permissions),
+            loaded_at=now,
+            checked_at=now
+        )
+        self._entries[role_id] = entry
+        logger.debug(f"[PERMISSION_CACHE] Loaded {len(permissions)} permissions for role {role_id} (version {version})")
+        return entry.permissions if case_sensitive else entry.permissions_folded
+
+    async def has_permission(
+        self,
+        db: Session,
+        user,
+        module: str,
+        action: str,
+        case_sensitive: bool = True
+    ) -> bool:
+        """True if the user's role grants module:action. Users without a role have no permissions."""
+        if user.role_id is None:
+            return False
+        permissions = await self.get_role_permissions(db, user.role_id, user.company_id, case_sensitive)
+        if case_sensitive:
+            return (module, action) in permissions
+        return (module.lower(), action.lower()) in permissions
+
+    def invalidate(self, company_ids: Optional[Iterable[Optional[int]]] = None):
+        """Drop local entries for the given companies (all entries when None)."""
+        if company_ids is None:
+            self._entries.clear()
+            return
+        company_ids = set(company_ids)
+        for role_id, entry in list(self._entries.items()):
+            if entry.company_id in company_ids:
+                self._entries.pop(role_id, None)
+
+
+def notify_permissions_changed(db: Session, company_id: Optional[int] = None):
+    """
+    Invalidate cached role permissions after a committed change.
+
+    company_id limits the change to one company's roles; None (a global
+    Permission edit) invalidates every company. Safe to call from sync route
+    handlers: the version bump is handed to the event loop with run_async.
+    """
+    if company_id is not None:
+        company_ids = [company_id]
+        permission_cache.invalidate(company_ids)
+    else:
+        from app.models import Company
+        company_ids = [row.id for row in db.query(Company.id).all()]
+        permission_cache.invalidate()
+
+    from app.services.cache import cache_service
+    from app.utils.concurrency import run_async
+
+    try:
+        run_async(cache_service.bump_version_for_companies, company_ids, PERMISSIONS_NAMESPACE)
+    except RuntimeError:
+        # Not running in a request worker thread (scripts); other workers catch up via the TTL
+        logger.warning("[PERMISSION_CACHE] Could not bump the permissions version outside the event loop")
+    except Exception as e:
+        logger.warning(f"[PERMISSION_CACHE] Permissions version bump failed: {e}")
+
+
+# Global cache instance - import this in other modules
+permission_cache = PermissionCache()
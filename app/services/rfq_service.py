@@ -19,6 +19,7 @@ from app.models import (
     RFQAuditTrail, RFQSiteVisit, RFQComparison,
     PurchaseRequest, PurchaseRequestLine, User
 )
+from app.services.sequences import next_number, max_suffix
 
 logger = logging.getLogger(__name__)
 
@@ -32,25 +33,11 @@ def generate_rfq_number(db: Session, company_id: int) -> str:
     Generate unique RFQ number in format: RFQ-YYYY-NNNNN
     Example: RFQ-2026-00001
     """
-    year = datetime.now().year
-
-    # Get the last RFQ number for this company and year
-    last_rfq = db.query(RFQ).filter(
-        RFQ.company_id == company_id,
-        RFQ.rfq_number.like(f"RFQ-{year}-%")
-    ).order_by(RFQ.id.desc()).first()
-
-    if last_rfq:
-        # Extract the sequence number and increment
-        try:
-            last_seq = int(last_rfq.rfq_number.split('-')[-1])
-            new_seq = last_seq + 1
-        except (ValueError, IndexError):
-            new_seq = 1
-    else:
-        new_seq = 1
-
-    return f"RFQ-{year}-{new_seq:05d}"
+    prefix = f"RFQ-{datetime.now().year}-"
+    return next_number(
+        db, company_id, prefix, width=5,
+        seed=lambda: max_suffix(db, RFQ.rfq_number, RFQ.company_id, company_id, prefix)
+    )
 
 
 # =============================================================================
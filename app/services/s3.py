@@ -1,13 +1,13 @@
-import boto3
 import os
 import json
-from PIL import Image
-from botocore.exceptions import ClientError
 from app.config import settings
-from .enhanced_invoice_processing import process_invoice_image_enhanced
+
+# boto3, PIL and the OCR/AI pipeline are imported where they are used, so routers
+# importing this module don't pay for them at worker boot (see tests/check_import_time.py)
 
 
 def get_s3_client():
+    import boto3
     return boto3.client(
         's3',
         aws_access_key_id=settings.aws_access_key_id,
@@ -16,19 +16,30 @@ def get_s3_client():
     )
 
 
-def process_image(file_path: str, file_bytes: bytes = None, db_session=None, company_id: int = None) -> tuple:
+def process_image(file_path: str, file_bytes: bytes = None, db_session=None, company_id: int = None, invoice_results: dict = None, pdf_bytes: bytes = None) -> tuple:
     """
     Process the image: resize, compress, and extract invoice data.
+    Pass invoice_results (e.g. from the document result cache) to skip OCR/AI extraction.
+    For PDF uploads pass the original pdf_bytes: file_path is then the rendered first
+    page (stored image) and invoice data is extracted from all pages of the PDF.
     Returns (processed_image_path, invoice_processing_results).
     """
+    from PIL import Image
+
     try:
-        # Read file bytes if not provided
-        if file_bytes is None:
-            with open(file_path, 'rb') as f:
-                file_bytes = f.read()
+        if invoice_results is None and pdf_bytes is not None:
+            from .pdf_ingestion import process_invoice_pdf
+            invoice_results = process_invoice_pdf(pdf_bytes, db_session, company_id)
+
+        if invoice_results is None:
+            # Read file bytes if not provided
+            if file_bytes is None:
+                with open(file_path, 'rb') as f:
+                    file_bytes = f.read()
 
-        # Process invoice data using enhanced OCR and AI (with optional vendor lookup)
-        invoice_results = process_invoice_image_enhanced(file_bytes, db_session, company_id)
+            # Process invoice data using enhanced OCR and AI (with optional vendor lookup)
+            from .enhanced_invoice_processing import process_invoice_image_enhanced
+            invoice_results = process_invoice_image_enhanced(file_bytes, db_session, company_id)
         
         # Standard image processing (resize, compress)
         with Image.open(file_path) as img:
@@ -77,6 +88,8 @@ def upload_to_s3(file_path: str, filename: str) -> tuple:
     """
     Upload file to S3 and return (s3_key, s3_url)
     """
+    from botocore.exceptions import ClientError
+
     try:
         s3_client = get_s3_client()
         s3_key = f"processed-images/{filename}"
@@ -121,6 +134,8 @@ def download_file_from_s3(s3_key: str) -> bytes:
     """
     Download file from S3 and return as bytes
     """
+    from botocore.exceptions import ClientError
+
     try:
         s3_client = get_s3_client()
         response = s3_client.get_object(Bucket=settings.s3_bucket, Key=s3_key)
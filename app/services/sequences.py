@@ -0,0 +1,131 @@
+"""
+Document Number Sequences
+
+Work order, journal entry, RFQ, ledger transaction, address book and other
+document numbers come from a per-company, per-prefix counter row in
+``document_sequences`` instead of "find the last number LIKE 'prefix%' and
+add one". The prefix carries the period (``WO-2026-``, ``ISS-202601-``), so
+every period has its own counter. A company_id of None selects a counter
+shared by all companies, for numbers that must be unique across tenants
+(recognition numbers).
+
+A number is reserved with a single INSERT ... ON CONFLICT DO UPDATE ...
+RETURNING on the counter row:
+
+- it replaces the LIKE scan on every create path with a primary key upsert;
+- the row lock serializes concurrent creates of the same document type in
+  the same company, so two requests can no longer get the same number;
+- the increment is part of the caller's transaction: a rolled-back create
+  also rolls back its number, so sequences stay gap-free.
+
+The first reservation of a prefix seeds the counter with the highest number
+already in use (the ``seed`` callable, typically max_suffix over the
+document table), so numbering continues where the old generators stopped.
+
+Bulk operations reserve a whole block in one round-trip with
+reserve_numbers(), and give the unused tail back with release() before
+committing.
+
+Usage:
+    from app.services.sequences import next_number, reserve_numbers, max_suffix
+
+    wo_number = next_number(
+        db, company_id, f"WO-{year}-", width=5,
+        seed=lambda: max_suffix(db, WorkOrder.wo_number, WorkOrder.company_id, company_id, f"WO-{year}-")
+    )
+"""
+import logging
+from typing import Callable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database import dialect_insert
+from app.models import DocumentSequence
+
+logger = logging.getLogger(__name__)
+
+Seed = Optional[Callable[[], int]]
+
+
+def max_suffix(db: Session, column, company_column, company_id: Optional[int], prefix: str) -> int:
+    """Highest numeric suffix of the column values starting with prefix (0 if none)."""
+    query = db.query(column).filter(column.like(f"{prefix}%"))
+    if company_column is not None:
+        query = query.filter(company_column == company_id)
+    # Longest first, then highest: numeric order for zero-padded suffixes of any width
+    for (value,) in query.order_by(func.length(column).desc(), column.desc()).limit(20):
+        try:
+            return int(value[len(prefix):].rsplit("-", 1)[-1])
+        except (ValueError, TypeError):
+            continue
+    return 0
+
+
+def _counter_filter(company_id: Optional[int], prefix: str):
+    company = DocumentSequence.company_id.is_(None) if company_id is None else DocumentSequence.company_id == company_id
+    return company, DocumentSequence.prefix == prefix
+
+
+def _conflict_target(company_id: Optional[int]) -> dict:
+    if company_id is None:
+        # Partial unique index uq_document_sequence_global_prefix
+        return {"index_elements": [DocumentSequence.prefix], "index_where": DocumentSequence.company_id.is_(None)}
+    return {"index_elements": [DocumentSequence.company_id, DocumentSequence.prefix]}
+
+
+def reserve(db: Session, company_id: Optional[int], prefix: str, count: int = 1, seed: Seed = None) -> int:
+    """
+    Reserve count consecutive values of the (company_id, prefix) sequence and
+    return the last one (company_id None: the shared sequence). The counter row
+    stays locked until the caller's transaction ends.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    start = 0
+    if seed is not None:
+        exists = db.query(DocumentSequence.id).filter(*_counter_filter(company_id, prefix)).first()
+        if not exists:
+            # First use of this prefix: continue after the numbers already in use.
+            # A concurrent first use computes the same seed and lands on the update branch
+            start = seed() or 0
+
+    stmt = dialect_insert(db, DocumentSequence).values(
+        company_id=company_id,
+        prefix=prefix,
+        last_value=start + count
+    )
+    stmt = stmt.on_conflict_do_update(
+        **_conflict_target(company_id),
+        set_={
+            "last_value": DocumentSequence.last_value + count,
+            "updated_at": func.now(),
+        }
+    ).returning(DocumentSequence.last_value)
+    return db.execute(stmt).scalar_one()
+
+
+def next_number(db: Session, company_id: Optional[int], prefix: str, width: int, seed: Seed = None) -> str:
+    """The next document number: prefix followed by the zero-padded sequence value."""
+    return f"{prefix}{reserve(db, company_id, prefix, 1, seed):0{width}d}"
+
+
+def reserve_numbers(db: Session, company_id: Optional[int], prefix: str, count: int, width: int, seed: Seed = None) -> List[str]:
+    """count consecutive document numbers in one round-trip (bulk creates)."""
+    last = reserve(db, company_id, prefix, count, seed)
+    return [f"{prefix}{value:0{width}d}" for value in range(last - count + 1, last + 1)]
+
+
+def release(db: Session, company_id: Optional[int], prefix: str, count: int):
+    """
+    Give back the last count values reserved in the current transaction (the
+    unused tail of a block). Nobody can have reserved after them: the counter
+    row stays locked by the reservation until the transaction ends.
+    """
+    if count < 1:
+        return
+    db.query(DocumentSequence).filter(*_counter_filter(company_id, prefix)).update({
+        DocumentSequence.last_value: DocumentSequence.last_value - count,
+        DocumentSequence.updated_at: func.now(),
+    }, synchronize_session=False)
@@ -0,0 +1,141 @@
+"""
+Company Subscription Status Cache
+
+SubscriptionEnforcementMiddleware only needs a company's subscription_status
+and subscription_end, which change a few times a year, yet it runs on every
+authenticated API request. This cache keeps them:
+
+- in-process, in a bounded LRU with a short TTL
+  (settings.subscription_cache_local_ttl), so most requests hit memory;
+- in Redis (settings.subscription_cache_ttl), shared by all workers, so a
+  local miss usually costs one GET instead of a Company query.
+
+The platform admin subscription endpoints (subscription, activate, suspend,
+extend, upgrade request processing) call invalidate() after committing: the
+Redis entry is deleted right away and other workers drop their local copy when
+its short TTL runs out.
+
+Usage:
+    from app.services.subscription_cache import subscription_cache
+
+    state = await subscription_cache.get(db, company_id)
+    if state and state.is_blocked: ...
+
+    await subscription_cache.invalidate(company_id)
+"""
+import time
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.utils.concurrency import run_sync
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SubscriptionState:
+    """The subscription fields the enforcement middleware checks."""
+    company_id: int
+    subscription_status: Optional[str]
+    subscription_end: Optional[datetime]
+
+    @property
+    def is_blocked(self) -> bool:
+        return self.subscription_status in ["cancelled", "suspended"]
+
+    @property
+    def is_expired(self) -> bool:
+        return bool(self.subscription_end and self.subscription_end < datetime.utcnow())
+
+    def to_dict(self) -> dict:
+        return {
+            "subscription_status": self.subscription_status,
+            "subscription_end": self.subscription_end.isoformat() if self.subscription_end else None
+        }
+
+    @classmethod
+    def from_dict(cls, company_id: int, data: dict) -> "SubscriptionState":
+        end = data.get("subscription_end")
+        return cls(
+            company_id=company_id,
+            subscription_status=data.get("subscription_status"),
+            subscription_end=datetime.fromisoformat(end) if end else None
+        )
+
+
+def _load_subscription(db: Session, company_id: int):
+    from app.models import Company
+    return (
+        db.query(Company.subscription_status, Company.subscription_end)
+        .filter(Company.id == company_id)
+        .first()
+    )
+
+
+class SubscriptionCache:
+    """company_id -> SubscriptionState, LRU + TTL in-process, backed by Redis."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, Tuple[SubscriptionState, float]]" = OrderedDict()
+
+    def _get_local(self, company_id: int) -> Optional[SubscriptionState]:
+        entry = self._entries.get(company_id)
+        if entry is None:
+            return None
+        state, expires_at = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(company_id, None)
+            return None
+        self._entries.move_to_end(company_id)
+        return state
+
+    def _set_local(self, state: SubscriptionState):
+        self._entries[state.company_id] = (state, time.monotonic() + settings.subscription_cache_local_ttl)
+        self._entries.move_to_end(state.company_id)
+        while len(self._entries) > max(1, settings.subscription_cache_max_entries):
+            self._entries.popitem(last=False)
+
+    async def get(self, db: Session, company_id: int) -> Optional[SubscriptionState]:
+        """The company's subscription state, or None if the company does not exist."""
+        from app.services.cache import cache_service
+
+        state = self._get_local(company_id)
+        if state is not None:
+            return state
+
+        data = await cache_service.get(company_id, "subscription")
+        if data is not None:
+            state = SubscriptionState.from_dict(company_id, data)
+            self._set_local(state)
+            return state
+
+        row = await run_sync(_load_subscription, db, company_id)
+        if row is None:
+            return None
+
+        state = SubscriptionState(company_id, row.subscription_status, row.subscription_end)
+        self._set_local(state)
+        await cache_service.set(
+            company_id, "subscription",
+            value=state.to_dict(),
+            ttl=settings.subscription_cache_ttl
+        )
+        return state
+
+    async def invalidate(self, company_id: int):
+        """Forget a company's state after its subscription changed."""
+        from app.services.cache import cache_service
+
+        self._entries.pop(company_id, None)
+        await cache_service.delete(company_id, "subscription")
+        logger.info(f"[SUBSCRIPTION_CACHE] Invalidated company {company_id}")
+
+
+# Global cache instance - import this in other modules
+subscription_cache = SubscriptionCache()
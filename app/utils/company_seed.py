@@ -616,20 +616,9 @@ def generate_address_number(company_id: int, db: Session) -> str:
     Generate the next sequential address number for a company.
     Format: 8-digit zero-padded number (e.g., "00000001")
     """
-    # Get the highest address number for this company
-    last_entry = db.query(AddressBook).filter(
-        AddressBook.company_id == company_id
-    ).order_by(AddressBook.address_number.desc()).first()
-
-    if last_entry and last_entry.address_number:
-        try:
-            next_num = int(last_entry.address_number) + 1
-        except ValueError:
-            next_num = 1
-    else:
-        next_num = 1
+    from app.api.address_book import generate_next_address_number
 
-    return f"{next_num:08d}"
+    return generate_next_address_number(db, company_id)
 
 
 def seed_default_client_and_site(company_id: int, db: Session) -> dict:
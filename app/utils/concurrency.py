@@ -0,0 +1,50 @@
+"""
+Keeping blocking work off the event loop
+
+Route handlers use the synchronous SQLAlchemy session, OpenCV/Tesseract,
+reportlab and smtplib, all of which block. The rule for handlers is:
+
+- Handlers that do blocking work are plain ``def``. FastAPI runs them in the
+  bounded AnyIO worker threadpool (settings.threadpool_workers threads per
+  process), so a slow query only occupies its own thread instead of stalling
+  every request on the worker.
+- Those handlers call the async services they need (cache, HTTP clients) with
+  ``run_async``, which hands the coroutine back to the event loop and waits.
+- ``async def`` handlers are for endpoints that only await; if one has to do
+  a blocking step it wraps it in ``await run_sync(...)``.
+
+tests/test_async_routes.py fails when an ``async def`` route calls a known
+blocking API directly.
+
+Usage:
+    from app.utils.concurrency import run_async, run_sync
+
+    @router.get("/items")
+    def get_items(db: Session = Depends(get_db)):
+        cached = run_async(cache_service.get_items_page, company_id, page, page_size)
+        ...
+
+    @router.get("/status")
+    async def get_status():
+        snapshot = await run_sync(load_snapshot, batch_id)
+"""
+import functools
+from typing import Any, Awaitable, Callable
+
+from anyio import from_thread, to_thread
+from anyio.to_thread import current_default_thread_limiter
+
+
+def run_async(async_fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """Run a coroutine function on the event loop from a sync handler (worker thread) and return its result."""
+    return from_thread.run(functools.partial(async_fn, *args, **kwargs))
+
+
+async def run_sync(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking function in the shared, bounded worker threadpool from async code."""
+    return await to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+
+
+def configure_threadpool(workers: int):
+    """Set how many sync handlers / run_sync calls may run at once (AnyIO's default is 40)."""
+    current_default_thread_limiter().total_tokens = max(1, workers)
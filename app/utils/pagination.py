@@ -0,0 +1,83 @@
+"""
+Keyset (Cursor) Pagination
+
+List endpoints over large tables page by the sort key instead of OFFSET: the
+client passes back an opaque cursor holding the (created_at, id) of the last
+row it received, and the next page is read with an index range scan that
+costs the same on page 1 and page 1000.
+
+Rows are ordered newest first, ``created_at DESC NULLS FIRST, id DESC``, with
+id as the tie-breaker so the order is total even when timestamps collide. That
+is a backward scan of a plain (company_id, created_at, id) index on PostgreSQL.
+Pagination metadata travels in response headers so the body stays the plain
+list existing clients expect:
+
+- ``X-Next-Cursor``: cursor of the next page (absent on the last page)
+- ``X-Total-Count``: total matching rows, only when the client asks for it
+
+Usage:
+    from app.utils.pagination import keyset_paginate
+
+    rows, next_cursor = keyset_paginate(query, WorkOrder.created_at, WorkOrder.id, cursor, limit)
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Opaque, URL-safe cursor for the row a page ended on."""
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """(created_at, id) of a cursor; 400 if it was not produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset_paginate(query, created_column, id_column, cursor: Optional[str], limit: int) -> Tuple[List, Optional[str]]:
+    """
+    One page of query ordered by (created_column DESC NULLS FIRST, id_column DESC).
+
+    The query must select rows that have ``created_at`` and ``id`` attributes
+    (entities or named columns). Returns (rows, next_cursor), next_cursor being
+    None on the last page.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        if created_at is None:
+            # Still among the rows without a timestamp, which sort first
+            query = query.filter(or_(
+                and_(created_column.is_(None), id_column < row_id),
+                created_column.isnot(None)
+            ))
+        else:
+            query = query.filter(or_(
+                created_column < created_at,
+                and_(created_column == created_at, id_column < row_id)
+            ))
+
+    rows = (
+        query.order_by(created_column.desc().nulls_first(), id_column.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+One-shot management commands (run once per deploy, not in every worker).
+
+Execute from the doxsnap_be directory:
+    python manage.py setup              # tables + migrations + permission seed + Gemini key check
+    python manage.py migrate            # tables + column migrations + data backfills
+    python manage.py seed-permissions
+    python manage.py check-ai           # validate GOOGLE_API_KEY (exit code 1 if invalid)
+    python manage.py recompute-balances --company-id 1 [--year 2025 [--month 3]]
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def recompute_balances(company_id, year=None, month=None):
+    """Rebuild a company's AccountBalance rows in one transaction, outside any request."""
+    from datetime import date, timedelta
+    from app.database import SessionLocal
+    from app.services import ledger_balances
+
+    start_date = end_date = None
+    if year and month:
+        start_date = date(year, month, 1)
+        end_date = (date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)) - timedelta(days=1)
+    elif year:
+        start_date, end_date = date(year, 1, 1), date(year, 12, 31)
+    elif month:
+        sys.exit("--month requires --year")
+
+    db = SessionLocal()
+    try:
+        result = ledger_balances.recompute_balances(db, company_id, start_date, end_date)
+        db.commit()
+    finally:
+        db.close()
+    logger.info(
+        f"recompute-balances: {len(result['periods'])} period(s), {result['rows_written']} rows "
+        f"in {result['elapsed_seconds']}s ({result['rows_per_second']} rows/s), "
+        f"{result['later_periods_invalidated']} later period(s) marked for rebuild"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="doxsnap_be management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    setup_parser = subparsers.add_parser("setup", help="Create tables, run migrations, seed permissions, check Gemini")
+    setup_parser.add_argument("--skip-ai-check", action="store_true", help="Don't call the Gemini API")
+    subparsers.add_parser("migrate", help="Create tables, run column migrations and data backfills")
+    subparsers.add_parser("seed-permissions", help="Add missing system permissions")
+    subparsers.add_parser("check-ai", help="Validate the Google API key")
+    recompute_parser = subparsers.add_parser("recompute-balances", help="Rebuild account balances from journal lines")
+    recompute_parser.add_argument("--company-id", type=int, required=True)
+    recompute_parser.add_argument("--year", type=int, help="Only the periods of this year (default: all periods)")
+    recompute_parser.add_argument("--month", type=int, help="Only this month of --year")
+
+    args = parser.parse_args()
+
+    from app import bootstrap
+
+    if args.command == "setup":
+        bootstrap.run_setup(check_ai=not args.skip_ai_check)
+    elif args.command == "migrate":
+        with bootstrap.setup_lock():
+            bootstrap.create_tables()
+            bootstrap.run_migrations()
+            bootstrap.backfill_invoice_duplicate_keys()
+    elif args.command == "seed-permissions":
+        with bootstrap.setup_lock():
+            bootstrap.run_permission_seed()
+    elif args.command == "check-ai":
+        if not bootstrap.validate_google_api_key():
+            sys.exit(1)
+    elif args.command == "recompute-balances":
+        recompute_balances(args.company_id, args.year, args.month)
+
+    logger.info(f"{args.command}: done")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,31 @@
 #!/usr/bin/env python3
 """
 Simple script to run the FastAPI backend server.
-Usage: python run.py
+Usage: python run.py [--profile all|api|mobile|documents|portal|platform] [--port 8000]
+
+The schema is not touched here: run `python manage.py setup` first, or set
+AUTO_SETUP=true to run it on app startup.
 """
 
+import os
+import argparse
+
 import uvicorn
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the FastAPI backend server")
+    parser.add_argument("--profile", help="Deployment profile: routers to mount (see app/routers.py)")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.profile:
+        # Read by app.config in this process and in the reloader's server process
+        os.environ["APP_PROFILE"] = args.profile
+
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
-        port=8000,
+        port=args.port,
         reload=True,
         log_level="info"
-    )
\ No newline at end of file
+    )
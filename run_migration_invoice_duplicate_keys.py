@@ -0,0 +1,56 @@
+"""
+Migration: Indexed duplicate-invoice detection keys on processed_images
+
+Adds invoice_number_normalized and supplier_name_normalized columns (plus a
+composite index) and backfills them from the structured_data JSON of existing
+documents, so check_duplicate_invoice can use a single indexed lookup.
+
+Safe to re-run: only rows with structured_data and no normalized invoice
+number are processed, in batches. `python manage.py setup` runs the same
+backfill (app/bootstrap.py); this script is for applying it on its own.
+
+Run with: python run_migration_invoice_duplicate_keys.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app import bootstrap
+from app.database import SessionLocal
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def run_migration():
+    """Add and backfill normalized invoice number / supplier name columns"""
+    db = SessionLocal()
+
+    try:
+        db.execute(text("ALTER TABLE processed_images ADD COLUMN IF NOT EXISTS invoice_number_normalized VARCHAR"))
+        db.execute(text("ALTER TABLE processed_images ADD COLUMN IF NOT EXISTS supplier_name_normalized VARCHAR"))
+        db.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_processed_images_duplicate_keys
+            ON processed_images (invoice_number_normalized, supplier_name_normalized)
+        """))
+        db.commit()
+        logger.info("Columns and index for duplicate detection are in place")
+
+        updated = bootstrap.backfill_invoice_duplicate_keys(BATCH_SIZE)
+        logger.info(f"Done. {updated} documents now have duplicate detection keys")
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Migration failed: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run_migration()
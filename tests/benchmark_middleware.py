@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the request middleware stack (permission + subscription enforcement)
+
+Measures the per-request overhead the two middlewares add on top of a bare
+ASGI app, comparing the pure ASGI implementations in app/middlewares/ with
+the previous BaseHTTPMiddleware versions (kept below as the reference, cut
+down to the DB-free paths they share with the new code):
+
+- public:     GET /api/health               (exempt from both middlewares)
+- rejected:   POST /api/items without token  (401 from the permission middleware)
+- streaming:  GET /api/health/export         (StreamingResponse, 200 chunks)
+
+Requests are driven straight through the ASGI interface, so the numbers are
+middleware cost only - no HTTP server, client or database. The overhead
+columns are per request over the bare app; speedup compares the full
+per-request time of the two stacks.
+
+Run from the doxsnap_be directory (DATABASE_URL must be set, it is not connected to):
+    python tests/benchmark_middleware.py
+    python tests/benchmark_middleware.py --requests 5000 --repeat 5
+"""
+
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.middlewares.permission_middleware import PermissionMiddleware, PUBLIC_PATHS
+from app.middlewares.subscription_middleware import SubscriptionEnforcementMiddleware, EXEMPT_PATHS, EXEMPT_EXACT
+
+STREAM_CHUNKS = 200
+
+
+class LegacyPermissionMiddleware(BaseHTTPMiddleware):
+    """Previous PermissionMiddleware, up to the point where it needs the database."""
+
+    async def dispatch(self, request, call_next):
+        path = request.url.path
+        print(f"[PERMISSION] {request.method} {request.url.path}")
+
+        if not path.startswith("/api/"):
+            return await call_next(request)
+
+        for p in PUBLIC_PATHS:
+            if path.startswith(p):
+                return await call_next(request)
+
+        if request.method == "OPTIONS":
+            return await call_next(request)
+
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"detail": "Not authenticated"})
+
+        return await call_next(request)
+
+
+class LegacySubscriptionEnforcementMiddleware(BaseHTTPMiddleware):
+    """Previous SubscriptionEnforcementMiddleware, up to the point where it needs the database."""
+
+    async def dispatch(self, request, call_next):
+        path = request.url.path
+
+        if path in EXEMPT_EXACT:
+            return await call_next(request)
+
+        for exempt in EXEMPT_PATHS:
+            if path.startswith(exempt):
+                return await call_next(request)
+
+        if not path.startswith("/api/"):
+            return await call_next(request)
+
+        if request.method == "OPTIONS":
+            return await call_next(request)
+
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return await call_next(request)
+
+        return await call_next(request)
+
+
+async def health(request):
+    return PlainTextResponse("ok")
+
+
+async def export(request):
+    async def rows():
+        for i in range(STREAM_CHUNKS):
+            yield f"{i},item-{i},10.00\n"
+    return StreamingResponse(rows(), media_type="text/csv")
+
+
+async def items(request):
+    return PlainTextResponse("created", status_code=201)
+
+
+def build_app(stack):
+    app = Starlette(routes=[
+        Route("/api/health", health),
+        Route("/api/health/export", export),
+        Route("/api/items", items, methods=["POST"]),
+    ])
+    if stack == "legacy":
+        # Same order as app/main.py: subscription runs first, then permissions
+        return LegacySubscriptionEnforcementMiddleware(LegacyPermissionMiddleware(app))
+    if stack == "asgi":
+        return SubscriptionEnforcementMiddleware(PermissionMiddleware(app))
+    return app
+
+
+def make_scope(method, path):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+
+
+async def run_requests(app, method, path, count):
+    """Send count requests; returns (seconds, status, body bytes of the last response)."""
+    result = {}
+    for_request = {}
+
+    async def receive():
+        # An empty request body, then a disconnect once the response is complete
+        if not for_request["body_sent"]:
+            for_request["body_sent"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await for_request["done"].wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["body"] = b""
+        elif message["type"] == "http.response.body":
+            result["body"] += message.get("body", b"")
+            if not message.get("more_body", False):
+                for_request["done"].set()
+
+    start = time.perf_counter()
+    for _ in range(count):
+        for_request.update(body_sent=False, done=asyncio.Event())
+        await app(make_scope(method, path), receive, send)
+    return time.perf_counter() - start, result.get("status"), result.get("body")
+
+
+def best_time(app, method, path, count, repeat):
+    best, status, body = None, None, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            elapsed, status, body = asyncio.run(run_requests(app, method, path, count))
+        best = elapsed if best is None else min(best, elapsed)
+    return best / count, status, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the permission/subscription middleware stack")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("public", "GET", "/api/health"),
+        ("rejected", "POST", "/api/items"),
+        ("streaming", "GET", "/api/health/export"),
+    ]
+    apps = {stack: build_app(stack) for stack in ("bare", "legacy", "asgi")}
+
+    print(f"{'scenario':<10} {'bare (us)':>10} {'legacy +us':>11} {'asgi +us':>10} {'speedup':>9}  status")
+    print("-" * 64)
+
+    ok = True
+    for name, method, path in scenarios:
+        bare, _, _ = best_time(apps["bare"], method, path, args.requests, args.repeat)
+        legacy, legacy_status, legacy_body = best_time(apps["legacy"], method, path, args.requests, args.repeat)
+        asgi, asgi_status, asgi_body = best_time(apps["asgi"], method, path, args.requests, args.repeat)
+
+        legacy_overhead = max(legacy - bare, 0)
+        asgi_overhead = max(asgi - bare, 0)
+        match = (legacy_status, legacy_body) == (asgi_status, asgi_body)
+        ok = ok and match
+        speedup = f"{legacy / asgi:8.1f}x"
+        print(f"{name:<10} {bare * 1e6:>10.1f} {legacy_overhead * 1e6:>11.1f} {asgi_overhead * 1e6:>10.1f} "
+              f"{speedup}  {asgi_status}{'' if match else ' (DIFFERS)'}")
+
+    if not ok:
+        print("\nFAILED: the ASGI middlewares answered differently from the legacy ones")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark for OCR word de-duplication (remove_duplicate_words)
+
+Compares the grid-bucketed remove_duplicate_words in
+app/services/enhanced_invoice_processing.py against the previous pairwise
+O(n^2) scan on synthetic OCR output (4 preprocessing variants of the same
+page, with jittered positions and confidences), and checks both return
+the same words in the same order.
+
+Run from the doxsnap_be directory:
+    python tests/benchmark_ocr_dedup.py
+    python tests/benchmark_ocr_dedup.py --sizes 1000 5000 20000 --repeat 3
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.enhanced_invoice_processing import remove_duplicate_words
+
+VOCABULARY = [
+    "Invoice", "INV-2024-0012", "Date", "Qty", "Unit", "Price", "Total", "VAT",
+    "Subtotal", "Description", "Filter", "Pump", "Valve", "Service", "Labour",
+    "1", "2", "5", "10", "12.50", "99.00", "250.00", "USD", "EUR", "Net", "Due",
+]
+
+
+def legacy_remove_duplicate_words(words):
+    """Previous pairwise implementation, kept here as the reference."""
+    unique_words = []
+    position_threshold = 15  # pixels
+
+    for word in words:
+        is_duplicate = False
+        for existing in unique_words:
+            pos_diff = abs(word['left'] - existing['left']) + abs(word['top'] - existing['top'])
+            text_similarity = word['text'].lower() == existing['text'].lower()
+
+            if pos_diff < position_threshold and text_similarity:
+                if word['confidence'] > existing['confidence']:
+                    unique_words.remove(existing)
+                    unique_words.append(word)
+                is_duplicate = True
+                break
+
+        if not is_duplicate:
+            unique_words.append(word)
+
+    return unique_words
+
+
+def make_words(total_words, variants=4, seed=42):
+    """Simulate `variants` OCR passes over a page with total_words // variants words."""
+    rng = random.Random(seed)
+    per_variant = max(1, total_words // variants)
+    columns = 8
+    page = []
+    for i in range(per_variant):
+        page.append({
+            'text': rng.choice(VOCABULARY),
+            'left': 40 + (i % columns) * 120,
+            'top': 40 + (i // columns) * 22,
+            'width': 60,
+            'height': 14,
+        })
+
+    words = []
+    for variant in range(variants):
+        for base in page:
+            words.append({
+                'text': base['text'] if rng.random() > 0.05 else base['text'].upper(),
+                'left': base['left'] + rng.randint(-6, 6),
+                'top': base['top'] + rng.randint(-4, 4),
+                'width': base['width'],
+                'height': base['height'],
+                'confidence': rng.randint(31, 96),
+                'preprocessing_method': variant,
+            })
+    return words
+
+
+def best_time(func, words, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(list(words))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR word de-duplication")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy-above", type=int, default=20000,
+                        help="Don't run the O(n^2) reference above this many words")
+    args = parser.parse_args()
+
+    print(f"{'words':>8} {'unique':>8} {'grid (ms)':>12} {'legacy (ms)':>12} {'speedup':>9}  match")
+    print("-" * 62)
+
+    ok = True
+    for size in args.sizes:
+        words = make_words(size)
+        grid_time, grid_result = best_time(remove_duplicate_words, words, args.repeat)
+
+        if size <= args.skip_legacy_above:
+            legacy_time, legacy_result = best_time(legacy_remove_duplicate_words, words, 1)
+            match = grid_result == legacy_result
+            ok = ok and match
+            speedup = f"{legacy_time / grid_time:8.1f}x" if grid_time else "      n/a"
+            print(f"{len(words):>8} {len(grid_result):>8} {grid_time * 1000:>12.1f} "
+                  f"{legacy_time * 1000:>12.1f} {speedup}  {'yes' if match else 'NO'}")
+        else:
+            print(f"{len(words):>8} {len(grid_result):>8} {grid_time * 1000:>12.1f} "
+                  f"{'skipped':>12} {'':>9}  -")
+
+    if not ok:
+        print("\nFAILED: grid implementation output differs from the legacy scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for worker boot
+
+Every uvicorn worker imports app.main before it can serve a request, so
+whatever the router modules import at module level is paid on each cold
+start and kept in each worker's memory. OpenCV, Tesseract, numpy, Gemini,
+boto3, reportlab and openpyxl are only needed by the document pipeline, the
+work order PDF report and the Excel import/export/email paths, and must be
+imported inside those functions, not at the top of a module.
+
+This runs ``python -X importtime -c "import app.main"`` in a fresh
+interpreter and fails (exit code 1) when:
+
+- any module in FORBIDDEN_AT_BOOT is imported while booting, or
+- the cumulative import time of app.main exceeds --budget-ms, or
+- the peak RSS of the interpreter exceeds --budget-mb.
+
+The best of --runs runs is used to keep noise out. The slowest top-level
+packages are listed to show where boot time goes.
+
+Run from the doxsnap_be directory (DATABASE_URL must be set, it is not connected to):
+    python tests/check_import_time.py
+    python tests/check_import_time.py --runs 5 --budget-ms 3000 --top 30
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy libraries that must stay out of worker boot (imported lazily where used)
+FORBIDDEN_AT_BOOT = (
+    "cv2",
+    "pytesseract",
+    "numpy",
+    "google.generativeai",
+    "boto3",
+    "botocore",
+    "PIL",
+    "reportlab",
+    "openpyxl",
+    "pandas",
+    "fitz",
+    "pymupdf",
+    "firebase_admin",
+)
+
+DEFAULT_BUDGET_MS = 5000
+DEFAULT_BUDGET_MB = 250
+
+
+def measure_boot(module: str = "app.main"):
+    """Import the module in a fresh interpreter: ({module: (self_us, cumulative_us)}, peak_rss_mb)."""
+    code = f"import resource, {module}; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"import {module} failed:\n" + "\n".join(errors[-15:]))
+
+    # ru_maxrss is in KiB on Linux
+    peak_rss_mb = int(result.stdout.strip().splitlines()[-1]) / 1024
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings, peak_rss_mb
+
+
+def slowest_packages(timings, top: int, module: str) -> list:
+    """(package, cumulative_ms) with the largest first-import cost: third-party packages and app modules."""
+    packages = {}
+    for name, (_, cumulative_us) in timings.items():
+        parts = name.split(".")
+        package = ".".join(parts[:3]) if parts[0] == "app" else parts[0]
+        if package in ("app", module):
+            continue
+        packages[package] = max(packages.get(package, 0), cumulative_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return [(package, cumulative_us / 1000) for package, cumulative_us in ranked[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import-time budget of app.main")
+    parser.add_argument("--module", default="app.main", help="Module a worker imports on boot")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to measure (best is used)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Max cumulative import time")
+    parser.add_argument("--budget-mb", type=float, default=DEFAULT_BUDGET_MB, help="Max peak RSS after import")
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages to list")
+    args = parser.parse_args()
+
+    best_timings, best_ms, peak_rss_mb = None, None, None
+    for _ in range(max(1, args.runs)):
+        try:
+            timings, rss_mb = measure_boot(args.module)
+        except RuntimeError as e:
+            print(e)
+            sys.exit(2)
+        total_ms = timings[args.module][1] / 1000
+        if best_ms is None or total_ms < best_ms:
+            best_timings, best_ms = timings, total_ms
+        peak_rss_mb = rss_mb if peak_rss_mb is None else min(peak_rss_mb, rss_mb)
+
+    print(f"import {args.module}: {best_ms:.0f} ms (budget {args.budget_ms:.0f} ms), "
+          f"peak RSS {peak_rss_mb:.0f} MB (budget {args.budget_mb:.0f} MB), "
+          f"{len(best_timings)} modules")
+    print("\nSlowest packages (cumulative ms):")
+    for package, cumulative_ms in slowest_packages(best_timings, args.top, args.module):
+        print(f"  {package:<30} {cumulative_ms:8.1f}")
+
+    failures = []
+    forbidden = [name for name in best_timings if name in FORBIDDEN_AT_BOOT]
+    if forbidden:
+        failures.append(f"heavy modules imported at boot: {', '.join(sorted(forbidden))} "
+                        f"- import them inside the functions that use them")
+    if best_ms > args.budget_ms:
+        failures.append(f"import time {best_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    if peak_rss_mb > args.budget_mb:
+        failures.append(f"peak RSS {peak_rss_mb:.0f} MB exceeds the {args.budget_mb:.0f} MB budget")
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("\nImport-time budget OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Lint: no blocking calls inside async route handlers and dependencies
+
+An ``async def`` route or dependency runs on the event loop, so any
+synchronous DB query, sleep, HTTP request or OCR call inside it stalls every
+other request on the uvicorn worker. Handlers that need blocking work must be
+plain ``def`` (FastAPI runs them in the worker threadpool) or wrap the
+blocking step in ``await run_sync(...)`` (see app/utils/concurrency.py).
+
+This walks the router modules under app/api and app/services/dependency.py
+with ``ast`` (nothing is imported, no server or database needed) and reports
+blocking calls made directly in the body of any ``async def`` there (routes,
+dependencies and their async helpers). Nested functions are checked on their
+own: they run wherever they are handed to.
+
+Run from the doxsnap_be directory:
+    python tests/test_async_routes.py
+    python -m pytest tests/test_async_routes.py
+"""
+
+import os
+import ast
+import sys
+import glob
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Receivers that hold a synchronous SQLAlchemy Session
+SESSION_NAMES = {"db", "session", "db_session"}
+SESSION_METHODS = {
+    "query", "execute", "scalar", "scalars", "get", "add", "add_all", "delete", "merge",
+    "flush", "commit", "rollback", "refresh", "begin_nested", "bulk_save_objects",
+}
+
+# module.<anything>() calls that always block
+BLOCKING_MODULES = {"time": {"sleep"}, "requests": None, "smtplib": None, "cv2": None,
+                    "pytesseract": None, "subprocess": None, "shutil": None}
+
+# Project functions that do OCR, file/S3 I/O or email synchronously
+BLOCKING_FUNCTIONS = {
+    "open", "process_image", "process_invoice_image_enhanced", "process_invoice_pdf",
+    "render_pdf_preview", "upload_to_s3", "delete_from_s3", "send_email",
+}
+
+
+def walk_own_body(node):
+    """ast.walk over a function body, not descending into nested functions/lambdas."""
+    stack = list(node.body)
+    while stack:
+        current = stack.pop()
+        yield current
+        for child in ast.iter_child_nodes(current):
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+                stack.append(child)
+
+
+def blocking_call(call: ast.Call):
+    """A description of the call if it is known to block, else None."""
+    func = call.func
+    if isinstance(func, ast.Name) and func.id in BLOCKING_FUNCTIONS:
+        return f"{func.id}()"
+    if isinstance(func, ast.Attribute):
+        owner = func.value
+        if isinstance(owner, ast.Name):
+            if owner.id in SESSION_NAMES and func.attr in SESSION_METHODS:
+                return f"{owner.id}.{func.attr}()"
+            if owner.id in BLOCKING_MODULES:
+                methods = BLOCKING_MODULES[owner.id]
+                if methods is None or func.attr in methods:
+                    return f"{owner.id}.{func.attr}()"
+        if func.attr in BLOCKING_FUNCTIONS:
+            return f"{ast.unparse(func)}()"
+    return None
+
+
+def find_violations(paths=None):
+    paths = paths or sorted(glob.glob(os.path.join(ROOT, "app", "api", "*.py"))) + [
+        os.path.join(ROOT, "app", "services", "dependency.py")
+    ]
+    violations = []
+    for path in paths:
+        with open(path) as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.AsyncFunctionDef):
+                continue
+            for child in walk_own_body(node):
+                if isinstance(child, ast.Call):
+                    description = blocking_call(child)
+                    if description:
+                        violations.append(
+                            f"{os.path.relpath(path, ROOT)}:{child.lineno} {node.name}: {description}"
+                        )
+    return violations
+
+
+def test_no_blocking_calls_in_async_handlers():
+    violations = find_violations()
+    assert not violations, "Blocking calls in async handlers:\n" + "\n".join(violations)
+
+
+def main():
+    violations = find_violations()
+    for violation in violations:
+        print(violation)
+    if violations:
+        print(f"\n{len(violations)} blocking calls in async handlers - make the handler a plain def "
+              f"or wrap the call in run_sync (app/utils/concurrency.py)")
+        sys.exit(1)
+    print("No blocking calls in async handlers")
+
+
+if __name__ == "__main__":
+    main()
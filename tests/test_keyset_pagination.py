@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Regression test: keyset pagination of GET /work-orders/ (app/utils/pagination.py)
+
+Checks the cursor encoding and the page boundaries on (created_at, id)
+against a throwaway SQLite database:
+
+- encode_cursor / decode_cursor round-trip timestamps (microseconds
+  included) and NULL timestamps, produce URL-safe cursors without padding,
+  and reject anything else with a 400;
+- paging through work orders whose timestamps collide (the id breaks the
+  tie) or are NULL (sorted first) returns every row exactly once, in
+  (created_at DESC NULLS FIRST, id DESC) order, at every page size; the last
+  page has no cursor, also when the row count is a multiple of the page size;
+- rows created while a client is paging don't shift the later pages;
+- the route sends the cursor in X-Next-Cursor and, on request, the total in
+  X-Total-Count, for the full and the summary view.
+
+Route handlers are called directly with a session; nothing outside the repo
+is needed (no server, PostgreSQL, Redis or network).
+
+Run from the doxsnap_be directory:
+    python tests/test_keyset_pagination.py
+    python -m pytest tests/test_keyset_pagination.py
+"""
+
+import os
+import sys
+import base64
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="keyset_pagination_"), "pagination.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Company, User, WorkOrder
+from app.api.work_orders import get_work_orders
+from app.utils.pagination import (
+    encode_cursor, decode_cursor, keyset_paginate, NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+)
+
+# Own engine: app.database's is bound to whichever test module imported it first
+engine = create_engine(f"sqlite:///{DB_PATH}")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+BASE_TIME = datetime(2026, 3, 1, 9, 30, 15, 250000)
+PAGE_SIZES = [1, 2, 3, 7, 12, 13, 50]
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def setup_company(db, slug: str):
+    company = Company(name=slug.title(), slug=slug, email=f"{slug}@test.local")
+    db.add(company)
+    db.flush()
+    user = User(email=f"planner@{slug}.test.local", company_id=company.id, hashed_password="x", role="admin")
+    db.add(user)
+    db.commit()
+    return company, user
+
+
+def add_work_orders(db, company_id: int, created_ats) -> list:
+    work_orders = [
+        WorkOrder(company_id=company_id, wo_number=f"WO-2026-{i:05d}", title=f"Work order {i}",
+                  work_order_type="corrective", created_at=created_at)
+        for i, created_at in enumerate(created_ats, start=1)
+    ]
+    db.add_all(work_orders)
+    db.commit()
+    # The column default fills in an explicit None: clear those timestamps afterwards
+    missing = [wo.id for wo, created_at in zip(work_orders, created_ats) if created_at is None]
+    if missing:
+        db.execute(update(WorkOrder).where(WorkOrder.id.in_(missing)).values(created_at=None))
+        db.commit()
+    return [wo.id for wo in work_orders]
+
+
+def expected_order(db, company_id: int) -> list:
+    """(created_at DESC NULLS FIRST, id DESC), computed in Python"""
+    rows = db.query(WorkOrder.id, WorkOrder.created_at).filter(WorkOrder.company_id == company_id).all()
+    undated = sorted((row.id for row in rows if row.created_at is None), reverse=True)
+    dated = sorted((row for row in rows if row.created_at is not None),
+                   key=lambda row: (row.created_at, row.id), reverse=True)
+    return undated + [row.id for row in dated]
+
+
+def collect_pages(db, company_id: int, limit: int) -> list:
+    """Page through with keyset_paginate; returns the ids of each page"""
+    query = db.query(WorkOrder.id, WorkOrder.created_at).filter(WorkOrder.company_id == company_id)
+    pages, cursor = [], None
+    while True:
+        rows, cursor = keyset_paginate(query, WorkOrder.created_at, WorkOrder.id, cursor, limit)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages
+        assert len(pages) <= 1000, "pagination does not terminate"
+
+
+def list_work_orders(db, user, cursor=None, limit=5, view="full", include_total=False):
+    """GET /work-orders/ with every query parameter passed explicitly (no Query defaults)"""
+    response = Response()
+    body = get_work_orders(
+        response=response, status=None, work_order_type=None, priority=None, branch_id=None,
+        equipment_id=None, technician_id=None, hhd_id=None, is_billable=None, search=None,
+        include_details=False, view=view, cursor=cursor, limit=limit, include_total=include_total,
+        auth_context=user, db=db
+    )
+    return body, response.headers
+
+
+# =============================================================================
+# Checks
+# =============================================================================
+
+def check_cursor_encoding():
+    for created_at in (BASE_TIME, BASE_TIME.replace(microsecond=0), datetime(1999, 12, 31, 23, 59, 59, 999999), None):
+        for row_id in (1, 42, 2 ** 31 + 7):
+            cursor = encode_cursor(created_at, row_id)
+            assert "=" not in cursor and "+" not in cursor and "/" not in cursor, cursor
+            assert decode_cursor(cursor) == (created_at, row_id)
+
+    def encoded(raw: bytes) -> str:
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    for bad in ("not a cursor!", "", encoded(b"{}"), encoded(b"[1]"), encoded(b'["2026-03-01", "x"]'),
+                encoded(b'["yesterday", 5]'), encoded(b'[null, 1, 2]'), encoded(b"\xff\xfe")):
+        try:
+            decode_cursor(bad)
+        except HTTPException as e:
+            assert e.status_code == 400, (bad, e.status_code)
+        else:
+            raise AssertionError(f"cursor {bad!r} must be rejected")
+
+
+def check_page_boundaries(db, company):
+    # Timestamps collide in runs (bulk creates within one clock tick) and a few are missing
+    created_ats = []
+    for i in range(24):
+        created_ats.append(BASE_TIME + timedelta(seconds=i // 4))
+    created_ats[5] = created_ats[17] = created_ats[20] = None
+    add_work_orders(db, company.id, created_ats)
+
+    expected = expected_order(db, company.id)
+    assert len(expected) == 24
+    for limit in PAGE_SIZES:
+        pages = collect_pages(db, company.id, limit)
+        assert [row_id for page in pages for row_id in page] == expected, f"limit {limit}: {pages}"
+        assert all(len(page) == limit for page in pages[:-1]), f"limit {limit}: {pages}"
+        # No empty trailing page when the count is a multiple of the page size
+        assert 0 < len(pages[-1]) <= limit, f"limit {limit}: {pages}"
+
+
+def check_concurrent_inserts(db, company):
+    expected = expected_order(db, company.id)
+    query = db.query(WorkOrder.id, WorkOrder.created_at).filter(WorkOrder.company_id == company.id)
+    first, cursor = keyset_paginate(query, WorkOrder.created_at, WorkOrder.id, None, 5)
+
+    # New work orders (newest, and one without a timestamp) arrive after the first page was served
+    add_work_orders(db, company.id, [BASE_TIME + timedelta(days=1), None])
+
+    rest, cursor = keyset_paginate(query, WorkOrder.created_at, WorkOrder.id, cursor, 100)
+    assert cursor is None
+    assert [row.id for row in first] + [row.id for row in rest] == expected
+
+
+def check_route(db, company, user, other_user):
+    expected = expected_order(db, company.id)
+    for view in ("full", "summary"):
+        seen, cursor = [], None
+        body, headers = list_work_orders(db, user, limit=10, view=view, include_total=True)
+        assert headers[TOTAL_COUNT_HEADER] == str(len(expected))
+        while True:
+            seen += [row["id"] for row in body]
+            cursor = headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+            body, headers = list_work_orders(db, user, cursor=cursor, limit=10, view=view)
+            assert TOTAL_COUNT_HEADER not in headers
+        assert seen == expected, view
+
+    # Another company's work orders are not listed
+    body, headers = list_work_orders(db, other_user, limit=10)
+    assert [row["id"] for row in body] == expected_order(db, other_user.company_id)
+    assert NEXT_CURSOR_HEADER not in headers
+
+
+def test_keyset_pagination():
+    assert engine.dialect.name == "sqlite", "this test only runs against its throwaway SQLite database"
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        check_cursor_encoding()
+        company, user = setup_company(db, "keyset")
+        other, other_user = setup_company(db, "keyset-other")
+        add_work_orders(db, other.id, [BASE_TIME, BASE_TIME])
+        check_page_boundaries(db, company)
+        check_concurrent_inserts(db, company)
+        check_route(db, company, user, other_user)
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(os.path.dirname(DB_PATH), ignore_errors=True)
+
+
+def main():
+    test_keyset_pagination()
+    print("Work order cursors round-trip and pages cover every row exactly once")
+
+
+if __name__ == "__main__":
+    main()
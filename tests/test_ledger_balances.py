@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Regression test: materialized ledger balances agree with the raw journal lines
+
+Runs the accounting write paths against a throwaway SQLite database and
+checks every balance the reports read against plain sums over
+journal_entry_lines:
+
+- posting (POST /journal-entries/{id}/post): the AccountBalance upsert adds
+  each entry's lines to its period (period debit/credit and the signed
+  closing movement);
+- reversing (POST /journal-entries/{id}/reverse): the reversal's lines are
+  attached to the reversal entry and reach AccountBalance;
+- closing a period (refresh_period_balances) and recompute_balances:
+  account_balances_as_of, which starts from the latest current closed
+  period, equals the raw sum of posted lines at every month end, including
+  after a closed period goes stale;
+- JournalPostingService.post_batch: a failing document is rolled back on its
+  own, its entry number goes to the next document and the unused tail of the
+  reserved block is released.
+
+Route handlers and services are called directly with a session; nothing
+outside the repo is needed (no server, PostgreSQL, Redis or network).
+
+Run from the doxsnap_be directory:
+    python tests/test_ledger_balances.py
+    python -m pytest tests/test_ledger_balances.py
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="ledger_balances_"), "ledger.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import (
+    Company, User, AccountType, Account, FiscalPeriod, JournalEntry, JournalEntryLine,
+    AccountBalance, DefaultAccountMapping, DocumentSequence,
+    ProcessedImage, InvoiceAllocation, AllocationPeriod
+)
+from app.schemas import JournalEntryCreate, JournalEntryLineCreate
+from app.api.accounting import (
+    create_journal_entry, post_journal_entry, reverse_journal_entry, generate_fiscal_periods,
+    close_fiscal_period
+)
+from app.services.journal_posting import JournalPostingService, entry_number_prefix
+from app.services.ledger_balances import account_balances_as_of, recompute_balances, _current_periods
+
+# Own engine: app.database's is bound to whichever test module imported it first
+engine = create_engine(f"sqlite:///{DB_PATH}")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+YEAR = 2025
+CENT = Decimal("0.01")
+
+
+def money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def nonzero(totals: dict) -> dict:
+    return {account_id: money(amount) for account_id, amount in totals.items() if money(amount)}
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def setup_company(db):
+    company = Company(name="Ledger Test", slug="ledger-test", email="ledger@test.local")
+    db.add(company)
+    db.flush()
+    user = User(email="accountant@test.local", company_id=company.id, hashed_password="x", role="admin")
+    db.add(user)
+
+    types = {}
+    for code, normal_balance in (("ASSET", "debit"), ("LIABILITY", "credit"),
+                                 ("REVENUE", "credit"), ("EXPENSE", "debit")):
+        types[code] = AccountType(company_id=company.id, code=code, name=code.title(), normal_balance=normal_balance)
+        db.add(types[code])
+    db.flush()
+
+    accounts = {}
+    for code, name, type_code in (("1100", "Cash", "ASSET"), ("2100", "Payables", "LIABILITY"),
+                                  ("4100", "Revenue", "REVENUE"), ("5100", "Expenses", "EXPENSE")):
+        accounts[name] = Account(company_id=company.id, code=code, name=name, account_type_id=types[type_code].id)
+        db.add(accounts[name])
+    db.commit()
+
+    generate_fiscal_periods(YEAR, db, user)
+    return company, user, {name: account.id for name, account in accounts.items()}
+
+
+def period_for(db, company_id: int, month: int) -> FiscalPeriod:
+    return db.query(FiscalPeriod).filter(
+        FiscalPeriod.company_id == company_id,
+        FiscalPeriod.fiscal_year == YEAR,
+        FiscalPeriod.period_number == month
+    ).one()
+
+
+def post_entry(db, user, entry_date: date, description: str, *lines) -> int:
+    """Create and post a manual entry; lines are (account_id, debit, credit)"""
+    created = create_journal_entry(JournalEntryCreate(
+        entry_date=entry_date,
+        description=description,
+        lines=[
+            JournalEntryLineCreate(account_id=account_id, debit=debit, credit=credit, line_number=i + 1)
+            for i, (account_id, debit, credit) in enumerate(lines)
+        ]
+    ), db, user)
+    post_journal_entry(created.id, db, user)
+    return created.id
+
+
+def age_history(db, company_id: int):
+    """
+    Move the timestamps the staleness check compares an hour into the past,
+    keeping their order, as if the next rebuild ran an hour after everything
+    so far (otherwise every entry is within STALE_MARGIN of it).
+    """
+    for entry in db.query(JournalEntry).filter(JournalEntry.company_id == company_id):
+        entry.updated_at = entry.updated_at - timedelta(hours=1)
+    for period in db.query(FiscalPeriod).filter(
+        FiscalPeriod.company_id == company_id, FiscalPeriod.balances_refreshed_at.isnot(None)
+    ):
+        period.balances_refreshed_at = period.balances_refreshed_at - timedelta(hours=1)
+    db.commit()
+
+
+# =============================================================================
+# Expected values straight from the journal lines
+# =============================================================================
+
+def raw_balances_as_of(db, company_id: int, as_of: date) -> dict:
+    """Net debit per account of posted entries dated on or before as_of"""
+    rows = db.query(
+        JournalEntryLine.account_id,
+        func.sum(JournalEntryLine.debit - JournalEntryLine.credit)
+    ).join(JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id).filter(
+        JournalEntry.company_id == company_id,
+        JournalEntry.status == "posted",
+        JournalEntry.entry_date <= as_of
+    ).group_by(JournalEntryLine.account_id).all()
+    return nonzero(dict(rows))
+
+
+def upserted_activity(db, company_id: int, period_id: int) -> dict:
+    """(period debit, period credit, closing - opening) per account from AccountBalance"""
+    rows = db.query(
+        AccountBalance.account_id,
+        func.sum(AccountBalance.period_debit),
+        func.sum(AccountBalance.period_credit),
+        func.sum(AccountBalance.closing_balance - AccountBalance.opening_balance)
+    ).filter(
+        AccountBalance.company_id == company_id,
+        AccountBalance.fiscal_period_id == period_id
+    ).group_by(AccountBalance.account_id).all()
+    return {
+        account_id: (money(debit), money(credit), money(movement))
+        for account_id, debit, credit, movement in rows
+        if money(debit) or money(credit) or money(movement)
+    }
+
+
+def line_activity(db, company_id: int, period_id: int, statuses) -> dict:
+    """The same triple summed from the lines of the period's entries with the given statuses"""
+    rows = db.query(
+        JournalEntryLine.account_id,
+        AccountType.normal_balance,
+        func.sum(JournalEntryLine.debit),
+        func.sum(JournalEntryLine.credit)
+    ).join(JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id).join(
+        Account, JournalEntryLine.account_id == Account.id
+    ).join(AccountType, Account.account_type_id == AccountType.id).filter(
+        JournalEntry.company_id == company_id,
+        JournalEntry.fiscal_period_id == period_id,
+        JournalEntry.status.in_(statuses)
+    ).group_by(JournalEntryLine.account_id, AccountType.normal_balance).all()
+    expected = {}
+    for account_id, normal_balance, debit, credit in rows:
+        debit, credit = money(debit), money(credit)
+        movement = debit - credit if normal_balance == "debit" else credit - debit
+        if debit or credit or movement:
+            expected[account_id] = (debit, credit, movement)
+    return expected
+
+
+def check_open_period_upserts(db, company_id: int, months):
+    """Open periods hold exactly what the upsert added: every entry posted into them, reversed or not"""
+    for month in months:
+        period = period_for(db, company_id, month)
+        assert period.status == "open"
+        expected = line_activity(db, company_id, period.id, ("posted", "reversed"))
+        assert upserted_activity(db, company_id, period.id) == expected, f"AccountBalance of {period.period_name}"
+
+
+def check_reports(db, company_id: int):
+    """account_balances_as_of equals the raw posted lines at every month end and mid-month"""
+    for month in range(1, 7):
+        period = period_for(db, company_id, month)
+        for as_of in (period.start_date + timedelta(days=14), period.end_date):
+            assert nonzero(account_balances_as_of(db, company_id, as_of)) == raw_balances_as_of(db, company_id, as_of), \
+                f"balances as of {as_of}"
+
+
+# =============================================================================
+# Scenarios
+# =============================================================================
+
+def run_posting_and_closing(db, company, user, accounts):
+    cash, payables, revenue, expenses = (accounts[name] for name in ("Cash", "Payables", "Revenue", "Expenses"))
+
+    post_entry(db, user, date(YEAR, 1, 5), "Sale", (cash, 1000, 0), (revenue, 0, 1000))
+    post_entry(db, user, date(YEAR, 1, 20), "Supplier bill", (expenses, 250.5, 0), (payables, 0, 250.5))
+    feb_sale = post_entry(db, user, date(YEAR, 2, 3), "Sale", (cash, 400, 0), (revenue, 0, 400))
+    post_entry(db, user, date(YEAR, 2, 10), "Split bill", (expenses, 100, 0), (expenses, 20.25, 0), (payables, 0, 120.25))
+    post_entry(db, user, date(YEAR, 3, 15), "Payment", (payables, 250.5, 0), (cash, 0, 250.5))
+    jan_sale_2 = post_entry(db, user, date(YEAR, 1, 25), "Late January sale", (cash, 75, 0), (revenue, 0, 75))
+
+    check_open_period_upserts(db, company.id, (1, 2, 3))
+    check_reports(db, company.id)
+
+    # Reversal in an open period: the reversal's lines must reach AccountBalance
+    reverse_journal_entry(feb_sale, date(YEAR, 2, 28), db, user)
+    reversal = db.query(JournalEntry).filter(JournalEntry.reversal_of_id == feb_sale).one()
+    assert len(reversal.lines) == 2, "reversal entry has no lines"
+    check_open_period_upserts(db, company.id, (2,))
+    check_reports(db, company.id)
+
+    # Closing January materializes it; reports start from its closing balances
+    age_history(db, company.id)
+    january = period_for(db, company.id, 1)
+    close_fiscal_period(january.id, db, user)
+    assert [p.id for p in _current_periods(db, company.id, date(YEAR, 1, 31))] == [january.id]
+    check_reports(db, company.id)
+
+    # Reversing a January entry into March makes January stale until it is rebuilt
+    reverse_journal_entry(jan_sale_2, date(YEAR, 3, 31), db, user)
+    assert _current_periods(db, company.id, date(YEAR, 1, 31)) == []
+    check_reports(db, company.id)
+
+    # Closing February rebuilds January too and rolls the opening balances forward
+    age_history(db, company.id)
+    february = period_for(db, company.id, 2)
+    close_fiscal_period(february.id, db, user)
+    assert [p.id for p in _current_periods(db, company.id, date(YEAR, 2, 28))] == [february.id, january.id]
+    check_reports(db, company.id)
+
+    # A full recompute rewrites every period and keeps the closed ones current
+    age_history(db, company.id)
+    summary = recompute_balances(db, company.id)
+    db.commit()
+    assert len(summary["periods"]) == 12
+    assert [p.id for p in _current_periods(db, company.id, date(YEAR, 2, 28))] == [february.id, january.id]
+    for month in (1, 2, 3):
+        period = period_for(db, company.id, month)
+        assert upserted_activity(db, company.id, period.id) == line_activity(db, company.id, period.id, ("posted",)), \
+            f"recomputed AccountBalance of {period.period_name}"
+    check_reports(db, company.id)
+
+
+def run_post_batch(db, company, user, accounts):
+    db.add(DefaultAccountMapping(
+        company_id=company.id, transaction_type="invoice_expense", category="expense",
+        debit_account_id=accounts["Expenses"], credit_account_id=accounts["Payables"]
+    ))
+
+    def allocation(amounts, structured_data):
+        invoice = ProcessedImage(
+            user_id=user.id, original_filename="invoice.pdf", s3_key="local/invoice.png",
+            s3_url="local/invoice.png", invoice_category="expense", structured_data=json.dumps(structured_data)
+        )
+        db.add(invoice)
+        db.flush()
+        record = InvoiceAllocation(
+            invoice_id=invoice.id, total_amount=sum(amounts), number_of_periods=len(amounts)
+        )
+        db.add(record)
+        db.flush()
+        periods = []
+        for i, amount in enumerate(amounts):
+            period_end = date(YEAR, 4 + i, 28)
+            periods.append(AllocationPeriod(
+                allocation_id=record.id, period_start=period_end.replace(day=1), period_end=period_end,
+                period_number=i + 1, amount=amount
+            ))
+        db.add_all(periods)
+        db.flush()
+        return periods
+
+    good = allocation([Decimal("300.00"), Decimal("300.00"), Decimal("150.75")], {})
+    # An unparseable tax amount makes post_invoice_allocation raise for this document
+    bad = allocation([Decimal("99.00")], {"financial_details": {"total_tax_amount": "n/a"}})
+    db.commit()
+
+    prefix = entry_number_prefix()
+    before = db.query(DocumentSequence.last_value).filter(
+        DocumentSequence.company_id == company.id, DocumentSequence.prefix == prefix
+    ).scalar() or 0
+
+    service = JournalPostingService(db, company.id, user.id)
+    batch = service.post_batch(service.post_invoice_allocation, [good[0], bad[0], good[1], good[2]],
+                               post_immediately=True)
+
+    assert (batch["posted"], batch["skipped"], batch["failed"]) == (3, 0, 1), batch
+    assert [result["status"] for result in batch["results"]] == ["posted", "failed", "posted", "posted"]
+    # The failed document's number went to the next one and the unused tail was released
+    numbers = [result["entry_number"] for result in batch["results"] if result["entry_number"]]
+    assert numbers == [f"{prefix}{value:06d}" for value in range(before + 1, before + 4)], numbers
+    assert db.query(DocumentSequence.last_value).filter(
+        DocumentSequence.company_id == company.id, DocumentSequence.prefix == prefix
+    ).scalar() == before + 3
+    assert db.query(JournalEntry).filter(
+        JournalEntry.source_type == "invoice", JournalEntry.source_id == bad[0].id
+    ).count() == 0
+
+    check_open_period_upserts(db, company.id, (4, 5, 6))
+    check_reports(db, company.id)
+
+
+def test_ledger_balances_match_journal_lines():
+    assert engine.dialect.name == "sqlite", "this test only runs against its throwaway SQLite database"
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        company, user, accounts = setup_company(db)
+        run_posting_and_closing(db, company, user, accounts)
+        run_post_batch(db, company, user, accounts)
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(os.path.dirname(DB_PATH), ignore_errors=True)
+
+
+def main():
+    test_ledger_balances_match_journal_lines()
+    print("Ledger balances match the journal lines")
+
+
+if __name__ == "__main__":
+    main()
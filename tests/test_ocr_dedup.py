@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Regression test: grid-bucketed OCR word de-duplication matches the pairwise scan
+
+remove_duplicate_words (app/services/enhanced_invoice_processing.py) buckets
+kept words in a position_threshold grid instead of comparing every word with
+every word kept so far. This runs it and the previous pairwise
+implementation on randomized OCR output and checks both keep the same words
+in the same order:
+
+- words crowded into a small area, so most have several same-text
+  neighbours at, just under and just over the threshold distance, across
+  grid cell edges;
+- mixed-case duplicates and tied confidences (the earlier word wins a tie);
+- several thresholds, including 1 (exact position only).
+
+Needs the OCR dependencies of the module (NumPy, OpenCV, Pillow, pytesseract,
+the Gemini client); skipped when they are not installed.
+
+Run from the doxsnap_be directory:
+    python tests/test_ocr_dedup.py
+    python -m pytest tests/test_ocr_dedup.py
+"""
+
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VOCABULARY = ["Total", "total", "TOTAL", "VAT", "vat", "12.50", "Qty", "INV-0012"]
+THRESHOLDS = [1, 5, 15, 40]
+ROUNDS = 300
+
+
+def legacy_remove_duplicate_words(words, position_threshold=15):
+    """The pairwise implementation remove_duplicate_words replaced, kept as the reference."""
+    unique_words = []
+
+    for word in words:
+        is_duplicate = False
+        for existing in unique_words:
+            pos_diff = abs(word['left'] - existing['left']) + abs(word['top'] - existing['top'])
+            text_similarity = word['text'].lower() == existing['text'].lower()
+
+            if pos_diff < position_threshold and text_similarity:
+                if word['confidence'] > existing['confidence']:
+                    unique_words.remove(existing)
+                    unique_words.append(word)
+                is_duplicate = True
+                break
+
+        if not is_duplicate:
+            unique_words.append(word)
+
+    return unique_words
+
+
+def random_words(rng, position_threshold):
+    """A crowded page: positions span a few grid cells, confidences often tie."""
+    span = max(3, position_threshold * rng.randint(1, 4))
+    words = []
+    for i in range(rng.randint(0, 120)):
+        words.append({
+            'id': i,  # Distinct dicts, so the comparison also checks which duplicate was kept
+            'text': rng.choice(VOCABULARY),
+            'left': rng.randint(0, span),
+            'top': rng.randint(0, span),
+            'confidence': rng.choice([40, 60, 60, 75, 90]),
+        })
+    return words
+
+
+def load_remove_duplicate_words():
+    for module in ("numpy", "cv2", "PIL", "pytesseract", "google.generativeai"):
+        pytest.importorskip(module)
+    from app.services.enhanced_invoice_processing import remove_duplicate_words
+    return remove_duplicate_words
+
+
+def test_remove_duplicate_words_matches_pairwise_scan():
+    remove_duplicate_words = load_remove_duplicate_words()
+    rng = random.Random(2024)
+    for position_threshold in THRESHOLDS:
+        for _ in range(ROUNDS):
+            words = random_words(rng, position_threshold)
+            expected = legacy_remove_duplicate_words(list(words), position_threshold)
+            result = remove_duplicate_words(list(words), position_threshold)
+            assert result == expected, (
+                f"threshold {position_threshold}: kept {[w['id'] for w in result]}, "
+                f"pairwise scan kept {[w['id'] for w in expected]}"
+            )
+
+
+def main():
+    test_remove_duplicate_words_matches_pairwise_scan()
+    print(f"remove_duplicate_words matches the pairwise scan ({ROUNDS} pages x {len(THRESHOLDS)} thresholds)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Regression test: batch journal posting and recognition numbers
+
+Runs JournalPostingService.post_batch with post_invoice_allocation against a
+throwaway SQLite database and checks:
+
+- the whole batch is committed once;
+- entry numbers come from one reserved block: consecutive, continuing after
+  the highest number already in use, and the unused tail (skipped and failed
+  documents) is released;
+- a document that raises after its entry was created is rolled back on its
+  own: no entry or lines are left for it, its number goes to the next
+  document, and the other documents' balances still reach AccountBalance;
+- recognition numbers (reserve_recognition_numbers) come from the counter
+  shared by all companies and continue after the highest REC number in use.
+
+Services are called directly with a session; nothing outside the repo is
+needed (no server, PostgreSQL, Redis or network).
+
+Run from the doxsnap_be directory:
+    python tests/test_post_batch.py
+    python -m pytest tests/test_post_batch.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="post_batch_"), "post_batch.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import (
+    Company, User, AccountType, Account, JournalEntry, JournalEntryLine, AccountBalance,
+    DefaultAccountMapping, DocumentSequence, ProcessedImage, InvoiceAllocation, AllocationPeriod
+)
+from app.api.accounting import generate_fiscal_periods
+from app.api.allocations import reserve_recognition_numbers, generate_recognition_number
+from app.services.journal_posting import JournalPostingService, entry_number_prefix
+
+# Own engine: app.database's is bound to whichever test module imported it first
+engine = create_engine(f"sqlite:///{DB_PATH}")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+YEAR = 2025
+
+
+class FailingDocument(Exception):
+    pass
+
+
+def money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+def setup_company(db, slug: str):
+    company = Company(name=slug.title(), slug=slug, email=f"{slug}@test.local")
+    db.add(company)
+    db.flush()
+    user = User(email=f"accountant@{slug}.test.local", company_id=company.id, hashed_password="x", role="admin")
+    db.add(user)
+
+    types = {}
+    for code, normal_balance in (("LIABILITY", "credit"), ("EXPENSE", "debit")):
+        types[code] = AccountType(company_id=company.id, code=code, name=code.title(), normal_balance=normal_balance)
+        db.add(types[code])
+    db.flush()
+
+    expenses = Account(company_id=company.id, code="5100", name="Expenses", account_type_id=types["EXPENSE"].id)
+    payables = Account(company_id=company.id, code="2100", name="Payables", account_type_id=types["LIABILITY"].id)
+    db.add_all([expenses, payables])
+    db.flush()
+    db.add(DefaultAccountMapping(
+        company_id=company.id, transaction_type="invoice_expense", category="expense",
+        debit_account_id=expenses.id, credit_account_id=payables.id
+    ))
+    db.commit()
+
+    generate_fiscal_periods(YEAR, db, user)
+    return company, user
+
+
+def allocation_periods(db, user, amounts, invoice_category="expense"):
+    invoice = ProcessedImage(
+        user_id=user.id, original_filename="invoice.pdf", s3_key="local/invoice.png",
+        s3_url="local/invoice.png", invoice_category=invoice_category
+    )
+    db.add(invoice)
+    db.flush()
+    allocation = InvoiceAllocation(invoice_id=invoice.id, total_amount=sum(amounts), number_of_periods=len(amounts))
+    db.add(allocation)
+    db.flush()
+    periods = []
+    for i, amount in enumerate(amounts):
+        period_end = date(YEAR, 4 + i, 28)
+        periods.append(AllocationPeriod(
+            allocation_id=allocation.id, period_start=period_end.replace(day=1), period_end=period_end,
+            period_number=i + 1, amount=amount
+        ))
+    db.add_all(periods)
+    db.commit()
+    return periods
+
+
+def sequence_value(db, company_id: int, prefix: str):
+    return db.query(DocumentSequence.last_value).filter(
+        DocumentSequence.company_id == company_id, DocumentSequence.prefix == prefix
+    ).scalar()
+
+
+# =============================================================================
+# Checks
+# =============================================================================
+
+def check_post_batch(db, company, user):
+    prefix = entry_number_prefix()
+    # Numbers issued before the sequence row existed: the block continues after them
+    db.add(JournalEntry(
+        company_id=company.id, entry_number=f"{prefix}000041", entry_date=date(YEAR, 1, 31),
+        description="Issued by the old generator", status="draft"
+    ))
+    db.commit()
+
+    posted = allocation_periods(db, user, [Decimal("300.00"), Decimal("120.00"), Decimal("80.50")])
+    skipped = allocation_periods(db, user, [Decimal("50.00")], invoice_category="unmapped")[0]
+    failing = allocation_periods(db, user, [Decimal("99.00")])[0]
+    documents = [posted[0], skipped, failing, posted[1], posted[2]]
+
+    service = JournalPostingService(db, company.id, user.id)
+
+    def post_or_fail(period, **kwargs):
+        entry = service.post_invoice_allocation(period, **kwargs)
+        if period is failing:
+            # After the entry, its lines and its number were created
+            raise FailingDocument("rejected after posting")
+        return entry
+
+    commits = []
+
+    def count_commit(session):
+        commits.append(session)
+
+    event.listen(db, "after_commit", count_commit)
+    try:
+        batch = service.post_batch(post_or_fail, documents, post_immediately=True)
+    finally:
+        event.remove(db, "after_commit", count_commit)
+
+    assert len(commits) == 1, f"the batch must commit once, committed {len(commits)} times"
+    assert (batch["posted"], batch["skipped"], batch["failed"]) == (3, 1, 1), batch
+    assert [result["status"] for result in batch["results"]] == ["posted", "skipped", "failed", "posted", "posted"]
+    assert [result["source_id"] for result in batch["results"]] == [document.id for document in documents]
+    assert batch["results"][2]["error"] == "rejected after posting"
+
+    # One block after the old numbers; the failed document's number went to the next one
+    numbers = [result["entry_number"] for result in batch["results"] if result["entry_number"]]
+    assert numbers == [f"{prefix}{value:06d}" for value in (42, 43, 44)], numbers
+    # The two numbers the skipped and failed documents did not use were released
+    assert sequence_value(db, company.id, prefix) == 44
+
+    entries = db.query(JournalEntry).filter(
+        JournalEntry.company_id == company.id, JournalEntry.source_type == "invoice"
+    ).all()
+    assert sorted(entry.source_id for entry in entries) == sorted(period.id for period in posted)
+    assert all(entry.status == "posted" for entry in entries)
+    assert db.query(JournalEntryLine).filter(JournalEntryLine.journal_entry_id.is_(None)).count() == 0
+
+    # Balances hold exactly the posted entries' lines
+    line_totals = dict(db.query(
+        JournalEntryLine.account_id, func.sum(JournalEntryLine.debit - JournalEntryLine.credit)
+    ).join(JournalEntry, JournalEntryLine.journal_entry_id == JournalEntry.id).filter(
+        JournalEntry.company_id == company.id, JournalEntry.status == "posted"
+    ).group_by(JournalEntryLine.account_id).all())
+    balance_totals = dict(db.query(
+        AccountBalance.account_id, func.sum(AccountBalance.period_debit - AccountBalance.period_credit)
+    ).filter(AccountBalance.company_id == company.id).group_by(AccountBalance.account_id).all())
+    balance_totals = {account_id: money(amount) for account_id, amount in balance_totals.items()}
+    assert balance_totals == {account_id: money(amount) for account_id, amount in line_totals.items()}
+    # Expenses debited and payables credited with the three posted periods only
+    assert sorted(balance_totals.values()) == [Decimal("-500.50"), Decimal("500.50")]
+
+
+def check_recognition_numbers(db, user):
+    prefix = f"REC-{datetime.utcnow().year}-"
+    period = allocation_periods(db, user, [Decimal("10.00")])[0]
+    period.recognition_number = f"{prefix}0007"
+    db.commit()
+
+    assert reserve_recognition_numbers(db, 2) == [f"{prefix}0008", f"{prefix}0009"]
+    assert generate_recognition_number(db) == f"{prefix}0010"
+    db.commit()
+    assert db.query(DocumentSequence.last_value).filter(
+        DocumentSequence.company_id.is_(None), DocumentSequence.prefix == prefix
+    ).scalar() == 10
+
+
+def test_post_batch():
+    assert engine.dialect.name == "sqlite", "this test only runs against its throwaway SQLite database"
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        company, user = setup_company(db, "post-batch")
+        check_post_batch(db, company, user)
+        check_recognition_numbers(db, user)
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(os.path.dirname(DB_PATH), ignore_errors=True)
+
+
+def main():
+    test_post_batch()
+    print("Batch posting commits once, numbers from one block and rolls back failing documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Regression test: document number sequences (app/services/sequences.py)
+
+Runs reserve / next_number / reserve_numbers / release / max_suffix against
+a throwaway SQLite database:
+
+- seeding: the first reservation of a prefix continues after the seed (the
+  highest number in use), and the seed is not consulted again once the
+  counter row exists;
+- blocks: reserve_numbers returns consecutive zero-padded numbers and the
+  next reservation continues after the block;
+- release gives back the unused tail of a block, and a rolled-back
+  reservation leaves no gap;
+- counters are separate per company and prefix, and the shared counter
+  (company_id None, recognition numbers) is separate from all of them;
+- max_suffix orders suffixes numerically across widths, skips non-numeric
+  ones and filters by company.
+
+Services are called directly with a session; nothing outside the repo is
+needed (no server, PostgreSQL, Redis or network).
+
+Run from the doxsnap_be directory:
+    python tests/test_sequences.py
+    python -m pytest tests/test_sequences.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="sequences_"), "sequences.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Company, DocumentSequence, JournalEntry
+from app.services.sequences import reserve, next_number, reserve_numbers, release, max_suffix
+
+# Own engine: app.database's is bound to whichever test module imported it first
+engine = create_engine(f"sqlite:///{DB_PATH}")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+PREFIX = "WO-2026-"
+
+
+class Seed:
+    """Seed callable that records how often it is consulted"""
+
+    def __init__(self, value: int):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self) -> int:
+        self.calls += 1
+        return self.value
+
+
+def setup_companies(db):
+    companies = [
+        Company(name=f"Sequence Test {i}", slug=f"sequence-test-{i}", email=f"sequences{i}@test.local")
+        for i in (1, 2)
+    ]
+    db.add_all(companies)
+    db.commit()
+    return companies
+
+
+def last_value(db, company_id, prefix: str):
+    company = DocumentSequence.company_id.is_(None) if company_id is None else DocumentSequence.company_id == company_id
+    return db.query(DocumentSequence.last_value).filter(company, DocumentSequence.prefix == prefix).scalar()
+
+
+def check_seeding_and_blocks(db, company):
+    seed = Seed(41)
+    assert next_number(db, company.id, PREFIX, 5, seed=seed) == "WO-2026-00042"
+    assert next_number(db, company.id, PREFIX, 5, seed=seed) == "WO-2026-00043"
+    assert seed.calls == 1, "the seed is only read when the counter row is created"
+
+    block = reserve_numbers(db, company.id, PREFIX, 3, width=5, seed=seed)
+    assert block == ["WO-2026-00044", "WO-2026-00045", "WO-2026-00046"]
+    assert reserve(db, company.id, PREFIX) == 47
+    db.commit()
+    assert last_value(db, company.id, PREFIX) == 47
+
+    # A prefix nobody numbered yet, without a seed, starts at 1
+    assert reserve_numbers(db, company.id, "ISS-202601-", 2, width=4) == ["ISS-202601-0001", "ISS-202601-0002"]
+    db.commit()
+
+    try:
+        reserve(db, company.id, PREFIX, 0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("reserving 0 numbers must raise")
+
+
+def check_release_and_rollback(db, company):
+    block = reserve_numbers(db, company.id, PREFIX, 5, width=5)
+    assert block[0] == "WO-2026-00048"
+    # Only the first two were used: the tail goes back to the sequence
+    release(db, company.id, PREFIX, 3)
+    release(db, company.id, PREFIX, 0)  # no-op
+    db.commit()
+    assert last_value(db, company.id, PREFIX) == 49
+    assert next_number(db, company.id, PREFIX, 5) == "WO-2026-00050"
+    db.commit()
+
+    # A rolled-back create rolls its number back too
+    assert next_number(db, company.id, PREFIX, 5) == "WO-2026-00051"
+    db.rollback()
+    assert next_number(db, company.id, PREFIX, 5) == "WO-2026-00051"
+    db.commit()
+
+
+def check_separate_counters(db, company, other):
+    assert next_number(db, other.id, PREFIX, 5) == "WO-2026-00001"
+    assert next_number(db, company.id, "WO-2027-", 5) == "WO-2027-00001"
+
+    # The shared counter (company_id None) is independent of the company counters
+    shared = reserve_numbers(db, None, "REC-2026-", 2, width=4, seed=Seed(9))
+    assert shared == ["REC-2026-0010", "REC-2026-0011"]
+    assert next_number(db, company.id, "REC-2026-", 4) == "REC-2026-0001"
+    assert next_number(db, None, "REC-2026-", 4, seed=Seed(0)) == "REC-2026-0012"
+    release(db, None, "REC-2026-", 1)
+    db.commit()
+
+    assert last_value(db, None, "REC-2026-") == 11
+    assert last_value(db, company.id, "REC-2026-") == 1
+    assert last_value(db, other.id, PREFIX) == 1
+    assert last_value(db, company.id, PREFIX) == 51
+    assert db.query(DocumentSequence).filter(DocumentSequence.company_id.is_(None)).count() == 1
+
+
+def check_max_suffix(db, company, other):
+    def entry(company_id, number):
+        return JournalEntry(company_id=company_id, entry_number=number, entry_date=date(2026, 1, 1), description="x")
+
+    db.add_all([
+        entry(company.id, "JE-2026-000009"),
+        entry(company.id, "JE-2026-000002"),
+        entry(company.id, "JE-2026-DRAFT"),
+        entry(company.id, "JE-2025-999999"),
+        entry(other.id, "JE-2026-999999"),
+        entry(other.id, "JE-2026-1000000"),  # outgrew the padding: sorts below 999999 as text
+        entry(other.id, "JE-2026-000500"),
+    ])
+    db.commit()
+
+    def suffix(company_id, prefix="JE-2026-"):
+        return max_suffix(db, JournalEntry.entry_number, JournalEntry.company_id, company_id, prefix)
+
+    assert suffix(company.id) == 9
+    assert suffix(other.id) == 1000000
+    assert suffix(company.id, "JE-2024-") == 0
+    # Without a company column: every company's numbers
+    assert max_suffix(db, JournalEntry.entry_number, None, None, "JE-2026-") == 1000000
+
+
+def test_sequences():
+    assert engine.dialect.name == "sqlite", "this test only runs against its throwaway SQLite database"
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        company, other = setup_companies(db)
+        check_seeding_and_blocks(db, company)
+        check_release_and_rollback(db, company)
+        check_separate_counters(db, company, other)
+        check_max_suffix(db, company, other)
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(os.path.dirname(DB_PATH), ignore_errors=True)
+
+
+def main():
+    test_sequences()
+    print("Document sequences reserve, release and seed as expected")
+
+
+if __name__ == "__main__":
+    main()